@@ -0,0 +1,203 @@
+# Kabul kontrolü (admission control): Sunucunun kaldırabileceğinden fazla soruyu kabul edip herkesi birlikte
+# yavaşlatmak yerine, fazla yükü hızlı ve anlaşılır bir yanıtla (429/503) geri çevirir.
+#   - SessionRateLimiter: Oturum başına token bucket; tek bir kullanıcının sürekli soru göndererek sırayı doldurmasını engeller.
+#   - AdmissionQueue: Aynı anda işlenen soru sayısını sınırlar; fazlası son tarihe (deadline) kadar sırada bekler.
+#     Tahmini bekleme süresi son tarihi aşıyorsa soru hiç sıraya alınmadan reddedilir.
+# Sınırlar süreç (gunicorn worker'ı) başınadır.
+
+# Gerekli kütüphaneleri içe aktar
+import math                         # Bekleme süresi tahminini yukarı yuvarlamak için
+import threading                    # Kilit ve bekleme koşulu (Condition) için
+import time                         # Token yenileme ve son tarih hesapları için
+from collections import OrderedDict # Oturum kovalarını en eski kullanılan önce silinecek şekilde tutmak için
+
+
+class RateLimitedError(Exception):
+    """Oturum soru hızı sınırını aştığında fırlatılır (HTTP 429)."""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after # Tekrar denemeden önce beklenmesi gereken süre (saniye)
+
+
+class OverloadedError(Exception):
+    """Soru son tarihinden önce işlenemeyecekse (sıra dolu veya tahmini bekleme çok uzun) fırlatılır (HTTP 503)."""
+
+    def __init__(self, message, retry_after, reason):
+        super().__init__(message)
+        self.retry_after = retry_after # Tekrar denemeden önce beklenmesi önerilen süre (saniye)
+        self.reason = reason           # "queue_full", "deadline" (tahmini bekleme son tarihi aşıyor) veya "timeout"
+
+
+class SessionRateLimiter:
+    """
+    Oturum başına token bucket: Her oturumun kovasında en fazla `burst` token bulunur ve kova saniyede `rate` token
+    dolar. Her soru bir token harcar; kova boşsa soru reddedilir. Böylece kısa soru patlamalarına izin verilirken
+    uzun süreli aşırı kullanım sınırlanır. En fazla `max_sessions` oturumun kovası tutulur (en eski kullanılan silinir;
+    silinen oturumun kovası yeniden dolu başlar).
+    """
+
+    def __init__(self, rate, burst, max_sessions=10000):
+        """
+        Args:
+            rate (float): Saniyede kovaya eklenen token sayısı (0 veya negatifse sınır yoktur).
+            burst (int): Kovanın kapasitesi (art arda gönderilebilecek en fazla soru).
+            max_sessions (int): Kovası tutulacak en fazla oturum sayısı.
+        """
+        self.rate = float(rate)
+        self.burst = max(1.0, float(burst))
+        self.max_sessions = max(1, int(max_sessions))
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict() # oturum -> (token sayısı, son güncelleme zamanı)
+        self.rejected = 0             # Reddedilen soru sayısı
+
+    def acquire(self, key):
+        """
+        Oturumun kovasından bir token harcar.
+        Args:
+            key (str): Oturum kimliği.
+        Raises:
+            RateLimitedError: Kovada token yoksa (retry_after: bir token dolana kadar geçecek süre).
+        """
+        if self.rate <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            if tokens >= 1.0:
+                tokens -= 1.0
+                allowed = True
+            else:
+                allowed = False
+                self.rejected += 1
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_sessions:
+                self._buckets.popitem(last=False)
+        if not allowed:
+            retry_after = (1.0 - tokens) / self.rate
+            raise RateLimitedError(f"Oturum soru sınırı aşıldı; {retry_after:.1f} saniye sonra tekrar denenebilir.", retry_after)
+
+
+class _Ticket:
+    """Kabul edilmiş bir sorunun işlem yeri. release() birden fazla çağrılabilir; yer sadece bir kez bırakılır."""
+
+    def __init__(self, queue):
+        self._queue = queue
+        self._started = time.monotonic()
+        self._released = False
+
+    def release(self):
+        if self._released:
+            return
+        self._released = True
+        self._queue._release(time.monotonic() - self._started)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+        return False
+
+
+class AdmissionQueue:
+    """
+    Aynı anda işlenen soru sayısını `max_in_flight` ile sınırlayan, son tarihli bekleme sırası.
+    Yer yoksa soru en fazla `max_queue` soruluk sırada, son tarihine kadar bekler. Sıraya girmeden önce bekleme süresi
+    tahmin edilir (önündeki soru sayısı / max_in_flight x ortalama işlem süresi); tahmin son tarihi aşıyorsa soru
+    beklemeden reddedilir. Böylece aşırı yükte kullanıcılar uzun süre bekleyip zaman aşımına uğramak yerine hemen
+    "meşgul" yanıtı alır ve kabul edilen soruların gecikmesi sabit kalır.
+    """
+
+    def __init__(self, max_in_flight, max_queue=32, deadline=10.0, smoothing=0.2):
+        """
+        Args:
+            max_in_flight (int): Aynı anda işlenebilecek en fazla soru.
+            max_queue (int): Yer bekleyebilecek en fazla soru (0: bekleme yok, yer yoksa hemen reddedilir).
+            deadline (float): Bir sorunun varsayılan en fazla bekleme süresi (saniye).
+            smoothing (float): Ortalama işlem süresinde son sorunun ağırlığı (0-1).
+        """
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.max_queue = max(0, int(max_queue))
+        self.deadline = float(deadline)
+        self.smoothing = smoothing
+        self._cond = threading.Condition()
+        self.active = 0                  # Şu anda işlenen soru sayısı
+        self.waiting = 0                 # Şu anda sırada bekleyen soru sayısı
+        self._avg_service = None         # İşlem süresinin üstel hareketli ortalaması (saniye)
+        self.shed = 0                    # Reddedilen soru sayısı
+
+    def estimated_wait(self):
+        """Şu anda gelen bir sorunun tahmini bekleme süresi (saniye); ölçüm yoksa veya boş yer varsa 0."""
+        with self._cond:
+            return self._estimate()
+
+    def has_capacity(self):
+        """Sırada bekleyen soru yoksa ve boş işlem yeri varsa True (isteğe bağlı arka plan işleri için)."""
+        with self._cond:
+            return self.active < self.max_in_flight and not self.waiting
+
+    def _estimate(self):
+        if self.active < self.max_in_flight or self._avg_service is None:
+            return 0.0
+        # Önündeki sorular max_in_flight'lık dalgalar halinde işlenir; bu soru kaçıncı dalgada yer bulur?
+        return math.ceil((self.waiting + 1) / self.max_in_flight) * self._avg_service
+
+    def admit(self, deadline=None):
+        """
+        Soru için bir işlem yeri alır; yer yoksa son tarihine kadar bekler.
+        Dönen nesne `with` ile kullanılabilir veya işlem bitince release() çağrılmalıdır.
+        Args:
+            deadline (float | None): Bu sorunun en fazla bekleme süresi (saniye); None ise varsayılan son tarih.
+        Returns:
+            _Ticket: İşlem yeri.
+        Raises:
+            OverloadedError: Sıra doluysa, tahmini bekleme son tarihi aşıyorsa veya son tarihe kadar yer açılmazsa.
+        """
+        deadline = self.deadline if deadline is None else float(deadline)
+        with self._cond:
+            if self.active < self.max_in_flight and not self.waiting:
+                self.active += 1
+                return _Ticket(self)
+            estimate = self._estimate()
+            if self.waiting >= self.max_queue:
+                self._shed()
+                raise OverloadedError("Bekleme sırası dolu.", self._retry_after(estimate), "queue_full")
+            if estimate > deadline:
+                self._shed()
+                raise OverloadedError(
+                    f"Tahmini bekleme süresi ({estimate:.1f} sn) son tarihi ({deadline:.1f} sn) aşıyor.",
+                    self._retry_after(estimate), "deadline",
+                )
+            expires = time.monotonic() + deadline
+            self.waiting += 1
+            try:
+                while self.active >= self.max_in_flight:
+                    remaining = expires - time.monotonic()
+                    if remaining <= 0:
+                        self._shed()
+                        raise OverloadedError(
+                            f"{deadline:.1f} saniye içinde işlem yeri açılmadı.", self._retry_after(self._estimate()), "timeout",
+                        )
+                    self._cond.wait(remaining)
+                self.active += 1
+            finally:
+                self.waiting -= 1
+        return _Ticket(self)
+
+    def _shed(self):
+        self.shed += 1
+
+    def _retry_after(self, estimate):
+        """İstemciye önerilecek tekrar deneme süresi (saniye): tahmini bekleme, ölçüm yoksa 1 saniye."""
+        return max(1.0, estimate or (self._avg_service or 1.0))
+
+    def _release(self, duration):
+        with self._cond:
+            self.active -= 1
+            if self._avg_service is None:
+                self._avg_service = duration
+            else:
+                self._avg_service = self.smoothing * duration + (1.0 - self.smoothing) * self._avg_service
+            self._cond.notify()
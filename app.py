@@ -3,264 +3,1875 @@ import os                           # İşletim sistemiyle ilgili işlemler içi
 import sys                          # Sistemle ilgili parametreler ve fonksiyonlar için (örn: hata mesajları, programdan çıkış)
 import uuid                         # Benzersiz kimlikler (UUID) oluşturmak için (session ID'leri için)
 from datetime import datetime       # Tarih ve zaman işlemleri için (sohbet zaman damgaları)
-import traceback                    # Hata ayıklama sırasında detaylı hata izi yazdırmak için
+import logging                      # Seviyeli ve yapılandırılmış loglama için
+import json                         # Akış (SSE) olaylarını JSON olarak kodlamak için
+import math                         # Tekrar deneme süresini tam saniyeye yuvarlamak için
+import time                         # Embedding çağrılarının süresini ölçmek için
+import threading                    # Paylaşılan Markdown dönüştürücüsünü kilitlemek için
+import functools                    # İşlenmiş Markdown sonuçlarını önbellekte tutmak için (lru_cache)
+import hmac                         # Toplu yanıt API anahtarını sabit sürede karşılaştırmak için
+import inspect                      # Embedding modelinin toplu sorgu desteğini kontrol etmek için
+import mimetypes                    # Önceden sıkıştırılmış statik dosyaların asıl türünü belirlemek için
+from concurrent.futures import ThreadPoolExecutor # Toplu soru yanıtlamada sınırlı eşzamanlı üretim için
 
-import google.generativeai as genai # Google Generative AI (Gemini) kütüphanesi
 import markdown                     # Metni Markdown formatından HTML'e çevirmek için
 from dotenv import load_dotenv      # .env dosyasındaki ortam değişkenlerini yüklemek için
-from flask import Flask, jsonify, redirect, render_template, request, session, url_for # Web framework'ü Flask ve ilgili modüller
-from langchain_google_genai import GoogleGenerativeAIEmbeddings # LangChain ile Google embedding modeli entegrasyonu
-from langchain_community.vectorstores import Chroma             # LangChain ile Chroma veritabanı entegrasyonu
+from flask import Flask, Response, abort, g, jsonify, redirect, render_template, request, send_file, session, url_for # Web framework'ü Flask ve ilgili modüller
 import shutil                       # Dosya ve klasör işlemleri için (örn: chroma_db silme)
+from werkzeug.security import safe_join # İstenen statik dosya yolunun klasör dışına çıkmamasını sağlamak için
+
+from semantic_cache import SemanticCache # Benzer sorular için LLM'e gitmeden yanıt döndüren anlamsal önbellek
+from vector_index import NumpyVectorIndex, vector_index_exists # Bellek eşlemeli, süreç içi NumPy vektör indeksi
+from quantized_index import QuantizedVectorIndex, load_quantized_meta, quantized_index_exists # Büyük korpuslar için sıkıştırılmış (int8/float16 + IVF) indeks
+from lexical_index import LexicalIndex, lexical_index_exists, load_document_frequencies, reciprocal_rank_fusion # Yerel BM25 indeksi ve sonuç birleştirme
+from game_catalog import collection_name, game_title, load_catalog # Oyun kataloğu (oyun başına veritabanı klasörleri)
+from snapshots import current_snapshot # Sürümlü anlık görüntüler: CURRENT'ın gösterdiği güncel veritabanı
+from game_router import GameRouter # Soruyu ilgili oyuna yönlendiren yerel sınıflandırıcı
+from conversation_store import create_conversation_store # Sohbet geçmişleri için bellek içi veya SQLite deposu
+from chunking import ParentIndex, parents_exist # Bulunan pasajları ait oldukları kural bölümlerine çevirmek için
+from context_builder import pack_context # Parçaları ortak kısımları çıkarıp token bütçesine sığdırmak için
+from prefetch import PrefetchCache  # Kullanıcı yazarken yapılan önceden aramaların oturum başına kısa ömürlü önbelleği
+from admission import AdmissionQueue, OverloadedError, RateLimitedError, SessionRateLimiter # Oturum başına hız sınırı ve son tarihli kabul sırası
+from concurrency import ConcurrencyLimiter, LLMBusyError, ServiceBudget, SingleFlight, normalize_question # Eşzamanlılık sınırı, servis bütçesi ve aynı soruları birleştirme
+from resilience import CircuitBreaker, CircuitOpenError, ResilientCaller, call_with_timeout # Zaman aşımı, tekrar deneme, yedek istek ve devre kesici
+from static_assets import DIST_DIRNAME, VENDOR_ASSETS, build_assets, compress_body, select_encoding # İçerik özetli, önceden sıkıştırılmış statik dosyalar
+from observability import REGISTRY, configure_logging # Arka planda yazılan loglar ve Prometheus formatında metrikler
 
 # ----- Yapılandırma ve Kurulum -----
 
 # Proje ana dizinindeki .env dosyasını bul ve içindeki değişkenleri yükle
 load_dotenv()
-# Yüklenen ortam değişkenlerinden GOOGLE_API_KEY değerini al
+# Loglama: LOG_LEVEL (DEBUG, INFO, WARNING, ERROR) ve LOG_FORMAT (text veya json) ile ayarlanır.
+# Log satırları arka plandaki bir thread tarafından yazılır; istekler stdout/stderr yazımını beklemez.
+configure_logging(level=os.getenv("LOG_LEVEL", "INFO"), fmt=os.getenv("LOG_FORMAT", "text"))
+logger = logging.getLogger("monopoly")
+# Yüklenen ortam değişkenlerinden GOOGLE_API_KEY değerini al (anahtarın varlığı ısınma (warm_up) sırasında kontrol edilir)
 api_key = os.getenv("GOOGLE_API_KEY")
+# Ayarlanırsa Gemini ve embedding istekleri Google yerine bu adrese REST ile gönderilir (örn: yük testinde yerel sahte
+# sunucu: http://127.0.0.1:8089, bkz. benchmarks/gemini_stub.py). Boşsa Google'ın varsayılan adresi kullanılır.
+GEMINI_API_ENDPOINT = os.getenv("GEMINI_API_ENDPOINT", "").rstrip("/")
+
+# Modelin her soruda uyacağı sabit talimatlar. Prompt'a her seferinde eklenmek yerine modelin sistem talimatı
+# (system_instruction) olarak bir kez verilir; istek başına gönderilen prompt sadece alıntılar ve sorudan oluşur.
+# Hangi oyunun sorulduğu prompt'taki alıntı başlığında yazar (örn: "MONOPOLY BİLGİ ALINTILARI").
+SYSTEM_INSTRUCTION = """Sen masa oyunları için bir Yardımcı Asistansın. Görevin, SADECE sana verilen BİLGİ ALINTILARI'nı kullanarak oyuncunun, alıntı başlığında adı geçen oyun hakkında sorduğu soruları yanıtlamaktır. Bu alıntılar hem resmi kuralları hem de oyunla ilgili ek bilgileri içerebilir.
+
+Yanıtlarken UYMAN GEREKEN KURALLAR:
+1.  Cevabın KESİNLİKLE verilen BİLGİ ALINTILARI içinde yer almalıdır.
+2.  Eğer cevap bu alıntılarda yoksa veya alıntılar yetersizse, "Üzgünüm, sağlanan bilgilerde bu soruya net bir cevap bulamadım. Belki kural kitapçığının kendisine bakmak isteyebilirsiniz." şeklinde yanıt ver. ASLA tahmin yürütme veya alıntılar dışında bilgi verme.
+3.  Cevabını net, anlaşılır ve doğrudan sorulan konuyla ilgili ver. Mümkünse adım adım açıkla veya madde imleri kullan.
+4.  Oyun stratejisi verme, sadece bilgi aktarımı yap. Örneğin "Ev kurmak iyi bir stratejidir" yerine "Ev kurmanın kuralları şunlardır..." gibi cevap ver.
+5.  Eğer alıntılarda birden fazla ilgili bilgi varsa, bunları mantıklı bir sıra ile birleştirerek kapsamlı bir yanıt oluştur.
+6.  "<Oyunun adı> kurallarına göre..." (örn: "Monopoly kurallarına göre..."), "Sağlanan bilgilere göre..." gibi ifadelerle başla. Yanıtının sonunda alıntıların dışına çıktığını belirten bir ifade KULLANMA."""
 
-# API anahtarı yüklenememişse hata ver ve programı durdur
-if not api_key:
-    print("Hata: GOOGLE_API_KEY ortam değişkeni bulunamadı.", file=sys.stderr)
-    print("Lütfen proje ana dizininde '.env' dosyasını oluşturup içine 'GOOGLE_API_KEY=...' satırını eklediğinizden emin olun.", file=sys.stderr)
-    sys.exit(1)
-
-# Google Generative AI kütüphanesini alınan API anahtarıyla yapılandır
-try:
-    genai.configure(api_key=api_key)
-    print("Google API Anahtarı başarıyla yüklendi ve yapılandırıldı.")
-except Exception as e:
-    # Yapılandırma başarısız olursa hata ver ve programı durdur
-    print(f"Hata: Google API yapılandırılamadı: {e}", file=sys.stderr)
-    sys.exit(1)
-
-# Kullanılacak Gemini modelini (LLM) yükle ve yapılandır
-try:
+def create_model():
+    """
+    Google Generative AI kütüphanesini API anahtarıyla yapılandırır ve kullanılacak Gemini modelini (LLM) oluşturur.
+    Kütüphane ilk kez burada import edilir; böylece modülün import edilmesi (ve gunicorn worker'ının açılması) hızlı kalır.
+    Returns:
+        genai.GenerativeModel: Yapılandırılmış model.
+    Raises:
+        RuntimeError: API anahtarı yoksa.
+    """
+    import google.generativeai as genai # Google Generative AI (Gemini) kütüphanesi
+
+    # API anahtarı yüklenememişse hata ver
+    if not api_key:
+        raise RuntimeError(
+            "GOOGLE_API_KEY ortam değişkeni bulunamadı. Lütfen proje ana dizininde '.env' dosyasını oluşturup "
+            "içine 'GOOGLE_API_KEY=...' satırını eklediğinizden emin olun."
+        )
+    # Google Generative AI kütüphanesini alınan API anahtarıyla yapılandır
+    if GEMINI_API_ENDPOINT:
+        genai.configure(api_key=api_key, transport="rest", client_options={"api_endpoint": GEMINI_API_ENDPOINT})
+        logger.info(f"Gemini istekleri '{GEMINI_API_ENDPOINT}' adresine gönderilecek.")
+    else:
+        genai.configure(api_key=api_key)
     # Model adı: 'gemini-1.5-flash' gibi daha yeni modeller de denenebilir.
     # generation_config: Modelin cevap üretme davranışını ayarlar.
     # temperature: Cevapların ne kadar rastgele/yaratıcı olacağını belirler (0=deterministik, 1=yaratıcı). Kural açıklamaları için düşük tutulur.
-    model = genai.GenerativeModel(
+    # system_instruction: Sabit talimatlar; her istekte prompt metni olarak tekrar gönderilmez
+    gemini_model = genai.GenerativeModel(
         "gemini-2.0-flash",
-        generation_config=genai.types.GenerationConfig(temperature=0.4) # Monopoly için 0.4 ayarlandı
+        generation_config=genai.types.GenerationConfig(temperature=0.4), # Kural açıklamaları için 0.4 ayarlandı
+        system_instruction=SYSTEM_INSTRUCTION,
     )
-    print("Google Gemini modeli ('gemini-2.0-flash', temperature=0.4) başarıyla yüklendi.")
-except Exception as e:
-    # Model yüklenemezse hata ver ve programı durdur
-    print(f"Hata: Google Gemini modeli yüklenemedi: {e}", file=sys.stderr)
-    sys.exit(1)
+    logger.info("Google Gemini modeli ('gemini-2.0-flash', temperature=0.4) başarıyla yüklendi.")
+    return gemini_model
+
+def create_embedding_function():
+    """
+    Sorguları vektöre çevirecek Google embedding modelini (text-embedding-004) oluşturur.
+    Returns:
+        GoogleGenerativeAIEmbeddings: LangChain embedding modeli.
+    """
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings # LangChain ile Google embedding modeli entegrasyonu
+
+    embedding_function = GoogleGenerativeAIEmbeddings(
+        model="models/text-embedding-004", google_api_key=api_key
+    )
+    if GEMINI_API_ENDPOINT:
+        # langchain-google-genai transport ayarını istemciye iletmediği için REST istemcisi burada kurulur
+        from google.ai.generativelanguage_v1beta import GenerativeServiceClient
+
+        embedding_function.client = GenerativeServiceClient(
+            transport="rest", client_options={"api_endpoint": GEMINI_API_ENDPOINT, "api_key": api_key},
+        )
+    logger.info("Google Embedding modeli başarıyla ayarlandı.")
+    return embedding_function
 
 # ----- Veritabanı Fonksiyonları -----
 
-def load_database():
+# Veritabanının kaydedildiği klasör yolu (ortam değişkeniyle değiştirilebilir, örn: benchmark'lar için sentetik veritabanı).
+# create_database.py her kurulumu bu klasörün altında yeni bir anlık görüntüye yazar; kullanılan anlık görüntü
+# CURRENT dosyasından okunur (bkz. snapshots.py). CURRENT yoksa klasörün kendisi veritabanıdır.
+DB_PATH = os.getenv("CHROMA_DB_PATH", "./chroma_db")
+# create_database.py her başarılı kurulumdan sonra bu dosyaya yeni bir sürüm kimliği yazar
+INDEX_VERSION_FILE = "index_version"
+# Arama için kullanılacak vektör deposu: "auto" (büyük korpuslarda (IVF kümeli) sıkıştırılmış indeks, yoksa NumPy
+# indeksi, o da yoksa Chroma), "quantized", "numpy" veya "chroma"
+VECTOR_INDEX = os.getenv("VECTOR_INDEX", "auto").lower()
+# Sıkıştırılmış indekste aramada bakılacak IVF küme sayısı (0: indeksi oluştururken seçilen değer); arttıkça isabet artar, hız düşer
+QUANTIZED_NPROBE = int(os.getenv("QUANTIZED_NPROBE", "0"))
+# Arama modu: "hybrid" (BM25 + vektör, RRF ile birleştirilir), "vector" (sadece vektör) veya "lexical" (sadece BM25, ağ çağrısı yok)
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid").lower()
+
+def get_index_version(db_path=DB_PATH):
     """
-    Önceden 'create_database.py' ile oluşturulmuş olan Chroma vektör veritabanını yükler.
-    Veritabanı bulunamazsa veya yüklenirken bir hata oluşursa programı durdurur.
+    Vektör veritabanının güncel sürüm kimliğini döndürür.
+    'create_database.py' veritabanını her yeniden oluşturduğunda bu değer değişir;
+    anlamsal önbellek bu sayede eski veritabanına ait yanıtları geçersiz sayar.
     Returns:
-        Chroma: Yüklenmiş LangChain Chroma vektör veritabanı nesnesi.
+        str | None: Sürüm kimliği (dosya yoksa sqlite dosyasının değiştirilme zamanı, o da yoksa None).
     """
-    print("Monopoly veritabanı yükleniyor...")
-    # Veritabanını yüklemek için de embedding fonksiyonuna ihtiyaç var
+    version_path = os.path.join(db_path, INDEX_VERSION_FILE)
+    try:
+        with open(version_path, "r", encoding="utf-8") as f:
+            return f.read().strip()
+    except OSError:
+        pass
     try:
-        # Google'ın text-embedding-004 modelini LangChain entegrasyonu ile kullan
-        embedding_function = GoogleGenerativeAIEmbeddings(
-            model="models/text-embedding-004", google_api_key=api_key
+        # Eski kurulumlarda sürüm dosyası yoktur; sqlite dosyasının değişme zamanını kullan
+        return str(os.stat(os.path.join(db_path, "chroma.sqlite3")).st_mtime_ns)
+    except OSError:
+        return None
+
+def check_database(db_path=DB_PATH):
+    """
+    Veritabanı klasöründeki oyun kataloğunu okur ve her oyunun sqlite dosyasının varlığını kontrol eder.
+    Katalog olmayan eski kurulumlarda klasörün kendisi tek bir oyun (monopoly) sayılır.
+    Returns:
+        dict[str, dict]: Oyun kimliği -> katalog kaydı (name, collection, path ...).
+    Raises:
+        RuntimeError: Veritabanı bulunamazsa.
+    """
+    try:
+        catalog = load_catalog(db_path) if os.path.isdir(db_path) else {}
+    except ValueError as e:
+        raise RuntimeError(f"{e}. Lütfen 'python create_database.py' komutunu tekrar çalıştırın.") from e
+    missing = [slug for slug, info in catalog.items() if not os.path.exists(os.path.join(info["path"], "chroma.sqlite3"))]
+    if not catalog or missing:
+        raise RuntimeError(
+            f"Veritabanı '{db_path}' klasöründe bulunamadı veya geçersiz"
+            + (f" (eksik oyunlar: {', '.join(missing)})" if missing else "")
+            + ". Lütfen önce 'python create_database.py' komutunu çalıştırarak veritabanını oluşturun."
         )
-        print("Google Embedding modeli başarıyla ayarlandı.")
-    except Exception as e:
-        # Embedding modeli ayarlanamazsa hata ver ve durdur
-        print(f"Hata: Google Embedding modeli ayarlanamadı: {e}", file=sys.stderr)
-        sys.exit(1)
+    return catalog
 
-    # Veritabanının kaydedildiği klasör yolu
-    db_path = "./chroma_db"
-    # Veritabanı içindeki koleksiyon adı (create_database.py ile aynı olmalı!)
-    collection_name = "gaih_monopoly_comprehensive"
+def use_quantized_index(db_path):
+    """
+    "auto" modunda sıkıştırılmış indeksin kullanılıp kullanılmayacağına karar verir: Küçük korpuslarda (IVF kümesi yok)
+    float32 matrisin tamamını taramak zaten hızlıdır ve kodların dönüştürülmesi aramayı yavaşlatır; NumPy indeksi seçilir.
+    """
+    if VECTOR_INDEX == "quantized":
+        return True
+    try:
+        return bool(load_quantized_meta(db_path).get("nlist"))
+    except (OSError, ValueError):
+        return False
 
-    # Veritabanı klasörünün ve içindeki önemli bir dosyanın (örn: sqlite dosyası) varlığını kontrol et
-    db_file_path = os.path.join(db_path, "chroma.sqlite3")
-    if not os.path.exists(db_path) or not os.path.exists(db_file_path):
-        # Veritabanı bulunamazsa kullanıcıyı bilgilendir ve programı durdur
-        print(f"Hata: Veritabanı '{db_path}' klasöründe bulunamadı veya geçersiz.", file=sys.stderr)
-        print("Lütfen önce 'python create_database.py' komutunu çalıştırarak veritabanını oluşturun.", file=sys.stderr)
-        sys.exit(1) # Veritabanı olmadan uygulama başlayamaz
+def load_vector_index(db_path=DB_PATH, embedding_function=None):
+    """
+    Klasörde dışa aktarılmış bir sıkıştırılmış indeks (vectors_q.*) veya NumPy indeksi (vectors.npy + documents.json)
+    varsa onu bellek eşlemeli olarak açar. Bu indeksler sadece okunan dosyalardan oluşur ve ağ bağlantısı tutmaz;
+    bu yüzden gunicorn --preload ile ana süreçte yüklenip fork edilen worker'larla paylaşılabilir
+    (embedding modeli daha sonra worker'da eklenir).
+    Args:
+        db_path (str): Veritabanı klasörü.
+        embedding_function (Embeddings | None): Sorguları vektöre çevirecek model (sonradan da atanabilir).
+    Returns:
+        NumpyVectorIndex | None: Yüklenen indeks; kullanılmayacaksa veya yüklenemezse None (Chroma kullanılır).
+    """
+    if VECTOR_INDEX in ("auto", "quantized") and quantized_index_exists(db_path) and use_quantized_index(db_path):
+        try:
+            vector_index = QuantizedVectorIndex(db_path, embedding_function, nprobe=QUANTIZED_NPROBE or None)
+            meta = vector_index.meta
+            logger.info(
+                f"Sıkıştırılmış vektör indeksi yüklendi ({len(vector_index)} parça, {meta.get('precision')}, "
+                f"IVF kümeleri: {meta.get('nlist') or 'yok'}, recall@10: {meta.get('recall_at_10', '?')}, "
+                f"bellekte {meta.get('resident_bytes', 0) / 2**20:.1f} MB / float32 {meta.get('float32_bytes', 0) / 2**20:.1f} MB)."
+            )
+            return vector_index
+        except Exception as e:
+            # İndeks bozuksa veya güncel değilse NumPy indeksiyle (o da yoksa Chroma ile) devam et
+            logger.warning(f"Sıkıştırılmış vektör indeksi yüklenemedi: {e}")
+    elif VECTOR_INDEX == "quantized":
+        logger.warning(f"'{db_path}' klasöründe sıkıştırılmış indeks yok. 'python create_database.py' ile oluşturabilirsiniz.")
+    if VECTOR_INDEX in ("auto", "numpy", "quantized") and vector_index_exists(db_path):
+        try:
+            vector_index = NumpyVectorIndex(db_path, embedding_function)
+            logger.info(f"NumPy vektör indeksi bellek eşlemeli olarak yüklendi ({len(vector_index)} parça).")
+            return vector_index
+        except Exception as e:
+            # İndeks bozuksa Chroma ile devam et
+            logger.warning(f"NumPy vektör indeksi yüklenemedi, Chroma kullanılacak: {e}")
+    elif VECTOR_INDEX == "numpy":
+        logger.warning(f"'{db_path}' klasöründe NumPy indeksi yok, Chroma kullanılacak. 'python create_database.py' ile oluşturabilirsiniz.")
+    return None
+
+def open_chroma(embedding_function, db_path=DB_PATH, collection_name=collection_name("monopoly")):
+    """
+    Önceden 'create_database.py' ile oluşturulmuş Chroma koleksiyonunu açar (NumPy indeksi yoksa kullanılır).
+    chromadb kütüphanesi ağır olduğu için sadece gerektiğinde import edilir.
+    Args:
+        embedding_function (Embeddings): Sorguları vektöre çevirecek model.
+        db_path (str): Oyunun veritabanı klasörü.
+        collection_name (str): Oyunun koleksiyon adı (katalogdaki, create_database.py ile aynı).
+    Returns:
+        Chroma: Aramada kullanılacak vektör deposu.
+    Raises:
+        RuntimeError: Koleksiyon açılamazsa.
+    """
+    from langchain_community.vectorstores import Chroma # LangChain ile Chroma veritabanı entegrasyonu
 
-    # Veritabanını Chroma kütüphanesiyle yüklemeyi dene
     try:
-        print(f"Mevcut veritabanı '{db_path}' klasöründen '{collection_name}' koleksiyonu yükleniyor...")
+        logger.info(f"Mevcut veritabanı '{db_path}' klasöründen '{collection_name}' koleksiyonu yükleniyor...")
         # Chroma'ya kalıcı depolama yolunu, embedding fonksiyonunu ve koleksiyon adını vererek yükle
-        vectordb = Chroma(
+        chroma = Chroma(
             persist_directory=db_path,
             embedding_function=embedding_function,
             collection_name=collection_name,
         )
-        print("Veritabanı başarıyla yüklendi.")
-        # Yüklenen veritabanı nesnesini döndür
-        return vectordb
+        logger.info("Veritabanı başarıyla yüklendi.")
+        return chroma
     except Exception as e:
         # Yükleme sırasında bir hata oluşursa (örn: bozuk dosya, sürüm uyumsuzluğu)
-        print(f"Hata: Vektör veritabanı yüklenemedi: {e}", file=sys.stderr)
-        print("Veritabanı dosyaları bozulmuş olabilir veya 'create_database.py' ile uyumsuzluk olabilir.", file=sys.stderr)
-        print(f"'{db_path}' klasörünü silip 'python create_database.py' komutunu tekrar çalıştırmayı deneyin.", file=sys.stderr)
-        traceback.print_exc() # Hatanın tam kaynağını logla
-        sys.exit(1) # Yükleme başarısızsa uygulama durmalı
+        logger.exception(f"Vektör veritabanı yüklenemedi: {e}") # Hatanın tam kaynağını logla
+        raise RuntimeError(
+            "Veritabanı dosyaları bozulmuş olabilir veya 'create_database.py' ile uyumsuzluk olabilir. "
+            f"'{db_path}' klasörünü silip 'python create_database.py' komutunu tekrar çalıştırmayı deneyin."
+        ) from e
+
+def load_lexical_index(vectordb, db_path=DB_PATH):
+    """
+    'create_database.py' ile oluşturulmuş BM25 indeksini (bm25.json) yükler.
+    Vektör deposu NumpyVectorIndex ise belge listesi onunla paylaşılır (bellekte ikinci kopya tutulmaz).
+    Args:
+        vectordb (NumpyVectorIndex | Chroma): Yüklenmiş vektör deposu.
+        db_path (str): Veritabanı klasörü.
+    Returns:
+        LexicalIndex | None: Yüklenen indeks; dosya yoksa veya yüklenemezse None (sadece vektör araması yapılır).
+    """
+    if RETRIEVAL_MODE == "vector":
+        return None
+    if not lexical_index_exists(db_path):
+        logger.warning(f"'{db_path}' klasöründe BM25 indeksi yok, sadece vektör araması yapılacak. 'python create_database.py' ile oluşturabilirsiniz.")
+        return None
+    try:
+        index = LexicalIndex(db_path, documents=getattr(vectordb, "documents", None), ids=getattr(vectordb, "ids", None))
+        logger.info(f"BM25 (anahtar kelime) indeksi yüklendi ({len(index)} parça).")
+        return index
+    except Exception as e:
+        logger.warning(f"BM25 indeksi yüklenemedi, sadece vektör araması yapılacak: {e}")
+        return None
+
+def load_parent_index(db_path=DB_PATH):
+    """
+    'create_database.py' ile yazılmış kural bölümlerini (parents.json) yükler.
+    Args:
+        db_path (str): Oyunun veritabanı klasörü.
+    Returns:
+        ParentIndex | None: Yüklenen eşleme; dosya yoksa (eski sabit boyutlu parçalama), kapalıysa veya yüklenemezse None.
+    """
+    if PARENT_SECTIONS <= 0 or not parents_exist(db_path):
+        return None
+    try:
+        index = ParentIndex(db_path)
+        logger.info(f"Kural bölümleri yüklendi ({len(index)} bölüm).")
+        return index
+    except Exception as e:
+        logger.warning(f"Kural bölümleri yüklenemedi, pasajlar olduğu gibi gönderilecek: {e}")
+        return None
+
+# ----- Anlamsal Önbellek -----
+
+# Aynı kural sorusu farklı kelimelerle tekrar tekrar sorulduğu için ("hapisten nasıl çıkarım?" / "hapisten çıkma kuralı"),
+# sorunun embedding vektörü daha önce yanıtlanmış sorularla karşılaştırılır. Yeterince benzer bir soru varsa
+# saklanan yanıt LLM'e hiç gidilmeden döndürülür. Ayarlar ortam değişkenleriyle değiştirilebilir.
+# Her oyunun kendi önbelleği vardır (farklı oyunlardaki benzer sorular birbirinin yanıtını almaz).
+def create_semantic_cache(db_path=DB_PATH):
+    """
+    Bir oyun için anlamsal önbellek oluşturur; oyunun veritabanı yeniden oluşturulunca önbellek otomatik temizlenir.
+    Args:
+        db_path (str): Oyunun veritabanı klasörü (sürüm kimliği buradan okunur).
+    Returns:
+        SemanticCache: Boş önbellek.
+    """
+    return SemanticCache(
+        similarity_threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92")), # İsabet için en düşük cosine benzerliği
+        max_entries=int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "512")),          # Oyun başına en fazla kayıt sayısı (LRU ile silinir)
+        ttl_seconds=float(os.getenv("SEMANTIC_CACHE_TTL", "86400")),              # Kayıtların geçerlilik süresi (saniye)
+        version_fn=lambda: get_index_version(db_path), # Oyunun veritabanı yeniden oluşturulunca önbellek temizlenir
+    )
+
+# ----- Oyunlar (Veritabanı Parçaları) -----
+
+class GameShard:
+    """
+    Tek bir oyunun arama verileri: vektör deposu, BM25 indeksi ve anlamsal önbellek.
+    Her oyunun kendi klasörü ve sürümü vardır; bir soru sadece yönlendirildiği oyunun verilerinde aranır
+    ve bir oyun yeniden indekslendiğinde sadece onun önbelleği temizlenir.
+    """
+
+    def __init__(self, slug, name, db_path, collection):
+        self.slug = slug                 # Oyun kimliği (örn: "monopoly")
+        self.name = name                 # Ekranda ve prompt'ta kullanılan ad (örn: "Monopoly")
+        self.db_path = db_path           # Oyunun veritabanı klasörü
+        self.collection = collection     # Oyunun Chroma koleksiyon adı
+        self.vectordb = None             # Vektör deposu (NumpyVectorIndex veya Chroma)
+        self.lexical_index = None        # BM25 indeksi (yoksa None)
+        self.parents = None              # Pasaj -> kural bölümü eşlemesi (ParentIndex; eski indekslerde None)
+        self.semantic_cache = create_semantic_cache(db_path)
+
+    def __repr__(self):
+        return f"GameShard({self.slug!r})"
+
+def load_game_shards(db_path=DB_PATH):
+    """
+    Katalogdaki her oyunun sadece okunan indekslerini (NumPy vektör indeksi ve BM25) yükler.
+    Args:
+        db_path (str): Katalogun bulunduğu klasör (anlık görüntü klasörü veya eski düzende veritabanı klasörü).
+    Returns:
+        dict[str, GameShard]: Oyun kimliği -> oyunun arama verileri.
+    Raises:
+        RuntimeError: Veritabanı bulunamazsa.
+    """
+    loaded = {}
+    for slug, info in check_database(db_path).items():
+        shard = GameShard(slug, info.get("name") or game_title(slug), info["path"], info.get("collection") or collection_name(slug))
+        shard.vectordb = load_vector_index(shard.db_path) # Embedding modeli warm_up'ta eklenir
+        shard.lexical_index = load_lexical_index(shard.vectordb, shard.db_path) # Yoksa None
+        shard.parents = load_parent_index(shard.db_path) # Yoksa None
+        loaded[slug] = shard
+    logger.info("Oyunlar yüklendi: %s", ", ".join(loaded))
+    return loaded
+
+def open_vector_stores(game_shards, embedding_function):
+    """
+    Oyunların vektör depolarına ortak embedding istemcisini bağlar; NumPy indeksi olmayan oyunlar için Chroma'yı açar.
+    Args:
+        game_shards (dict[str, GameShard]): load_game_shards ile yüklenmiş oyunlar.
+        embedding_function (Embeddings): Sorguları vektöre çevirecek model.
+    Raises:
+        RuntimeError: Bir oyunun Chroma koleksiyonu açılamazsa.
+    """
+    for shard in game_shards.values():
+        if shard.vectordb is None:
+            shard.vectordb = open_chroma(embedding_function, shard.db_path, shard.collection)
+        else:
+            shard.vectordb.embeddings = embedding_function
+
+def prefault_vector_indexes(game_shards):
+    """
+    Bellek eşlemeli vektör indekslerinde bir deneme araması yapar; böylece yeni yüklenen bir anlık görüntüye
+    geçildiğinde ilk kullanıcı soruları matrisin diskten okunmasını beklemez. Ağ çağrısı yapmaz (Chroma atlanır).
+    """
+    for shard in game_shards.values():
+        vectordb = shard.vectordb
+        if isinstance(vectordb, NumpyVectorIndex) and len(vectordb):
+            vectordb.similarity_search_by_vector(vectordb.vectors[0], k=1)
+
+def create_game_router(game_shards):
+    """
+    Oyunların BM25 indekslerindeki terim sayılarından soru yönlendiricisini kurar.
+    BM25 indeksi yüklenmemiş oyunlar (örn: RETRIEVAL_MODE=vector) için sayılar bm25.json'dan okunur;
+    o da yoksa oyun sadece adı soruda geçtiğinde seçilir.
+    Args:
+        game_shards (dict[str, GameShard]): Yüklenmiş oyunlar.
+    Returns:
+        GameRouter: Yönlendirici.
+    """
+    term_counts, chunk_counts = {}, {}
+    for slug, shard in game_shards.items():
+        if shard.lexical_index is not None:
+            term_counts[slug] = shard.lexical_index.document_frequencies()
+            chunk_counts[slug] = len(shard.lexical_index)
+        elif lexical_index_exists(shard.db_path):
+            chunk_counts[slug], term_counts[slug] = load_document_frequencies(shard.db_path)
+        else:
+            chunk_counts[slug], term_counts[slug] = 0, {}
+    return GameRouter(
+        term_counts,
+        chunk_counts,
+        names={slug: shard.name for slug, shard in game_shards.items()},
+        min_confidence=GAME_ROUTER_MIN_CONFIDENCE,
+    )
+
+# Sınıflandırıcının bir oyunu seçmesi için gereken en düşük olasılık; altında kalan sorular sohbetin son oyununa gider
+GAME_ROUTER_MIN_CONFIDENCE = float(os.getenv("GAME_ROUTER_MIN_CONFIDENCE", "0.6"))
+# Soru hiçbir oyuna yönlendirilemezse ve sohbette önceki bir oyun yoksa kullanılacak oyun (boşsa alfabetik ilk oyun)
+DEFAULT_GAME = os.getenv("DEFAULT_GAME", "").strip().lower()
+
+# ----- Eşzamanlılık Ayarları -----
+
+# Uygulama gunicorn'un thread'li worker'larıyla (gthread) çalışır; bir worker aynı anda birden fazla isteği karşılar.
+# Aynı anda Gemini'ye gidebilecek çağrı sayısı sınırlanır, boş yer bekleme süresi aşılırsa kullanıcıya "meşgul" yanıtı verilir.
+llm_limiter = ConcurrencyLimiter(
+    max_concurrent=int(os.getenv("MAX_CONCURRENT_LLM_CALLS", "8")),   # Worker başına aynı anda en fazla LLM çağrısı
+    acquire_timeout=float(os.getenv("LLM_SLOT_TIMEOUT", "30")),       # Boş yer için en fazla bekleme süresi (saniye)
+)
+# Embedding servisi yavaşladığında veya dakikalık bütçe dolduğunda, BM25 indeksi varsa soru ağ çağrısı yapılmadan yanıtlanır
+embedding_budget = ServiceBudget(
+    max_calls_per_minute=int(os.getenv("EMBEDDING_CALLS_PER_MINUTE", "0")),    # Dakikalık embedding çağrısı bütçesi (0 = sınırsız)
+    slow_threshold=float(os.getenv("EMBEDDING_SLOW_THRESHOLD", "2.0")),        # Ortalama gecikme bu değeri (saniye) aşarsa servis yavaş sayılır
+    cooldown_seconds=float(os.getenv("EMBEDDING_COOLDOWN", "30")),             # Yavaşlık/hata sonrası sadece BM25 kullanılacak süre (saniye)
+)
+# ----- Dayanıklılık (Gemini ve embedding çağrıları) -----
+
+# Her çağrının bir son tarihi vardır; geçici hatalar (kota, ağ, 5xx, zaman aşımı) rastgele artan beklemeyle tekrar denenir.
+# Çağrı gözlenen gecikme yüzdeliğini (varsayılan p95) aşınca aynı isteğin bir kopyası gönderilir ve önce biten kullanılır
+# (UPSTREAM_HEDGE_QUANTILE=0 ile kapatılır). Servis art arda hata verirse devre kesici açılır ve bir süre hiç çağrılmaz:
+# embedding yerine BM25 kullanılır, Gemini yerine önbellekteki yakın bir yanıt veya ilgili kitapçık alıntıları gösterilir.
+UPSTREAM_HEDGE_QUANTILE = float(os.getenv("UPSTREAM_HEDGE_QUANTILE", "95")) or None
+# Gemini: tek denemenin ve çağrının tamamının en fazla süresi (saniye), deneme sayısı
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+LLM_DEADLINE = float(os.getenv("LLM_DEADLINE", "45"))
+LLM_MAX_ATTEMPTS = int(os.getenv("LLM_MAX_ATTEMPTS", "2"))
+# Akışta ilk parçadan sonra iki parça arasında en fazla bekleme süresi (saniye); aşılırsa yanıt yarıda kesilir
+LLM_STREAM_CHUNK_TIMEOUT = float(os.getenv("LLM_STREAM_CHUNK_TIMEOUT", "20"))
+# Embedding: tek sorunun vektöre çevrilmesi kısa sürmelidir; aşılırsa soru BM25 ile aranır
+EMBEDDING_TIMEOUT = float(os.getenv("EMBEDDING_TIMEOUT", "3"))
+EMBEDDING_DEADLINE = float(os.getenv("EMBEDDING_DEADLINE", "5"))
+# Devre kesici: art arda bu kadar geçici hatada devre açılır ve CIRCUIT_RESET_SECONDS boyunca servis çağrılmaz
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RESET_SECONDS = float(os.getenv("CIRCUIT_RESET_SECONDS", "30"))
+# Gemini kullanılamadığında önbellekte aranacak "yakın" sorunun en düşük benzerliği (normal eşikten düşüktür)
+DEGRADED_CACHE_THRESHOLD = float(os.getenv("DEGRADED_CACHE_THRESHOLD", "0.85"))
+
+def _record_upstream_event(service, event):
+    UPSTREAM_EVENTS.inc(service=service, event=event)
+
+llm_breaker = CircuitBreaker(CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_SECONDS)
+embedding_breaker = CircuitBreaker(CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_SECONDS)
+# Akışlı ve akışsız Gemini çağrıları aynı devre kesiciyi paylaşır; gecikmeleri farklı olduğu için yüzdelikleri ayrı tutulur
+# (akışta süre ilk parçaya kadar ölçülür)
+llm_caller = ResilientCaller(
+    "gemini", attempt_timeout=LLM_TIMEOUT, deadline=LLM_DEADLINE, max_attempts=LLM_MAX_ATTEMPTS,
+    hedge_quantile=UPSTREAM_HEDGE_QUANTILE, breaker=llm_breaker, on_event=_record_upstream_event,
+)
+llm_stream_caller = ResilientCaller(
+    "gemini_stream", attempt_timeout=LLM_TIMEOUT, deadline=LLM_DEADLINE, max_attempts=LLM_MAX_ATTEMPTS,
+    hedge_quantile=UPSTREAM_HEDGE_QUANTILE, breaker=llm_breaker, on_event=_record_upstream_event,
+)
+embedding_caller = ResilientCaller(
+    "embedding", attempt_timeout=EMBEDDING_TIMEOUT, deadline=EMBEDDING_DEADLINE, max_attempts=2,
+    backoff_base=0.2, backoff_max=1.0,
+    hedge_quantile=UPSTREAM_HEDGE_QUANTILE, breaker=embedding_breaker, on_event=_record_upstream_event,
+)
+# Toplu embedding çağrısı (yüzlerce soru) için tek denemenin en fazla süresi (saniye)
+BATCH_EMBEDDING_TIMEOUT = float(os.getenv("BATCH_EMBEDDING_TIMEOUT", "120"))
+# Gemini yanıt veremediğinde gösterilen yedek yanıtların başlıkları
+DEGRADED_CACHE_NOTE = "*Asistan şu anda yanıt üretemiyor; benzer bir sorunun önceki yanıtı gösteriliyor.*\n\n"
+DEGRADED_EXCERPTS_NOTE = "*Asistan şu anda yanıt üretemiyor; kural kitapçığındaki ilgili bölümler aşağıdadır.*\n\n"
+
+# Aynı (normalleştirilmiş) soru zaten yanıtlanıyorsa yeni istekler o çağrının sonucunu bekler
+inflight_questions = SingleFlight()
+# Takipçi isteklerin lider çağrıyı en fazla bekleme süresi (saniye)
+COALESCE_WAIT_TIMEOUT = float(os.getenv("COALESCE_WAIT_TIMEOUT", "120"))
+# LLM çağrı sınırı dolduğunda kullanıcıya gösterilecek mesaj
+BUSY_MESSAGE = "Şu anda çok sayıda soru yanıtlanıyor. Lütfen birkaç saniye sonra tekrar deneyin."
+
+# ----- Kabul Kontrolü (aşırı yükte soruları hızlıca geri çevirme) -----
+
+# Oturum başına soru hızı: kovada en fazla SESSION_BURST soru birikir ve kova dakikada SESSION_RATE_PER_MINUTE soru dolar
+# (0: sınırsız). Sınırı aşan soruya 429 döner; böylece tek bir kullanıcı sırayı dolduramaz.
+session_limiter = SessionRateLimiter(
+    rate=float(os.getenv("SESSION_RATE_PER_MINUTE", "20")) / 60.0,
+    burst=int(os.getenv("SESSION_BURST", "5")),
+)
+# Aynı anda işlenen soru sayısı sınırlıdır; fazlası ADMISSION_DEADLINE saniyeye kadar sırada bekler. Sıra doluysa veya
+# tahmini bekleme son tarihi aşıyorsa soru sohbete eklenmeden hemen 503 ile reddedilir (bekleyip zaman aşımına uğramak yerine).
+admission_queue = AdmissionQueue(
+    max_in_flight=int(os.getenv("MAX_INFLIGHT_QUESTIONS", os.getenv("MAX_CONCURRENT_LLM_CALLS", "8"))),  # Worker başına aynı anda işlenen en fazla soru
+    max_queue=int(os.getenv("ADMISSION_QUEUE_SIZE", "32")),        # Sırada bekleyebilecek en fazla soru
+    deadline=float(os.getenv("ADMISSION_DEADLINE", "10")),         # Bir sorunun sırada en fazla bekleme süresi (saniye)
+)
+# Reddedilen sorularda kullanıcıya gösterilecek mesajlar
+RATE_LIMITED_MESSAGE = "Çok hızlı soru gönderiyorsunuz. Lütfen {seconds} saniye sonra tekrar deneyin."
+OVERLOADED_MESSAGE = "Asistan şu anda çok yoğun. Lütfen {seconds} saniye sonra tekrar deneyin."
+
+# ----- Önceden Arama (kullanıcı yazarken) -----
+
+# Sayfa, kullanıcı yazmayı kısa bir süre bıraktığında yarım soruyu /prefetch'e gönderir; soru vektöre çevrilip ilgili
+# bölümler bulunur ve oturum başına PREFETCH_TTL saniye saklanır. Asıl soru önceden arananla aynıysa veya kelimelerinin
+# en az PREFETCH_MIN_OVERLAP oranı önceden aranan soruda varsa embedding ve arama atlanır (PREFETCH_ENABLED=0 ile kapatılır).
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "1") != "0"
+prefetch_cache = PrefetchCache(
+    ttl_seconds=float(os.getenv("PREFETCH_TTL", "30")),
+    min_overlap=float(os.getenv("PREFETCH_MIN_OVERLAP", "0.8")),
+)
+# Önceden arama isteğe bağlıdır ve asıl sorularla yarışmamalıdır: oturum başına ayrı bir hız sınırı vardır, worker başına
+# aynı anda en fazla PREFETCH_MAX_CONCURRENT arama yapılır ve kabul sırasında bekleyen soru varsa veya embedding servisi
+# yavaş/hatalıysa hiç yapılmaz.
+prefetch_limiter = SessionRateLimiter(
+    rate=float(os.getenv("PREFETCH_RATE_PER_MINUTE", "30")) / 60.0,
+    burst=int(os.getenv("PREFETCH_BURST", "3")),
+)
+PREFETCH_MAX_CONCURRENT = int(os.getenv("PREFETCH_MAX_CONCURRENT", "2"))
+_prefetch_slots = threading.BoundedSemaphore(max(1, PREFETCH_MAX_CONCURRENT))
+# Bundan kısa (normalleştirilmiş) yarım sorular için önceden arama yapılmaz
+PREFETCH_MIN_CHARS = int(os.getenv("PREFETCH_MIN_CHARS", "8"))
+
+# ----- Arama Ayarları -----
+
+# Aranacak parça (pasaj) sayısı ve MMR'ın aday olarak çekeceği parça sayısı (/metrics'teki gecikme ve bağlam
+# boyutu dağılımlarına bakılarak ayarlanabilir)
+TOP_K = int(os.getenv("RAG_TOP_K", "5"))
+FETCH_K = int(os.getenv("RAG_FETCH_K", "15"))
+# Bulunan pasajlar ait oldukları kural bölümlerine çevrilir (aynı bölümden gelenler bir kez); prompt'a en fazla bu
+# kadar bölüm eklenir (0: bölümlere çevirme, pasajları olduğu gibi gönder)
+PARENT_SECTIONS = int(os.getenv("RAG_PARENT_SECTIONS", "2"))
+# Prompt'a eklenecek bağlam için tahmini token bütçesi (0: sınırsız). Parçalar alaka sırasıyla, aralarındaki
+# ortak kısımlar (chunk_overlap) çıkarılarak bu bütçeye sığana kadar eklenir.
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+
+# ----- Metrikler (/metrics endpoint'inden Prometheus formatında okunur) -----
+
+# Her RAG aşamasının süresi: game_routing, embedding, vector_search, lexical_search, fusion, prompt_build,
+# llm_generation, llm_first_token (akışta ilk parçaya kadar geçen süre), markdown_render, admission_wait (kabul sırasında bekleme),
+# prefetch_embedding (kullanıcı yazarken yarım sorunun vektöre çevrilmesi)
+RAG_STAGE_SECONDS = REGISTRY.histogram("rag_stage_duration_seconds", "RAG aşamalarının süresi (saniye).", ["stage"])
+# Gemini yanıtlarının bitiş nedenleri (STOP, SAFETY, MAX_TOKENS, EMPTY, BUSY, ERROR ...)
+LLM_FINISH_REASONS = REGISTRY.counter("llm_finish_reason_total", "Gemini yanıtlarının bitiş nedenleri.", ["reason"])
+# Aşama bazında yakalanan hatalar
+RAG_ERRORS = REGISTRY.counter("rag_errors_total", "RAG aşamalarında yakalanan hatalar.", ["stage"])
+# Anlamsal önbellek sonuçları (hit/miss)
+SEMANTIC_CACHE_LOOKUPS = REGISTRY.counter("semantic_cache_lookups_total", "Anlamsal önbellek sorguları.", ["result"])
+# Soruların hangi yöntemle arandığı (hybrid, vector, lexical, lexical_fallback)
+RETRIEVAL_MODES = REGISTRY.counter("retrieval_requests_total", "Arama istekleri (kullanılan yönteme göre).", ["mode"])
+# Prompt'a eklenen bağlamın uzunluğu (karakter); top_k ayarı için
+CONTEXT_CHARS = REGISTRY.histogram(
+    "rag_context_chars", "Prompt'a eklenen bağlamın uzunluğu (karakter).",
+    buckets=(500, 1000, 2000, 4000, 6000, 8000, 12000, 16000, 24000, 32000),
+)
+# Bağlama sığmadığı veya başka bir parçanın içinde kaldığı için atlanan parçalar ve ortak kısımlardan kazanılan karakterler
+CONTEXT_DROPPED_CHUNKS = REGISTRY.counter("rag_context_dropped_chunks_total", "Bağlama eklenmeyen parçalar.")
+CONTEXT_SAVED_CHARS = REGISTRY.counter("rag_context_overlap_saved_chars_total", "Parçalar arası ortak kısımlar çıkarılarak kazanılan karakterler.")
+# Başka bir istekle paylaşılan (single-flight) yanıtlar
+COALESCED_ANSWERS = REGISTRY.counter("coalesced_answers_total", "Devam eden aynı soru çağrısından paylaşılan yanıtlar.", ["mode"])
+# HTTP istek süreleri (akışlı yanıtlarda başlıkların gönderilmesine kadar geçen süre)
+HTTP_REQUEST_SECONDS = REGISTRY.histogram("http_request_duration_seconds", "HTTP isteklerinin süresi (saniye).", ["endpoint", "method", "status"])
+# Anlık değerler
+REGISTRY.gauge("llm_calls_in_progress", "Şu anda devam eden Gemini çağrıları.").set_function(lambda: llm_limiter.active)
+REGISTRY.gauge("coalesced_calls_in_progress", "Şu anda devam eden farklı soru çağrıları.").set_function(inflight_questions.in_flight)
+REGISTRY.gauge("semantic_cache_entries", "Anlamsal önbellekteki kayıt sayısı (tüm oyunlar).").set_function(
+    lambda: sum(shard.semantic_cache.stats()["entries"] for shard in shards.values())
+)
+# Kabul kontrolünün reddettiği sorular (rate_limited: oturum hız sınırı, queue_full: sıra dolu, deadline: tahmini bekleme
+# son tarihi aşıyor, timeout: son tarihe kadar yer açılmadı)
+ADMISSION_REJECTIONS = REGISTRY.counter("admission_rejections_total", "Kabul kontrolünün reddettiği sorular.", ["reason"])
+REGISTRY.gauge("admission_in_progress", "Şu anda işlenen sorular.").set_function(lambda: admission_queue.active)
+REGISTRY.gauge("admission_queue_depth", "İşlem yeri bekleyen sorular.").set_function(lambda: admission_queue.waiting)
+REGISTRY.gauge("admission_estimated_wait_seconds", "Yeni bir sorunun tahmini bekleme süresi (saniye).").set_function(admission_queue.estimated_wait)
+# Dış servis çağrılarındaki olaylar (retry, hedge, hedge_win, timeout, failure, rejected: devre açık olduğu için çağrılmadı)
+UPSTREAM_EVENTS = REGISTRY.counter("upstream_events_total", "Gemini/embedding çağrılarında tekrar deneme, yedek istek, zaman aşımı ve hatalar.", ["service", "event"])
+# Gemini kullanılamadığında verilen yedek yanıtlar (cache: önbellekteki yakın soru, excerpts: kitapçık alıntıları)
+DEGRADED_ANSWERS = REGISTRY.counter("degraded_answers_total", "Gemini yerine verilen yedek yanıtlar.", ["source"])
+REGISTRY.gauge("llm_circuit_open", "Gemini devre kesicisi açıksa 1.").set_function(lambda: int(llm_breaker.state != CircuitBreaker.CLOSED))
+REGISTRY.gauge("embedding_circuit_open", "Embedding devre kesicisi açıksa 1.").set_function(lambda: int(embedding_breaker.state != CircuitBreaker.CLOSED))
+# Soruların hangi oyuna ve hangi yöntemle yönlendirildiği (explicit: kullanıcı seçti, classifier: yerel sınıflandırıcı,
+# fallback: sohbetin son oyunu veya varsayılan oyun)
+GAME_ROUTES = REGISTRY.counter("game_routes_total", "Soruların oyunlara yönlendirilmesi.", ["game", "method"])
+# Yeni anlık görüntüye geçişler (ok: değiştirildi, failed: yüklenemedi, eski veriler kullanılmaya devam edildi)
+SNAPSHOT_RELOADS = REGISTRY.counter("snapshot_reloads_total", "Veritabanı anlık görüntüsünün yeniden yüklenmesi.", ["result"])
+# Önceden aramaların sonucu (stored: saklandı, cancelled: yeni arama veya asıl soru geldi, rate_limited, busy: kabul
+# sırası veya önceden arama yerleri dolu, unavailable: embedding servisi yavaş/hatalı, empty: ilgili bölüm bulunamadı, error)
+PREFETCH_REQUESTS = REGISTRY.counter("prefetch_requests_total", "Kullanıcı yazarken yapılan önceden aramalar.", ["result"])
+# Asıl sorularda önceden arama sonucunun kullanılması (exact: aynı soru, similar: yeterince benzer, miss: kullanılmadı)
+PREFETCH_LOOKUPS = REGISTRY.counter("prefetch_lookups_total", "Asıl sorularda önceden arama sonucunun kullanılması.", ["result"])
 
 # ----- RAG (Retrieval-Augmented Generation) ve AI Fonksiyonları -----
 
-def get_answer(query, vectordb, top_k=5):
+def finish_reason_label(reason):
     """
-    Kullanıcının sorusunu alır, vektör veritabanından ilgili bilgi parçalarını çeker (retrieve),
-    bu parçaları ve soruyu bir prompt ile birleştirip Gemini modeline göndererek yanıt üretir (generate).
+    Gemini'nin bitiş nedenini metrik etiketi olarak kullanılabilecek kısa bir ada çevirir
+    (örn: FinishReason.SAFETY veya 3 -> "SAFETY").
+    """
+    name = getattr(reason, "name", None) or str(reason)
+    return name.rsplit(".", 1)[-1].upper()
+
+# Türkçe'ye özgü büyük harf dönüşümleri (Python'un upper() fonksiyonu 'i' -> 'I' yapar)
+_TURKISH_UPPER = str.maketrans({"i": "İ", "ı": "I"})
+
+def build_prompt(context, query, game_name="Monopoly"):
+    """
+    Çekilen bilgi parçalarını (context) ve soruyu LLM'e gönderilecek prompt'ta birleştirir.
+    Sabit talimatlar prompt'ta değil, modelin sistem talimatında (SYSTEM_INSTRUCTION) bulunur.
+    Args:
+        context (str): Veritabanından çekilen parçaların birleştirilmiş metni.
+        query (str): Kullanıcının sorduğu soru.
+        game_name (str): Sorunun yönlendirildiği oyunun adı (alıntı başlığında kullanılır).
+    Returns:
+        str: Gemini modeline gönderilecek prompt metni.
+    """
+    title = game_name.translate(_TURKISH_UPPER).upper()
+    # LLM'e gönderilecek çekilen bilgileri ve soruyu içeren prompt metni
+    return f"""{title} BİLGİ ALINTILARI:
+---
+{context}
+---
+
+OYUNCUNUN SORUSU:
+{query}
+
+{title} YARDIMCI ASİSTANI YANITI:"""
+
+def select_shard(query, requested=None, previous=None, record=True):
+    """
+    Sorunun aranacağı oyunu seçer. Öncelik sırası: istekte açıkça seçilen oyun, yerel sınıflandırıcının tahmini,
+    sohbetin son sorusunun oyunu (örn: "peki otel için?" gibi devam soruları), DEFAULT_GAME, alfabetik ilk oyun.
+    Args:
+        query (str): Kullanıcının sorusu.
+        requested (str | None): Kullanıcının seçtiği oyun kimliği ("auto" veya boş ise otomatik).
+        previous (str | None): Bu sohbette son sorunun yönlendirildiği oyun.
+        record (bool): False ise yönlendirme metriklere (game_routes_total, game_routing süresi) eklenmez
+                       (örn: kullanıcı yazarken yapılan önceden aramalar soru sayılmaz).
+    Returns:
+        GameShard: Seçilen oyunun arama verileri.
+    Raises:
+        KeyError: İstenen oyun veritabanında yoksa.
+    """
+    # Anlık görüntü bu sırada değiştirilirse soru tutarlı olarak tek bir anlık görüntünün oyunlarından seçilsin
+    current, router = shards, game_router
+    if requested and requested != "auto":
+        shard = current.get(requested)
+        if shard is None:
+            raise KeyError(requested)
+        if record:
+            GAME_ROUTES.inc(game=shard.slug, method="explicit")
+        return shard
+    started = time.perf_counter()
+    slug, confidence = router.route(query)
+    if record:
+        RAG_STAGE_SECONDS.observe(time.perf_counter() - started, stage="game_routing")
+    if slug in current:
+        if record:
+            GAME_ROUTES.inc(game=slug, method="classifier")
+        logger.debug("Soru '%s' oyununa yönlendirildi (olasılık %.2f).", slug, confidence)
+        return current[slug]
+    for candidate in (previous, DEFAULT_GAME, min(current)):
+        if candidate in current:
+            if record:
+                GAME_ROUTES.inc(game=candidate, method="fallback")
+            return current[candidate]
+
+def use_vector_search(shard):
+    """
+    Vektör araması yapılıp yapılmayacağını döndürür. "lexical" modunda hiç, diğer modlarda embedding servisi
+    yavaşladıysa veya bütçesi dolduysa (ve oyunun BM25 indeksi varsa) embedding çağrısı atlanır.
+    """
+    lexical_index = shard.lexical_index
+    use_vector = RETRIEVAL_MODE != "lexical" or lexical_index is None
+    if use_vector and lexical_index is not None and not embedding_budget.allow():
+        logger.info("Embedding servisi yavaş veya bütçesi dolu; soru sadece BM25 ile aranacak (hızlı yol).")
+        RETRIEVAL_MODES.inc(mode="lexical_fallback")
+        use_vector = False
+    return use_vector
+
+def lookup_cached_answer(shard, query_embedding):
+    """
+    Oyunun anlamsal önbelleğinde soruya yeterince benzeyen önceki bir sorunun yanıtını arar.
+    Returns:
+        str | None: Önbellekteki yanıt (yoksa None).
+    """
+    cached = shard.semantic_cache.lookup(query_embedding)
+    SEMANTIC_CACHE_LOOKUPS.inc(result="miss" if cached is None else "hit")
+    if cached is None:
+        return None
+    logger.info(
+        "Anlamsal önbellek isabeti.",
+        extra={"similarity": round(cached["similarity"], 3), "matched_query": cached["query"]},
+    )
+    return cached["answer"]
+
+def retrieve_context(query, shard, top_k, query_embedding, vector_docs=None):
+    """
+    Soruyla ilgili bilgi parçalarını oyunun verilerinden çeker (vektör araması ve/veya BM25), RRF ile birleştirir
+    ve token bütçesine sığdırır.
     Args:
         query (str): Kullanıcının sorduğu soru.
-        vectordb (Chroma): Yüklenmiş Chroma vektör veritabanı nesnesi.
+        shard (GameShard): Sorunun yönlendirildiği oyunun arama verileri.
         top_k (int): Veritabanından çekilecek en ilgili belge (chunk) sayısı.
+        query_embedding (list[float] | None): Sorunun vektörü (None ise sadece BM25 kullanılır).
+        vector_docs (list[Document] | None): Vektör araması önceden (örn: toplu olarak) yapıldıysa sonuçları.
     Returns:
-        str: Gemini modeli tarafından üretilen yanıt metni.
+        tuple[str, str | None]: (prompt'a eklenecek bağlam, bağlama eklenen alıntılar; ilgili parça bulunamadıysa
+                                veya arama hata verdiyse None).
     """
-    print(f"Alınan soru: '{query}'")
-    print(f"Veritabanında en ilgili {top_k} Monopoly bilgisi aranıyor...")
+    vectordb, lexical_index = shard.vectordb, shard.lexical_index
     # Hata durumunda LLM'e gönderilecek varsayılan context
-    context = "Monopoly veritabanı aranırken bir hata oluştu."
+    context = f"{shard.name} veritabanı aranırken bir hata oluştu."
+    excerpts = None
+    # fetch_k -> MMR'ın çeşitliliği sağlamak için başlangıçta çekeceği sonuç sayısı (genellikle k'dan büyük)
+    fetch_k = max(FETCH_K, top_k)
+    logger.debug("Veritabanında en ilgili %d %s bilgisi aranıyor...", top_k, shard.name)
 
     # Adım 1: Retrieval (Bilgi Çekme)
     try:
-        # Veritabanı nesnesini bir retriever olarak kullan
-        # search_type="mmr": Max Marginal Relevance - Hem benzerliği hem de sonuçların çeşitliliğini dikkate alır.
-        # search_kwargs: k -> döndürülecek sonuç sayısı, fetch_k -> MMR'ın çeşitliliği sağlamak için başlangıçta çekeceği sonuç sayısı (genellikle k'dan büyük)
-        retriever = vectordb.as_retriever(
-            search_type="mmr",
-            search_kwargs={'k': top_k, 'fetch_k': 15}
-        )
-        # Kullanıcının sorusunu kullanarak ilgili belgeleri retriever'dan al
-        retrieved_docs = retriever.invoke(query)
+        result_lists = []
+        methods = [] # Kullanılan arama yöntemleri (loglama için)
+        # Vektör araması: search_type="mmr" ile aynı - Max Marginal Relevance, hem benzerliği hem de sonuçların çeşitliliğini dikkate alır.
+        # Önbellek için hesaplanan vektör tekrar kullanılır, böylece ikinci bir embedding çağrısı yapılmaz.
+        if vector_docs is not None:
+            result_lists.append(vector_docs)
+            methods.append("MMR")
+        elif query_embedding is not None:
+            with RAG_STAGE_SECONDS.time(stage="vector_search"):
+                result_lists.append(vectordb.max_marginal_relevance_search_by_vector(
+                    query_embedding, k=top_k, fetch_k=fetch_k
+                ))
+            methods.append("MMR")
+        # Anahtar kelime araması (BM25): tamamen yerel, ağ çağrısı yok
+        if lexical_index is not None and (RETRIEVAL_MODE != "vector" or query_embedding is None):
+            with RAG_STAGE_SECONDS.time(stage="lexical_search"):
+                result_lists.append(lexical_index.search(query, k=top_k))
+            methods.append("BM25")
+
+        if not result_lists:
+            raise RuntimeError("Soru vektöre çevrilemedi ve BM25 indeksi yok.")
+        # Birden fazla sonuç listesi varsa Reciprocal Rank Fusion ile birleştir
+        if len(result_lists) > 1:
+            with RAG_STAGE_SECONDS.time(stage="fusion"):
+                retrieved_docs = reciprocal_rank_fusion(result_lists, limit=top_k)
+            RETRIEVAL_MODES.inc(mode="hybrid")
+        else:
+            retrieved_docs = result_lists[0]
+            RETRIEVAL_MODES.inc(mode="vector" if methods == ["MMR"] else "lexical")
+
+        # Küçük pasajlar ait oldukları kural bölümlerine çevrilir; aynı bölümden gelen pasajlar tek bölüm olur
+        if shard.parents is not None and retrieved_docs:
+            retrieved_docs = shard.parents.expand(retrieved_docs, limit=PARENT_SECTIONS)
 
         # Eğer hiç belge bulunamazsa
         if not retrieved_docs:
-             print("Uyarı: Veritabanından bu soruyla ilgili bilgi bulunamadı.")
+             logger.warning("Veritabanından bu soruyla ilgili bilgi bulunamadı.")
              context = "İlgili bilgi bulunamadı." # LLM'e bu durumu bildir
         else:
-            # Bulunan belgelerin içeriklerini birleştirerek LLM için context oluştur
+            # Bulunan belgeleri alaka sırasıyla, ortak kısımları bir kez gönderilecek şekilde token bütçesine sığdır
             # Belgeler arasına ayırıcı eklemek modelin belgeleri ayırt etmesine yardımcı olabilir
-            context = "\n\n---\n\n".join([doc.page_content for doc in retrieved_docs])
-            print(f"{len(retrieved_docs)} adet ilgili bilgi parçası bulundu (MMR ile).")
+            context, packing = pack_context(retrieved_docs, CONTEXT_TOKEN_BUDGET)
+            excerpts = context
+            CONTEXT_DROPPED_CHUNKS.inc(packing["dropped"])
+            CONTEXT_SAVED_CHARS.inc(packing["saved_chars"])
+            logger.debug(
+                "%d adet ilgili bilgi parçası bulundu (%s ile), %d tanesi bağlama eklendi (~%d token).",
+                len(retrieved_docs), " + ".join(methods), packing["used"], packing["tokens"],
+            )
 
     except Exception as e:
         # Veritabanı araması sırasında hata olursa logla
-        print(f"Hata: Veritabanı araması sırasında sorun oluştu: {e}", file=sys.stderr)
-        traceback.print_exc()
+        RAG_ERRORS.inc(stage="retrieval")
+        logger.exception("Veritabanı araması sırasında sorun oluştu: %s", e)
         # context zaten hata mesajı olarak ayarlı
 
+    return context, excerpts
+
+def build_context_prompt(query, shard, top_k, query_embedding, vector_docs=None):
+    """
+    Soruyla ilgili bilgi parçalarını çeker (bkz. retrieve_context) ve LLM'e gönderilecek prompt'u hazırlar.
+    Args:
+        query (str): Kullanıcının sorduğu soru.
+        shard (GameShard): Sorunun yönlendirildiği oyunun arama verileri.
+        top_k (int): Veritabanından çekilecek en ilgili belge (chunk) sayısı.
+        query_embedding (list[float] | None): Sorunun vektörü (None ise sadece BM25 kullanılır).
+        vector_docs (list[Document] | None): Vektör araması önceden (örn: toplu olarak) yapıldıysa sonuçları.
+    Returns:
+        tuple[str, str | None]: (Gemini modeline gönderilecek prompt, bağlama eklenen alıntılar; ilgili parça
+                                bulunamadıysa None). Alıntılar Gemini yanıt veremezse yedek yanıt olarak gösterilir.
+    """
+    # Adım 1: Retrieval (Bilgi Çekme)
+    context, excerpts = retrieve_context(query, shard, top_k, query_embedding, vector_docs)
+
     # Adım 2: Prompt Oluşturma
-    # LLM'e gönderilecek talimatları ve çekilen bilgileri içeren prompt metni
-    prompt = f"""
-Sen Monopoly Emlak Ticareti Oyunu için bir Yardımcı Asistansın. Görevin, SADECE sana aşağıda verilen MONOPOLY BİLGİ ALINTILARI'nı kullanarak oyuncunun sorduğu soruları yanıtlamaktır. Bu alıntılar hem resmi kuralları hem de oyunla ilgili ek bilgileri içerebilir.
+    with RAG_STAGE_SECONDS.time(stage="prompt_build"):
+        prompt = build_prompt(context, query, shard.name)
+    CONTEXT_CHARS.observe(len(context))
 
-Yanıtlarken UYMAN GEREKEN KURALLAR:
-1.  Cevabın KESİNLİKLE verilen MONOPOLY BİLGİ ALINTILARI içinde yer almalıdır.
-2.  Eğer cevap bu alıntılarda yoksa veya alıntılar yetersizse, "Üzgünüm, sağlanan bilgilerde bu soruya net bir cevap bulamadım. Belki kural kitapçığının kendisine bakmak isteyebilirsiniz." şeklinde yanıt ver. ASLA tahmin yürütme veya alıntılar dışında bilgi verme.
-3.  Cevabını net, anlaşılır ve doğrudan sorulan konuyla ilgili ver. Mümkünse adım adım açıkla veya madde imleri kullan.
-4.  Oyun stratejisi verme, sadece bilgi aktarımı yap. Örneğin "Ev kurmak iyi bir stratejidir" yerine "Ev kurmanın kuralları şunlardır..." gibi cevap ver.
-5.  Eğer alıntılarda birden fazla ilgili bilgi varsa, bunları mantıklı bir sıra ile birleştirerek kapsamlı bir yanıt oluştur.
-6.  "Monopoly kurallarına göre...", "Sağlanan bilgilere göre..." gibi ifadelerle başla. Yanıtının sonunda alıntıların dışına çıktığını belirten bir ifade KULLANMA.
+    return prompt, excerpts
 
-MONOPOLY BİLGİ ALINTILARI:
----
-{context}
----
+def prepare_answer(query, shard, top_k=5, prefetched=None):
+    """
+    Yanıt üretiminden önceki adımları yapar: anlamsal önbelleği kontrol eder, önbellekte yoksa
+    oyunun veritabanından ilgili bilgi parçalarını çeker (retrieve) ve LLM'e gönderilecek prompt'u hazırlar.
+    Args:
+        query (str): Kullanıcının sorduğu soru.
+        shard (GameShard): Sorunun yönlendirildiği oyunun arama verileri.
+        top_k (int): Veritabanından çekilecek en ilgili belge (chunk) sayısı.
+        prefetched (dict | None): Kullanıcı yazarken yapılmış önceden aramanın sonucu (bkz. take_prefetched);
+                                  verilirse embedding ve arama yapılmaz, prompt bu sonucun bağlamıyla hazırlanır.
+    Returns:
+        tuple: (prompt, excerpts, query_embedding, cached_answer). Önbellek isabetinde prompt ve excerpts None,
+               cached_answer ise saklanan yanıttır; aksi halde cached_answer None olur. excerpts, prompt'a eklenen
+               kitapçık alıntılarıdır (bkz. build_context_prompt).
+    """
+    logger.debug("Alınan soru: %r", query)
+    if prefetched is not None:
+        # Önceden aranan soru asıl soruyla aynıysa vektörü de geçerlidir (önbellek kontrolü ve yanıtın önbelleğe
+        # eklenmesi için); sadece benzerse vektör yarım soruya aittir ve kullanılmaz
+        query_embedding = prefetched["embedding"] if prefetched["exact"] else None
+        if query_embedding is not None:
+            cached_answer = lookup_cached_answer(shard, query_embedding)
+            if cached_answer is not None:
+                return None, None, query_embedding, cached_answer
+        with RAG_STAGE_SECONDS.time(stage="prompt_build"):
+            prompt = build_prompt(prefetched["context"], query, shard.name)
+        CONTEXT_CHARS.observe(len(prefetched["context"]))
+        return prompt, prefetched["excerpts"], query_embedding, None
 
-OYUNCUNUN SORUSU:
-{query}
+    # Sorunun embedding vektörü (hem önbellek hem de veritabanı araması için bir kez hesaplanır)
+    query_embedding = None
+
+    # Adım 0: Sorunun vektöre çevrilmesi ve Anlamsal Önbellek Kontrolü
+    if use_vector_search(shard):
+        try:
+            started = time.perf_counter()
+            # Zaman aşımı, tekrar deneme ve yedek istekle; devre açıksa hemen BM25'e geçilir
+            query_embedding = embedding_caller.call(lambda: shard.vectordb.embeddings.embed_query(query))
+            elapsed = time.perf_counter() - started
+            embedding_budget.record_success(elapsed)
+            RAG_STAGE_SECONDS.observe(elapsed, stage="embedding")
+            cached_answer = lookup_cached_answer(shard, query_embedding)
+            if cached_answer is not None:
+                return None, None, query_embedding, cached_answer
+        except Exception as e:
+            # Embedding alınamazsa BM25 indeksi varsa onunla devam et
+            embedding_budget.record_failure()
+            RAG_ERRORS.inc(stage="embedding")
+            logger.warning("Soru vektöre çevrilemedi: %s", e)
+
+    # Adım 1-2: Retrieval ve Prompt Oluşturma
+    prompt, excerpts = build_context_prompt(query, shard, top_k, query_embedding)
+    return prompt, excerpts, query_embedding, None
+
+def remember_answer(shard, query, query_embedding, answer):
+    """
+    Başarıyla üretilmiş bir yanıtı bir sonraki benzer soru için oyunun anlamsal önbelleğine ekler.
+    Args:
+        shard (GameShard): Sorunun yönlendirildiği oyun.
+        query (str): Kullanıcının sorusu.
+        query_embedding (list[float] | None): Sorunun embedding vektörü (yoksa önbelleğe eklenmez).
+        answer (str): Üretilen yanıt.
+    """
+    if query_embedding is None:
+        return
+    shard.semantic_cache.store(query, query_embedding, answer)
+    stats = shard.semantic_cache.stats()
+    logger.debug("Anlamsal önbellek: %d kayıt, %d isabet / %d ıska.", stats["entries"], stats["hits"], stats["misses"])
 
-MONOPOLY YARDIMCI ASİSTANI YANITI:"""
+def degraded_answer(shard, query_embedding, excerpts):
+    """
+    Gemini yanıt veremediğinde (devre açık, zaman aşımı veya tekrar denemelere rağmen hata) gösterilecek yedek yanıt:
+    önce oyunun önbelleğinde normalden düşük bir eşikle yakın bir soru aranır, yoksa ilgili kitapçık alıntıları gösterilir.
+    Args:
+        shard (GameShard): Sorunun yönlendirildiği oyun.
+        query_embedding (list[float] | None): Sorunun vektörü.
+        excerpts (str | None): Prompt'a eklenen alıntılar.
+    Returns:
+        str | None: Yedek yanıt; ikisi de yoksa None.
+    """
+    if query_embedding is not None:
+        cached = shard.semantic_cache.lookup(query_embedding, threshold=DEGRADED_CACHE_THRESHOLD)
+        if cached is not None:
+            DEGRADED_ANSWERS.inc(source="cache")
+            return DEGRADED_CACHE_NOTE + cached["answer"]
+    if excerpts:
+        DEGRADED_ANSWERS.inc(source="excerpts")
+        return DEGRADED_EXCERPTS_NOTE + "\n".join(f"> {line}" if line else ">" for line in excerpts.splitlines())
+    return None
 
-    # Adım 3: Generation (Yanıt Üretme)
-    print("Prompt Gemini modeline gönderiliyor...")
+def generate_from_prompt(prompt, fallback=None, limiter=None):
+    """
+    Hazırlanan prompt'u Gemini modeline gönderir (eşzamanlı LLM çağrısı sınırı içinde, zaman aşımı, tekrar deneme,
+    yedek istek ve devre kesiciyle) ve yanıtı döndürür.
+    Hata, güvenlik filtresi ve meşgul durumlarında kullanıcıya gösterilecek mesaj döndürülür.
+    Args:
+        prompt (str): build_context_prompt ile hazırlanmış prompt.
+        fallback (callable | None): Gemini yanıt veremezse yedek yanıtı üreten fonksiyon (bkz. degraded_answer).
+        limiter (ConcurrencyLimiter | None): Kullanılacak LLM çağrı sınırı (None: etkileşimli soruların llm_limiter'ı).
+    Returns:
+        tuple[str, bool]: (yanıt metni, yanıtın başarılı olup olmadığı; sadece başarılı yanıtlar önbelleğe alınır).
+    """
+    logger.debug("Prompt Gemini modeline gönderiliyor...")
     # Hata durumunda varsayılan yanıt
     answer = "Üzgünüm, sorunuzu yanıtlarken bir teknik sorunla karşılaştım. Lütfen tekrar deneyin."
+    # Sadece başarılı yanıtlar önbelleğe alınır (hata ve güvenlik filtresi mesajları alınmaz)
+    cacheable = False
     try:
-        # Hazırlanan prompt'u Gemini modeline gönder
-        response = model.generate_content(prompt)
+        # Hazırlanan prompt'u Gemini modeline gönder (eşzamanlı LLM çağrısı sınırı içinde)
+        with limiter or llm_limiter, RAG_STAGE_SECONDS.time(stage="llm_generation"):
+            response = llm_caller.call(lambda: model.generate_content(prompt))
 
         # Modelden gelen yanıtı kontrol et
         # response.parts: Modelin ürettiği metin parçalarını içerir. Başarılıysa dolu olur.
         if response.parts:
             answer = response.text # Üretilen metni al
-            print("Gemini modelinden yanıt alındı.")
+            cacheable = True
+            LLM_FINISH_REASONS.inc(reason="STOP")
+            logger.debug("Gemini modelinden yanıt alındı.")
         # response.candidates: Alternatif yanıt adayları ve bitiş nedenini içerir.
         # finish_reason != 'STOP': Modelin normal şekilde bitmediğini gösterir (örn: güvenlik filtresi, uzunluk limiti).
         elif response.candidates and response.candidates[0].finish_reason != 'STOP':
              reason = response.candidates[0].finish_reason # Bitiş nedenini al
-             print(f"Uyarı: Gemini yanıtı tamamlayamadı. Neden: {reason}")
+             LLM_FINISH_REASONS.inc(reason=finish_reason_label(reason))
+             logger.warning("Gemini yanıtı tamamlayamadı. Neden: %s", reason)
              answer = f"Yanıt tam olarak üretilemedi (Neden: {reason}). Sorunuzu farklı şekilde sormayı deneyin."
         # Eğer response.parts boşsa ve bitiş nedeni de STOP değilse (örn: tamamen engellendi)
         else:
-             print("Uyarı: Gemini modelinden boş yanıt alındı (Muhtemelen güvenlik filtresi).")
+             LLM_FINISH_REASONS.inc(reason="EMPTY")
+             logger.warning("Gemini modelinden boş yanıt alındı (Muhtemelen güvenlik filtresi).")
              answer = "Modelden geçerli bir yanıt alınamadı (güvenlik filtresine takılmış olabilir). Lütfen sorunuzu farklı şekilde ifade etmeyi deneyin."
 
+    except LLMBusyError as e:
+        # Eşzamanlı LLM çağrısı sınırı doluysa kullanıcıya meşgul mesajı göster
+        LLM_FINISH_REASONS.inc(reason="BUSY")
+        logger.warning("%s", e)
+        answer = BUSY_MESSAGE
+    except CircuitOpenError as e:
+        # Servis art arda hata verdi; çağrı yapılmadan yedek yanıta geç
+        LLM_FINISH_REASONS.inc(reason="CIRCUIT_OPEN")
+        logger.warning("%s", e)
+        answer = (fallback() if fallback else None) or answer
     except Exception as e:
-        # API çağrısı sırasında bir hata oluşursa logla
-        print(f"Hata: Gemini modeli yanıt üretirken sorun oluştu: {e}", file=sys.stderr)
-        traceback.print_exc() # Hatanın detayını logla
-        # answer zaten varsayılan hata mesajı olarak ayarlı
+        # API çağrısı sırasında bir hata oluşursa (tekrar denemelerden sonra) logla ve varsa yedek yanıtı ver
+        LLM_FINISH_REASONS.inc(reason="ERROR")
+        RAG_ERRORS.inc(stage="llm")
+        logger.exception("Gemini modeli yanıt üretirken sorun oluştu: %s", e)
+        answer = (fallback() if fallback else None) or answer
+
+    return answer, cacheable
+
+def _generate_answer(query, shard, top_k=5, prefetched=None):
+    """
+    Kullanıcının sorusunu alır, vektör veritabanından ilgili bilgi parçalarını çeker (retrieve),
+    bu parçaları ve soruyu bir prompt ile birleştirip Gemini modeline göndererek yanıt üretir (generate).
+    Soru daha önce yanıtlanmış bir soruya yeterince benziyorsa yanıt anlamsal önbellekten döndürülür.
+    Aynı sorular birleştirilmeden çalışır; dışarıdan get_answer kullanılmalıdır.
+    Args:
+        query (str): Kullanıcının sorduğu soru.
+        shard (GameShard): Sorunun yönlendirildiği oyunun arama verileri (bkz. select_shard).
+        top_k (int): Veritabanından çekilecek en ilgili belge (chunk) sayısı.
+        prefetched (dict | None): Önceden aramanın sonucu (bkz. prepare_answer).
+    Returns:
+        str: Gemini modeli tarafından üretilen (veya önbellekten gelen) yanıt metni.
+    """
+    # Adım 0-2: Önbellek kontrolü, Retrieval ve Prompt Oluşturma
+    prompt, excerpts, query_embedding, cached_answer = prepare_answer(query, shard, top_k, prefetched)
+    if cached_answer is not None:
+        return cached_answer
+
+    # Adım 3: Generation (Yanıt Üretme; Gemini yanıt veremezse önbellekteki yakın yanıt veya alıntılar)
+    answer, cacheable = generate_from_prompt(prompt, lambda: degraded_answer(shard, query_embedding, excerpts))
+
+    # Başarılı yanıtı bir sonraki benzer soru için önbelleğe ekle
+    if cacheable:
+        remember_answer(shard, query, query_embedding, answer)
 
     # Üretilen veya hata mesajı olan yanıtı döndür
     return answer
 
+def _stream_generated_answer(query, shard, top_k=5, prefetched=None):
+    """
+    _generate_answer'ın akış (streaming) versiyonu: Gemini'nin ürettiği metni parça parça, geldiği anda döndürür.
+    Böylece kullanıcı yanıtın tamamını beklemeden ilk kelimeleri görmeye başlar.
+    Önbellek isabetinde yanıtın tamamı tek parça olarak döndürülür.
+    Args:
+        query (str): Kullanıcının sorduğu soru.
+        shard (GameShard): Sorunun yönlendirildiği oyunun arama verileri (bkz. select_shard).
+        top_k (int): Veritabanından çekilecek en ilgili belge (chunk) sayısı.
+        prefetched (dict | None): Önceden aramanın sonucu (bkz. prepare_answer).
+    Yields:
+        str: Yanıt metninin bir sonraki parçası.
+    """
+    # Adım 0-2: Önbellek kontrolü, Retrieval ve Prompt Oluşturma
+    prompt, excerpts, query_embedding, cached_answer = prepare_answer(query, shard, top_k, prefetched)
+    if cached_answer is not None:
+        yield cached_answer
+        return
+
+    def open_stream():
+        # Akışı başlatır ve ilk parçayı bekler; zaman aşımı, tekrar deneme ve yedek istek ilk parçaya kadar geçerlidir
+        response = model.generate_content(prompt, stream=True)
+        chunks = iter(response)
+        return response, chunks, next(chunks, None)
+
+    # Adım 3: Generation (Yanıt Üretme - akış halinde)
+    logger.debug("Prompt Gemini modeline gönderiliyor (akış modu)...")
+    parts = [] # Gelen parçalar; akış bitince tam yanıtı önbelleğe eklemek için
+    try:
+        # stream=True: Model yanıtı üretirken parçaları sırayla gönderir
+        # Akış boyunca LLM çağrı yeri tutulur (eşzamanlı LLM çağrısı sınırı)
+        with llm_limiter:
+            started = time.perf_counter()
+            response, chunks, chunk = llm_stream_caller.call(open_stream)
+            while chunk is not None:
+                # Güvenlik filtresi vb. nedenlerle boş gelen parçaları atla
+                if chunk.parts:
+                    if not parts:
+                        # Kullanıcının ilk kelimeleri görmesine kadar geçen süre
+                        RAG_STAGE_SECONDS.observe(time.perf_counter() - started, stage="llm_first_token")
+                    parts.append(chunk.text)
+                    yield chunk.text
+                # Sonraki parçayı en fazla LLM_STREAM_CHUNK_TIMEOUT saniye bekle (akış takılırsa yanıt yarıda kesilir)
+                chunk = call_with_timeout(lambda: next(chunks, None), LLM_STREAM_CHUNK_TIMEOUT)
+            RAG_STAGE_SECONDS.observe(time.perf_counter() - started, stage="llm_generation")
+
+        if parts:
+            LLM_FINISH_REASONS.inc(reason="STOP")
+            logger.debug("Gemini modelinden akış yanıtı tamamlandı.")
+            remember_answer(shard, query, query_embedding, "".join(parts))
+        # Hiç metin gelmediyse bitiş nedenini kullanıcıya bildir (get_answer ile aynı mesajlar)
+        elif response.candidates and response.candidates[0].finish_reason != 'STOP':
+            reason = response.candidates[0].finish_reason
+            LLM_FINISH_REASONS.inc(reason=finish_reason_label(reason))
+            logger.warning("Gemini yanıtı tamamlayamadı. Neden: %s", reason)
+            yield f"Yanıt tam olarak üretilemedi (Neden: {reason}). Sorunuzu farklı şekilde sormayı deneyin."
+        else:
+            LLM_FINISH_REASONS.inc(reason="EMPTY")
+            logger.warning("Gemini modelinden boş yanıt alındı (Muhtemelen güvenlik filtresi).")
+            yield "Modelden geçerli bir yanıt alınamadı (güvenlik filtresine takılmış olabilir). Lütfen sorunuzu farklı şekilde ifade etmeyi deneyin."
+
+    except LLMBusyError as e:
+        LLM_FINISH_REASONS.inc(reason="BUSY")
+        logger.warning("%s", e)
+        yield BUSY_MESSAGE
+    except CircuitOpenError as e:
+        # Servis art arda hata verdi; çağrı yapılmadan yedek yanıta geç
+        LLM_FINISH_REASONS.inc(reason="CIRCUIT_OPEN")
+        logger.warning("%s", e)
+        yield degraded_answer(shard, query_embedding, excerpts) or "Üzgünüm, sorunuzu yanıtlarken bir teknik sorunla karşılaştım. Lütfen tekrar deneyin."
+    except Exception as e:
+        # API çağrısı sırasında bir hata oluşursa logla
+        LLM_FINISH_REASONS.inc(reason="ERROR")
+        RAG_ERRORS.inc(stage="llm")
+        logger.exception("Gemini modeli akış yanıtı üretirken sorun oluştu: %s", e)
+        # Akış yarıda kesildiyse kullanıcıya bunu belirt, hiç başlamadıysa yedek yanıtı veya varsayılan hata mesajını gönder
+        if parts:
+            yield "\n\n*(Yanıt yarıda kesildi. Lütfen tekrar deneyin.)*"
+        else:
+            yield degraded_answer(shard, query_embedding, excerpts) or "Üzgünüm, sorunuzu yanıtlarken bir teknik sorunla karşılaştım. Lütfen tekrar deneyin."
+
+def get_answer(query, shard, top_k=5, prefetched=None):
+    """
+    Soruyu RAG ile yanıtlar. Aynı (normalleştirilmiş) soru başka bir istek tarafından zaten
+    yanıtlanıyorsa yeni bir embedding/LLM çağrısı yapılmaz, devam eden çağrının sonucu paylaşılır.
+    Args:
+        query (str): Kullanıcının sorduğu soru.
+        shard (GameShard): Sorunun yönlendirildiği oyunun arama verileri (bkz. select_shard).
+        top_k (int): Veritabanından çekilecek en ilgili belge (chunk) sayısı.
+        prefetched (dict | None): Önceden aramanın sonucu (bkz. prepare_answer).
+    Returns:
+        str: Üretilen (önbellekten gelen veya başka bir istekle paylaşılan) yanıt metni.
+    """
+    key = f"{shard.slug}:{top_k}:{normalize_question(query)}"
+    try:
+        answer, shared = inflight_questions.do(
+            key, lambda: _generate_answer(query, shard, top_k, prefetched), timeout=COALESCE_WAIT_TIMEOUT
+        )
+    except TimeoutError as e:
+        logger.warning("%s", e)
+        return BUSY_MESSAGE
+    if shared:
+        COALESCED_ANSWERS.inc(mode="sync")
+        logger.debug("Aynı soru için devam eden çağrının yanıtı paylaşıldı: %r", query)
+    return answer
+
+def stream_answer(query, shard, top_k=5, prefetched=None):
+    """
+    get_answer'ın akış (streaming) versiyonu. Aynı soru için devam eden bir çağrı varsa
+    yeni bir akış başlatılmaz; o çağrı bitince yanıtın tamamı tek parça olarak döndürülür.
+    Args:
+        query (str): Kullanıcının sorduğu soru.
+        shard (GameShard): Sorunun yönlendirildiği oyunun arama verileri (bkz. select_shard).
+        top_k (int): Veritabanından çekilecek en ilgili belge (chunk) sayısı.
+        prefetched (dict | None): Önceden aramanın sonucu (bkz. prepare_answer).
+    Yields:
+        str: Yanıt metninin bir sonraki parçası.
+    """
+    key = f"{shard.slug}:{top_k}:{normalize_question(query)}"
+    call, leader = inflight_questions.begin(key)
+    if not leader:
+        # Takipçi: liderin yanıtını bekle
+        try:
+            answer = call.wait(COALESCE_WAIT_TIMEOUT)
+            COALESCED_ANSWERS.inc(mode="stream")
+            logger.debug("Aynı soru için devam eden akışın yanıtı paylaşıldı: %r", query)
+        except TimeoutError as e:
+            logger.warning("%s", e)
+            answer = BUSY_MESSAGE
+        except Exception:
+            answer = "Üzgünüm, sorunuzu yanıtlarken bir teknik sorunla karşılaştım. Lütfen tekrar deneyin."
+        yield answer
+        return
+
+    # Lider: akışı başlat, bitince (veya kesilince) bekleyenlere tam yanıtı ilet
+    parts = []
+    error = None
+    try:
+        for text in _stream_generated_answer(query, shard, top_k, prefetched):
+            parts.append(text)
+            yield text
+    except GeneratorExit:
+        # İstemci bağlantıyı kapattı; yarım yanıtı bekleyenlere verme
+        error = ConnectionAbortedError("Akış istemci tarafından kesildi.")
+        raise
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        inflight_questions.finish(key, call, result="".join(parts), error=error)
+
+def prefetch_context(session_id, query, shard, top_k=5):
+    """
+    Kullanıcı yazarken yarım soruyu vektöre çevirir, ilgili bölümleri bulur ve sonucu oturumun önceden arama
+    önbelleğine kaydeder (bkz. take_prefetched). Asıl sorularla yarışmaması için kabul sırasında bekleyen soru varsa,
+    önceden arama yerleri doluysa veya embedding servisi yavaş/hatalıysa hiç yapılmaz; embedding çağrısı tekrar
+    denenmez ve devre kesiciyi etkilemez. Oturumun yeni bir önceden araması veya asıl sorusu bu aramayı iptal eder.
+    Args:
+        session_id (str): Oturum kimliği.
+        query (str): Kullanıcının yazmakta olduğu (yarım) soru.
+        shard (GameShard): Sorunun yönlendirildiği oyun.
+        top_k (int): Veritabanından çekilecek en ilgili belge (chunk) sayısı.
+    Returns:
+        str: Sonuç (stored, cancelled, busy, unavailable, empty veya error; bkz. PREFETCH_REQUESTS).
+    """
+    if not admission_queue.has_capacity() or not _prefetch_slots.acquire(blocking=False):
+        return "busy"
+    try:
+        use_vector = RETRIEVAL_MODE != "lexical" or shard.lexical_index is None
+        # Dakikalık embedding bütçesi asıl sorulara ayrılır; önceden arama bütçeyi sadece kontrol eder, harcamaz
+        if use_vector and (embedding_breaker.state != CircuitBreaker.CLOSED or not embedding_budget.has_budget()):
+            return "unavailable"
+        # Reddedilen önceden arama oturumun saklanan sonucunu silmesin diye yeni nesil ancak burada başlar
+        generation = prefetch_cache.begin(session_id)
+        query_embedding = None
+        if use_vector:
+            started = time.perf_counter()
+            query_embedding = call_with_timeout(lambda: shard.vectordb.embeddings.embed_query(query), EMBEDDING_TIMEOUT)
+            RAG_STAGE_SECONDS.observe(time.perf_counter() - started, stage="prefetch_embedding")
+            # Embedding beklenirken kullanıcı yazmaya devam ettiyse veya soruyu gönderdiyse arama yapılmaz
+            if not prefetch_cache.is_current(session_id, generation):
+                return "cancelled"
+        context, excerpts = retrieve_context(query, shard, top_k, query_embedding)
+        if excerpts is None:
+            return "empty"
+        stored = prefetch_cache.store(session_id, generation, query, shard, query_embedding, context, excerpts)
+        return "stored" if stored else "cancelled"
+    except Exception as e:
+        logger.warning("Önceden arama yapılamadı: %s", e)
+        return "error"
+    finally:
+        _prefetch_slots.release()
+
+def take_prefetched(session_id, query, shard):
+    """
+    Asıl soru için oturumun önceden arama sonucunu alır (bkz. PrefetchCache.take); devam eden önceden arama iptal edilir.
+    Returns:
+        dict | None: prepare_answer'a verilecek sonuç; kullanılabilir sonuç yoksa None.
+    """
+    if not PREFETCH_ENABLED:
+        return None
+    prefetched = prefetch_cache.take(session_id, query, shard)
+    PREFETCH_LOOKUPS.inc(result="miss" if prefetched is None else ("exact" if prefetched["exact"] else "similar"))
+    if prefetched is not None:
+        logger.debug("Önceden arama sonucu kullanılıyor: %r", prefetched["query"])
+    return prefetched
+
+# ----- Toplu Soru Yanıtlama -----
+
+# Kural denetimi gibi çevrimdışı işler için yüzlerce soru tek istekte yanıtlanır: tüm sorular tek bir toplu embedding
+# çağrısıyla vektöre çevrilir, vektör araması tek bir matris işlemiyle yapılır ve yanıtlar sınırlı eşzamanlılıkla üretilir.
+# Toplu istekte aynı anda yapılacak en fazla Gemini çağrısı
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+# Toplu işlerin Gemini çağrıları etkileşimli soruların LLM çağrı sınırını (llm_limiter) kullanmaz; worker'daki tüm toplu
+# istekler bu ayrı sınırı paylaşır. Böylece toplu iş sohbet sorularının LLM yeri beklemesine yol açmaz ve kabul sırasının
+# bekleme tahminleri (sadece etkileşimli soruları sayar) geçerli kalır.
+batch_llm_limiter = ConcurrencyLimiter(
+    max_concurrent=int(os.getenv("BATCH_MAX_CONCURRENT_LLM_CALLS", str(BATCH_CONCURRENCY))),
+)
+# Tek istekte kabul edilecek en fazla soru sayısı
+BATCH_MAX_QUESTIONS = int(os.getenv("BATCH_MAX_QUESTIONS", "1000"))
+# /batch_answer isteklerinde "Authorization: Bearer <token>" başlığı zorunludur; ayarlanmamışsa endpoint kapalıdır (404).
+# Yerel mod (python batch_answer.py sorular.txt) endpoint'i kullanmadığı için anahtar gerektirmez.
+BATCH_API_TOKEN = os.getenv("BATCH_API_TOKEN", "")
+
+def embed_queries(embedding_function, queries):
+    """
+    Soruları tek bir toplu embedding çağrısıyla vektöre çevirir.
+    Google embedding modeli embed_documents'ta task_type kabul eder; sorgular için RETRIEVAL_QUERY kullanılır
+    (embed_query ile aynı vektörler). Bu parametreyi desteklemeyen modellerde her soru embed_query ile çevrilir.
+    Args:
+        embedding_function (Embeddings): Embedding modeli.
+        queries (list[str]): Sorular.
+    Returns:
+        list[list[float]]: Soru sırasıyla vektörler.
+    """
+    try:
+        supports_task_type = "task_type" in inspect.signature(embedding_function.embed_documents).parameters
+    except (TypeError, ValueError):
+        supports_task_type = False
+    if supports_task_type:
+        return embedding_function.embed_documents(queries, task_type="RETRIEVAL_QUERY")
+    return [embedding_function.embed_query(q) for q in queries]
+
+def answer_batch(questions, shards, top_k=5, concurrency=BATCH_CONCURRENCY):
+    """
+    Birden fazla soruyu toplu olarak yanıtlar ve sonuçları soru sırasıyla, hazır oldukça döndürür.
+    Aynı oyundaki aynı (normalleştirilmiş) sorular bir kez yanıtlanır; anlamsal önbellekteki sorular LLM'e gitmez.
+    Sorular farklı oyunlara ait olabilir: vektöre çevirme tek çağrıda, vektör araması her oyun için tek matris işlemiyle yapılır.
+    Args:
+        questions (list[str]): Sorular.
+        shards (GameShard | list[GameShard]): Tüm soruların oyunu veya her sorunun oyunu (soru sırasıyla).
+        top_k (int): Soru başına çekilecek en ilgili belge sayısı.
+        concurrency (int): Aynı anda yapılacak en fazla Gemini çağrısı.
+    Yields:
+        dict: index (sorunun sırası), question, game, answer, cached (yanıt önbellekten mi geldi) ve ok (yanıt başarılı mı).
+    """
+    if isinstance(shards, GameShard):
+        shards = [shards] * len(questions)
+    # Aynı soruları birleştir: (oyun, normalleştirilmiş soru) -> benzersiz soru sırası
+    unique_of = {}
+    unique_questions = []
+    unique_shards = []
+    slots = []
+    for question, shard in zip(questions, shards):
+        key = (shard.slug, normalize_question(question))
+        if key not in unique_of:
+            unique_of[key] = len(unique_questions)
+            unique_questions.append(question)
+            unique_shards.append(shard)
+        slots.append(unique_of[key])
+
+    # Adım 0: Vektör araması yapılacak oyunların sorularını tek çağrıda vektöre çevir ve önbelleği kontrol et
+    vector_games = {shard.slug for shard in set(unique_shards) if use_vector_search(shard)}
+    to_embed = [i for i, shard in enumerate(unique_shards) if shard.slug in vector_games]
+    embeddings = [None] * len(unique_questions)
+    if to_embed:
+        try:
+            started = time.perf_counter()
+            embedding_function = unique_shards[to_embed[0]].vectordb.embeddings
+            texts = [unique_questions[i] for i in to_embed]
+            # Toplu çağrının gecikmesi tek sorudan farklıdır: yedek istek gönderilmez, süre sınırı daha uzundur
+            vectors = embedding_caller.call(
+                lambda: embed_queries(embedding_function, texts),
+                hedge=False, attempt_timeout=BATCH_EMBEDDING_TIMEOUT, deadline=BATCH_EMBEDDING_TIMEOUT * 2,
+            )
+            elapsed = time.perf_counter() - started
+            embedding_budget.record_success(elapsed)
+            RAG_STAGE_SECONDS.observe(elapsed, stage="embedding")
+            for i, vector in zip(to_embed, vectors):
+                embeddings[i] = vector
+        except Exception as e:
+            # Embedding alınamazsa BM25 indeksi varsa onunla devam et
+            embedding_budget.record_failure()
+            RAG_ERRORS.inc(stage="embedding")
+            logger.warning("Sorular vektöre çevrilemedi: %s", e)
+    cached = [
+        lookup_cached_answer(shard, e) if e is not None else None
+        for shard, e in zip(unique_shards, embeddings)
+    ]
+
+    # Adım 1: Önbellekte olmayan soruların vektör araması (oyun başına, NumPy indeksinde tek matris işlemi)
+    pending_by_game = {}
+    for i, e in enumerate(embeddings):
+        if e is not None and cached[i] is None:
+            pending_by_game.setdefault(unique_shards[i], []).append(i)
+    vector_docs = {}
+    fetch_k = max(FETCH_K, top_k)
+    for shard, pending in pending_by_game.items():
+        vectordb = shard.vectordb
+        try:
+            with RAG_STAGE_SECONDS.time(stage="vector_search"):
+                if hasattr(vectordb, "batch_max_marginal_relevance_search_by_vector"):
+                    results = vectordb.batch_max_marginal_relevance_search_by_vector(
+                        [embeddings[i] for i in pending], k=top_k, fetch_k=fetch_k
+                    )
+                else:
+                    results = [
+                        vectordb.max_marginal_relevance_search_by_vector(embeddings[i], k=top_k, fetch_k=fetch_k)
+                        for i in pending
+                    ]
+            vector_docs.update(zip(pending, results))
+        except Exception as e:
+            # Toplu arama başarısız olursa her soru build_context_prompt içinde tek tek aranır
+            RAG_ERRORS.inc(stage="retrieval")
+            logger.warning("Toplu vektör araması yapılamadı (%s): %s", shard.slug, e)
+
+    def answer_one(i):
+        if cached[i] is not None:
+            return cached[i], True, True
+        question, shard = unique_questions[i], unique_shards[i]
+        prompt, excerpts = build_context_prompt(question, shard, top_k, embeddings[i], vector_docs.get(i))
+        # Adım 2-3: Prompt ve yanıt üretimi (toplu işlerin ayrı LLM sınırıyla; yedek yanıtlar ok=False döner)
+        answer, ok = generate_from_prompt(
+            prompt, lambda: degraded_answer(shard, embeddings[i], excerpts), limiter=batch_llm_limiter,
+        )
+        if ok:
+            remember_answer(shard, question, embeddings[i], answer)
+        return answer, False, ok
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="batch-answer") as pool:
+        futures = [pool.submit(answer_one, i) for i in range(len(unique_questions))]
+        try:
+            # Sonuçlar soru sırasıyla döndürülür; sıradaki yanıt hazır olunca hemen gönderilir
+            for index, (question, slot) in enumerate(zip(questions, slots)):
+                answer, from_cache, ok = futures[slot].result()
+                yield {
+                    "index": index, "question": question, "game": unique_shards[slot].slug,
+                    "answer": answer, "cached": from_cache, "ok": ok,
+                }
+        finally:
+            # İstemci bağlantıyı keserse henüz başlamamış üretimleri iptal et
+            for future in futures:
+                future.cancel()
+
 # ----- Yardımcı Fonksiyonlar -----
 
+# Markdown dönüştürücüsü uzantılarıyla birlikte bir kez oluşturulur ve her çağrıda yeniden kullanılır
+# extensions: Markdown'a ek özellikler kazandırır (kod blokları, tablolar, listeler vb.)
+_markdown_converter = markdown.Markdown(
+    extensions=[
+        "markdown.extensions.fenced_code", # ```python ... ``` gibi kod blokları
+        "markdown.extensions.nl2br",      # Satır sonlarını <br> etiketine çevir
+        "markdown.extensions.tables",     # Markdown tablolarını HTML tablosuna çevir
+        "markdown.extensions.sane_lists", # İç içe ve düzgün listeler oluştur
+    ],
+    output_format="html5", # Modern HTML5 çıktısı üret
+)
+# Markdown nesnesi thread-safe değildir (dönüşüm sırasında iç durum tutar); aynı anda tek thread kullanır
+_markdown_lock = threading.Lock()
+# Aynı metin için en fazla bu kadar HTML sonucu bellekte tutulur
+MARKDOWN_CACHE_SIZE = int(os.getenv("MARKDOWN_CACHE_SIZE", "1024"))
+
+@functools.lru_cache(maxsize=MARKDOWN_CACHE_SIZE)
+def _render_markdown_cached(text):
+    """Metni HTML'e çevirir; aynı metin için sonuç önbellekten döner (metnin kendisi anahtardır)."""
+    with _markdown_lock, RAG_STAGE_SECONDS.time(stage="markdown_render"):
+        try:
+            return _markdown_converter.convert(text)
+        finally:
+            # Bir sonraki dönüşüm önceki metnin durumunu (örn: referans linkleri) görmesin
+            _markdown_converter.reset()
+
 def render_markdown_html(text):
     """
     Verilen metni Markdown formatından HTML formatına dönüştürür.
-    Bu fonksiyon Flask template'i içinde Jinja2 tarafından kullanılır.
+    Bot mesajları eklenirken bir kez çağrılır ve sonuç mesajla birlikte saklanır;
+    ayrıca aynı metin (örn: önbellekten gelen ortak yanıtlar) için sonuçlar bellekte tutulur.
     Args:
         text (str): Markdown formatındaki metin.
     Returns:
         str: HTML formatına dönüştürülmüş metin (veya hata durumunda düz metin).
     """
     try:
-        # Markdown kütüphanesini kullanarak dönüşüm yap
-        # extensions: Markdown'a ek özellikler kazandırır (kod blokları, tablolar, listeler vb.)
-        html = markdown.markdown(
-            text or "", # Metin None ise boş string kullan
-            extensions=[
-                "markdown.extensions.fenced_code", # ```python ... ``` gibi kod blokları
-                "markdown.extensions.nl2br",      # Satır sonlarını <br> etiketine çevir
-                "markdown.extensions.tables",     # Markdown tablolarını HTML tablosuna çevir
-                "markdown.extensions.sane_lists", # İç içe ve düzgün listeler oluştur
-            ],
-            output_format="html5", # Modern HTML5 çıktısı üret
-        )
-        return html
+        return _render_markdown_cached(text or "") # Metin None ise boş string kullan
     except Exception as e:
         # Markdown dönüşümü sırasında hata olursa logla ve güvenli bir HTML döndür
-        print(f"Markdown render hatası: {e}", file=sys.stderr)
+        RAG_ERRORS.inc(stage="markdown_render")
+        logger.error("Markdown render hatası: %s", e)
         import html as html_escaper
         # Metni HTML'den kaçış karakterleriyle güvenli hale getir ve <pre> içinde göster
         escaped_text = html_escaper.escape(text or "")
         return f"<p><i>(İçerik görüntülenirken hata oluştu)</i></p><pre>{escaped_text}</pre>"
 
+def message_html(message):
+    """
+    Bot mesajının saklanmış HTML halini döndürür; eski (HTML'i saklanmamış) mesajlar için bir kez hesaplar.
+    Args:
+        message (dict): role, content ve html alanlarını içeren mesaj.
+    Returns:
+        str: Mesajın HTML hali.
+    """
+    return message.get("html") or render_markdown_html(message.get("content"))
+
+def append_bot_message(session_id, text):
+    """
+    Bot yanıtını HTML'e bir kez çevirip metniyle birlikte sohbete ekler.
+    Args:
+        session_id (str): Sohbetin kimliği.
+        text (str): Bot yanıtı (Markdown).
+    Returns:
+        str: Yanıtın HTML hali (istemciye gönderilmek için).
+    """
+    html = render_markdown_html(text)
+    conversation_store.append_message(session_id, "bot", text, html=html)
+    return html
+
+def conversation_delta(session_id):
+    """
+    Sol menünün güncellenmesi için sadece bu sohbetin özetini döndürür (tüm liste yerine).
+    İstemci bu özeti listesine ekler veya mevcut kaydın başlığını günceller.
+    Args:
+        session_id (str): Sohbetin kimliği.
+    Returns:
+        dict | None: id, title, created_at ve created_ts alanlarını içeren özet.
+    """
+    try:
+        return conversation_store.get_summary(session_id)
+    except Exception as e:
+        logger.warning("Sohbet özeti alınamadı: %s", e)
+        return None
+
+def new_conversation_title(game_name=None):
+    """Yeni sohbetler için varsayılan başlığı döndürür (tek oyun varsa oyunun adıyla, yoksa oyundan bağımsız)."""
+    label = f"Yeni {game_name} Sohbeti" if game_name else "Yeni Sohbet"
+    return f"{label} {datetime.now().strftime('%d.%m %H:%M')}"
+
+def empty_message_response(game_name=None):
+    """Boş mesaj gönderildiğinde döndürülen yanıt (tek oyun varsa oyunun adıyla)."""
+    return jsonify({"response": f"Lütfen {game_name + ' hakkında ' if game_name else ''}bir soru sorun."})
+
+def add_user_message(session_id, user_message):
+    """
+    Kullanıcının mesajını sohbete ekler; bu sohbetteki ilk soruysa sohbet başlığını sorudan oluşturur.
+    Args:
+        session_id (str): Sohbetin kimliği.
+        user_message (str): Kullanıcının mesajı.
+    """
+    user_message_count = conversation_store.append_message(session_id, "user", user_message)
+    # Eğer bu, kullanıcının bu sohbetteki ilk mesajıysa, sohbet başlığını ayarla
+    if user_message_count == 1:
+        # Başlığı mesajın ilk 35 karakteri yap (çok uzunsa kısalt)
+        title = user_message[:35] + "..." if len(user_message) > 35 else user_message
+        conversation_store.set_title(session_id, title)
+        logger.debug("Başlık güncellendi: %r", title, extra={"session": session_id})
+
+def load_secret_key():
+    """
+    Oturum çerezlerini imzalamak için kullanılan gizli anahtarı döndürür.
+    Tüm gunicorn worker'larının (ve yeniden başlatmaların) aynı anahtarı kullanması gerekir; aksi halde
+    bir worker'ın verdiği oturum çerezini başka bir worker tanımaz. Öncelik FLASK_SECRET_KEY ortam
+    değişkenindedir; yoksa anahtar bir kez rastgele üretilip instance/secret_key dosyasında saklanır.
+    Returns:
+        bytes | str: Gizli anahtar.
+    """
+    env_key = os.getenv("FLASK_SECRET_KEY")
+    if env_key:
+        return env_key
+    key_path = os.path.join("instance", "secret_key")
+    os.makedirs("instance", exist_ok=True)
+    try:
+        # O_EXCL: Aynı anda başlayan worker'lardan sadece biri dosyayı oluşturabilir
+        fd = os.open(key_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(os.urandom(24))
+    except FileExistsError:
+        pass
+    # Dosya yeni oluşturulduysa içeriğin yazılmasını kısa süre bekle
+    for _ in range(50):
+        with open(key_path, "rb") as f:
+            key = f.read()
+        if len(key) == 24:
+            return key
+        time.sleep(0.01)
+    raise RuntimeError(f"Gizli anahtar dosyası okunamadı: {key_path}")
+
+def sse_event(event, data):
+    """
+    Server-Sent Events (SSE) formatında tek bir olay metni oluşturur.
+    Args:
+        event (str): Olay adı (örn: 'chunk', 'done', 'error').
+        data (dict): Olayla birlikte gönderilecek veri (JSON'a çevrilir).
+    Returns:
+        str: 'event:' ve 'data:' satırlarından oluşan, boş bir satırla biten olay metni.
+    """
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
 # ----- Flask Uygulama Kurulumu -----
 
 # Flask uygulamasını oluştur
 app = Flask(__name__)
-# Kullanıcı oturumlarını (session) şifrelemek ve güvende tutmak için rastgele bir gizli anahtar oluştur
-# Bu anahtar, sunucu her yeniden başladığında değişir (kalıcı olması için sabit bir değer de atanabilir ama daha az güvenli)
-app.secret_key = os.urandom(24)
-
-# Uygulama başlarken vektör veritabanını yükle
-print("Uygulama başlatılıyor, Monopoly veritabanı yükleniyor...")
-try:
-    vectordb = load_database() # Veritabanı yükleme fonksiyonunu çağır
-    print("Monopoly veritabanı hazır. Flask uygulaması çalışmaya hazır.")
-except SystemExit: # load_database hata verip çıkarsa uygulamayı başlatma
-    print("Veritabanı yüklenemediği için Flask uygulaması başlatılamıyor.", file=sys.stderr)
-    sys.exit(1) # Uygulamayı başlatmadan çık
-
-# Sohbet geçmişlerini sunucu hafızasında (RAM) tutmak için bir sözlük yapısı
-# Basit uygulamalar için yeterli, ancak sunucu yeniden başlarsa tüm sohbetler kaybolur.
-# Kalıcı depolama için Redis, veritabanı vb. çözümler gerekir.
-conversations = {}
+# Kullanıcı oturumlarını (session) imzalamak ve güvende tutmak için gizli anahtar
+# Tüm worker'lar ve yeniden başlatmalar aynı anahtarı kullanır (bkz. load_secret_key)
+app.secret_key = load_secret_key()
+
+# ----- Statik Dosyalar ve Yanıt Sıkıştırma -----
+
+# İçerik özetli statik dosyaların tarayıcıda önbellekte tutulma süresi (saniye; adres içerikle değiştiği için uzun olabilir)
+ASSET_MAX_AGE = int(os.getenv("ASSET_MAX_AGE", str(365 * 24 * 3600)))
+# Bu boyutun (bayt) üzerindeki JSON ve HTML yanıtları gönderilmeden önce sıkıştırılır (0: kapalı)
+RESPONSE_COMPRESS_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESS_MIN_BYTES", "1024"))
+# Yanıt sıkıştırmasında gzip seviyesi (1: en hızlı, 9: en küçük)
+RESPONSE_COMPRESS_LEVEL = int(os.getenv("RESPONSE_COMPRESS_LEVEL", "6"))
+# Anında sıkıştırılacak yanıt türleri (akışlı yanıtlar, SSE ve statik dosyalar hariç)
+COMPRESSIBLE_MIMETYPES = ("application/json", "text/html")
+
+@functools.lru_cache(maxsize=1)
+def asset_manifest():
+    """
+    static/ klasöründeki dosyaların içerik özetli kopyalarını (ve .gz/.br sürümlerini) static/dist/ altına yazar ve
+    {dosya: özetli ad} eşlemesini döndürür. Süreç başına ilk sayfada bir kez çalışır; içeriği değişmeyen dosyalar
+    tekrar yazılmaz. Klasör yazılamazsa dosyalar /static/ altından olduğu gibi sunulur.
+    """
+    try:
+        manifest = build_assets(app.static_folder)
+        logger.info(f"{len(manifest)} statik dosya içerik özetli adlarla hazırlandı.")
+        return manifest
+    except OSError as e:
+        logger.warning(f"Statik dosyalar hazırlanamadı, özetsiz adlarla sunulacak: {e}")
+        return {}
+
+@app.template_global()
+def asset_url(filename):
+    """
+    Şablonlarda statik dosya adresi: içerik özetli adres (/assets/...), yoksa /static/... adresi.
+    Üçüncü taraf bir kütüphane henüz static/vendor/ altına indirilmediyse sabitlenmiş CDN adresi döner.
+    """
+    hashed = asset_manifest().get(filename)
+    if hashed:
+        return url_for("hashed_asset", filename=hashed)
+    if filename in VENDOR_ASSETS and not os.path.exists(os.path.join(app.static_folder, filename)):
+        return VENDOR_ASSETS[filename]
+    return url_for("static", filename=filename)
+
+@app.route("/assets/<path:filename>")
+def hashed_asset(filename):
+    """
+    İçerik özetli statik dosyaları bir yıllık, değişmez (immutable) önbellek başlığıyla sunar.
+    İstemci destekliyorsa önceden sıkıştırılmış .br veya .gz sürümü gönderilir (istek başına sıkıştırma yapılmaz).
+    """
+    path = safe_join(os.path.join(app.static_folder, DIST_DIRNAME), filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+    served, encoding = select_encoding(request.headers.get("Accept-Encoding"), path)
+    response = send_file(served, mimetype=mimetypes.guess_type(path)[0] or "application/octet-stream", max_age=ASSET_MAX_AGE)
+    response.headers["Cache-Control"] = f"public, max-age={ASSET_MAX_AGE}, immutable"
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    return response
+
+@app.after_request
+def compress_response(response):
+    """
+    RESPONSE_COMPRESS_MIN_BYTES'tan büyük JSON ve HTML yanıtlarını istemci destekliyorsa sıkıştırır
+    (örn: sohbet listesini taşıyan /send_message yanıtı). Akışlı yanıtlara (SSE, toplu yanıt) dokunulmaz.
+    """
+    if (
+        RESPONSE_COMPRESS_MIN_BYTES <= 0
+        or response.direct_passthrough
+        or response.is_streamed
+        or response.status_code < 200
+        or response.status_code in (204, 304)
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+    ):
+        return response
+    response.vary.add("Accept-Encoding")
+    data = response.get_data()
+    if len(data) < RESPONSE_COMPRESS_MIN_BYTES:
+        return response
+    body, encoding = compress_body(data, request.headers.get("Accept-Encoding"), RESPONSE_COMPRESS_LEVEL)
+    if encoding:
+        response.set_data(body)
+        response.headers["Content-Encoding"] = encoding
+    return response
+
+# ----- Başlatma (Isınma) -----
+
+# Modülün import edilmesi hızlıdır: Gemini/embedding istemcileri, Chroma ve indeksler import sırasında yüklenmez.
+# Yükleme iki aşamalıdır:
+#   1. preload_read_only_data() ve preload_modules(): Sadece okunan dosyalar (NumPy indeksi, BM25) ve ağır kütüphanelerin
+#      import'u. Ağ bağlantısı veya thread açmadıkları için gunicorn --preload ile ana süreçte bir kez yapılabilir;
+#      fork edilen worker'lar bu belleği paylaşır.
+#   2. warm_up(): Her süreçte (fork sonrası) API istemcilerini oluşturur; NumPy indeksi olmayan oyunlar için Chroma'yı açar.
+# Hazır olduktan sonra her süreç CURRENT dosyasını izler; create_database.py yeni bir anlık görüntü yayınladığında
+# (veya /admin/reload çağrıldığında) yeni veriler arka planda yüklenip tek atamayla değiştirilir (bkz. reload_snapshot).
+# gunicorn'da ısınma post_fork kancasıyla worker açılır açılmaz arka planda başlar (bkz. gunicorn.conf.py);
+# başka sunucularda ilk istekte başlar. Hazır olana kadar /readyz 503 döner ve soru endpoint'leri kısa süre bekler.
+model = None          # Gemini modeli
+shards = {}           # Oyun kimliği -> GameShard (vektör deposu, BM25 indeksi, anlamsal önbellek)
+game_router = None    # Soruları oyunlara yönlendiren yerel sınıflandırıcı
+embedding_client = None # Tüm oyunların paylaştığı embedding istemcisi (yeni anlık görüntüye geçerken tekrar kullanılır)
+
+# Soru endpoint'lerinin ısınmanın bitmesini en fazla bekleme süresi (saniye); aşılırsa 503 döner
+WARMUP_WAIT_TIMEOUT = float(os.getenv("WARMUP_WAIT_TIMEOUT", "10"))
+# Isınma başarısız olursa (örn: veritabanı henüz oluşturulmadı) tekrar deneme aralığı (saniye)
+WARMUP_RETRY_SECONDS = float(os.getenv("WARMUP_RETRY_SECONDS", "30"))
+
+_warm_up_lock = threading.RLock()
+_ready = threading.Event()
+# Isınma durumu: state -> "starting", "ready" veya "failed"; pid -> ısınmayı başlatan süreç
+_startup = {"state": "starting", "error": None, "pid": None, "read_only_loaded": False, "seconds": None}
+
+# Yeni anlık görüntü için CURRENT dosyasının kontrol aralığı (saniye); 0 ise sadece /admin/reload ile geçilir
+SNAPSHOT_POLL_SECONDS = float(os.getenv("SNAPSHOT_POLL_SECONDS", "10"))
+# /admin/reload için "Authorization: Bearer <token>" anahtarı; ayarlanmamışsa endpoint kapalıdır
+ADMIN_API_TOKEN = os.getenv("ADMIN_API_TOKEN", "")
+
+# Aynı anda tek bir yeniden yükleme yapılır (izleyici thread ve yönetici isteği çakışmasın)
+_reload_lock = threading.Lock()
+# Kullanılan anlık görüntü: name -> CURRENT'taki ad (eski düzende None), watcher_pid -> izleyiciyi başlatan süreç
+_snapshot = {"name": None, "loaded_at": None, "reloads": 0, "error": None, "failed": None, "watcher_pid": None}
+
+def preload_read_only_data():
+    """
+    Her oyunun sadece okunan indeks dosyalarını (NumPy vektör indeksi ve BM25) yükler ve oyun yönlendiricisini kurar.
+    Fork-safe'tir: ağ bağlantısı, thread veya açık veritabanı bağlantısı bırakmaz; bu yüzden gunicorn --preload ile
+    ana süreçte çağrılabilir ve worker'lar bellek eşlemeli matrisleri ve belge listelerini kopyalamadan paylaşır.
+    Birden fazla çağrılması güvenlidir.
+    Raises:
+        RuntimeError: Veritabanı bulunamazsa.
+    """
+    global shards, game_router
+    with _warm_up_lock:
+        if _startup["read_only_loaded"]:
+            return
+        name, path = current_snapshot(DB_PATH)
+        loaded = load_game_shards(path)
+        game_router = create_game_router(loaded)
+        shards = loaded
+        _snapshot.update(name=name, loaded_at=datetime.now().isoformat(timespec="seconds"))
+        _startup["read_only_loaded"] = True
+
+def preload_modules():
+    """
+    API istemcilerinin kütüphanelerini istemci oluşturmadan import eder (google.generativeai, LangChain Google
+    entegrasyonu; NumPy indeksi yoksa Chroma). Import işlemi bağlantı açmadığı için gunicorn --preload ile ana
+    süreçte yapılabilir; böylece worker'lardaki ısınma sadece istemcilerin oluşturulmasından ibaret kalır.
+    """
+    import google.generativeai # noqa: F401
+    import langchain_google_genai # noqa: F401
+    if not all(isinstance(shard.vectordb, NumpyVectorIndex) for shard in shards.values()):
+        import langchain_community.vectorstores # noqa: F401
+
+def warm_up():
+    """
+    Uygulamayı soru yanıtlamaya hazır hale getirir: sadece okunan indeksleri yükler (yüklenmediyse),
+    Gemini ve embedding istemcilerini oluşturur, NumPy indeksi yoksa Chroma'yı açar ve anlık görüntü izleyicisini
+    başlatır. Birden fazla çağrılması güvenlidir. Hata durumunda programı durdurmaz; hata /readyz'de raporlanır.
+    Returns:
+        bool: Uygulama hazırsa True.
+    """
+    global model, embedding_client
+    with _warm_up_lock:
+        if _ready.is_set():
+            return True
+        started = time.perf_counter()
+        logger.info("Uygulama ısınıyor, oyun veritabanları yükleniyor...")
+        try:
+            if _startup["read_only_loaded"] and current_snapshot(DB_PATH)[0] != _snapshot["name"]:
+                # Ana süreçte (--preload) yüklenen anlık görüntü bu worker açılana kadar eskidi; güncelini yükle
+                _startup["read_only_loaded"] = False
+            preload_read_only_data()
+            # Tüm oyunlar aynı embedding modelini (ve istemcisini) paylaşır
+            embedding_client = create_embedding_function()
+            open_vector_stores(shards, embedding_client)
+            model = create_model()
+        except Exception as e:
+            _startup.update(state="failed", error=str(e))
+            logger.exception("Uygulama hazırlanamadı: %s", e)
+            return False
+        _startup.update(state="ready", error=None, seconds=round(time.perf_counter() - started, 3))
+        _ready.set()
+        logger.info("Oyun veritabanları hazır. Flask uygulaması çalışmaya hazır.", extra={"warmup_seconds": _startup["seconds"], "games": len(shards)})
+    start_snapshot_watcher()
+    return True
+
+def _warm_up_until_ready():
+    """Arka plan thread'i: ısınma başarılı olana kadar WARMUP_RETRY_SECONDS aralıkla tekrar dener."""
+    while not warm_up():
+        time.sleep(WARMUP_RETRY_SECONDS)
+
+def start_warm_up():
+    """
+    Isınmayı bu süreçte arka planda başlatır (zaten başlamışsa bir şey yapmaz). Fork sonrası worker'da
+    tekrar başlatılabilmesi için hangi süreçte başlatıldığı tutulur. gunicorn'un post_fork kancasından çağrılır.
+    """
+    with _warm_up_lock:
+        if _startup["pid"] == os.getpid():
+            return
+        _startup["pid"] = os.getpid()
+    threading.Thread(target=_warm_up_until_ready, name="warm-up", daemon=True).start()
+
+def reload_snapshot(force=False):
+    """
+    CURRENT yeni bir anlık görüntüyü gösteriyorsa (veya force ise) oyunların verilerini yükler, vektör depolarını açıp
+    ısıtır ve oyunları tek bir atamayla değiştirir. Yükleme sırasında istekler eski anlık görüntüyle karşılanmaya
+    devam eder; devam eden istekler seçtikleri GameShard nesnesini tuttukları için eski veriyle tamamlanır.
+    Yeniden indekslenmemiş oyunların (sürümü aynı kalan) anlamsal önbellekleri yeni anlık görüntüye taşınır.
+    Yüklenemeyen anlık görüntü hatırlanır ve CURRENT değişene kadar (force olmadıkça) tekrar denenmez.
+    Args:
+        force (bool): True ise anlık görüntü değişmemiş veya daha önce yüklenemediyse de yeniden yüklenir.
+    Returns:
+        dict: {"snapshot": kullanılan anlık görüntü, "previous": önceki, "reloaded": değiştirildiyse True, "seconds": süre};
+              daha önce yüklenemediği için atlanan anlık görüntüde "error" alanı da bulunur.
+    Raises:
+        RuntimeError: Uygulama henüz hazır değilse veya yeni anlık görüntü yüklenemezse (eski veriler kullanılmaya devam eder).
+    """
+    global shards, game_router
+    if not _ready.is_set():
+        raise RuntimeError("Uygulama henüz hazır değil; ısınma güncel anlık görüntüyü yükleyecek.")
+    with _reload_lock:
+        name, path = current_snapshot(DB_PATH)
+        previous = _snapshot["name"]
+        if name == previous and not force:
+            if _snapshot["failed"] is not None:
+                # CURRENT yüklenemeyen anlık görüntüden kullanılana geri döndürüldü
+                _snapshot.update(failed=None, error=None)
+            return {"snapshot": name, "previous": previous, "reloaded": False, "seconds": 0.0}
+        if name == _snapshot["failed"] and not force:
+            # Bu anlık görüntü daha önce yüklenemedi; her kontrolde tekrar denenip hata loglanmasın
+            return {"snapshot": previous, "previous": previous, "reloaded": False, "seconds": 0.0, "error": _snapshot["error"]}
+        started = time.perf_counter()
+        logger.info("Yeni anlık görüntü yükleniyor: %s (kullanılan: %s)", name or DB_PATH, previous or DB_PATH)
+        try:
+            loaded = load_game_shards(path)
+            router = create_game_router(loaded)
+            open_vector_stores(loaded, embedding_client)
+            prefault_vector_indexes(loaded)
+        except Exception as e:
+            SNAPSHOT_RELOADS.inc(result="failed")
+            _snapshot.update(error=str(e), failed=name)
+            logger.exception("Yeni anlık görüntü yüklenemedi, eski veriler kullanılmaya devam ediliyor: %s", e)
+            raise RuntimeError(f"Anlık görüntü '{name or DB_PATH}' yüklenemedi: {e}") from e
+        for slug, shard in loaded.items():
+            old = shards.get(slug)
+            version = get_index_version(shard.db_path)
+            if old is not None and version is not None and get_index_version(old.db_path) == version:
+                cache = old.semantic_cache
+                cache.version_fn = shard.semantic_cache.version_fn # Sürüm artık yeni klasörden okunur
+                shard.semantic_cache = cache
+        with _warm_up_lock:
+            shards, game_router = loaded, router
+            _snapshot.update(name=name, loaded_at=datetime.now().isoformat(timespec="seconds"), error=None, failed=None, reloads=_snapshot["reloads"] + 1)
+        seconds = round(time.perf_counter() - started, 3)
+        SNAPSHOT_RELOADS.inc(result="ok")
+        logger.info("Anlık görüntü değiştirildi.", extra={"snapshot": name, "previous": previous, "reload_seconds": seconds, "games": len(loaded)})
+        return {"snapshot": name, "previous": previous, "reloaded": True, "seconds": seconds}
+
+def _watch_snapshots():
+    """Arka plan thread'i: CURRENT dosyasını SNAPSHOT_POLL_SECONDS aralıkla kontrol eder ve değiştiyse yeniden yükler."""
+    while True:
+        time.sleep(SNAPSHOT_POLL_SECONDS)
+        try:
+            reload_snapshot()
+        except RuntimeError:
+            pass # Hata loglandı; aynı anlık görüntü CURRENT değişene kadar tekrar denenmez
+
+def start_snapshot_watcher():
+    """
+    Bu süreçte CURRENT izleyicisini başlatır (SNAPSHOT_POLL_SECONDS 0 ise veya zaten başladıysa bir şey yapmaz).
+    Fork sonrası worker'da tekrar başlatılabilmesi için hangi süreçte başlatıldığı tutulur.
+    """
+    if SNAPSHOT_POLL_SECONDS <= 0:
+        return
+    with _reload_lock:
+        if _snapshot["watcher_pid"] == os.getpid():
+            return
+        _snapshot["watcher_pid"] = os.getpid()
+    threading.Thread(target=_watch_snapshots, name="snapshot-watcher", daemon=True).start()
+
+def wait_until_ready(timeout=WARMUP_WAIT_TIMEOUT):
+    """
+    Isınmayı (başlamadıysa) başlatır ve bitmesini en fazla timeout saniye bekler.
+    Returns:
+        bool: Uygulama hazırsa True.
+    """
+    if _ready.is_set():
+        return True
+    start_warm_up()
+    return _ready.wait(timeout)
+
+def available_games():
+    """
+    Oyun seçici için oyunların listesini ada göre sıralı döndürür. Oyunlar henüz yüklenmediyse (ısınma sürüyor)
+    katalog dosyasından okunur.
+    Returns:
+        list[dict]: slug ve name alanlarını içeren kayıtlar.
+    """
+    if shards:
+        games = {slug: shard.name for slug, shard in shards.items()}
+    else:
+        try:
+            games = {slug: info.get("name") or game_title(slug) for slug, info in load_catalog(current_snapshot(DB_PATH)[1]).items()}
+        except (OSError, ValueError):
+            games = {}
+    return [{"slug": slug, "name": name} for slug, name in sorted(games.items(), key=lambda item: item[1])]
+
+def single_game_name():
+    """Veritabanında tek oyun varsa adını, birden fazla oyun varsa (veya henüz bilinmiyorsa) None döndürür."""
+    games = available_games()
+    return games[0]["name"] if len(games) == 1 else None
+
+def requested_game(data):
+    """İstek gövdesindeki oyun seçimini ("game") normalleştirir; seçim yoksa veya "auto" ise None döner."""
+    game = str((data or {}).get("game") or "").strip().lower()
+    return None if game in ("", "auto") else game
+
+def unknown_game_response(game):
+    """İstekte veritabanında olmayan bir oyun seçildiğinde döndürülen 400 yanıtı."""
+    response = jsonify({"response": f"'{game}' adlı oyun bulunamadı. Mevcut oyunlar: {', '.join(sorted(shards))}."})
+    response.status_code = 400
+    return response
+
+def admit_question(session_id):
+    """
+    Soruyu kabul kontrolünden geçirir: önce oturumun soru hızı sınırı, sonra işlem yeri (gerekirse son tarihe kadar sırada beklenir).
+    Args:
+        session_id (str): Soruyu gönderen oturum.
+    Returns:
+        _Ticket: İşlem yeri; soru yanıtlanınca release() çağrılmalıdır (veya `with` ile kullanılmalıdır).
+    Raises:
+        RateLimitedError: Oturum hız sınırını aştıysa.
+        OverloadedError: Soru son tarihinden önce işlenemeyecekse.
+    """
+    try:
+        session_limiter.acquire(session_id)
+        with RAG_STAGE_SECONDS.time(stage="admission_wait"):
+            return admission_queue.admit()
+    except RateLimitedError:
+        ADMISSION_REJECTIONS.inc(reason="rate_limited")
+        raise
+    except OverloadedError as e:
+        ADMISSION_REJECTIONS.inc(reason=e.reason)
+        raise
+
+def rejected_response(error):
+    """
+    Kabul kontrolünün reddettiği soru için hızlı ve biçimli yanıt: hız sınırında 429, aşırı yükte 503.
+    Gövdedeki "retry_after" ve Retry-After başlığı istemcinin ne zaman tekrar deneyebileceğini bildirir.
+    """
+    seconds = max(1, math.ceil(error.retry_after))
+    rate_limited = isinstance(error, RateLimitedError)
+    message = (RATE_LIMITED_MESSAGE if rate_limited else OVERLOADED_MESSAGE).format(seconds=seconds)
+    logger.warning("Soru reddedildi: %s", error, extra={"status": 429 if rate_limited else 503})
+    response = jsonify({"response": message, "retry_after": seconds})
+    response.status_code = 429 if rate_limited else 503
+    response.headers["Retry-After"] = str(seconds)
+    return response
+
+def not_ready_response():
+    """Uygulama henüz hazır değilken soru endpoint'lerinin döndürdüğü 503 yanıtı."""
+    response = jsonify({"response": "Asistan henüz hazırlanıyor. Lütfen birkaç saniye sonra tekrar deneyin."})
+    response.status_code = 503
+    response.headers["Retry-After"] = "5"
+    return response
+
+# Sohbet geçmişlerini tutan depo (varsayılan: SQLite, tüm worker'lar arasında paylaşılır ve yeniden başlatmada kaybolmaz)
+# CONVERSATION_STORE=memory ile eski bellek içi davranışa dönülebilir. Uzun süre kullanılmayan sohbetler otomatik silinir.
+conversation_store = create_conversation_store()
+# Sol menüde bir seferde gösterilecek sohbet sayısı (fazlası "Daha fazla" ile yüklenir)
+SIDEBAR_PAGE_SIZE = int(os.getenv("SIDEBAR_PAGE_SIZE", "50"))
 
 # ----- Flask Rotaları (Web Sayfaları ve API Endpoints) -----
 
@@ -274,46 +1885,49 @@ def index():
     # Kullanıcının tarayıcısında kayıtlı session ID'sini al
     session_id = session.get("session_id")
 
-    # Eğer session ID yoksa (ilk ziyaret) veya hafızadaki sohbetlerde bu ID yoksa (sunucu yeniden başlamış olabilir)
-    if not session_id or session_id not in conversations:
+    # Oyun seçici için oyunlar; tek oyun varsa sayfa başlıkları ve yeni sohbet başlığı oyunun adıyla oluşturulur
+    games = available_games()
+    game_name = games[0]["name"] if len(games) == 1 else None
+
+    # Mevcut sohbeti depodan al (session ID yoksa veya sohbet silinmişse None döner)
+    current_conversation = conversation_store.get(session_id) if session_id else None
+
+    # Eğer session ID yoksa (ilk ziyaret) veya depoda bu ID yoksa (sohbet süresi dolup silinmiş olabilir)
+    if current_conversation is None:
         # Yeni bir benzersiz session ID oluştur
         session_id = str(uuid.uuid4())
         # Bu ID'yi kullanıcının tarayıcısına (cookie olarak) kaydet
         session["session_id"] = session_id
-        # Sunucu hafızasında bu yeni ID için boş bir sohbet kaydı oluştur
-        conversations[session_id] = {
-            "id": session_id,
-            "title": f"Yeni Monopoly Oyunu {datetime.now().strftime('%d.%m %H:%M')}", # Varsayılan başlık
-            "created_at": datetime.now().strftime("%d.%m.%Y %H:%M"),
-            "messages": [], # Mesaj listesi başlangıçta boş
-        }
-        print(f"Yeni oturum başlatıldı ve ayarlandı: {session_id}")
-
-    # Mevcut veya yeni oluşturulan sohbet verisini hafızadan al
-    current_conversation = conversations.get(session_id)
-
-    # Sol menüde gösterilecek tüm sohbetlerin listesini al ve tarihe göre (en yeni üste) sırala
-    all_conversations = sorted(
-        list(conversations.values()),
-        key=lambda c: datetime.strptime(c["created_at"], "%d.%m.%Y %H:%M"), # Sıralama için tarih formatını parse et
-        reverse=True # En yeni en üstte olacak şekilde ters sırala
-    )
+        # Depoda bu yeni ID için boş bir sohbet kaydı oluştur
+        current_conversation = conversation_store.create(session_id, new_conversation_title(game_name))
+        current_conversation["messages"] = [] # Mesaj listesi başlangıçta boş
+        logger.info("Yeni oturum başlatıldı.", extra={"session": session_id})
+
+    # Sol menüde gösterilecek sohbetlerin ilk sayfasını al (depo tarihe göre en yeni üstte, indeksten sıralı döndürür)
+    # Daha eski sohbetler /conversations endpoint'inden sayfa sayfa yüklenir
+    all_conversations, next_cursor = conversation_store.list_summaries(limit=SIDEBAR_PAGE_SIZE)
 
-    # HTML template'ine gönderilecek sayfa başlıkları ve diğer bilgiler
+    # HTML template'ine gönderilecek sayfa başlıkları ve diğer bilgiler (tek oyun varsa başlıkta oyunun adı geçer)
     page_config = {
-        "page_title": "Monopoly Yardımcı Asistanı",
-        "header_title": "Monopoly Yardımcı Asistanı",
-        "header_subtitle": "Monopoly kuralları ve oyunu hakkında sorularınızı yanıtlar."
+        "page_title": f"{game_name or 'Masa Oyunu'} Yardımcı Asistanı",
+        "header_title": f"{game_name or 'Masa Oyunu'} Yardımcı Asistanı",
+        "header_subtitle": f"{game_name} kuralları ve oyunu hakkında sorularınızı yanıtlar." if game_name
+                           else "Masa oyunlarının kuralları hakkında sorularınızı yanıtlar.",
+        "game_label": game_name or "Oyun", # Karşılama mesajı ve soru kutusundaki oyun adı
     }
 
     # Flask'ın render_template fonksiyonu ile index.html dosyasını oluştur ve tarayıcıya gönder
-    # Template'e çeşitli değişkenler ve fonksiyonlar (renderMarkdown gibi) gönderilir
+    # Template'e çeşitli değişkenler ve fonksiyonlar (messageHtml gibi) gönderilir
     return render_template(
         "index.html",
         conversation_history=current_conversation.get("messages", []), # Mevcut sohbetin mesajları
-        conversations=all_conversations, # Sol menü için tüm sohbet başlıkları
+        conversations=all_conversations, # Sol menü için sohbet başlıklarının ilk sayfası
+        conversations_next_cursor=next_cursor, # "Daha fazla" ile sonraki sayfayı yüklemek için
         current_session_id=session_id, # Aktif sohbeti vurgulamak için
-        renderMarkdown=render_markdown_html, # Template'in Markdown'ı HTML'e çevirmesi için
+        messageHtml=message_html, # Bot mesajlarının saklanmış HTML hali (Markdown sayfa yüklenirken tekrar işlenmez)
+        games=games, # Oyun seçici (birden fazla oyun varsa gösterilir)
+        selected_game=session.get("game_choice", "auto"), # Kullanıcının son seçimi ("auto": soruya göre otomatik)
+        prefetch_enabled=PREFETCH_ENABLED, # Sayfa kullanıcı yazarken /prefetch'i çağırsın mı
         **page_config # page_config sözlüğündeki tüm anahtar-değerleri template'e değişken olarak gönderir
     )
 
@@ -327,10 +1941,10 @@ def send_message():
     # Kullanıcının session ID'sini al
     session_id = session.get("session_id")
     # Geçerli bir session ID var mı kontrol et (güvenlik ve tutarlılık için)
-    if not session_id or session_id not in conversations:
-         print(f"Hata: /send_message - Geçersiz veya kayıp session ({session_id}).", file=sys.stderr)
+    if not session_id or not conversation_store.exists(session_id):
+         logger.warning("/send_message - Geçersiz veya kayıp session.", extra={"session": session_id})
          # İstemciye (JavaScript) hata mesajı döndür
-         return jsonify({"response": "Oturum bulunamadı veya süresi doldu. Lütfen sayfayı yenileyin.", "conversations": []}), 400 # 400 Bad Request HTTP durum kodu
+         return jsonify({"response": "Oturum bulunamadı veya süresi doldu. Lütfen sayfayı yenileyin."}), 400 # 400 Bad Request HTTP durum kodu
 
     # Gelen isteği ve yanıt üretimini try-except bloğu içine alarak hataları yakala
     try:
@@ -341,66 +1955,211 @@ def send_message():
 
         # Mesaj boşsa, kullanıcıyı uyar ve işlemi durdur
         if not user_message:
-            all_conversations = sorted(list(conversations.values()), key=lambda c: datetime.strptime(c["created_at"], "%d.%m.%Y %H:%M"), reverse=True)
-            return jsonify({"response": "Lütfen Monopoly hakkında bir soru sorun.", "conversations": all_conversations})
+            return empty_message_response(single_game_name())
+
+        # Veritabanı ve model henüz hazır değilse soruyu kaydetmeden 503 döndür (istemci tekrar deneyebilir)
+        if not wait_until_ready():
+            return not_ready_response()
 
-        # Kullanıcının mesajını ilgili session'ın mesaj listesine ekle
-        conversations[session_id]["messages"].append({"role": "user", "content": user_message})
-        print(f"Oturum {session_id}: Soru: '{user_message}'")
+        # Soruyu ilgili oyuna yönlendir (kullanıcının seçimi, yoksa yerel sınıflandırıcı, yoksa sohbetin son oyunu)
+        game = requested_game(data)
+        try:
+            shard = select_shard(user_message, game, session.get("game"))
+        except KeyError:
+            return unknown_game_response(game)
 
-        # Eğer bu, kullanıcının bu sohbetteki ilk mesajıysa, sohbet başlığını ayarla
-        # (Listede 'user' rolüne sahip mesaj sayısını kontrol et)
-        if len([msg for msg in conversations[session_id]["messages"] if msg['role'] == 'user']) == 1:
-            # Başlığı mesajın ilk 35 karakteri yap (çok uzunsa kısalt)
-            title = user_message[:35] + "..." if len(user_message) > 35 else user_message
-            conversations[session_id]["title"] = title
-            print(f"Oturum {session_id}: Başlık güncellendi: '{title}'")
+        # Kabul kontrolü: hız sınırını aşan veya zamanında işlenemeyecek soru sohbete eklenmeden 429/503 ile reddedilir
+        try:
+            ticket = admit_question(session_id)
+        except (RateLimitedError, OverloadedError) as e:
+            return rejected_response(e)
+        session["game"] = shard.slug
+        session["game_choice"] = game or "auto"
 
-        # RAG fonksiyonunu çağırarak bot yanıtını al
-        bot_response_text = get_answer(user_message, vectordb, top_k=5) # Veritabanından en fazla 5 ilgili parça al
+        with ticket:
+            # Kullanıcının mesajını ilgili sohbete ekle (ilk mesajsa sohbet başlığı da ayarlanır)
+            add_user_message(session_id, user_message)
+            logger.info("Soru alındı.", extra={"session": session_id, "question": user_message, "game": shard.slug})
 
-        # Bot yanıtını ilgili session'ın mesaj listesine ekle
-        conversations[session_id]["messages"].append({"role": "bot", "content": bot_response_text})
-        print(f"Oturum {session_id}: Yanıt eklendi.")
+            # Kullanıcı yazarken yapılan önceden arama soruya yeterince benziyorsa embedding ve arama atlanır
+            prefetched = take_prefetched(session_id, user_message, shard)
+            # RAG fonksiyonunu çağırarak bot yanıtını al (sadece seçilen oyunun veritabanında aranır)
+            bot_response_text = get_answer(user_message, shard, top_k=TOP_K, prefetched=prefetched) # Veritabanından en fazla TOP_K ilgili parça al
 
-        # Güncel sohbet listesini (sol menü için) hazırla
-        all_conversations = sorted(list(conversations.values()), key=lambda c: datetime.strptime(c["created_at"], "%d.%m.%Y %H:%M"), reverse=True)
+        # Bot yanıtını (bir kez HTML'e çevrilmiş haliyle) ilgili sohbete ekle
+        bot_response_html = append_bot_message(session_id, bot_response_text)
+        logger.debug("Yanıt eklendi.", extra={"session": session_id})
 
-        # Yanıtı (düz metin olarak) ve güncel sohbet listesini JSON formatında döndür
-        # JavaScript bu JSON'ı alıp arayüzü güncelleyecek
-        return jsonify({"response": bot_response_text, "conversations": all_conversations})
+        # Yanıtı, eklenen mesajı ve sadece bu sohbetin özetini (sol menü için) JSON formatında döndür
+        # Tüm sohbet listesi gönderilmez; JavaScript bu özetle listeyi günceller
+        return jsonify({
+            "response": bot_response_text,
+            "message": {"role": "bot", "content": bot_response_text, "html": bot_response_html},
+            "conversation": conversation_delta(session_id),
+            "game": shard.slug,
+        })
 
     except Exception as e:
         # Beklenmedik bir hata oluşursa logla ve genel bir hata mesajı döndür
-        print(f"Hata: /send_message sırasında beklenmedik hata: {e}", file=sys.stderr)
-        traceback.print_exc() # Hatanın tam izini yazdır
-        current_conversations = []
-        try: # Hata olsa bile mevcut sohbet listesini göndermeyi dene
-            current_conversations = sorted(list(conversations.values()), key=lambda c: datetime.strptime(c["created_at"], "%d.%m.%Y %H:%M"), reverse=True)
-        except Exception: pass # Liste alınamazsa boş gönder
+        RAG_ERRORS.inc(stage="request")
+        logger.exception("/send_message sırasında beklenmedik hata: %s", e)
         # Kullanıcıya teknik olmayan bir hata mesajı göster
         return jsonify({
                 "response": "Üzgünüm, sorunuzu yanıtlarken beklenmedik bir sunucu hatası oluştu. Lütfen tekrar deneyin veya daha sonra tekrar gelin.",
-                "conversations": current_conversations,
             }), 500 # 500 Internal Server Error HTTP durum kodu
 
+# Akışlı (streaming) mesaj gönderme API endpoint'i (JavaScript tarafından POST isteği ile çağrılır)
+@app.route("/send_message_stream", methods=["POST"])
+def send_message_stream():
+    """
+    /send_message ile aynı işi yapar, ancak yanıtı Gemini ürettikçe Server-Sent Events (SSE)
+    olarak parça parça gönderir. Olaylar:
+      - 'chunk': {"text": "..."}  -> Yanıtın bir sonraki parçası
+      - 'done':  {"response": "...", "html": "...", "conversation": {...}, "game": "..."} -> Akış bitti; tam yanıt, HTML hali,
+                 sol menü için bu sohbetin özeti ve sorunun yönlendirildiği oyun
+      - 'error': {"response": "..."} -> Beklenmedik sunucu hatası
+    Akış bittiğinde tam yanıt sohbet geçmişine eklenir.
+    """
+    # Kullanıcının session ID'sini al (akış başladıktan sonra request/session'a erişmemek için önceden okunur)
+    session_id = session.get("session_id")
+    if not session_id or not conversation_store.exists(session_id):
+         logger.warning("/send_message_stream - Geçersiz veya kayıp session.", extra={"session": session_id})
+         return jsonify({"response": "Oturum bulunamadı veya süresi doldu. Lütfen sayfayı yenileyin."}), 400
+
+    data = request.get_json(silent=True) or {}
+    user_message = (data.get("message") or "").strip()
+    if not user_message:
+        return empty_message_response(single_game_name())
+    if not wait_until_ready():
+        return not_ready_response()
+    # Soruyu ilgili oyuna yönlendir (/send_message ile aynı)
+    game = requested_game(data)
+    try:
+        shard = select_shard(user_message, game, session.get("game"))
+    except KeyError:
+        return unknown_game_response(game)
+    # Kabul kontrolü (/send_message ile aynı); işlem yeri akış bitince veya bağlantı kapanınca bırakılır
+    try:
+        ticket = admit_question(session_id)
+    except (RateLimitedError, OverloadedError) as e:
+        return rejected_response(e)
+    session["game"] = shard.slug
+    session["game_choice"] = game or "auto"
+
+    # Kullanıcının mesajını ekle ve gerekirse sohbet başlığını ayarla (/send_message ile aynı)
+    add_user_message(session_id, user_message)
+    logger.info("Soru alındı (akış).", extra={"session": session_id, "question": user_message, "game": shard.slug})
+    prefetched = take_prefetched(session_id, user_message, shard)
+
+    def generate():
+        parts = []
+        try:
+            # Gemini'den gelen her parçayı anında istemciye ilet
+            for text in stream_answer(user_message, shard, top_k=TOP_K, prefetched=prefetched):
+                parts.append(text)
+                yield sse_event("chunk", {"text": text})
+
+            # Akış bitti: tam yanıtı sohbet geçmişine ekle ve sol menü için bu sohbetin özetini gönder
+            bot_response_text = "".join(parts)
+            bot_response_html = append_bot_message(session_id, bot_response_text)
+            logger.debug("Akış yanıtı eklendi.", extra={"session": session_id})
+            yield sse_event("done", {
+                "response": bot_response_text,
+                "html": bot_response_html,
+                "conversation": conversation_delta(session_id),
+                "game": shard.slug,
+            })
+        except Exception as e:
+            RAG_ERRORS.inc(stage="request")
+            logger.exception("/send_message_stream sırasında beklenmedik hata: %s", e)
+            yield sse_event("error", {"response": "Üzgünüm, sorunuzu yanıtlarken beklenmedik bir sunucu hatası oluştu. Lütfen tekrar deneyin veya daha sonra tekrar gelin."})
+        finally:
+            ticket.release()
+
+    # X-Accel-Buffering: Ters vekil sunucuların (nginx vb.) akışı tamponlamasını engeller
+    response = Response(
+        generate(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    # İstemci akış başlamadan bağlantıyı kapatırsa generate() hiç çalışmaz; işlem yeri yine de bırakılır
+    response.call_on_close(ticket.release)
+    return response
+
+# Önceden arama API endpoint'i (kullanıcı yazarken JavaScript tarafından çağrılır)
+@app.route("/prefetch", methods=["POST"])
+def prefetch():
+    """
+    Kullanıcının yazmakta olduğu yarım soru için önceden arama yapar (bkz. prefetch_context). İstek
+    {"message": "...", "game": "..."} gövdesiyle gönderilir; sonuç istemciye değil, oturumun bir sonraki sorusuna
+    aittir. Bu yüzden her zaman boş yanıt (204) döner; sadece oturum hız sınırı aşılırsa 429 ve Retry-After döner.
+    Uygulama henüz hazır değilse ısınma beklenmez.
+    """
+    session_id = session.get("session_id")
+    if not session_id or not conversation_store.exists(session_id):
+        return jsonify({"response": "Oturum bulunamadı veya süresi doldu. Lütfen sayfayı yenileyin."}), 400
+    data = request.get_json(silent=True) or {}
+    user_message = (data.get("message") or "").strip()
+    if not PREFETCH_ENABLED or not _ready.is_set() or len(normalize_question(user_message)) < PREFETCH_MIN_CHARS:
+        return "", 204
+    game = requested_game(data)
+    try:
+        shard = select_shard(user_message, game, session.get("game"), record=False)
+    except KeyError:
+        return unknown_game_response(game)
+    try:
+        prefetch_limiter.acquire(session_id)
+    except RateLimitedError as e:
+        PREFETCH_REQUESTS.inc(result="rate_limited")
+        return "", 429, {"Retry-After": str(max(1, math.ceil(e.retry_after)))}
+    PREFETCH_REQUESTS.inc(result=prefetch_context(session_id, user_message, shard, top_k=TOP_K))
+    return "", 204
+
+# Sohbet listesi (sol menü) API endpoint'i
+@app.route("/conversations")
+def list_conversations():
+    """
+    Sol menü için sohbet özetlerini (sadece id, başlık ve oluşturulma zamanı) sayfa sayfa döndürür.
+    Sorgu parametreleri:
+      - limit: Sayfadaki en fazla sohbet sayısı (1-200, varsayılan SIDEBAR_PAGE_SIZE)
+      - cursor: Önceki yanıttaki next_cursor (ilk sayfa için verilmez)
+    Liste değişmediyse (If-None-Match başlığındaki ETag güncelse) gövdesiz 304 döndürülür.
+    """
+    try:
+        limit = max(1, min(200, int(request.args.get("limit", SIDEBAR_PAGE_SIZE))))
+    except ValueError:
+        return jsonify({"error": "Geçersiz 'limit' değeri."}), 400
+    cursor = request.args.get("cursor") or None
+
+    # ETag: liste sürümü + sayfa parametreleri. Liste değişmediyse depoya hiç sorgu atılmaz.
+    etag = f"{conversation_store.list_version()}-{limit}-{cursor or ''}"
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+        response.set_etag(etag, weak=True)
+        return response
+
+    try:
+        items, next_cursor = conversation_store.list_summaries(limit=limit, cursor=cursor)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    response = jsonify({"conversations": items, "next_cursor": next_cursor})
+    response.set_etag(etag, weak=True)
+    # no-cache: Tarayıcı yanıtı saklayabilir ama her seferinde ETag ile sunucuya doğrulatmalıdır
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
 # Yeni sohbet başlatma API endpoint'i (JavaScript tarafından POST isteği ile çağrılır)
 @app.route("/new_chat", methods=["POST"])
 def new_chat():
     """Yeni bir sohbet oturumu başlatır ve tarayıcıyı yönlendirmek için yeni ID'yi döndürür."""
-    print("Yeni sohbet başlatılıyor...")
     # Yeni benzersiz ID oluştur
     session_id = str(uuid.uuid4())
     # Tarayıcının session bilgisini bu yeni ID ile güncelle
     session["session_id"] = session_id
-    # Hafızada bu yeni ID için boş bir sohbet kaydı oluştur
-    conversations[session_id] = {
-        "id": session_id,
-        "title": f"Yeni Monopoly Oyunu {datetime.now().strftime('%d.%m %H:%M')}",
-        "created_at": datetime.now().strftime("%d.%m.%Y %H:%M"),
-        "messages": [],
-    }
-    print(f"Yeni oturum oluşturuldu: {session_id}")
+    # Depoda bu yeni ID için boş bir sohbet kaydı oluştur
+    conversation_store.create(session_id, new_conversation_title(single_game_name()))
+    logger.info("Yeni sohbet başlatıldı.", extra={"session": session_id})
     # JavaScript'in yönlendirme yapabilmesi için başarı durumu ve yeni ID'yi döndür
     return jsonify({"success": True, "new_session_id": session_id})
 
@@ -408,18 +2167,146 @@ def new_chat():
 @app.route("/conversation/<session_id>")
 def load_conversation(session_id):
     """Kullanıcı sol menüden eski bir sohbete tıkladığında o sohbeti aktif hale getirir."""
-    # Gelen session_id hafızamızda (conversations sözlüğünde) var mı kontrol et
-    if session_id in conversations:
+    # Gelen session_id sohbet deposunda var mı kontrol et
+    if conversation_store.exists(session_id):
         # Varsa, tarayıcının session bilgisini bu ID ile güncelle
         session["session_id"] = session_id
-        print(f"Oturuma geçildi: {session_id}")
+        logger.debug("Oturuma geçildi.", extra={"session": session_id})
     else:
-        # Yoksa (geçersiz link veya sunucu yeniden başlatılmış olabilir), uyarı ver ve tarayıcı session'ını temizle
-        print(f"Uyarı: Geçersiz sohbet ID'si ({session_id}) yüklenmeye çalışıldı. Yeni oturum açılacak.")
+        # Yoksa (geçersiz link veya sohbetin süresi dolup silinmiş olabilir), uyarı ver ve tarayıcı session'ını temizle
+        logger.warning("Geçersiz sohbet ID'si yüklenmeye çalışıldı. Yeni oturum açılacak.", extra={"session": session_id})
         session.pop('session_id', None) # Tarayıcıdaki geçersiz ID'yi sil
     # Her durumda kullanıcıyı ana sayfaya yönlendir (index fonksiyonu durumu ele alacaktır)
     return redirect(url_for('index')) # 'index' -> index() fonksiyonunun adıdır
 
+# Toplu soru yanıtlama (kural denetimi gibi çevrimdışı işler için; oturum gerektirmez)
+@app.route("/batch_answer", methods=["POST"])
+def batch_answer():
+    """
+    JSON gövdesindeki soruları ({"questions": [...], "top_k": 5, "game": "monopoly"}) toplu olarak yanıtlar.
+    "game" verilmezse her soru yerel sınıflandırıcıyla kendi oyununa yönlendirilir.
+    Yanıt, soru sırasıyla her satırda bir JSON nesnesi olan bir akıştır (application/x-ndjson);
+    her satır hazır olur olmaz gönderilir. Sorular sohbet geçmişine eklenmez.
+    "Authorization: Bearer <BATCH_API_TOKEN>" başlığı gerekir; BATCH_API_TOKEN ayarlanmamışsa endpoint kapalıdır (404),
+    çünkü tek bir istek yüzlerce Gemini çağrısı başlatabilir.
+    """
+    if not BATCH_API_TOKEN:
+        abort(404)
+    provided = request.headers.get("Authorization", "")
+    if not hmac.compare_digest(provided.encode(), f"Bearer {BATCH_API_TOKEN}".encode()):
+        return jsonify({"error": "Yetkisiz istek."}), 401
+
+    data = request.get_json(silent=True) or {}
+    questions = data.get("questions")
+    if not isinstance(questions, list) or not all(isinstance(q, str) for q in questions):
+        return jsonify({"error": "'questions' bir metin listesi olmalıdır."}), 400
+    questions = [q.strip() for q in questions]
+    if not questions or not all(questions):
+        return jsonify({"error": "En az bir soru gönderilmeli ve sorular boş olmamalıdır."}), 400
+    if len(questions) > BATCH_MAX_QUESTIONS:
+        return jsonify({"error": f"Tek istekte en fazla {BATCH_MAX_QUESTIONS} soru gönderilebilir."}), 413
+    try:
+        top_k = int(data.get("top_k", TOP_K))
+    except (TypeError, ValueError):
+        return jsonify({"error": "'top_k' bir tam sayı olmalıdır."}), 400
+    top_k = max(1, min(top_k, 20))
+
+    if not wait_until_ready():
+        return not_ready_response()
+    game = requested_game(data)
+    if game is not None:
+        if game not in shards:
+            return jsonify({"error": f"'{game}' adlı oyun bulunamadı. Mevcut oyunlar: {', '.join(sorted(shards))}."}), 400
+        question_shards = shards[game]
+        GAME_ROUTES.inc(len(questions), game=game, method="explicit")
+    else:
+        question_shards = [select_shard(q) for q in questions]
+    logger.info("Toplu yanıt isteği alındı.", extra={"questions": len(questions), "game": game or "auto"})
+
+    def generate():
+        for result in answer_batch(questions, question_shards, top_k=top_k):
+            yield json.dumps(result, ensure_ascii=False) + "\n"
+
+    return Response(generate(), mimetype="application/x-ndjson", headers={"X-Accel-Buffering": "no"})
+
+# Canlılık kontrolü: süreç istek karşılayabiliyorsa 200 döner (bağımlılıkları kontrol etmez, ısınmayı beklemez)
+@app.route("/healthz")
+def healthz():
+    """Liveness probe: süreç ayaktaysa her zaman 200 döner."""
+    return jsonify({"status": "ok"})
+
+# Hazırlık kontrolü: veritabanı ve model yüklendiyse 200, değilse 503 döner (yük dengeleyici trafiği buna göre yönlendirir)
+@app.route("/readyz")
+def readyz():
+    """
+    Readiness probe: Isınma tamamlandıysa 200, devam ediyorsa veya başarısız olduysa 503 döner.
+    Isınma bu süreçte başlamadıysa başlatılır (beklenmez).
+    """
+    if not _ready.is_set():
+        start_warm_up()
+    body = {"status": _startup["state"], "pid": os.getpid()}
+    if _startup["error"]:
+        body["error"] = _startup["error"]
+    if _startup["seconds"] is not None:
+        body["warmup_seconds"] = _startup["seconds"]
+    if _snapshot["name"]:
+        body["snapshot"] = _snapshot["name"]
+    if _snapshot["failed"]:
+        # Yüklenemeyen yeni anlık görüntü (eski veriler kullanılmaya devam ediliyor)
+        body["snapshot_failed"] = {"name": _snapshot["failed"], "error": _snapshot["error"]}
+    return jsonify(body), (200 if _ready.is_set() else 503)
+
+# Yeni anlık görüntüye yeniden başlatmadan geçiş (izleyiciyi beklemeden; örn: dağıtım betiğinden)
+@app.route("/admin/reload", methods=["POST"])
+def admin_reload():
+    """
+    Bu süreçte CURRENT'ın gösterdiği anlık görüntüyü hemen yükler ve oyunları değiştirir ({"force": true} ile
+    anlık görüntü değişmemiş olsa da). "Authorization: Bearer <ADMIN_API_TOKEN>" başlığı gerekir; ADMIN_API_TOKEN
+    ayarlanmamışsa endpoint kapalıdır (404).
+    Not: İstek tek bir worker'a gider; diğer worker'lar yeni anlık görüntüyü SNAPSHOT_POLL_SECONDS içinde kendileri bulur.
+    """
+    if not ADMIN_API_TOKEN:
+        abort(404)
+    provided = request.headers.get("Authorization", "")
+    if not hmac.compare_digest(provided.encode(), f"Bearer {ADMIN_API_TOKEN}".encode()):
+        return jsonify({"error": "Yetkisiz istek."}), 401
+    if not wait_until_ready():
+        return not_ready_response()
+    data = request.get_json(silent=True) or {}
+    try:
+        result = reload_snapshot(force=bool(data.get("force")))
+    except RuntimeError as e:
+        return jsonify({"error": str(e), "snapshot": _snapshot["name"], "pid": os.getpid()}), 500
+    return jsonify({**result, "games": sorted(shards), "pid": os.getpid()})
+
+# Prometheus metrikleri
+@app.route("/metrics")
+def metrics():
+    """
+    Uygulama metriklerini Prometheus metin formatında döndürür: RAG aşama gecikme histogramları,
+    Gemini bitiş nedenleri, hatalar, önbellek ve arama yöntemi sayaçları, HTTP istek süreleri.
+    Not: Metrikler worker süreci başınadır; her gunicorn worker'ı kendi değerlerini raporlar.
+    """
+    return Response(REGISTRY.render(), mimetype=REGISTRY.CONTENT_TYPE)
+
+@app.before_request
+def start_request_timer():
+    """İsteğin başlangıç zamanını kaydeder (süre after_request'te ölçülür)."""
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_duration(response):
+    """İsteğin süresini endpoint, metot ve durum koduna göre histograma ekler."""
+    started = getattr(g, "request_started", None)
+    if started is not None:
+        HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - started,
+            endpoint=request.endpoint or "unknown",
+            method=request.method,
+            status=response.status_code,
+        )
+    return response
+
 # ----- Uygulama Başlatma Noktası -----
 
 # Bu script doğrudan çalıştırıldığında (örn: python app.py) aşağıdaki kod bloğu çalışır
@@ -429,7 +2316,10 @@ if __name__ == "__main__":
     # Debug modunu ortam değişkeninden al (FLASK_DEBUG=1 veya True ise aktif, yoksa pasif)
     # debug=True: Kod değişikliklerinde otomatik yeniden başlatma ve tarayıcıda detaylı hata gösterme sağlar. Deploy ederken False olmalı!
     debug_mode = os.environ.get("FLASK_DEBUG", "True").lower() in ["true", "1", "yes"]
-    print(f"Flask uygulaması http://0.0.0.0:{port} adresinde (Debug Modu: {debug_mode}) başlatılıyor...")
+    # Geliştirme sunucusunda ısınma sunucu açılmadan önce yapılır (hata varsa hemen görülsün)
+    if not warm_up():
+        sys.exit(1)
+    logger.info(f"Flask uygulaması http://0.0.0.0:{port} adresinde (Debug Modu: {debug_mode}) başlatılıyor...")
     # Flask uygulamasını geliştirme sunucusu ile çalıştır
     # host='0.0.0.0' -> Uygulamanın sadece yerel makineden değil, ağdaki diğer cihazlardan da erişilebilir olmasını sağlar (örn: aynı ağdaki telefon)
     app.run(debug=debug_mode, host="0.0.0.0", port=port)
@@ -0,0 +1,125 @@
+# Toplu soru yanıtlama komutu (kural denetimi ve çevrimdışı değerlendirme için)
+#
+# Soruları bir dosyadan (her satırda bir soru veya her satırda {"question": "..."} içeren JSONL) okur ve
+# yanıtları soru sırasıyla JSONL olarak yazar. Varsayılan olarak uygulama bu süreçte yüklenir (HTTP yok);
+# --url verilirse çalışan bir sunucunun /batch_answer endpoint'i kullanılır.
+#
+#   python batch_answer.py sorular.txt -o yanitlar.jsonl
+#   python batch_answer.py sorular.jsonl --url http://localhost:5000 --token $BATCH_API_TOKEN
+
+# Gerekli kütüphaneleri içe aktar
+import argparse                     # Komut satırı seçenekleri için
+import json                         # Soruları okumak ve yanıtları yazmak için
+import sys                          # Standart girdi/çıktı ve çıkış kodu için
+import time                         # Toplam süre ve hız ölçümü için
+import urllib.error                 # Sunucu hatalarını raporlamak için
+import urllib.request               # --url ile sunucuya istek göndermek için
+
+
+def read_questions(path):
+    """
+    Soruları dosyadan okur. Her satır ya düz bir soru ya da "question" alanı olan bir JSON nesnesidir; boş satırlar atlanır.
+    Args:
+        path (str): Dosya yolu ("-" ise standart girdi).
+    Returns:
+        list[str]: Sorular.
+    """
+    stream = sys.stdin if path == "-" else open(path, "r", encoding="utf-8")
+    questions = []
+    try:
+        for line in stream:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                line = str(json.loads(line).get("question", "")).strip()
+            if line:
+                questions.append(line)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+    return questions
+
+
+def answer_locally(questions, top_k, concurrency, game=None):
+    """
+    Uygulamayı bu süreçte yükler ve soruları toplu olarak yanıtlar (sonuçları sırayla döndürür).
+    game verilmezse her soru yerel sınıflandırıcıyla kendi oyununa yönlendirilir.
+    """
+    import app # Uygulama sadece yerel modda yüklenir
+
+    if not app.warm_up():
+        raise SystemExit("Uygulama hazırlanamadı (ayrıntılar loglarda).")
+    try:
+        shards = [app.select_shard(q, game) for q in questions]
+    except KeyError:
+        raise SystemExit(f"'{game}' adlı oyun bulunamadı. Mevcut oyunlar: {', '.join(sorted(app.shards))}.")
+    yield from app.answer_batch(questions, shards, top_k=top_k, concurrency=concurrency)
+
+
+def answer_remotely(questions, url, token, top_k, timeout, game=None):
+    """Soruları çalışan bir sunucunun /batch_answer endpoint'ine gönderir ve akan sonuçları sırayla döndürür."""
+    payload = {"questions": questions, "top_k": top_k}
+    if game:
+        payload["game"] = game
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    request = urllib.request.Request(f"{url.rstrip('/')}/batch_answer", data=body, method="POST")
+    request.add_header("Content-Type", "application/json")
+    if token:
+        request.add_header("Authorization", f"Bearer {token}")
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        for line in response:
+            if line.strip():
+                yield json.loads(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Soruları toplu olarak yanıtlar ve sonuçları JSONL olarak yazar.")
+    parser.add_argument("input", help="Soru dosyası (her satırda bir soru veya {\"question\": ...}); '-' ise standart girdi.")
+    parser.add_argument("-o", "--output", default="-", help="Yanıtların yazılacağı JSONL dosyası (varsayılan: standart çıktı).")
+    parser.add_argument("--top-k", type=int, default=5, help="Soru başına çekilecek parça sayısı (varsayılan: 5).")
+    parser.add_argument("--game", default=None, help="Tüm soruların oyunu (örn: monopoly); verilmezse her soru kendi oyununa yönlendirilir.")
+    parser.add_argument("--concurrency", type=int, default=4, help="Yerel modda aynı anda yapılacak en fazla Gemini çağrısı (varsayılan: 4).")
+    parser.add_argument("--url", default=None, help="Kullanılacak sunucu adresi (örn: http://localhost:5000); verilmezse yerel mod.")
+    parser.add_argument("--token", default=None, help="Sunucudaki BATCH_API_TOKEN değeri.")
+    parser.add_argument("--timeout", type=float, default=600.0, help="Sunucu isteği zaman aşımı, saniye (varsayılan: 600).")
+    args = parser.parse_args()
+
+    questions = read_questions(args.input)
+    if not questions:
+        print("Soru bulunamadı.", file=sys.stderr)
+        sys.exit(1)
+
+    if args.url:
+        results = answer_remotely(questions, args.url, args.token, args.top_k, args.timeout, args.game)
+    else:
+        results = answer_locally(questions, args.top_k, args.concurrency, args.game)
+
+    started = time.perf_counter()
+    failed = 0
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        for result in results:
+            failed += 0 if result.get("ok") else 1
+            output.write(json.dumps(result, ensure_ascii=False) + "\n")
+            output.flush()
+    except urllib.error.HTTPError as e:
+        print(f"Sunucu hatası ({e.code}): {e.read().decode('utf-8', 'replace')}", file=sys.stderr)
+        sys.exit(1)
+    except urllib.error.URLError as e:
+        print(f"Sunucuya bağlanılamadı: {e.reason}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    elapsed = time.perf_counter() - started
+    print(
+        f"{len(questions)} soru {elapsed:.1f} sn'de yanıtlandı ({len(questions) / max(elapsed, 1e-9):.1f} soru/sn), "
+        f"{failed} başarısız.",
+        file=sys.stderr,
+    )
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+# Gerekli kütüphaneleri içe aktar
+import random                       # Bekleme sürelerine rastgelelik (jitter) eklemek için
+import sys                          # İlerleme ve uyarı mesajları için
+import threading                    # Worker'lar arasında ortak bekleme durumu için
+import time                         # Bekleme ve hız (parça/saniye) ölçümü için
+from concurrent.futures import ThreadPoolExecutor, as_completed # Grupları sınırlı eşzamanlılıkla göndermek için
+
+# Tekrar denemeye değer geçici hataların HTTP durum kodları
+TRANSIENT_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+# Kod taşımayan hatalarda (örn: LangChain'in sardığı hatalar) kota/hız sınırını gösteren ifadeler
+_RATE_LIMIT_MARKERS = ("429", "resource exhausted", "resourceexhausted", "quota", "rate limit")
+# Geçici ağ/sunucu hatalarını gösteren ifadeler
+_TRANSIENT_MARKERS = _RATE_LIMIT_MARKERS + ("503", "unavailable", "deadline", "timed out", "timeout", "connection")
+
+
+def _status_code(error):
+    """Hatanın HTTP durum kodunu (google.api_core hataları .code taşır) döndürür; yoksa None."""
+    code = getattr(error, "code", None)
+    return code if isinstance(code, int) else None
+
+
+def is_rate_limit_error(error):
+    """Hatanın bir kota/hız sınırı (HTTP 429) hatası olup olmadığını döndürür."""
+    if _status_code(error) == 429:
+        return True
+    text = f"{type(error).__name__} {error}".lower()
+    return any(marker in text for marker in _RATE_LIMIT_MARKERS)
+
+
+def is_transient_error(error):
+    """Hatanın tekrar denendiğinde geçebilecek (kota, ağ, sunucu) bir hata olup olmadığını döndürür."""
+    if _status_code(error) in TRANSIENT_STATUS_CODES:
+        return True
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    text = f"{type(error).__name__} {error}".lower()
+    return any(marker in text for marker in _TRANSIENT_MARKERS)
+
+
+class BackoffGate:
+    """
+    Tüm worker'ların ortak kullandığı bekleme kapısı. Bir grup kota hatası aldığında kapı bir süre kapanır
+    ve diğer worker'lar da yeni istek göndermeden önce bekler; böylece hız sınırına takılan API'ye
+    aynı anda tekrar yüklenilmez.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._open_at = 0.0 # Bu zamandan önce istek gönderilmez (time.monotonic)
+
+    def wait(self):
+        """Kapı kapalıysa açılana kadar bekler."""
+        while True:
+            with self._lock:
+                delay = self._open_at - time.monotonic()
+            if delay <= 0:
+                return
+            time.sleep(delay)
+
+    def close_for(self, seconds):
+        """Kapıyı en az verilen süre (saniye) boyunca kapatır."""
+        with self._lock:
+            self._open_at = max(self._open_at, time.monotonic() + seconds)
+
+
+def embed_in_batches(embeddings, texts, batch_size=100, max_workers=4, max_retries=6,
+                     base_delay=2.0, max_delay=60.0, progress_interval=10.0):
+    """
+    Metinleri sabit boyutlu gruplar halinde, sınırlı eşzamanlılıkla vektöre çevirir.
+    Geçici hatalarda grup üstel artan bekleme (exponential backoff + jitter) ile tekrar denenir;
+    kota hatasında tüm worker'lar birlikte bekler. Her tamamlanan grup CachedEmbeddings tarafından
+    diske yazıldığı için önbellek bir kontrol noktası (checkpoint) görevi görür: işlem yarıda kesilirse
+    tekrar çalıştırıldığında biten gruplar API'ye gitmeden önbellekten gelir.
+    Args:
+        embeddings (Embeddings): Tercihen CachedEmbeddings (sonuçları diske yazan model).
+        texts (list[str]): Vektöre çevrilecek metinler.
+        batch_size (int): Tek istekte gönderilecek metin sayısı.
+        max_workers (int): Aynı anda gönderilecek en fazla grup sayısı.
+        max_retries (int): Bir grup için en fazla tekrar deneme sayısı.
+        base_delay (float): İlk tekrar denemeden önceki bekleme (saniye); her denemede iki katına çıkar.
+        max_delay (float): Bir bekleme için üst sınır (saniye).
+        progress_interval (float): İlerleme mesajlarının en sık yazdırılma aralığı (saniye).
+    Returns:
+        dict: chunks (işlenen metin), batches (grup), retries (tekrar deneme), seconds (süre)
+              ve chunks_per_second (hız) alanlarını içeren özet.
+    Raises:
+        Exception: Bir grup tekrar denemelere rağmen başarısız olursa son hata (kalan gruplar iptal edilir).
+    """
+    batch_size = max(1, int(batch_size))
+    batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+    gate = BackoffGate()
+    lock = threading.Lock()
+    stats = {"chunks": 0, "batches": 0, "retries": 0}
+
+    def run(batch):
+        attempt = 0
+        while True:
+            gate.wait()
+            try:
+                embeddings.embed_documents(batch)
+                return len(batch)
+            except Exception as e:
+                if attempt >= max_retries or not is_transient_error(e):
+                    raise
+                # Üstel bekleme; rastgelelik, aynı anda hata alan worker'ların aynı anda tekrar denemesini önler
+                delay = min(max_delay, base_delay * (2 ** attempt)) * random.uniform(0.5, 1.0)
+                with lock:
+                    stats["retries"] += 1
+                if is_rate_limit_error(e):
+                    print(f"Uyarı: Kota/hız sınırı, tüm istekler {delay:.1f} sn bekletiliyor ({e})", file=sys.stderr)
+                    gate.close_for(delay)
+                else:
+                    print(f"Uyarı: Geçici hata, grup {delay:.1f} sn sonra tekrar denenecek ({e})", file=sys.stderr)
+                    time.sleep(delay)
+                attempt += 1
+
+    start = time.monotonic()
+    last_report = start
+    pool = ThreadPoolExecutor(max_workers=max(1, int(max_workers)))
+    try:
+        futures = [pool.submit(run, batch) for batch in batches]
+        for future in as_completed(futures):
+            count = future.result() # Grup başarısız olduysa hatayı burada fırlatır
+            stats["chunks"] += count
+            stats["batches"] += 1
+            now = time.monotonic()
+            if now - last_report >= progress_interval:
+                last_report = now
+                rate = stats["chunks"] / max(now - start, 1e-9)
+                print(f"  {stats['chunks']}/{len(texts)} parça vektöre çevrildi ({rate:.1f} parça/sn)")
+    finally:
+        # Hata durumunda henüz başlamamış grupları gönderme (biten gruplar önbellekte kalır)
+        pool.shutdown(wait=True, cancel_futures=True)
+
+    stats["seconds"] = time.monotonic() - start
+    stats["chunks_per_second"] = stats["chunks"] / max(stats["seconds"], 1e-9)
+    return stats
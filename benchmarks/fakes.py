@@ -0,0 +1,177 @@
+# Gerekli kütüphaneleri içe aktar
+import hashlib                      # Metinlerden deterministik sayılar üretmek için
+import os                           # Sahte LLM gecikmesini ortam değişkeninden okumak için
+import random                       # Hata ve yavaş yanıt enjeksiyonu için
+import time                         # Sahte LLM gecikmesi için
+
+import numpy as np                  # Sahte embedding vektörleri için
+from langchain_core.embeddings import Embeddings # LangChain embedding arayüzü
+
+from lexical_index import tokenize  # Sahte vektörleri gerçek aramaya benzer kılmak için aynı Türkçe terimler kullanılır
+
+# Sahte embedding boyutu (text-embedding-004 ile aynı)
+EMBEDDING_DIM = 768
+
+
+class FakeUpstreamError(Exception):
+    """Sahte istemcilerin enjekte ettiği geçici servis hatası (google.api_core hataları gibi HTTP kodu taşır)."""
+
+    def __init__(self, message, code=503):
+        super().__init__(message)
+        self.code = code
+
+
+class FaultInjector:
+    """
+    Sahte istemcilere gecikme ve hata enjekte eder; dayanıklılık katmanını (zaman aşımı, tekrar deneme, yedek istek,
+    devre kesici) ağ olmadan denemek için. Ayarlar ortam değişkenlerinden okunur (<prefix>_...):
+      - <prefix>_LATENCY: Her çağrının gecikmesi (saniye).
+      - <prefix>_SLOW_RATE / <prefix>_SLOW_LATENCY: Çağrıların bu oranı bu kadar (saniye) ek gecikmeyle yanıtlanır (kuyruk gecikmesi).
+      - <prefix>_ERROR_RATE: Çağrıların bu oranı geçici hata (503) verir.
+    Varsayılanların hepsi 0'dır (enjeksiyon yok).
+    """
+
+    def __init__(self, prefix):
+        self.latency = float(os.getenv(f"{prefix}_LATENCY", "0"))
+        self.slow_rate = float(os.getenv(f"{prefix}_SLOW_RATE", "0"))
+        self.slow_latency = float(os.getenv(f"{prefix}_SLOW_LATENCY", "0"))
+        self.error_rate = float(os.getenv(f"{prefix}_ERROR_RATE", "0"))
+        self.calls = 0
+
+    def delay(self):
+        """Bu çağrının gecikmesi (saniye): sabit gecikme, SLOW_RATE olasılıkla ek gecikme."""
+        self.calls += 1
+        extra = self.slow_latency if self.slow_rate and random.random() < self.slow_rate else 0.0
+        return self.latency + extra
+
+    def maybe_fail(self, name):
+        """ERROR_RATE olasılıkla geçici hata fırlatır."""
+        if self.error_rate and random.random() < self.error_rate:
+            raise FakeUpstreamError(f"503 {name} geçici olarak kullanılamıyor (enjekte edilen hata).")
+
+
+def _stable_int(text):
+    """Metinden, Python'un hash rastgeleliğinden etkilenmeyen sabit bir tamsayı üretir."""
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class FakeEmbeddings(Embeddings):
+    """
+    GoogleGenerativeAIEmbeddings'in ağ çağrısı yapmayan, deterministik yerine geçeni.
+    Her metin, Türkçe terimlerinin (feature hashing ile) sabit yönlere toplanmasıyla vektöre çevrilir;
+    böylece ortak kelimeleri olan soru ve parçalar birbirine yakın çıkar ve arama/MMR gerçekçi iş yapar.
+    """
+
+    def __init__(self, model=None, google_api_key=None, dim=EMBEDDING_DIM, **kwargs):
+        self.model = model
+        self.dim = dim
+        # FAKE_EMBEDDING_LATENCY, FAKE_EMBEDDING_ERROR_RATE ... (bkz. FaultInjector)
+        self.faults = FaultInjector("FAKE_EMBEDDING")
+
+    def _inject(self):
+        delay = self.faults.delay()
+        if delay:
+            time.sleep(delay)
+        self.faults.maybe_fail("embedding")
+
+    def _embed(self, text):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for term in tokenize(text):
+            h = _stable_int(term)
+            vector[h % self.dim] += 1.0 if (h >> 32) & 1 else -1.0
+        norm = float(np.linalg.norm(vector))
+        if norm == 0.0:
+            vector[_stable_int(text) % self.dim] = 1.0
+            norm = 1.0
+        return (vector / norm).tolist()
+
+    def embed_documents(self, texts):
+        self._inject()
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text):
+        self._inject()
+        return self._embed(text)
+
+
+class _FakeCandidate:
+    def __init__(self, finish_reason="STOP"):
+        self.finish_reason = finish_reason
+
+
+class _FakeResponse:
+    """generate_content yanıtının uygulamanın kullandığı kısmı (parts, text, candidates)."""
+
+    def __init__(self, text):
+        self.text = text
+        self.parts = [text] if text else []
+        self.candidates = [_FakeCandidate()]
+
+
+class _FakeStream:
+    """stream=True ile dönen yanıt: parçalar üzerinde gezilebilir ve candidates taşır."""
+
+    def __init__(self, chunks, delay):
+        self._chunks = chunks
+        self._delay = delay
+        self.candidates = [_FakeCandidate()]
+
+    def __iter__(self):
+        for chunk in self._chunks:
+            if self._delay:
+                time.sleep(self._delay)
+            yield _FakeResponse(chunk)
+
+
+class FakeGenerativeModel:
+    """
+    genai.GenerativeModel'in ağ çağrısı yapmayan, deterministik yerine geçeni.
+    Yanıt, prompt'un özetinden türetilen Markdown metnidir (başlık, liste, kalın yazı içerir; render maliyeti gerçekçi olsun diye).
+    Gecikme FAKE_LLM_LATENCY ortam değişkeniyle (saniye) ayarlanabilir; varsayılan 0 (sadece uygulamanın kendi maliyeti ölçülür).
+    Kuyruk gecikmesi ve hatalar FAKE_LLM_SLOW_RATE, FAKE_LLM_SLOW_LATENCY ve FAKE_LLM_ERROR_RATE ile enjekte edilir (bkz. FaultInjector).
+    """
+
+    def __init__(self, model_name=None, generation_config=None, **kwargs):
+        self.model_name = model_name
+        self.faults = FaultInjector("FAKE_LLM")
+
+    @staticmethod
+    def answer_for(prompt):
+        """Prompt için her seferinde aynı olan sahte bir Markdown yanıt üretir."""
+        seed = _stable_int(prompt)
+        items = "\n".join(f"{i + 1}. **Kural {(seed >> i) % 97}**: Oyuncu sırası geldiğinde zarları atar ve ilerler." for i in range(6))
+        return (
+            "Monopoly kurallarına göre bu durumda şunlar geçerlidir:\n\n"
+            f"{items}\n\n"
+            "- Banka, ev ve otel sayısını sınırlar.\n"
+            "- İpotekli mülkten kira alınmaz.\n\n"
+            "| Durum | Sonuç |\n|---|---|\n| Kodes | 3 tur bekle |\n| Başlangıç | 200 TL al |\n"
+        )
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        answer = self.answer_for(prompt)
+        delay = self.faults.delay()
+        if stream:
+            # Hata ve kuyruk gecikmesi ilk parçadan önce, sabit gecikme parçalara bölünerek uygulanır
+            if delay > self.faults.latency:
+                time.sleep(delay - self.faults.latency)
+            self.faults.maybe_fail("Gemini")
+            chunks = [answer[i:i + 40] for i in range(0, len(answer), 40)]
+            return _FakeStream(chunks, self.faults.latency / max(len(chunks), 1))
+        if delay:
+            time.sleep(delay)
+        self.faults.maybe_fail("Gemini")
+        return _FakeResponse(answer)
+
+
+def install_fakes():
+    """
+    Google istemcilerini sahteleriyle değiştirir. app.py import edilmeden ÖNCE çağrılmalıdır;
+    app.py 'from langchain_google_genai import GoogleGenerativeAIEmbeddings' ile sahte sınıfı alır.
+    """
+    import google.generativeai as genai
+    import langchain_google_genai
+
+    genai.configure = lambda *args, **kwargs: None
+    genai.GenerativeModel = FakeGenerativeModel
+    langchain_google_genai.GoogleGenerativeAIEmbeddings = FakeEmbeddings
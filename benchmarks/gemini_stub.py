@@ -0,0 +1,320 @@
+"""
+Yük testleri için Gemini/embedding REST API'sinin yerel sahte sunucusu.
+
+Uygulama GEMINI_API_ENDPOINT=http://127.0.0.1:<port> ile başlatıldığında gerçek google-generativeai ve
+langchain-google-genai istemcileri (REST transport) Google yerine bu sunucuya bağlanır; böylece kota harcamadan ve
+ağ değişkenliği olmadan, istemci kütüphaneleri dahil uçtan uca yük testi yapılabilir. Yanıtlar deterministiktir
+(benchmarks/fakes.py ile aynı sahte embedding ve yanıt üretimi); gecikme dağılımları, akış (streaming) parça hızı ve
+hata oranları ayarlanabilir.
+
+Desteklenen uç noktalar:
+    POST /v1beta/models/<model>:generateContent
+    POST /v1beta/models/<model>:streamGenerateContent   (JSON dizisi olarak parça parça)
+    POST /v1beta/models/<model>:embedContent
+    POST /v1beta/models/<model>:batchEmbedContents
+    GET  /stats                                         (çağrı ve hata sayıları; yük testi raporu için)
+
+Kullanım:
+    python benchmarks/gemini_stub.py --port 8089 --llm-latency lognormal:0.8:0.4 --error-rate 0.01
+    GEMINI_API_ENDPOINT=http://127.0.0.1:8089 gunicorn -c gunicorn.conf.py app:app
+"""
+# Gerekli kütüphaneleri içe aktar
+import argparse                     # Komut satırı seçenekleri için
+import json                         # İstek ve yanıt gövdeleri için
+import math                         # Log-normal dağılım için
+import os                           # Import yolu için
+import random                       # Gecikme örnekleme ve hata enjeksiyonu için
+import sys                          # Import yolu için
+import threading                    # Sayaçları korumak için
+import time                         # Gecikme için
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer # Çok thread'li HTTP sunucusu
+
+# Proje ana dizinindeki modüllerin (benchmarks.fakes, lexical_index) import edilebilmesi için
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.fakes import FakeEmbeddings, FakeGenerativeModel # Deterministik sahte embedding ve yanıt üretimi
+
+# Akışlı yanıtta parça başına karakter sayısı (Gemini'nin gönderdiği parçalara yakın)
+DEFAULT_CHUNK_CHARS = 40
+
+
+class LatencyDistribution:
+    """
+    Saniye cinsinden gecikme dağılımı. Tanım biçimleri:
+      "0.5" veya "const:0.5"   -> sabit
+      "uniform:0.2:1.0"        -> iki değer arasında düzgün
+      "exp:0.8"                -> ortalaması 0.8 olan üstel
+      "lognormal:0.8:0.4"      -> medyanı 0.8, sigma'sı 0.4 olan log-normal (LLM gecikmelerinin uzun kuyruğuna en yakın)
+    """
+
+    KINDS = ("const", "uniform", "exp", "lognormal")
+
+    def __init__(self, spec):
+        self.spec = str(spec)
+        kind, _, params = self.spec.partition(":")
+        if not params:
+            kind, params = "const", kind
+        try:
+            self.params = [float(p) for p in params.split(":")]
+        except ValueError:
+            raise ValueError(f"Geçersiz gecikme tanımı: {spec!r}") from None
+        expected = {"const": 1, "uniform": 2, "exp": 1, "lognormal": 2}.get(kind)
+        if expected != len(self.params) or any(p < 0 for p in self.params):
+            raise ValueError(f"Geçersiz gecikme tanımı: {spec!r} (biçimler: {', '.join(self.KINDS)})")
+        self.kind = kind
+
+    def sample(self):
+        """Dağılımdan bir gecikme (saniye) örnekler."""
+        if self.kind == "const":
+            return self.params[0]
+        if self.kind == "uniform":
+            return random.uniform(*self.params)
+        if self.kind == "exp":
+            return random.expovariate(1.0 / self.params[0]) if self.params[0] > 0 else 0.0
+        median, sigma = self.params
+        return random.lognormvariate(math.log(median), sigma) if median > 0 else 0.0
+
+    def __repr__(self):
+        return f"LatencyDistribution({self.spec!r})"
+
+
+class StubState:
+    """Sunucu ayarları ve çağrı sayaçları (tüm istek thread'leri paylaşır)."""
+
+    def __init__(self, llm_latency="0", first_token_latency="0", chunk_latency="0", embed_latency="0",
+                 error_rate=0.0, quota_rate=0.0, chunk_chars=DEFAULT_CHUNK_CHARS):
+        self.llm_latency = LatencyDistribution(llm_latency)                 # Tek parça yanıtın tamamı
+        self.first_token_latency = LatencyDistribution(first_token_latency) # Akışta ilk parçaya kadar
+        self.chunk_latency = LatencyDistribution(chunk_latency)             # Akışta sonraki her parça arası
+        self.embed_latency = LatencyDistribution(embed_latency)             # Embedding isteği başına
+        self.error_rate = error_rate     # Geçici hata (503 UNAVAILABLE) oranı
+        self.quota_rate = quota_rate     # Kota hatası (429 RESOURCE_EXHAUSTED) oranı
+        self.chunk_chars = max(1, chunk_chars)
+        self.embeddings = FakeEmbeddings()
+        self._lock = threading.Lock()
+        self.counts = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def count(self, key, n=1):
+        with self._lock:
+            self.counts[key] = self.counts.get(key, 0) + n
+
+    def enter(self):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def leave(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def stats(self):
+        with self._lock:
+            return {"calls": dict(self.counts), "in_flight": self.in_flight, "max_in_flight": self.max_in_flight}
+
+    def reset(self):
+        with self._lock:
+            self.counts = {}
+            self.max_in_flight = self.in_flight
+
+    def injected_error(self):
+        """Ayarlanan oranlarla enjekte edilecek hata: (HTTP kodu, durum) veya None."""
+        roll = random.random()
+        if roll < self.quota_rate:
+            return 429, "RESOURCE_EXHAUSTED"
+        if roll < self.quota_rate + self.error_rate:
+            return 503, "UNAVAILABLE"
+        return None
+
+
+def _texts(content):
+    """Bir Content nesnesindeki metin parçalarını birleştirir."""
+    return "".join(part.get("text", "") for part in (content or {}).get("parts", []))
+
+
+def _generate_response(text, finish_reason=None):
+    candidate = {"content": {"parts": [{"text": text}], "role": "model"}, "index": 0}
+    if finish_reason:
+        candidate["finishReason"] = finish_reason
+    return {"candidates": [candidate]}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Gemini REST API'sinin uygulamanın kullandığı kısmını taklit eder."""
+
+    protocol_version = "HTTP/1.1" # Keep-alive: istemci bağlantı havuzu gerçek API'deki gibi kullanılır
+    server_version = "GeminiStub/1.0"
+
+    def log_message(self, format, *args):
+        pass # Her istek için stderr'e yazmak yük altında sunucuyu yavaşlatır
+
+    def _send_json(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_error(self, status, reason, message):
+        self._send_json(status, {"error": {"code": status, "message": message, "status": reason}})
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        state = self.server.state
+        if self.path.rstrip("/") == "/stats":
+            return self._send_json(200, state.stats())
+        self._send_error(404, "NOT_FOUND", f"Bilinmeyen adres: {self.path}")
+
+    def do_POST(self):
+        state = self.server.state
+        path = self.path.split("?", 1)[0]
+        if path.rstrip("/") == "/stats/reset":
+            state.reset()
+            return self._send_json(200, state.stats())
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return self._send_error(400, "INVALID_ARGUMENT", "Geçersiz JSON gövdesi.")
+        _, _, method = path.rpartition(":")
+        handler = {
+            "generateContent": self._generate,
+            "streamGenerateContent": self._stream_generate,
+            "embedContent": self._embed,
+            "batchEmbedContents": self._batch_embed,
+        }.get(method)
+        if handler is None:
+            return self._send_error(404, "NOT_FOUND", f"Bilinmeyen yöntem: {path}")
+        state.count(method)
+        state.enter()
+        try:
+            handler(state, body)
+        finally:
+            state.leave()
+
+    def _fail_if_injected(self, state, name, latency):
+        """Enjekte edilen hata varsa (gecikmeden sonra) hata yanıtını gönderir ve True döner."""
+        error = state.injected_error()
+        if error is None:
+            return False
+        time.sleep(latency.sample())
+        status, reason = error
+        state.count(f"error_{status}")
+        self._send_error(status, reason, f"{name} geçici olarak kullanılamıyor (sahte sunucunun enjekte ettiği hata).")
+        return True
+
+    def _generate(self, state, body):
+        if self._fail_if_injected(state, "Gemini", state.llm_latency):
+            return
+        prompt = "".join(_texts(content) for content in body.get("contents", []))
+        time.sleep(state.llm_latency.sample())
+        self._send_json(200, _generate_response(FakeGenerativeModel.answer_for(prompt), "STOP"))
+
+    def _stream_generate(self, state, body):
+        if self._fail_if_injected(state, "Gemini", state.first_token_latency):
+            return
+        prompt = "".join(_texts(content) for content in body.get("contents", []))
+        answer = FakeGenerativeModel.answer_for(prompt)
+        chunks = [answer[i:i + state.chunk_chars] for i in range(0, len(answer), state.chunk_chars)]
+        time.sleep(state.first_token_latency.sample())
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        # REST akışı bir JSON dizisidir: "[" {parça} "," {parça} ... "]"
+        for i, chunk in enumerate(chunks):
+            if i:
+                time.sleep(state.chunk_latency.sample())
+            last = i == len(chunks) - 1
+            prefix = b"[" if i == 0 else b",\r\n"
+            data = prefix + json.dumps(_generate_response(chunk, "STOP" if last else None)).encode("utf-8")
+            self._write_chunk(data + (b"]" if last else b""))
+        self._write_chunk(b"")
+        state.count("stream_chunks", len(chunks))
+
+    def _embed(self, state, body):
+        if self._fail_if_injected(state, "Embedding", state.embed_latency):
+            return
+        time.sleep(state.embed_latency.sample())
+        vector = state.embeddings.embed_query(_texts(body.get("content")))
+        self._send_json(200, {"embedding": {"values": vector}})
+
+    def _batch_embed(self, state, body):
+        if self._fail_if_injected(state, "Embedding", state.embed_latency):
+            return
+        texts = [_texts(request.get("content")) for request in body.get("requests", [])]
+        time.sleep(state.embed_latency.sample())
+        state.count("embedded_texts", len(texts))
+        self._send_json(200, {"embeddings": [{"values": vector} for vector in state.embeddings.embed_documents(texts)]})
+
+
+def create_stub_server(host="127.0.0.1", port=0, **settings):
+    """
+    Sahte sunucuyu oluşturur (başlatmaz). port=0 ise boş bir port seçilir (server.server_address ile okunur).
+    Args:
+        host (str): Dinlenecek adres.
+        port (int): Dinlenecek port.
+        **settings: StubState ayarları (llm_latency, first_token_latency, chunk_latency, embed_latency,
+            error_rate, quota_rate, chunk_chars).
+    Returns:
+        ThreadingHTTPServer: serve_forever() ile çalıştırılacak sunucu (server.state: ayarlar ve sayaçlar).
+    """
+    server = ThreadingHTTPServer((host, port), StubHandler)
+    server.daemon_threads = True
+    server.state = StubState(**settings)
+    return server
+
+
+def add_stub_arguments(parser):
+    """Sahte sunucunun ayarlarını komut satırı seçeneklerine ekler (load_test.py de aynı seçenekleri kullanır)."""
+    parser.add_argument("--llm-latency", default="lognormal:0.8:0.4", help="Tek parça Gemini yanıtının gecikmesi (varsayılan: lognormal:0.8:0.4).")
+    parser.add_argument("--first-token-latency", default="lognormal:0.4:0.4", help="Akışlı yanıtta ilk parçanın gecikmesi (varsayılan: lognormal:0.4:0.4).")
+    parser.add_argument("--chunk-latency", default="0.02", help="Akışlı yanıtta parçalar arası gecikme (varsayılan: 0.02).")
+    parser.add_argument("--embed-latency", default="lognormal:0.05:0.3", help="Embedding isteğinin gecikmesi (varsayılan: lognormal:0.05:0.3).")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Geçici hata (503) veren çağrı oranı (varsayılan: 0).")
+    parser.add_argument("--quota-rate", type=float, default=0.0, help="Kota hatası (429) veren çağrı oranı (varsayılan: 0).")
+    parser.add_argument("--chunk-chars", type=int, default=DEFAULT_CHUNK_CHARS, help=f"Akışlı yanıtta parça başına karakter (varsayılan: {DEFAULT_CHUNK_CHARS}).")
+
+
+def stub_settings(args):
+    """Komut satırı seçeneklerinden create_stub_server ayarlarını üretir."""
+    return {
+        "llm_latency": args.llm_latency,
+        "first_token_latency": args.first_token_latency,
+        "chunk_latency": args.chunk_latency,
+        "embed_latency": args.embed_latency,
+        "error_rate": args.error_rate,
+        "quota_rate": args.quota_rate,
+        "chunk_chars": args.chunk_chars,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Yük testleri için yerel sahte Gemini/embedding REST sunucusu.")
+    parser.add_argument("--host", default="127.0.0.1", help="Dinlenecek adres (varsayılan: 127.0.0.1).")
+    parser.add_argument("--port", type=int, default=8089, help="Dinlenecek port (varsayılan: 8089).")
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+    try:
+        server = create_stub_server(args.host, args.port, **stub_settings(args))
+    except ValueError as e:
+        parser.error(str(e))
+    host, port = server.server_address[:2]
+    print(f"Sahte Gemini sunucusu http://{host}:{port} adresinde çalışıyor (uygulama için: GEMINI_API_ENDPOINT=http://{host}:{port}).", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
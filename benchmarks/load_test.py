@@ -0,0 +1,502 @@
+"""
+Flask uygulamasının uçtan uca yük testi (kapasite planlama ve eşzamanlılık gerilemeleri için).
+
+Yerel sahte Gemini sunucusu (benchmarks/gemini_stub.py) ayrı bir süreçte başlatılır ve uygulama gunicorn ile
+GEMINI_API_ENDPOINT bu sunucuyu gösterecek şekilde çalıştırılır; böylece gerçek istemci kütüphaneleri, gunicorn
+worker/thread modeli, sohbet deposu ve kabul kontrolü dahil tüm yol kota harcamadan ölçülür. Eşzamanlı sanal
+kullanıcılar soru listesini tekrar oynatır: her kullanıcı kendi oturum çerezini tutar, sayfayı açar (/), ara sıra yeni
+sohbet başlatır (/new_chat) ve düşünme süresi bekleyerek soru sorar (/send_message, istenirse /send_message_stream).
+Her worker/thread/kullanıcı sayısı kombinasyonu için saniyedeki başarılı soru sayısı, gecikme yüzdelikleri,
+reddedilen (429/503) ve hatalı istek oranları raporlanır.
+
+Kullanım:
+    python benchmarks/load_test.py --workers 1,2,4 --threads 8,16 --users 50 --duration 60
+    python benchmarks/load_test.py --users 20,80 --llm-latency lognormal:1.2:0.5 --error-rate 0.02
+    python benchmarks/load_test.py --url http://localhost:5000 --users 20   (çalışan bir sunucuya; sahte sunucu başlatılmaz)
+    python benchmarks/load_test.py --baseline benchmarks/results/load-onceki.json --tolerance 0.25
+"""
+# Gerekli kütüphaneleri içe aktar
+import argparse                     # Komut satırı seçenekleri için
+import http.client                  # Sanal kullanıcıların keep-alive HTTP bağlantıları için
+import json                         # İstek gövdeleri ve sonuç dosyası için
+import os                           # Ortam değişkenleri ve dosya yolları için
+import platform                     # Sonuçlara çalışılan makine bilgisini eklemek için
+import random                       # Soru seçimi ve düşünme süresi için
+import shutil                       # Geçici klasörleri silmek için
+import socket                       # Boş port bulmak için
+import subprocess                   # gunicorn ve sahte sunucu süreçleri için
+import sys                          # Çıkış kodu ve import yolu için
+import tempfile                     # Sentetik veritabanı ve sohbet deposu için geçici klasör
+import threading                    # Sanal kullanıcılar için
+import time                         # Süre ölçümü için
+from datetime import datetime       # Sonuç dosyası adı ve zaman damgası için
+from http.cookies import SimpleCookie # Oturum çerezini tutmak için
+from urllib.parse import urlsplit   # --url adresini ayrıştırmak için
+
+# Proje ana dizinindeki modüllerin import edilebilmesi için
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.gemini_stub import add_stub_arguments       # Sahte sunucunun gecikme/hata seçenekleri
+from benchmarks.run_benchmarks import (                      # Ortak soru listesi, yüzdelik hesabı ve sentetik veritabanı
+    QUERIES, RESULTS_DIR, build_synthetic_database, git_commit, load_base_documents, parse_int_list, percentile,
+)
+
+# Sunucunun hazır olmasının en fazla beklenme süresi (saniye)
+READY_TIMEOUT = 120
+# Reddedilen istek sayılan durum kodları (kabul kontrolü: hız sınırı, sıra dolu, ısınma sürüyor)
+REJECTED_STATUSES = (429, 503)
+
+
+class Recorder:
+    """Sanal kullanıcıların istek sonuçlarını toplar (thread-safe)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.records = []
+
+    def add(self, endpoint, seconds, status, first_byte=None):
+        """
+        Args:
+            endpoint (str): İstek adı ("index", "new_chat", "send_message", "send_message_stream").
+            seconds (float): İsteğin toplam süresi.
+            status (int | None): HTTP durum kodu (bağlantı hatası/zaman aşımında None).
+            first_byte (float | None): Akışlı yanıtta ilk parçaya kadar geçen süre.
+        """
+        with self._lock:
+            self.records.append((endpoint, seconds, status, first_byte))
+
+
+class UserClient:
+    """Tek bir sanal kullanıcı: keep-alive bağlantısı ve tarayıcı gibi tutulan oturum çerezi."""
+
+    def __init__(self, host, port, timeout):
+        self.host, self.port, self.timeout = host, port, timeout
+        self.cookies = SimpleCookie()
+        self.connection = None
+
+    def _connect(self):
+        if self.connection is None:
+            self.connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        return self.connection
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def request(self, method, path, body=None, stream=False):
+        """
+        İsteği gönderir ve yanıtı okur; bağlantı hatasında bağlantı kapatılıp hata yukarı iletilir.
+        Returns:
+            tuple[int, bytes, float | None]: (durum kodu, gövde, akışlı yanıtta ilk parçaya kadar geçen süre).
+        """
+        headers = {"Accept-Encoding": "identity"}
+        if self.cookies:
+            headers["Cookie"] = "; ".join(f"{k}={m.value}" for k, m in self.cookies.items())
+        data = None
+        if body is not None:
+            data = json.dumps(body).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+        started = time.perf_counter()
+        try:
+            connection = self._connect()
+            connection.request(method, path, body=data, headers=headers)
+            response = connection.getresponse()
+            for header in response.headers.get_all("Set-Cookie") or []:
+                self.cookies.load(header)
+            first_byte = None
+            if stream:
+                chunks = []
+                for line in response:
+                    if first_byte is None and line.startswith(b"event: chunk"):
+                        first_byte = time.perf_counter() - started
+                    chunks.append(line)
+                chunks.append(response.read()) # Yanıtı kapatır; bağlantı bir sonraki istekte tekrar kullanılabilsin
+                payload = b"".join(chunks)
+            else:
+                payload = response.read()
+            if response.will_close:
+                self.close()
+            return response.status, payload, first_byte
+        except (OSError, http.client.HTTPException):
+            self.close()
+            raise
+
+
+def run_user(client, recorder, questions, stop_at, rng, think_time, new_chat_rate, stream_ratio):
+    """
+    Bir sanal kullanıcının oturumu: sayfayı açar, stop_at zamanına kadar düşünme süresi bekleyip soru sorar,
+    ara sıra yeni sohbet başlatır.
+    """
+    def timed(endpoint, method, path, body=None, stream=False):
+        started = time.perf_counter()
+        try:
+            status, payload, first_byte = client.request(method, path, body, stream=stream)
+        except (OSError, http.client.HTTPException):
+            recorder.add(endpoint, time.perf_counter() - started, None)
+            return None, b""
+        seconds = time.perf_counter() - started
+        if stream and status == 200 and b"event: done" not in payload:
+            status = 599 # Akış 200 ile başladı ama hata olayıyla veya yarıda bitti
+        recorder.add(endpoint, seconds, status, first_byte)
+        return status, payload
+
+    timed("index", "GET", "/")
+    while time.time() < stop_at:
+        # Düşünme süresi (üstel dağılım; kullanıcılar aynı anda soru sormasın)
+        pause = rng.expovariate(1.0 / think_time) if think_time > 0 else 0.0
+        if time.time() + pause >= stop_at:
+            break
+        time.sleep(pause)
+        if new_chat_rate and rng.random() < new_chat_rate:
+            timed("new_chat", "POST", "/new_chat")
+            timed("index", "GET", "/")
+        question = rng.choice(questions)
+        if stream_ratio and rng.random() < stream_ratio:
+            timed("send_message_stream", "POST", "/send_message_stream", {"message": question}, stream=True)
+        else:
+            timed("send_message", "POST", "/send_message", {"message": question})
+    client.close()
+
+
+def summarize(recorder, seconds):
+    """
+    İstek sonuçlarını endpoint başına özetler.
+    Returns:
+        dict[str, dict]: Endpoint -> istek sayıları, saniyedeki başarılı istek, gecikme yüzdelikleri (ms) ve oranlar.
+    """
+    summary = {}
+    for endpoint in sorted({r[0] for r in recorder.records}):
+        records = [r for r in recorder.records if r[0] == endpoint]
+        ok = sorted(r[1] * 1000.0 for r in records if r[2] == 200)
+        rejected = sum(1 for r in records if r[2] in REJECTED_STATUSES)
+        errors = len(records) - len(ok) - rejected
+        entry = {
+            "requests": len(records),
+            "ok": len(ok),
+            "rejected": rejected,
+            "errors": errors,
+            "throughput_rps": len(ok) / seconds if seconds else 0.0,
+            "error_rate": errors / len(records),
+            "rejection_rate": rejected / len(records),
+            "p50_ms": percentile(ok, 50),
+            "p95_ms": percentile(ok, 95),
+            "p99_ms": percentile(ok, 99),
+            "max_ms": ok[-1] if ok else None,
+        }
+        first_bytes = sorted(r[3] * 1000.0 for r in records if r[2] == 200 and r[3] is not None)
+        if first_bytes:
+            entry["first_chunk_p50_ms"] = percentile(first_bytes, 50)
+            entry["first_chunk_p95_ms"] = percentile(first_bytes, 95)
+        summary[endpoint] = entry
+    return summary
+
+
+def run_scenario(host, port, users, duration, ramp_up, questions, args, seed):
+    """
+    'users' sanal kullanıcıyı ramp_up saniyeye yayarak başlatır ve duration saniye boyunca çalıştırır.
+    Returns:
+        tuple[dict, float]: (endpoint özetleri, ölçülen süre).
+    """
+    recorder = Recorder()
+    started = time.time()
+    stop_at = started + ramp_up + duration
+    threads = []
+    for i in range(users):
+        client = UserClient(host, port, timeout=args.request_timeout)
+        rng = random.Random(seed * 100003 + i)
+        thread = threading.Thread(
+            target=run_user,
+            args=(client, recorder, questions, stop_at, rng, args.think_time, args.new_chat_rate, args.stream_ratio),
+            name=f"user-{i}",
+            daemon=True,
+        )
+        threads.append(thread)
+        thread.start()
+        if ramp_up and users > 1:
+            time.sleep(ramp_up / users)
+    for thread in threads:
+        thread.join(timeout=max(0.0, stop_at - time.time()) + args.request_timeout + 5)
+    return summarize(recorder, time.time() - started), time.time() - started
+
+
+def free_port():
+    """İşletim sisteminin verdiği boş bir TCP portu."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def http_get_json(host, port, path, method="GET", timeout=5):
+    """Küçük yardımcı: JSON döndüren bir adresi çağırır. Returns: (durum kodu, gövde veya None)."""
+    connection = http.client.HTTPConnection(host, port, timeout=timeout)
+    try:
+        connection.request(method, path)
+        response = connection.getresponse()
+        payload = response.read()
+        try:
+            return response.status, json.loads(payload)
+        except ValueError:
+            return response.status, None
+    finally:
+        connection.close()
+
+
+def wait_until(check, timeout, what):
+    """check() True dönene kadar bekler; süre dolarsa RuntimeError fırlatır."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if check():
+                return
+        except (OSError, http.client.HTTPException):
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{what} {timeout:.0f} saniyede hazır olmadı.")
+
+
+def start_stub(args, log_file):
+    """Sahte Gemini sunucusunu ayrı bir süreçte başlatır (yük üreten süreçle GIL paylaşmasın). Returns: (süreç, port)."""
+    port = free_port()
+    command = [
+        sys.executable, os.path.join(ROOT, "benchmarks", "gemini_stub.py"), "--port", str(port),
+        "--llm-latency", args.llm_latency, "--first-token-latency", args.first_token_latency,
+        "--chunk-latency", args.chunk_latency, "--embed-latency", args.embed_latency,
+        "--error-rate", str(args.error_rate), "--quota-rate", str(args.quota_rate), "--chunk-chars", str(args.chunk_chars),
+    ]
+    process = subprocess.Popen(command, cwd=ROOT, stdout=log_file, stderr=subprocess.STDOUT)
+    wait_until(lambda: http_get_json("127.0.0.1", port, "/stats")[0] == 200, 30, "Sahte Gemini sunucusu")
+    return process, port
+
+
+def start_app(workers, threads, port, env, log_file):
+    """
+    Uygulamayı gunicorn ile (gunicorn.conf.py ayarlarıyla) başlatır ve tüm worker'lar hazır olana kadar bekler.
+    Returns:
+        subprocess.Popen: gunicorn ana süreci.
+    """
+    env = dict(env, WEB_CONCURRENCY=str(workers), GUNICORN_THREADS=str(threads), PORT=str(port))
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:app"],
+        cwd=ROOT, env=env, stdout=log_file, stderr=subprocess.STDOUT,
+    )
+    ready_pids = set()
+
+    def all_workers_ready():
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn beklenmedik şekilde kapandı (çıkış kodu {process.returncode}).")
+        status, body = http_get_json("127.0.0.1", port, "/readyz")
+        if status == 200 and body:
+            ready_pids.add(body.get("pid"))
+        return len(ready_pids) >= workers
+
+    try:
+        wait_until(all_workers_ready, READY_TIMEOUT, f"Uygulama ({workers} worker)")
+    except Exception:
+        stop_process(process)
+        raise
+    return process
+
+
+def stop_process(process):
+    """Süreci nazikçe durdurur; kapanmazsa öldürür."""
+    if process.poll() is None:
+        process.terminate()
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+def load_questions(path):
+    """Soru dosyasını (her satırda bir soru) okur; dosya verilmezse ortak soru listesi kullanılır."""
+    if not path:
+        return list(QUERIES)
+    with open(path, "r", encoding="utf-8") as f:
+        questions = [line.strip() for line in f if line.strip()]
+    if not questions:
+        raise ValueError(f"'{path}' dosyasında soru yok.")
+    return questions
+
+
+def result_key(entry):
+    """İki çalıştırmadaki aynı ölçümü eşleştirmek için anahtar."""
+    return (entry["workers"], entry["threads"], entry["users"], entry["endpoint"])
+
+
+def compare(results, baseline_path, tolerance):
+    """
+    Sonuçları önceki bir çalıştırmayla karşılaştırır: p95 gecikmesi tolerans oranından fazla artan, saniyedeki başarılı
+    istek sayısı tolerans oranından fazla düşen veya hata oranı artan ölçümleri listeler.
+    Returns:
+        list[str]: Gerilemelerin (regression) açıklamaları.
+    """
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {result_key(e): e for e in json.load(f)["results"]}
+    regressions = []
+    for entry in results:
+        old = baseline.get(result_key(entry))
+        if not old:
+            continue
+        name = "/".join(str(k) for k in result_key(entry))
+        if old.get("p95_ms") and entry.get("p95_ms"):
+            change = (entry["p95_ms"] - old["p95_ms"]) / old["p95_ms"]
+            if change > tolerance:
+                regressions.append(f"{name}: p95 {old['p95_ms']:.1f} ms -> {entry['p95_ms']:.1f} ms (+{change * 100:.0f}%)")
+        if old.get("throughput_rps"):
+            change = (entry["throughput_rps"] - old["throughput_rps"]) / old["throughput_rps"]
+            if change < -tolerance:
+                regressions.append(f"{name}: {old['throughput_rps']:.2f} -> {entry['throughput_rps']:.2f} istek/sn ({change * 100:.0f}%)")
+        if entry["error_rate"] > old["error_rate"] + 0.01:
+            regressions.append(f"{name}: hata oranı %{old['error_rate'] * 100:.1f} -> %{entry['error_rate'] * 100:.1f}")
+    return regressions
+
+
+def print_table(results):
+    """Sonuçları okunabilir bir tablo olarak yazdırır."""
+    print(
+        f"{'worker':>6}{'thread':>7}{'kull.':>6}  {'endpoint':<20}{'istek':>7}{'istek/sn':>10}"
+        f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'hata %':>8}{'ret %':>7}"
+    )
+    def p(value):
+        return f"{value:>9.0f}" if value is not None else f"{'-':>9}"
+
+    for e in results:
+        print(
+            f"{e['workers']:>6}{e['threads']:>7}{e['users']:>6}  {e['endpoint']:<20}{e['requests']:>7}{e['throughput_rps']:>10.2f}"
+            f"{p(e['p50_ms'])}{p(e['p95_ms'])}{p(e['p99_ms'])}{e['error_rate'] * 100:>8.1f}{e['rejection_rate'] * 100:>7.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Uygulamanın sahte Gemini sunucusuyla uçtan uca yük testi.")
+    parser.add_argument("--workers", type=parse_int_list, default=[2], help="Denenecek gunicorn worker sayıları (varsayılan: 2).")
+    parser.add_argument("--threads", type=parse_int_list, default=[16], help="Denenecek worker başına thread sayıları (varsayılan: 16).")
+    parser.add_argument("--users", type=parse_int_list, default=[20], help="Eşzamanlı sanal kullanıcı sayıları (varsayılan: 20).")
+    parser.add_argument("--duration", type=float, default=30.0, help="Kombinasyon başına ölçüm süresi, saniye (varsayılan: 30).")
+    parser.add_argument("--ramp-up", type=float, default=5.0, help="Kullanıcıların bu sürede kademeli başlatılması, saniye (varsayılan: 5).")
+    parser.add_argument("--think-time", type=float, default=5.0, help="Kullanıcının sorular arasındaki ortalama bekleme süresi, saniye (varsayılan: 5).")
+    parser.add_argument("--new-chat-rate", type=float, default=0.1, help="Sorudan önce yeni sohbet başlatma olasılığı (varsayılan: 0.1).")
+    parser.add_argument("--stream-ratio", type=float, default=0.0, help="/send_message_stream ile sorulan soruların oranı (varsayılan: 0).")
+    parser.add_argument("--request-timeout", type=float, default=60.0, help="İstemci tarafı istek zaman aşımı, saniye (varsayılan: 60).")
+    parser.add_argument("--questions", default=None, help="Tekrar oynatılacak sorular (her satırda bir soru; varsayılan: benchmark soruları).")
+    parser.add_argument("--db", default=None, help="Kullanılacak veritabanı klasörü (varsayılan: paketteki PDF'ten sentetik veritabanı).")
+    parser.add_argument("--corpus-scale", type=int, default=1, help="Sentetik veritabanının korpus çoğaltma katsayısı (varsayılan: 1).")
+    parser.add_argument("--semantic-cache", action="store_true", help="Anlamsal önbelleği açık bırak (varsayılan: kapalı, her soru LLM'e gider).")
+    parser.add_argument("--app-env", action="append", default=[], metavar="AD=DEĞER", help="Uygulamaya verilecek ek ortam değişkeni (birden fazla kez verilebilir).")
+    parser.add_argument("--url", default=None, help="Çalışan bir sunucuyu test et (gunicorn ve sahte sunucu başlatılmaz; --workers/--threads sadece rapor için).")
+    parser.add_argument("--seed", type=int, default=1, help="Soru seçimi ve düşünme sürelerinin tohum değeri (varsayılan: 1).")
+    parser.add_argument("--output", default=None, help="Sonuç JSON dosyası (varsayılan: benchmarks/results/load-<zaman>.json).")
+    parser.add_argument("--baseline", default=None, help="Karşılaştırılacak önceki sonuç dosyası.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="p95 artışı ve istek/sn düşüşü için kabul edilen en fazla oran (varsayılan: 0.25).")
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+    questions = load_questions(args.questions)
+
+    workdir = tempfile.mkdtemp(prefix="rag-load-")
+    # gunicorn ve sahte sunucunun çıktısı; sonuç dosyasının yanına kopyalanır (hata olursa geçici klasörde bırakılır)
+    log_path = os.path.join(workdir, "server.log")
+    log_file = open(log_path, "ab")
+    processes = []
+    results = []
+    stub_stats = {}
+    try:
+        if args.url:
+            target = urlsplit(args.url)
+            combinations = [(args.workers[0], args.threads[0])]
+        else:
+            stub, stub_port = start_stub(args, log_file)
+            processes.append(stub)
+            db_path = args.db
+            if not db_path:
+                db_path = os.path.join(workdir, "chroma_db")
+                print("Sentetik veritabanı oluşturuluyor...")
+                chunks = build_synthetic_database(db_path, load_base_documents(), args.corpus_scale)
+                print(f"Korpus x{args.corpus_scale}: {chunks} parça.")
+            env = dict(
+                os.environ,
+                GEMINI_API_ENDPOINT=f"http://127.0.0.1:{stub_port}",
+                GOOGLE_API_KEY=os.environ.get("GOOGLE_API_KEY") or "load-test",
+                FLASK_SECRET_KEY="load-test",
+                CHROMA_DB_PATH=os.path.abspath(db_path),
+                CONVERSATION_STORE="sqlite",
+                LOG_LEVEL=os.environ.get("LOG_LEVEL", "WARNING"),
+                SNAPSHOT_POLL_SECONDS="0",
+            )
+            if not args.semantic_cache:
+                env["SEMANTIC_CACHE_THRESHOLD"] = "2.0"
+            for item in args.app_env:
+                key, _, value = item.partition("=")
+                env[key] = value
+            combinations = [(w, t) for w in args.workers for t in args.threads]
+
+        for seed, (workers, threads) in enumerate(combinations, start=args.seed):
+            app_process = None
+            if args.url:
+                host, port = target.hostname, target.port or 80
+            else:
+                # Her kombinasyon boş bir sohbet deposuyla başlar (önceki çalıştırmanın sohbetleri ölçümü etkilemesin)
+                env["CONVERSATION_DB_PATH"] = os.path.join(workdir, f"conversations-{workers}x{threads}.sqlite3")
+                host, port = "127.0.0.1", free_port()
+                print(f"gunicorn başlatılıyor: {workers} worker x {threads} thread...")
+                app_process = start_app(workers, threads, port, env, log_file)
+                processes.append(app_process)
+            try:
+                for users in args.users:
+                    if not args.url:
+                        http_get_json("127.0.0.1", stub_port, "/stats/reset", method="POST")
+                    print(f"  {users} kullanıcı, {args.duration:.0f} sn ölçülüyor...")
+                    summary, seconds = run_scenario(host, port, users, args.duration, args.ramp_up, questions, args, seed)
+                    for endpoint, entry in summary.items():
+                        results.append({"workers": workers, "threads": threads, "users": users, "endpoint": endpoint, "seconds": round(seconds, 2), **entry})
+                    if not args.url:
+                        stub_stats[f"{workers}x{threads}x{users}"] = http_get_json("127.0.0.1", stub_port, "/stats")[1]
+            finally:
+                if app_process is not None:
+                    stop_process(app_process)
+    except BaseException:
+        print(f"Yük testi yarıda kaldı; sunucu logları: {log_path}", file=sys.stderr)
+        raise
+    finally:
+        for process in processes:
+            stop_process(process)
+        log_file.close()
+
+    report = {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": {k: v for k, v in vars(args).items() if k not in ("output", "baseline")},
+            "upstream_calls": stub_stats,
+        },
+        "results": results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"load-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=1)
+    if not args.url:
+        shutil.copyfile(log_path, os.path.splitext(output)[0] + ".log")
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    print_table(results)
+    print(f"Sonuçlar kaydedildi: {output}")
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} gerileme bulundu (tolerans: %{args.tolerance * 100:.0f}):")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("Önceki çalıştırmaya göre gerileme yok.")
+
+
+if __name__ == "__main__":
+    main()
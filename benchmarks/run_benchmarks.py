@@ -0,0 +1,405 @@
+"""
+RAG sıcak yolunun (hot path) çevrimdışı mikro-benchmark'ı.
+
+Google embedding ve Gemini istemcileri deterministik sahteleriyle değiştirilir, paketteki PDF'ten
+sentetik bir Chroma koleksiyonu (ve NumPy/BM25 indeksleri) oluşturulur ve app.py bu veritabanıyla
+import edilir. Her aşama için p50/p95/p99 gecikme ve çağrı başına bellek ayırma (tracemalloc) ölçülür;
+korpus büyüklüğü ve sohbet sayısı ölçeklenerek hangi aşamanın ölçeklenmediği görülür.
+
+Kullanım:
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --corpus-scales 1,4,16 --conversation-counts 100,1000,10000
+    python benchmarks/run_benchmarks.py --baseline benchmarks/results/onceki.json --tolerance 0.25
+"""
+# Gerekli kütüphaneleri içe aktar
+import argparse                     # Komut satırı seçenekleri için
+import contextlib                   # Uygulamanın print çıktılarını ölçüm sırasında susturmak için
+import importlib                    # app.py'yi her korpus için yeniden import etmek için
+import json                         # Sonuçları kaydetmek ve karşılaştırmak için
+import math                         # Yüzdelik sıra hesabı için
+import os                           # Ortam değişkenleri ve dosya yolları için
+import platform                     # Sonuçlara çalışılan makine bilgisini eklemek için
+import shutil                       # Geçici veritabanlarını silmek için
+import subprocess                   # Sonuçlara git commit kimliğini eklemek için
+import sys                          # Çıkış kodu ve import yolu için
+import tempfile                     # Sentetik veritabanları için geçici klasör
+import time                         # Süre ölçümü için
+import tracemalloc                  # Bellek ayırma ölçümü için
+import uuid                         # Sentetik sohbet kimlikleri için
+from datetime import datetime       # Sonuç dosyası adı ve zaman damgası için
+
+# Proje ana dizinindeki modüllerin (app, vector_index, ...) import edilebilmesi için
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from langchain.schema import Document                          # Sentetik parçalar için
+from langchain_community.vectorstores import Chroma            # Sentetik Chroma koleksiyonu için
+
+from benchmarks.fakes import FakeEmbeddings, install_fakes     # Ağ çağrısı yapmayan Google istemcileri
+from context_builder import pack_context
+from conversation_store import InMemoryConversationStore, SQLiteConversationStore
+from chunking import parent_id, save_parents
+from create_database import create_chunker, sync_collection, write_index_version
+from embedding_cache import text_hash
+from game_catalog import collection_name, game_title, shard_path, update_catalog
+from lexical_index import build_lexical_index, reciprocal_rank_fusion
+from pdf_ingest import iter_pdf_documents
+from quantized_index import export_quantized_index
+from vector_index import export_vector_index
+
+# Paketteki veri dosyası
+PDF_PATH = os.path.join(ROOT, "data", "monopoly_kapsamli_veri.pdf")
+# Sonuçların varsayılan olarak kaydedileceği klasör
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+# Sentetik veritabanındaki oyun ve koleksiyon adı (create_database.py ile aynı düzen: chroma_db/<oyun>/)
+GAME = "monopoly"
+COLLECTION_NAME = collection_name(GAME)
+
+# Ölçümde kullanılan sorular (gerçek kullanıcı sorularına benzer)
+QUERIES = [
+    "Bankada ev veya otel kalmazsa ne olur?",
+    "Kodes'ten çıkmak için ne kadar ödemem gerekir?",
+    "İpotekli mülk satılabilir mi?",
+    "Açık artırma nasıl yapılır?",
+    "Kamu kuruluşlarının kirası nasıl hesaplanır?",
+    "Evleri nasıl kurarım? Sırayla mı kurmak zorundayım?",
+    "Başlangıç noktasından geçince ne kadar para alırım?",
+    "Şans kartı çekince ne yapmalıyım?",
+    "İflas eden oyuncunun mülkleri ne olur?",
+    "Çift zar atınca tekrar oynayabilir miyim?",
+    "Otel kurmak için kaç ev gerekir?",
+    "Oyuncular arasında takas yapılabilir mi?",
+]
+
+
+def percentile(sorted_values, q):
+    """Sıralı listede q. yüzdelik değeri (en yakın sıra yöntemiyle) döndürür."""
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(q / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def measure(fn, inputs, iterations, warmup, alloc_iterations):
+    """
+    fn'i inputs üzerinde döngüyle çalıştırıp gecikme yüzdeliklerini ve bellek ayırmayı ölçer.
+    Gecikme ve bellek ayrı turlarda ölçülür (tracemalloc açıkken kod belirgin şekilde yavaşlar).
+    Args:
+        fn (callable): Tek argümanlı ölçülecek fonksiyon.
+        inputs (list): Sırayla fn'e verilecek girdiler.
+        iterations (int): Gecikme ölçümü için çağrı sayısı.
+        warmup (int): Ölçüme katılmayan ısınma çağrısı sayısı.
+        alloc_iterations (int): Bellek ölçümü için çağrı sayısı.
+    Returns:
+        dict: Gecikme (ms) yüzdelikleri ve çağrı başına bellek (KB) özetleri.
+    """
+    for i in range(warmup):
+        fn(inputs[i % len(inputs)])
+
+    timings = []
+    for i in range(iterations):
+        arg = inputs[i % len(inputs)]
+        started = time.perf_counter()
+        fn(arg)
+        timings.append((time.perf_counter() - started) * 1000.0)
+    timings.sort()
+
+    peaks, retained = [], []
+    tracemalloc.start()
+    try:
+        for i in range(alloc_iterations):
+            arg = inputs[i % len(inputs)]
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            fn(arg)
+            current, peak = tracemalloc.get_traced_memory()
+            peaks.append((peak - before) / 1024.0)
+            retained.append((current - before) / 1024.0)
+    finally:
+        tracemalloc.stop()
+    peaks.sort()
+    retained.sort()
+
+    return {
+        "iterations": iterations,
+        "mean_ms": sum(timings) / len(timings),
+        "p50_ms": percentile(timings, 50),
+        "p95_ms": percentile(timings, 95),
+        "p99_ms": percentile(timings, 99),
+        "max_ms": timings[-1],
+        "alloc_peak_kb_p50": percentile(peaks, 50),
+        "alloc_retained_kb_p50": percentile(retained, 50),
+    }
+
+
+# ----- Sentetik veritabanı -----
+
+def load_base_documents():
+    """Paketteki PDF'i gerçek ingestion akışıyla bölümlere ve pasajlara ayırır: [(ebeveyn bölüm, çocuk pasajlar), ...]."""
+    return list(iter_pdf_documents(PDF_PATH, create_chunker()))
+
+
+def build_synthetic_database(db_path, base_documents, scale):
+    """
+    Temel bölümleri ve pasajları 'scale' kez çoğaltıp (her kopya benzersiz olsun diye işaretlenir) sahte embedding'lerle
+    oyunun klasöründe bir Chroma koleksiyonu oluşturur; ardından create_database.py ile aynı şekilde NumPy ve BM25
+    indekslerini, bölüm dosyasını ve oyun kataloğunu yazar.
+    Returns:
+        int: Koleksiyondaki parça sayısı.
+    """
+    documents = {}
+    parents = {}
+    for copy in range(scale):
+        suffix = "" if copy == 0 else f" (kopya {copy})"
+        for parent, children in base_documents:
+            text = parent.page_content + suffix
+            pid = parent_id(text)
+            parents.setdefault(pid, Document(page_content=text, metadata=dict(parent.metadata, parent_id=pid)))
+            for document in children:
+                text = document.page_content + suffix
+                documents.setdefault(text_hash(text), Document(page_content=text, metadata=dict(document.metadata, parent_id=pid)))
+    game_path = shard_path(db_path, GAME)
+    vectordb = Chroma(
+        collection_name=COLLECTION_NAME,
+        embedding_function=FakeEmbeddings(),
+        persist_directory=game_path,
+    )
+    sync_collection(vectordb, documents, batch_size=500)
+    export_vector_index(vectordb, game_path)
+    export_quantized_index(game_path)
+    build_lexical_index(game_path)
+    save_parents(game_path, parents)
+    write_index_version(game_path)
+    update_catalog(db_path, {GAME: {"name": game_title(GAME), "collection": COLLECTION_NAME, "sources": [os.path.basename(PDF_PATH)], "chunks": len(documents)}})
+    return len(documents)
+
+
+def import_app(db_path, vector_index):
+    """app.py'yi verilen sentetik veritabanıyla (sahte Google istemcileriyle) yeniden import eder ve ısındırır."""
+    os.environ["CHROMA_DB_PATH"] = db_path
+    os.environ["VECTOR_INDEX"] = vector_index
+    sys.modules.pop("app", None)
+    app = importlib.import_module("app")
+    if not app.warm_up():
+        raise RuntimeError("Uygulama sentetik veritabanıyla hazırlanamadı.")
+    return app
+
+
+# ----- Aşamalar -----
+
+def bench_rag(app, args):
+    """get_answer'ın aşamalarını ayrı ayrı ve uçtan uca ölçer."""
+    measure_args = dict(iterations=args.iterations, warmup=args.warmup, alloc_iterations=args.alloc_iterations)
+    shard = app.shards[GAME]
+    vectordb, lexical_index = shard.vectordb, shard.lexical_index
+    embeddings = {q: vectordb.embeddings.embed_query(q) for q in QUERIES}
+    vector_results = {q: vectordb.max_marginal_relevance_search_by_vector(embeddings[q], k=5, fetch_k=15) for q in QUERIES}
+    lexical_results = {q: lexical_index.search(q, k=5) for q in QUERIES} if lexical_index else {}
+    fused = {q: reciprocal_rank_fusion([vector_results[q], lexical_results.get(q, [])], limit=5) for q in QUERIES}
+    contexts = {q: pack_context(fused[q], app.CONTEXT_TOKEN_BUDGET)[0] for q in QUERIES}
+    prompts = {q: app.build_prompt(contexts[q], q) for q in QUERIES}
+    answers = [app.model.generate_content(prompts[q]).text for q in QUERIES]
+
+    def generation(q):
+        with app.llm_limiter:
+            return app.model.generate_content(prompts[q])
+
+    def render_cold(answer):
+        app._render_markdown_cached.cache_clear()
+        return app.render_markdown_html(answer)
+
+    stages = [
+        ("embed_query", lambda q: vectordb.embeddings.embed_query(q), QUERIES),
+        ("vector_mmr_search", lambda q: vectordb.max_marginal_relevance_search_by_vector(embeddings[q], k=5, fetch_k=15), QUERIES),
+    ]
+    if lexical_index is not None:
+        stages.append(("bm25_search", lambda q: lexical_index.search(q, k=5), QUERIES))
+        stages.append(("rrf_fusion", lambda q: reciprocal_rank_fusion([vector_results[q], lexical_results[q]], limit=5), QUERIES))
+    stages += [
+        ("context_packing", lambda q: pack_context(fused[q], app.CONTEXT_TOKEN_BUDGET), QUERIES),
+        ("prompt_assembly", lambda q: app.build_prompt(contexts[q], q), QUERIES),
+        ("prepare_answer", lambda q: app.prepare_answer(q, shard, top_k=5), QUERIES),
+        ("generation", generation, QUERIES),
+        ("get_answer", lambda q: app.get_answer(q, shard, top_k=5), QUERIES),
+        # Tüm soruların tek toplu istekte yanıtlanması (get_answer x soru sayısı ile karşılaştırılabilir)
+        ("answer_batch_all", lambda qs: list(app.answer_batch(qs, shard, top_k=5)), [QUERIES]),
+        ("render_markdown_cold", render_cold, answers),
+        ("render_markdown_warm", app.render_markdown_html, answers),
+    ]
+    results = []
+    for name, fn, inputs in stages:
+        results.append({"stage": name, **measure(fn, inputs, **measure_args)})
+    return results
+
+
+def populate_store(store, count, messages_per_conversation):
+    """Depoya 'count' sohbet ekler; ilk sohbete mesaj ekleyip kimliğini döndürür."""
+    first_id = None
+    for i in range(count):
+        conversation_id = str(uuid.uuid4())
+        store.create(conversation_id, f"Sohbet {i}: {QUERIES[i % len(QUERIES)]}")
+        if first_id is None:
+            first_id = conversation_id
+    for i in range(messages_per_conversation):
+        store.append_message(first_id, "user" if i % 2 == 0 else "bot", QUERIES[i % len(QUERIES)])
+    return first_id
+
+
+def bench_conversations(store, count, args):
+    """Sol menü listesi, sayfalama ve mesaj ekleme gibi sohbet deposu işlemlerini ölçer."""
+    measure_args = dict(iterations=args.iterations, warmup=args.warmup, alloc_iterations=args.alloc_iterations)
+    conversation_id = populate_store(store, count, messages_per_conversation=20)
+    # Listenin ortasındaki bir sayfanın imleci (derin sayfalama maliyeti için)
+    cursor = None
+    for _ in range(max(0, (count // 50) // 2)):
+        _, cursor = store.list_summaries(limit=50, cursor=cursor)
+    ids = [conversation_id]
+
+    stages = [
+        ("list_first_page", lambda _: store.list_summaries(limit=50), ids),
+        ("list_middle_page", lambda _: store.list_summaries(limit=50, cursor=cursor), ids),
+        ("get_summary", store.get_summary, ids),
+        ("get_conversation", store.get, ids),
+        ("append_message", lambda cid: store.append_message(cid, "user", "Kira nasıl hesaplanır?"), ids),
+    ]
+    return [{"stage": name, **measure(fn, inputs, **measure_args)} for name, fn, inputs in stages]
+
+
+# ----- Kaydetme ve karşılaştırma -----
+
+def result_key(entry):
+    """İki çalıştırmadaki aynı ölçümü eşleştirmek için anahtar."""
+    return (entry["group"], entry["stage"], entry.get("corpus_scale"), entry.get("backend"), entry.get("conversations"))
+
+
+def compare(results, baseline_path, tolerance):
+    """
+    Sonuçları önceki bir çalıştırmayla karşılaştırır; p95 gecikmesi tolerans oranından fazla artan ölçümleri listeler.
+    Returns:
+        list[str]: Gerilemelerin (regression) açıklamaları.
+    """
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {result_key(e): e for e in json.load(f)["results"]}
+    regressions = []
+    for entry in results:
+        old = baseline.get(result_key(entry))
+        if not old or not old.get("p95_ms"):
+            continue
+        change = (entry["p95_ms"] - old["p95_ms"]) / old["p95_ms"]
+        if change > tolerance:
+            regressions.append(
+                f"{'/'.join(str(k) for k in result_key(entry) if k is not None)}: "
+                f"p95 {old['p95_ms']:.3f} ms -> {entry['p95_ms']:.3f} ms (+{change * 100:.0f}%)"
+            )
+    return regressions
+
+
+def git_commit():
+    """Çalışılan git commit kimliğini döndürür (git yoksa None)."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def print_table(results):
+    """Sonuçları okunabilir bir tablo olarak yazdırır."""
+    print(f"{'grup':<22}{'ölçek':>8}  {'aşama':<22}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'tepe KB':>10}")
+    for e in results:
+        scale = e.get("corpus_scale") or e.get("conversations")
+        group = e["group"] if e["group"] == "rag" else f"{e['group']}:{e['backend']}"
+        print(
+            f"{group:<22}{scale:>8}  {e['stage']:<22}{e['p50_ms']:>10.3f}{e['p95_ms']:>10.3f}"
+            f"{e['p99_ms']:>10.3f}{e['alloc_peak_kb_p50']:>10.1f}"
+        )
+
+
+def parse_int_list(value):
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RAG sıcak yolunun çevrimdışı mikro-benchmark'ı.")
+    parser.add_argument("--corpus-scales", type=parse_int_list, default=[1, 4, 16], help="Korpus çoğaltma katsayıları (varsayılan: 1,4,16).")
+    parser.add_argument("--conversation-counts", type=parse_int_list, default=[100, 1000, 10000], help="Sohbet deposundaki sohbet sayıları (varsayılan: 100,1000,10000).")
+    parser.add_argument("--backends", default="memory,sqlite", help="Ölçülecek sohbet depoları (varsayılan: memory,sqlite).")
+    parser.add_argument("--vector-index", default="auto", choices=["auto", "quantized", "numpy", "chroma"], help="app.py'nin kullanacağı vektör deposu (VECTOR_INDEX).")
+    parser.add_argument("--iterations", type=int, default=200, help="Aşama başına ölçülen çağrı sayısı (varsayılan: 200).")
+    parser.add_argument("--warmup", type=int, default=20, help="Aşama başına ısınma çağrısı sayısı (varsayılan: 20).")
+    parser.add_argument("--alloc-iterations", type=int, default=20, help="Aşama başına bellek ölçümü çağrı sayısı (varsayılan: 20).")
+    parser.add_argument("--output", default=None, help="Sonuç JSON dosyası (varsayılan: benchmarks/results/bench-<zaman>.json).")
+    parser.add_argument("--baseline", default=None, help="Karşılaştırılacak önceki sonuç dosyası.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="p95 gecikmesinde kabul edilen en fazla artış oranı (varsayılan: 0.25).")
+    args = parser.parse_args()
+
+    # Uygulama ayarları: ağ yok, anlamsal önbellek kapalı (her soru gerçekten aranır), sohbetler bellekte
+    os.environ.setdefault("GOOGLE_API_KEY", "offline-benchmark")
+    os.environ.setdefault("FLASK_SECRET_KEY", "offline-benchmark")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ["CONVERSATION_STORE"] = "memory"
+    os.environ["SEMANTIC_CACHE_THRESHOLD"] = "2.0"
+    install_fakes()
+
+    workdir = tempfile.mkdtemp(prefix="rag-bench-")
+    results = []
+    try:
+        print("PDF parçalara ayrılıyor...")
+        base_documents = load_base_documents()
+        print(f"{len(base_documents)} temel bölüm, {sum(len(children) for _, children in base_documents)} temel pasaj.")
+
+        for scale in args.corpus_scales:
+            db_path = os.path.join(workdir, f"corpus-x{scale}")
+            chunks = build_synthetic_database(db_path, base_documents, scale)
+            print(f"Korpus x{scale}: {chunks} parça ölçülüyor...")
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                app = import_app(db_path, args.vector_index)
+                stage_results = bench_rag(app, args)
+            for entry in stage_results:
+                results.append({"group": "rag", "corpus_scale": scale, "chunks": chunks, **entry})
+
+        for backend in [b.strip() for b in args.backends.split(",") if b.strip()]:
+            for count in args.conversation_counts:
+                print(f"Sohbet deposu ({backend}) {count} sohbet ile ölçülüyor...")
+                if backend == "sqlite":
+                    store = SQLiteConversationStore(os.path.join(workdir, f"conversations-{count}.sqlite3"), max_conversations=0, idle_ttl_seconds=0)
+                else:
+                    store = InMemoryConversationStore(max_conversations=0, idle_ttl_seconds=0)
+                for entry in bench_conversations(store, count, args):
+                    results.append({"group": "conversations", "backend": backend, "conversations": count, **entry})
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": {k: v for k, v in vars(args).items() if k not in ("output", "baseline")},
+        },
+        "results": results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"bench-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=1)
+
+    print_table(results)
+    print(f"Sonuçlar kaydedildi: {output}")
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} gerileme bulundu (tolerans: %{args.tolerance * 100:.0f}):")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("Önceki çalıştırmaya göre gerileme yok.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+# Kural kitapçıklarının bölüm yapısına göre parçalanması (parent/child chunking).
+#
+# Sabit boyutlu (1500 karakter, 200 ortak) parçalar bölüm sınırlarını gözetmez: bir parça iki kuralın sonunu ve başını
+# taşır, aynı metin ardışık parçalarda tekrar eder ve soruyu yanıtlayan tek cümle için LLM'e büyük parçalar gider.
+# Bu modül önce başlıkları ve kural bölümlerini (örn: "Otel Kurmak", SSS'deki her "Soru: ... Cevap: ...") bulur:
+#   - Ebeveyn (parent): Bir bölümün tamamı (çok uzunsa birkaç parçaya bölünür). parents.json'da saklanır ve LLM'e gönderilir.
+#   - Çocuk (child): Bölümün küçük, örtüşen pasajları (başlarında bölüm başlığı). Vektör ve BM25 indekslerine
+#     bunlar eklenir; küçük oldukları için soruyla eşleşmeleri daha keskindir.
+# Sorgu anında en iyi çocuklar ebeveyn bölümlerine çevrilir ve aynı bölümden gelenler bir kez gönderilir (ParentIndex).
+
+# Gerekli kütüphaneleri içe aktar
+import hashlib                      # Ebeveyn bölümlerin içerik özetli kimlikleri için
+import json                         # Ebeveyn bölümleri parents.json'a yazmak/okumak için
+import os                           # Dosya yolları ve atomik dosya değiştirme için
+import re                           # Başlık ve satır içi bölüm işaretlerini bulmak için
+
+from langchain.schema import Document # LangChain'in metin parçalarını temsil eden Document sınıfı
+from langchain.text_splitter import RecursiveCharacterTextSplitter # Uzun bölümleri ve çocuk pasajları bölmek için
+
+# Ebeveyn bölümlerin yazıldığı dosya (oyunun veritabanı klasöründe)
+PARENTS_FILE = "parents.json"
+# Çocuk pasajların boyutu ve ortak kısmı (karakter); embedding ve BM25 bunlarla yapılır
+CHILD_CHUNK_SIZE = 400
+CHILD_CHUNK_OVERLAP = 80
+# Ebeveyn bölümlerin en fazla boyutu (daha uzun bölümler bölünür) ve en az boyutu (daha kısalar sonrakiyle birleştirilir)
+PARENT_MAX_CHARS = 1500
+PARENT_MIN_CHARS = 200
+
+# Başlık sayılacak bir satırın en fazla uzunluğu ve kelime sayısı
+HEADING_MAX_CHARS = 70
+HEADING_MAX_WORDS = 8
+# Bu karakterlerle biten satırlar başlık değildir (cümle veya liste devam ediyor)
+_NOT_HEADING_END = ".,;:!?…-–"
+# Bir önceki satır bunlardan biriyle bitiyorsa cümle tamamlanmıştır (sonraki satır bir başlık olabilir)
+_SENTENCE_END = ".!?:)”\""
+# Satır içinde yeni bir bölüm başlatan işaretler (PDF'ten tek satır olarak çıkan SSS sayfaları)
+_INLINE_SECTION = re.compile(r"(?<!\w)(?=(?:Soru|SORU)\s*:)")
+# SSS bölümünün başlığı: "Soru:" ile "Cevap:" (veya ilk soru işareti) arasındaki metin
+_QUESTION_TITLE = re.compile(r"^(?:Soru|SORU)\s*:\s*(.+?)(?:\s*(?:Cevap|CEVAP)\s*:|(?<=\?))")
+
+
+def parent_id(text):
+    """Ebeveyn bölümün içerik özetli kimliği (aynı metin her kurulumda aynı kimliği alır)."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:24]
+
+
+def is_heading(line, previous=None):
+    """
+    Satırın bir bölüm başlığı olup olmadığını tahmin eder: kısa, noktalama ile bitmeyen, büyük harfle başlayan
+    ve tamamı büyük harf ya da kelimelerinin çoğu büyük harfle başlayan satırlar (örn: "Otel Kurmak",
+    "OYUNA HAZIRLIK"). Önceki satır tamamlanmamış bir cümleyse satır o cümlenin devamıdır.
+    Args:
+        line (str): Satır.
+        previous (str | None): Bir önceki satır (yoksa None).
+    Returns:
+        bool: Satır başlık gibi görünüyorsa True.
+    """
+    line = line.strip()
+    words = line.split()
+    if not line or len(line) > HEADING_MAX_CHARS or len(words) > HEADING_MAX_WORDS:
+        return False
+    if line[-1] in _NOT_HEADING_END or not line[0].isupper():
+        return False
+    letters = [ch for ch in line if ch.isalpha()]
+    if len(letters) < 3 or sum(ch.isdigit() for ch in line) * 3 > len(line):
+        return False
+    if previous and previous.rstrip()[-1:] not in _SENTENCE_END and not is_heading(previous):
+        return False
+    if line.upper() == line:
+        return True
+    # Harfle başlayan kelimelerin yarısından fazlası büyük harfle başlamalı ("Otel Kurmak" evet, "Ya da" hayır)
+    words = [word for word in words if word[0].isalpha()]
+    return sum(1 for word in words if word[0].isupper()) * 2 > len(words)
+
+
+def iter_sections(pages):
+    """
+    Sayfa akışını bölümlere ayırır. Bölümler sayfa sınırlarını aşabilir; başlığı olmayan metin (örn: kitapçığın ilk
+    satırları) başlıksız bir bölüm olarak döner.
+    Args:
+        pages (iterable[tuple[int, str]]): (sayfa numarası, satırları korunmuş metin) çiftleri.
+    Yields:
+        dict: {"title": başlık veya "", "lines": [satırlar (başlık satırı dahil)], "page": ilk sayfa, "page_end": son sayfa}.
+    """
+    section = None
+    previous = None
+    for page_number, text in pages:
+        for line in text.splitlines():
+            # Satır içindeki "Soru:" işaretleri her soruyu ayrı bir bölüm yapar
+            for i, part in enumerate(_INLINE_SECTION.split(line)):
+                part = part.strip()
+                if not part:
+                    continue
+                question = _QUESTION_TITLE.match(part)
+                if question or (i == 0 and is_heading(part, previous)):
+                    if section is not None:
+                        yield section
+                    title = question.group(1).strip() if question else part
+                    section = {"title": title, "lines": [part], "page": page_number, "page_end": page_number}
+                else:
+                    if section is None:
+                        section = {"title": "", "lines": [], "page": page_number, "page_end": page_number}
+                    section["lines"].append(part)
+                    section["page_end"] = page_number
+                previous = part
+    if section is not None:
+        yield section
+
+
+class SectionChunker:
+    """
+    Sayfaları bölümlere, bölümleri ebeveyn (LLM'e gönderilen) ve çocuk (indekslenen) parçalara ayırır.
+    Ayarlar değiştiğinde parçalar da değişir; create_database.py'deki CHUNKING_VERSION artırılmalıdır.
+    """
+
+    def __init__(self, child_size=CHILD_CHUNK_SIZE, child_overlap=CHILD_CHUNK_OVERLAP,
+                 parent_max=PARENT_MAX_CHARS, parent_min=PARENT_MIN_CHARS):
+        """
+        Args:
+            child_size (int): Çocuk pasajların en fazla karakter sayısı.
+            child_overlap (int): Ardışık çocuk pasajların ortak karakter sayısı.
+            parent_max (int): Ebeveyn bölümün en fazla karakter sayısı.
+            parent_min (int): Bu boyuttan kısa bölümler sonraki bölümle birleştirilir.
+        """
+        self.parent_max = parent_max
+        self.parent_min = parent_min
+        separators = ["\n\n", "\n", ". ", "? ", "! ", "; ", ", ", " ", ""]
+        self._parent_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=parent_max, chunk_overlap=0, length_function=len, separators=separators,
+        )
+        self._child_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=child_size, chunk_overlap=child_overlap, length_function=len, separators=separators,
+        )
+
+    def _iter_merged(self, sections):
+        """Kısa bölümleri (parent_min altı, örn: tek başına kalan başlıklar) sonraki bölümün başına ekler."""
+        pending = None
+        for section in sections:
+            merged = {"title": section["title"], "text": "\n".join(section["lines"]), "page": section["page"], "page_end": section["page_end"]}
+            if pending is not None:
+                merged["text"] = f"{pending['text']}\n{merged['text']}"
+                merged["title"] = pending["title"] or merged["title"]
+                merged["page"] = pending["page"]
+                pending = None
+            if len(merged["text"]) < self.parent_min:
+                pending = merged
+            else:
+                yield merged
+        if pending is not None:
+            yield pending
+
+    def iter_documents(self, pages, source=None):
+        """
+        Sayfa akışından ebeveyn bölümleri ve her birinin çocuk pasajlarını üretir.
+        Args:
+            pages (iterable[tuple[int, str]]): (sayfa numarası, satırları korunmuş metin) çiftleri.
+            source (str | None): Metadata'ya yazılacak kaynak dosya adı.
+        Yields:
+            tuple[Document, list[Document]]: (ebeveyn bölüm, çocuk pasajları). Çocukların metadata'sında 'parent_id',
+                                             'section' (başlık), 'page' ve 'page_end' bulunur.
+        """
+        for section in self._iter_merged(iter_sections(pages)):
+            texts = [section["text"]] if len(section["text"]) <= self.parent_max else self._parent_splitter.split_text(section["text"])
+            for text in texts:
+                text = text.strip()
+                if not text:
+                    continue
+                metadata = {"page": section["page"], "page_end": section["page_end"]}
+                if source:
+                    metadata["source"] = source
+                if section["title"]:
+                    metadata["section"] = section["title"]
+                pid = parent_id(text)
+                parent = Document(page_content=text, metadata=dict(metadata, parent_id=pid))
+                children = []
+                for chunk in self._child_splitter.split_text(text):
+                    chunk = chunk.strip()
+                    if not chunk:
+                        continue
+                    # Başlığı kaybeden pasajların başına bölüm başlığı eklenir (eşleşme için bağlam)
+                    if section["title"] and section["title"] not in chunk:
+                        chunk = f"{section['title']}\n{chunk}"
+                    children.append(Document(page_content=chunk, metadata=dict(metadata, parent_id=pid)))
+                yield parent, children
+
+
+def save_parents(index_dir, parents):
+    """
+    Ebeveyn bölümleri parents.json dosyasına yazar (önce geçici dosyaya, sonra yerine taşınır).
+    Args:
+        index_dir (str): Oyunun veritabanı klasörü.
+        parents (dict): {ebeveyn kimliği: Document} sözlüğü.
+    Returns:
+        int: Yazılan bölüm sayısı.
+    """
+    records = {pid: {"page_content": doc.page_content, "metadata": doc.metadata} for pid, doc in parents.items()}
+    path = os.path.join(index_dir, PARENTS_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(records, f, ensure_ascii=False)
+    os.replace(path + ".tmp", path)
+    return len(records)
+
+
+def parents_exist(index_dir):
+    """Klasörde ebeveyn bölüm dosyası olup olmadığını kontrol eder."""
+    return os.path.exists(os.path.join(index_dir, PARENTS_FILE))
+
+
+class ParentIndex:
+    """Çocuk pasajları ebeveyn bölümlerine çeviren, sadece okunan eşleme (parents.json)."""
+
+    def __init__(self, index_dir):
+        """
+        Args:
+            index_dir (str): parents.json'ın bulunduğu klasör.
+        """
+        with open(os.path.join(index_dir, PARENTS_FILE), "r", encoding="utf-8") as f:
+            records = json.load(f)
+        self.parents = {
+            pid: Document(page_content=record["page_content"], metadata=record.get("metadata") or {})
+            for pid, record in records.items()
+        }
+
+    def __len__(self):
+        return len(self.parents)
+
+    def expand(self, documents, limit=None):
+        """
+        Alaka sırasındaki çocuk pasajları ebeveyn bölümlerine çevirir. Aynı bölümden gelen pasajlar tek bölüm olur;
+        bölümün sırası en iyi pasajının sırasıdır. Ebeveyni bilinmeyen parçalar (eski indeksler) olduğu gibi kalır.
+        Args:
+            documents (list[Document]): Arama sonuçları (çocuk pasajlar).
+            limit (int | None): En fazla döndürülecek bölüm sayısı.
+        Returns:
+            list[Document]: Ebeveyn bölümler.
+        """
+        expanded = []
+        seen = set()
+        for document in documents:
+            pid = (document.metadata or {}).get("parent_id")
+            parent = self.parents.get(pid) if pid else None
+            key = pid if parent is not None else id(document)
+            if key in seen:
+                continue
+            seen.add(key)
+            expanded.append(parent if parent is not None else document)
+            if limit is not None and len(expanded) >= limit:
+                break
+        return expanded
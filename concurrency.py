@@ -0,0 +1,246 @@
+# Gerekli kütüphaneleri içe aktar
+import re                           # Soruları normalleştirirken noktalama işaretlerini temizlemek için
+import threading                    # Kilitler ve bekleme olayları (Event) için
+import time                         # Gecikme ve zaman penceresi hesapları için
+from collections import deque       # Son çağrıların zamanlarını tutmak için
+
+# Türkçe'ye özgü büyük/küçük harf dönüşümleri (Python'un lower() fonksiyonu 'I' -> 'i' ve 'İ' -> 'i̇' yapar)
+_TURKISH_LOWER = str.maketrans({"I": "ı", "İ": "i"})
+# Harf, rakam ve boşluk dışındaki karakterler (noktalama işaretleri)
+_PUNCTUATION = re.compile(r"[^\w\s]", re.UNICODE)
+
+
+def normalize_question(text):
+    """
+    Aynı sorunun farklı yazımlarını (büyük/küçük harf, fazla boşluk, noktalama) aynı anahtara indirger.
+    Örn: "Hapisten nasıl çıkarım?" ve "hapisten  NASIL çıkarım" aynı sonucu verir.
+    Args:
+        text (str): Kullanıcının sorusu.
+    Returns:
+        str: Normalleştirilmiş soru metni.
+    """
+    text = (text or "").translate(_TURKISH_LOWER).lower()
+    text = _PUNCTUATION.sub(" ", text)
+    return " ".join(text.split())
+
+
+class _Call:
+    """Devam eden tek bir üst akış (upstream) çağrısının durumunu tutar."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0 # Bu çağrının sonucunu bekleyen diğer istek sayısı
+
+    def wait(self, timeout=None):
+        """
+        Çağrının bitmesini bekler ve sonucunu döndürür (çağrı hata verdiyse aynı hatayı fırlatır).
+        Args:
+            timeout (float | None): En fazla bekleme süresi (saniye).
+        Returns:
+            Çağrının sonucu.
+        """
+        if not self.done.wait(timeout):
+            raise TimeoutError("Aynı soru için devam eden çağrı zamanında bitmedi.")
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class SingleFlight:
+    """
+    Aynı anahtara sahip eşzamanlı işleri tek bir çağrıda birleştirir (single-flight).
+    Bir anahtar için iş zaten devam ediyorsa, yeni gelen istekler yeni bir çağrı başlatmak
+    yerine devam eden çağrının bitmesini bekler ve aynı sonucu alır. Örneğin oyun gecesi başında
+    herkes aynı soruyu sorduğunda Gemini'ye sadece bir istek gider.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {} # anahtar -> _Call
+
+    def begin(self, key):
+        """
+        Anahtar için bir çağrı başlatır ya da devam eden çağrıya katılır.
+        Args:
+            key (str): Çağrının anahtarı (örn: normalleştirilmiş soru).
+        Returns:
+            tuple[_Call, bool]: (çağrı nesnesi, bu isteğin çağrıyı yapacak "lider" olup olmadığı).
+                                Lider, işi bitirince finish() çağırmak zorundadır.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                return call, False
+            call = _Call()
+            self._calls[key] = call
+            return call, True
+
+    def finish(self, key, call, result=None, error=None):
+        """
+        Liderin işi bittiğinde sonucu (veya hatayı) bekleyenlere iletir ve anahtarı serbest bırakır.
+        Args:
+            key (str): Çağrının anahtarı.
+            call (_Call): begin() ile alınan çağrı nesnesi.
+            result: Çağrının sonucu.
+            error (Exception | None): Çağrı hata verdiyse hata nesnesi.
+        """
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+        call.result = result
+        call.error = error
+        call.done.set()
+
+    def do(self, key, fn, timeout=None):
+        """
+        fn() fonksiyonunu anahtar başına en fazla bir kez eşzamanlı çalıştırır.
+        Args:
+            key (str): Çağrının anahtarı.
+            fn (callable): Argümansız çalıştırılacak fonksiyon.
+            timeout (float | None): Takipçilerin en fazla bekleme süresi (saniye).
+        Returns:
+            tuple: (fn sonucu, sonucun başka bir istekle paylaşılıp paylaşılmadığı)
+        """
+        call, leader = self.begin(key)
+        if not leader:
+            return call.wait(timeout), True
+        try:
+            result = fn()
+        except Exception as e:
+            self.finish(key, call, error=e)
+            raise
+        self.finish(key, call, result=result)
+        return result, False
+
+    def in_flight(self):
+        """Şu anda devam eden farklı çağrı sayısını döndürür."""
+        with self._lock:
+            return len(self._calls)
+
+
+class LLMBusyError(Exception):
+    """Dış servis (LLM) çağrısı için zamanında boş yer bulunamadığında fırlatılır."""
+
+
+class ConcurrencyLimiter:
+    """
+    Aynı anda yapılabilecek dış servis çağrısı sayısını sınırlar.
+    Her gunicorn worker'ı birden fazla thread ile çalıştığında, yavaş Gemini çağrılarının
+    tüm thread'leri doldurmasını ve API kotasını bir anda tüketmesini engeller.
+    """
+
+    def __init__(self, max_concurrent, acquire_timeout=None):
+        """
+        Args:
+            max_concurrent (int): Aynı anda izin verilen en fazla çağrı sayısı.
+            acquire_timeout (float | None): Boş yer için en fazla bekleme süresi (saniye).
+        """
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.acquire_timeout = acquire_timeout
+        self._semaphore = threading.BoundedSemaphore(self.max_concurrent)
+        self._lock = threading.Lock()
+        self.active = 0 # Şu anda devam eden çağrı sayısı
+
+    def __enter__(self):
+        if not self._semaphore.acquire(timeout=self.acquire_timeout):
+            raise LLMBusyError(f"{self.acquire_timeout} saniye içinde boş LLM çağrı yeri bulunamadı.")
+        with self._lock:
+            self.active += 1
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        with self._lock:
+            self.active -= 1
+        self._semaphore.release()
+        return False
+
+
+class ServiceBudget:
+    """
+    Bir dış servisin (örn: embedding API'si) kullanılmaya değer olup olmadığına karar verir.
+    Son çağrıların gecikmesini (üstel hareketli ortalama) ve son bir dakikadaki çağrı sayısını izler;
+    servis yavaşladıysa, dakikalık bütçe dolduysa veya son çağrı hata verdiyse bir süre
+    "kullanma" der. Böylece istek, ağ çağrısı gerektirmeyen yedek yola (örn: BM25) geçebilir.
+    """
+
+    def __init__(self, max_calls_per_minute=0, slow_threshold=None, cooldown_seconds=30.0, smoothing=0.3):
+        """
+        Args:
+            max_calls_per_minute (int): Dakikada izin verilen en fazla çağrı (0 = sınırsız).
+            slow_threshold (float | None): Ortalama gecikme bu değeri (saniye) aşarsa servis yavaş sayılır.
+            cooldown_seconds (float): Hata veya yavaşlık sonrası servisin atlanacağı süre (saniye).
+            smoothing (float): Gecikme ortalamasında son çağrının ağırlığı (0-1).
+        """
+        self.max_calls_per_minute = int(max_calls_per_minute or 0)
+        self.slow_threshold = slow_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.smoothing = smoothing
+        self._lock = threading.Lock()
+        self._calls = deque()            # Son 60 saniyedeki çağrıların zamanları
+        self._avg_latency = None         # Gecikmenin üstel hareketli ortalaması (saniye)
+        self._skip_until = 0.0           # Bu zamana kadar servis kullanılmaz
+        self.skipped = 0                 # Bütçe/yavaşlık nedeniyle atlanan çağrı sayısı
+
+    def allow(self):
+        """
+        Servisin şu anda çağrılıp çağrılmaması gerektiğini döndürür; True ise çağrı bütçeden düşülür.
+        Returns:
+            bool: Çağrı yapılabilirse True.
+        """
+        now = time.monotonic()
+        with self._lock:
+            while self._calls and now - self._calls[0] > 60.0:
+                self._calls.popleft()
+            if now < self._skip_until:
+                self.skipped += 1
+                return False
+            if self.max_calls_per_minute and len(self._calls) >= self.max_calls_per_minute:
+                self.skipped += 1
+                return False
+            self._calls.append(now)
+            return True
+
+    def has_budget(self):
+        """
+        allow() ile aynı kontrolü yapar ama çağrıyı bütçeden düşmez ve atlanan çağrı saymaz. İsteğe bağlı işler
+        (örn: önceden arama) için: bütçe sadece asıl çağrılar tarafından harcanır.
+        Returns:
+            bool: Servis şu anda kullanılabilir ve dakikalık bütçede yer varsa True.
+        """
+        now = time.monotonic()
+        with self._lock:
+            while self._calls and now - self._calls[0] > 60.0:
+                self._calls.popleft()
+            if now < self._skip_until:
+                return False
+            return not (self.max_calls_per_minute and len(self._calls) >= self.max_calls_per_minute)
+
+    def record_success(self, latency):
+        """
+        Başarılı bir çağrının gecikmesini kaydeder; ortalama eşiği aşarsa servis bir süre atlanır.
+        Args:
+            latency (float): Çağrının süresi (saniye).
+        """
+        with self._lock:
+            if self._avg_latency is None:
+                self._avg_latency = latency
+            else:
+                self._avg_latency = self.smoothing * latency + (1.0 - self.smoothing) * self._avg_latency
+            if self.slow_threshold and self._avg_latency > self.slow_threshold:
+                self._skip_until = time.monotonic() + self.cooldown_seconds
+                # Bekleme sonrası servise temiz bir başlangıç şansı ver
+                self._avg_latency = None
+
+    def record_failure(self):
+        """Başarısız bir çağrıyı kaydeder; servis bir süre atlanır."""
+        with self._lock:
+            self._skip_until = time.monotonic() + self.cooldown_seconds
+
+    @property
+    def average_latency(self):
+        """Gecikmenin güncel hareketli ortalaması (saniye) veya henüz ölçüm yoksa None."""
+        with self._lock:
+            return self._avg_latency
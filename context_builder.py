@@ -0,0 +1,133 @@
+# Gerekli kütüphaneleri içe aktar
+import re                           # Parçaları cümle/kelime sınırında kısaltmak için
+
+# Token sayısı için kaba tahmin: ortalama bir token kaç karakter (Gemini için İngilizce ~4, Türkçe biraz daha az)
+CHARS_PER_TOKEN = 3.5
+# Parçalar arasına konan ayırıcı (modelin alıntıları birbirinden ayırt etmesine yardımcı olur)
+SEPARATOR = "\n\n---\n\n"
+# Ortak kısım sayılması için gereken en az karakter sayısı (tesadüfi kısa eşleşmeleri önler)
+MIN_OVERLAP = 40
+# Aranacak en uzun ortak kısım (eski sabit boyutlu parçalamadaki chunk_overlap=200'den biraz fazla)
+MAX_OVERLAP = 400
+# Bütçeye sığmayan bir parçanın kısaltılarak eklenmesi için kalması gereken en az yer (token)
+MIN_PARTIAL_TOKENS = 60
+
+# Kısaltırken tercih edilen sınırlar: cümle sonu, yoksa boşluk
+_SENTENCE_END = re.compile(r"[.!?:;](?=\s)")
+
+
+def estimate_tokens(text):
+    """
+    Metnin token sayısını karakter sayısından tahmin eder (ağ çağrısı yapmadan).
+    Args:
+        text (str): Metin.
+    Returns:
+        int: Tahmini token sayısı.
+    """
+    return int(len(text) / CHARS_PER_TOKEN + 0.999)
+
+
+def overlap_length(previous, text, min_overlap=MIN_OVERLAP, max_overlap=MAX_OVERLAP):
+    """
+    'previous' metninin sonu ile 'text' metninin başı arasındaki en uzun ortak kısmın uzunluğunu bulur.
+    Splitter'ın chunk_overlap ayarı yüzünden ardışık parçalar bu şekilde birbirinin devamıdır.
+    Args:
+        previous (str): Önceki parça.
+        text (str): Sonraki parça.
+        min_overlap (int): Ortak kısım sayılması için gereken en az karakter.
+        max_overlap (int): Aranacak en uzun ortak kısım.
+    Returns:
+        int: Ortak kısmın karakter sayısı (yoksa 0).
+    """
+    if len(previous) < min_overlap or len(text) < min_overlap:
+        return 0
+    tail = previous[-max_overlap:]
+    probe = text[:min_overlap]
+    # Sondaki pencerede sonraki parçanın başlangıcını ara; ilk eşleşme en uzun ortak kısımdır
+    start = tail.find(probe)
+    while start != -1:
+        if text.startswith(tail[start:]):
+            return len(tail) - start
+        start = tail.find(probe, start + 1)
+    return 0
+
+
+def _strip_overlaps(text, packed):
+    """
+    Parçanın zaten eklenmiş parçalarla ortak olan baş/son kısmını çıkarır.
+    Returns:
+        str: Kalan metin (parça tamamen başka bir parçanın içindeyse boş metin).
+    """
+    text = text.strip()
+    for other in packed:
+        if not text:
+            break
+        if text in other:
+            return ""
+        # Bu parça, eklenmiş bir parçanın devamı ise baştaki ortak kısmı at
+        cut = overlap_length(other, text)
+        if cut:
+            text = text[cut:].lstrip()
+        # Bu parça, eklenmiş bir parçanın hemen öncesi ise sondaki ortak kısmı at
+        cut = overlap_length(text, other)
+        if cut:
+            text = text[:-cut].rstrip()
+    return text
+
+
+def _truncate(text, max_chars):
+    """Metni en fazla max_chars karakter olacak şekilde, tercihen cümle sonunda, yoksa kelime sınırında keser."""
+    if len(text) <= max_chars:
+        return text
+    head = text[:max_chars]
+    ends = [m.end() for m in _SENTENCE_END.finditer(head)]
+    # Cümle sonu metnin ikinci yarısındaysa orada kes, değilse son boşlukta
+    if ends and ends[-1] >= max_chars // 2:
+        return head[:ends[-1]].rstrip() + " …"
+    space = head.rfind(" ")
+    if space >= max_chars // 2:
+        head = head[:space]
+    return head.rstrip() + " …"
+
+
+def pack_context(documents, token_budget, separator=SEPARATOR):
+    """
+    Alaka sırasına göre gelen parçaları verilen token bütçesine sığacak şekilde tek bir bağlam metninde birleştirir.
+    Ardışık parçalar arasındaki ortak kısımlar (chunk_overlap) bir kez gönderilir, başka bir parçanın içinde kalan
+    parçalar atlanır; bütçeye tam sığmayan parça yeterli yer varsa cümle sınırında kısaltılarak eklenir.
+    Args:
+        documents (list[Document]): En alakalıdan başlayarak sıralı parçalar.
+        token_budget (int): Bağlam için ayrılan en fazla token (tahmini). 0 veya daha az ise sınır uygulanmaz.
+        separator (str): Parçalar arasına konacak ayırıcı.
+    Returns:
+        tuple[str, dict]: (bağlam metni, özet). Özet: used (eklenen parça), dropped (atlanan/sığmayan parça),
+                          saved_chars (ortak kısımlar çıkarılarak kazanılan karakter), tokens (tahmini token).
+    """
+    packed = []        # Eklenen parçaların (ortak kısımları çıkarılmış) metinleri
+    used_chars = 0
+    saved_chars = 0
+    max_chars = int(token_budget * CHARS_PER_TOKEN) if token_budget and token_budget > 0 else None
+
+    for doc in documents:
+        original = doc.page_content.strip()
+        text = _strip_overlaps(original, packed)
+        saved_chars += len(original) - len(text)
+        if not text:
+            continue
+        separator_len = len(separator) if packed else 0
+        if max_chars is not None and used_chars + separator_len + len(text) > max_chars:
+            remaining = max_chars - used_chars - separator_len
+            # İlk parça her zaman (gerekirse kısaltılarak) eklenir; sonrakiler sadece yeterli yer kaldıysa
+            if not packed or remaining >= MIN_PARTIAL_TOKENS * CHARS_PER_TOKEN:
+                packed.append(_truncate(text, max(remaining, 1)))
+            break
+        packed.append(text)
+        used_chars += separator_len + len(text)
+
+    context = separator.join(packed)
+    return context, {
+        "used": len(packed),
+        "dropped": len(documents) - len(packed),
+        "saved_chars": saved_chars,
+        "tokens": estimate_tokens(context),
+    }
@@ -0,0 +1,529 @@
+# Gerekli kütüphaneleri içe aktar
+import base64                       # Sayfalama imlecini (cursor) URL'de güvenle taşımak için
+import bisect                       # Bellek içi depoda sıralı indeksi korumak için
+import os                           # Veritabanı klasörünü oluşturmak ve ortam değişkenlerini okumak için
+import sqlite3                      # Kalıcı (diskte) sohbet deposu için
+import threading                    # Kilitler ve thread'e özel SQLite bağlantıları için
+import time                         # Zaman damgaları ve TTL hesapları için
+from collections import OrderedDict # Bellek içi depoda LRU sırasını tutmak için
+from datetime import datetime       # Zaman damgalarını ekranda gösterilecek biçime çevirmek için
+
+# Sohbet oluşturulma zamanının ekranda gösterilme biçimi (önceki sürümle aynı)
+DISPLAY_TIME_FORMAT = "%d.%m.%Y %H:%M"
+
+
+def format_timestamp(timestamp):
+    """Unix zaman damgasını '%d.%m.%Y %H:%M' biçiminde metne çevirir."""
+    return datetime.fromtimestamp(timestamp).strftime(DISPLAY_TIME_FORMAT)
+
+
+def encode_cursor(summary):
+    """
+    Bir sohbet özetinden, sonraki sayfanın başlangıcını gösteren imleci (cursor) oluşturur.
+    İmleç (oluşturulma zamanı, kimlik) çiftidir; aynı zamanda oluşturulan sohbetler de doğru sıralanır.
+    """
+    raw = f"{summary['created_ts']!r}|{summary['id']}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor):
+    """
+    encode_cursor ile oluşturulmuş imleci (oluşturulma zamanı, kimlik) çiftine çevirir.
+    Raises:
+        ValueError: İmleç geçersizse.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        created_ts, conversation_id = raw.split("|", 1)
+        return float(created_ts), conversation_id
+    except Exception:
+        raise ValueError(f"Geçersiz sayfalama imleci: {cursor!r}")
+
+
+def _summary(conversation_id, title, created_ts):
+    """Sol menüde gösterilecek sohbet özetini (mesajlar hariç) oluşturur."""
+    return {
+        "id": conversation_id,
+        "title": title,
+        "created_at": format_timestamp(created_ts), # Ekranda gösterilecek tarih
+        "created_ts": created_ts,                   # Sıralama için gerçek zaman damgası
+    }
+
+
+class ConversationStore:
+    """
+    Sohbet geçmişlerini saklayan depoların ortak arayüzü.
+    Uygulamanın geri kalanı sohbetlere sadece bu fonksiyonlar üzerinden erişir; böylece
+    bellek içi ve SQLite depoları birbirinin yerine kullanılabilir.
+
+    Uzun süre kullanılmayan (idle) sohbetler TTL'e göre, sohbet sayısı sınırı aşıldığında ise
+    en uzun süredir kullanılmayanlar (LRU) silinir; böylece bellek/disk kullanımı sınırlı kalır.
+    """
+
+    def __init__(self, max_conversations=10000, idle_ttl_seconds=7 * 24 * 3600):
+        """
+        Args:
+            max_conversations (int): Saklanacak en fazla sohbet sayısı (0 = sınırsız).
+            idle_ttl_seconds (float): Bu süre (saniye) boyunca kullanılmayan sohbetler silinir (0 = süresiz).
+        """
+        self.max_conversations = int(max_conversations or 0)
+        self.idle_ttl_seconds = float(idle_ttl_seconds or 0)
+
+    def create(self, conversation_id, title):
+        """
+        Yeni ve boş bir sohbet oluşturur.
+        Args:
+            conversation_id (str): Sohbetin (session) kimliği.
+            title (str): Sohbetin başlığı.
+        Returns:
+            dict: Oluşturulan sohbetin özeti (id, title, created_at, created_ts).
+        """
+        raise NotImplementedError
+
+    def exists(self, conversation_id):
+        """Sohbetin depoda olup olmadığını döndürür (ve son kullanım zamanını günceller)."""
+        raise NotImplementedError
+
+    def get(self, conversation_id):
+        """
+        Sohbeti mesajlarıyla birlikte döndürür.
+        Returns:
+            dict | None: id, title, created_at, created_ts ve messages alanlarını içeren sözlük; yoksa None.
+                         Her mesaj role, content ve html (saklanmadıysa None) alanlarını içerir.
+        """
+        raise NotImplementedError
+
+    def append_message(self, conversation_id, role, content, html=None):
+        """
+        Sohbete yeni bir mesaj ekler.
+        Args:
+            conversation_id (str): Sohbetin kimliği.
+            role (str): 'user' veya 'bot'.
+            content (str): Mesaj metni.
+            html (str | None): Mesajın bir kez işlenmiş HTML hali (bot mesajları için); sayfa yüklenirken tekrar hesaplanmaz.
+        Returns:
+            int: Sohbette bu role ait mesaj sayısı (eklenen dahil).
+        """
+        raise NotImplementedError
+
+    def set_title(self, conversation_id, title):
+        """Sohbetin başlığını değiştirir."""
+        raise NotImplementedError
+
+    def get_summary(self, conversation_id):
+        """
+        Sohbetin özetini (mesajlar hariç) döndürür.
+        Returns:
+            dict | None: id, title, created_at ve created_ts alanlarını içeren sözlük; yoksa None.
+        """
+        raise NotImplementedError
+
+    def list_summaries(self, limit=50, cursor=None):
+        """
+        Sohbet özetlerini (mesajlar hariç) en yeniden eskiye sıralı ve sayfa sayfa döndürür.
+        Sıralama oluşturulma zamanı indeksinden okunur; her istekte tüm sohbetler sıralanmaz.
+        Args:
+            limit (int): Sayfadaki en fazla sohbet sayısı.
+            cursor (str | None): Önceki sayfanın döndürdüğü next_cursor (ilk sayfa için None).
+        Returns:
+            tuple[list[dict], str | None]: (sohbet özetleri, sonraki sayfanın imleci; son sayfaysa None)
+        """
+        raise NotImplementedError
+
+    def list_version(self):
+        """
+        Sohbet listesinin sürüm numarasını döndürür. Sohbet eklendiğinde, başlığı değiştiğinde
+        veya silindiğinde artar; ETag ile "liste değişmediyse tekrar gönderme" kararı için kullanılır.
+        Returns:
+            int: Liste sürümü.
+        """
+        raise NotImplementedError
+
+    def evict(self):
+        """
+        Süresi dolmuş ve sınırı aşan sohbetleri siler.
+        Returns:
+            int: Silinen sohbet sayısı.
+        """
+        raise NotImplementedError
+
+    def __len__(self):
+        raise NotImplementedError
+
+
+class InMemoryConversationStore(ConversationStore):
+    """
+    Sohbetleri süreç belleğinde tutan depo. Hızlıdır ancak sunucu yeniden başlayınca sohbetler kaybolur
+    ve gunicorn worker'ları arasında paylaşılmaz; tek süreçli geliştirme ortamı için uygundur.
+    """
+
+    def __init__(self, max_conversations=10000, idle_ttl_seconds=7 * 24 * 3600):
+        super().__init__(max_conversations, idle_ttl_seconds)
+        self._lock = threading.Lock()
+        # sohbet kimliği -> sohbet; sıralama son kullanım sırasını gösterir (en eski en başta)
+        self._conversations = OrderedDict()
+        # Oluşturulma zamanına göre sıralı indeks: (-zaman, kimlik) anahtarları, en yeni en başta
+        self._by_created = []
+        self._version = 0
+
+    def _remove_locked(self, conversation_id):
+        """Sohbeti depodan ve sıralı indeksten siler (kilit altında çağrılmalı)."""
+        conversation = self._conversations.pop(conversation_id)
+        key = (-conversation["created_ts"], conversation_id)
+        pos = bisect.bisect_left(self._by_created, key)
+        if pos < len(self._by_created) and self._by_created[pos] == key:
+            del self._by_created[pos]
+        self._version += 1
+
+    def _touch(self, conversation_id):
+        """Sohbetin son kullanım zamanını günceller (kilit altında çağrılmalı)."""
+        conversation = self._conversations.get(conversation_id)
+        if conversation is not None:
+            conversation["last_access"] = time.time()
+            self._conversations.move_to_end(conversation_id)
+        return conversation
+
+    def _evict_locked(self):
+        """Süresi dolmuş ve sınırı aşan sohbetleri siler (kilit altında çağrılmalı)."""
+        removed = 0
+        if self.idle_ttl_seconds:
+            cutoff = time.time() - self.idle_ttl_seconds
+            # Sıralama son kullanıma göre olduğundan baştaki (en eski) kayıtlara bakmak yeterli
+            while self._conversations:
+                oldest_id, oldest = next(iter(self._conversations.items()))
+                if oldest["last_access"] >= cutoff:
+                    break
+                self._remove_locked(oldest_id)
+                removed += 1
+        if self.max_conversations:
+            while len(self._conversations) > self.max_conversations:
+                self._remove_locked(next(iter(self._conversations)))
+                removed += 1
+        return removed
+
+    def create(self, conversation_id, title):
+        now = time.time()
+        with self._lock:
+            if conversation_id in self._conversations:
+                self._remove_locked(conversation_id)
+            self._conversations[conversation_id] = {
+                "id": conversation_id,
+                "title": title,
+                "created_ts": now,
+                "last_access": now,
+                "messages": [],
+            }
+            self._conversations.move_to_end(conversation_id)
+            bisect.insort(self._by_created, (-now, conversation_id))
+            self._version += 1
+            self._evict_locked()
+        return _summary(conversation_id, title, now)
+
+    def exists(self, conversation_id):
+        with self._lock:
+            return self._touch(conversation_id) is not None
+
+    def get(self, conversation_id):
+        with self._lock:
+            conversation = self._touch(conversation_id)
+            if conversation is None:
+                return None
+            result = _summary(conversation["id"], conversation["title"], conversation["created_ts"])
+            result["messages"] = [dict(m) for m in conversation["messages"]]
+            return result
+
+    def append_message(self, conversation_id, role, content, html=None):
+        with self._lock:
+            conversation = self._touch(conversation_id)
+            if conversation is None:
+                raise KeyError(conversation_id)
+            conversation["messages"].append({"role": role, "content": content, "html": html})
+            return sum(1 for m in conversation["messages"] if m["role"] == role)
+
+    def set_title(self, conversation_id, title):
+        with self._lock:
+            conversation = self._conversations.get(conversation_id)
+            if conversation is not None and conversation["title"] != title:
+                conversation["title"] = title
+                self._version += 1
+
+    def get_summary(self, conversation_id):
+        with self._lock:
+            c = self._conversations.get(conversation_id)
+            return _summary(c["id"], c["title"], c["created_ts"]) if c is not None else None
+
+    def list_summaries(self, limit=50, cursor=None):
+        with self._lock:
+            self._evict_locked()
+            start = 0
+            if cursor:
+                created_ts, conversation_id = decode_cursor(cursor)
+                start = bisect.bisect_right(self._by_created, (-created_ts, conversation_id))
+            keys = self._by_created[start:start + limit + 1]
+            items = []
+            for _, conversation_id in keys[:limit]:
+                c = self._conversations[conversation_id]
+                items.append(_summary(c["id"], c["title"], c["created_ts"]))
+        next_cursor = encode_cursor(items[-1]) if len(keys) > limit and items else None
+        return items, next_cursor
+
+    def list_version(self):
+        with self._lock:
+            return self._version
+
+    def evict(self):
+        with self._lock:
+            return self._evict_locked()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._conversations)
+
+
+class SQLiteConversationStore(ConversationStore):
+    """
+    Sohbetleri bir SQLite dosyasında tutan kalıcı depo. Sunucu yeniden başlasa da sohbetler kaybolmaz
+    ve aynı dosyayı açan tüm gunicorn worker'ları her oturuma hizmet verebilir.
+
+    WAL (write-ahead log) modu okuyucuların yazıcıları beklemesini önler; oluşturulma ve son kullanım
+    zamanları indekslendiğinden sıralı listeleme ve eski sohbetlerin silinmesi tüm tabloyu taramaz.
+    """
+
+    # Son kullanım zamanı en fazla bu sıklıkta (saniye) güncellenir (her okumada diske yazmamak için)
+    TOUCH_INTERVAL = 60.0
+    # Eski sohbetlerin silinmesi en fazla bu sıklıkta (saniye) çalıştırılır
+    EVICT_INTERVAL = 300.0
+
+    def __init__(self, db_path, max_conversations=10000, idle_ttl_seconds=7 * 24 * 3600):
+        """
+        Args:
+            db_path (str): SQLite dosyasının yolu (klasör yoksa oluşturulur).
+            max_conversations (int): Saklanacak en fazla sohbet sayısı (0 = sınırsız).
+            idle_ttl_seconds (float): Bu süre (saniye) boyunca kullanılmayan sohbetler silinir (0 = süresiz).
+        """
+        super().__init__(max_conversations, idle_ttl_seconds)
+        self.db_path = db_path
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        # Her thread kendi bağlantısını kullanır (SQLite bağlantıları thread'ler arasında paylaşılmamalı)
+        self._local = threading.local()
+        self._last_evict = 0.0
+        self._evict_lock = threading.Lock()
+        self._create_schema()
+        # Şema için açılan bağlantıyı kapat: depo gunicorn --preload ile ana süreçte oluşturulursa
+        # açık bir SQLite bağlantısı fork ile worker'lara geçmemeli (her thread ilk kullanımda kendi bağlantısını açar)
+        self._local.conn.close()
+        self._local.conn = None
+
+    def _connect(self):
+        """Bu thread'e ait SQLite bağlantısını döndürür (yoksa açar)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10.0)
+            conn.execute("PRAGMA journal_mode=WAL")     # Okuyucular yazıcıları beklemez
+            conn.execute("PRAGMA synchronous=NORMAL")   # WAL ile güvenli ve daha hızlı
+            conn.execute("PRAGMA foreign_keys=ON")      # Sohbet silinince mesajları da silinsin
+            self._local.conn = conn
+        return conn
+
+    def _create_schema(self):
+        """Tabloları ve indeksleri (yoksa) oluşturur."""
+        conn = self._connect()
+        with conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS conversations (
+                    id TEXT PRIMARY KEY,
+                    title TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_conversations_created_at ON conversations (created_at, id);
+                CREATE INDEX IF NOT EXISTS idx_conversations_last_access ON conversations (last_access);
+                CREATE TABLE IF NOT EXISTS messages (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    conversation_id TEXT NOT NULL REFERENCES conversations (id) ON DELETE CASCADE,
+                    role TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    html TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_messages_conversation ON messages (conversation_id, id);
+                -- Sohbet listesinin sürüm numarası (ETag için); liste her değiştiğinde artırılır
+                CREATE TABLE IF NOT EXISTS store_meta (
+                    key TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                );
+                INSERT OR IGNORE INTO store_meta (key, value) VALUES ('list_version', 0);
+                """
+            )
+            # Eski sürümle oluşturulmuş veritabanlarına mesajların HTML halini tutan sütunu ekle
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(messages)")}
+            if "html" not in columns:
+                conn.execute("ALTER TABLE messages ADD COLUMN html TEXT")
+
+    def _touch(self, conn, conversation_id):
+        """Son kullanım zamanını (en fazla TOUCH_INTERVAL'de bir) günceller; sohbet varsa True döndürür."""
+        now = time.time()
+        with conn:
+            cur = conn.execute(
+                "UPDATE conversations SET last_access = ? WHERE id = ? AND last_access < ?",
+                (now, conversation_id, now - self.TOUCH_INTERVAL),
+            )
+        if cur.rowcount:
+            return True
+        return conn.execute("SELECT 1 FROM conversations WHERE id = ?", (conversation_id,)).fetchone() is not None
+
+    @staticmethod
+    def _bump_version(conn):
+        """Sohbet listesinin sürüm numarasını artırır (açık bir işlem içinde çağrılmalı)."""
+        conn.execute("UPDATE store_meta SET value = value + 1 WHERE key = 'list_version'")
+
+    def _maybe_evict(self):
+        """Son silme işleminin üzerinden EVICT_INTERVAL geçtiyse eski sohbetleri siler."""
+        now = time.time()
+        if now - self._last_evict < self.EVICT_INTERVAL:
+            return
+        with self._evict_lock:
+            if now - self._last_evict < self.EVICT_INTERVAL:
+                return
+            self._last_evict = now
+        self.evict()
+
+    def create(self, conversation_id, title):
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO conversations (id, title, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (conversation_id, title, now, now),
+            )
+            self._bump_version(conn)
+        self._maybe_evict()
+        return _summary(conversation_id, title, now)
+
+    def exists(self, conversation_id):
+        return self._touch(self._connect(), conversation_id)
+
+    def get(self, conversation_id):
+        conn = self._connect()
+        if not self._touch(conn, conversation_id):
+            return None
+        row = conn.execute(
+            "SELECT id, title, created_at FROM conversations WHERE id = ?", (conversation_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        result = _summary(*row)
+        result["messages"] = [
+            {"role": role, "content": content, "html": html}
+            for role, content, html in conn.execute(
+                "SELECT role, content, html FROM messages WHERE conversation_id = ? ORDER BY id", (conversation_id,)
+            )
+        ]
+        return result
+
+    def append_message(self, conversation_id, role, content, html=None):
+        conn = self._connect()
+        with conn:
+            try:
+                conn.execute(
+                    "INSERT INTO messages (conversation_id, role, content, html) VALUES (?, ?, ?, ?)",
+                    (conversation_id, role, content, html),
+                )
+            except sqlite3.IntegrityError:
+                # Sohbet silinmiş (veya hiç olmamış)
+                raise KeyError(conversation_id)
+            conn.execute("UPDATE conversations SET last_access = ? WHERE id = ?", (time.time(), conversation_id))
+        return conn.execute(
+            "SELECT COUNT(*) FROM messages WHERE conversation_id = ? AND role = ?", (conversation_id, role)
+        ).fetchone()[0]
+
+    def set_title(self, conversation_id, title):
+        conn = self._connect()
+        with conn:
+            cur = conn.execute(
+                "UPDATE conversations SET title = ? WHERE id = ? AND title != ?", (title, conversation_id, title)
+            )
+            if cur.rowcount:
+                self._bump_version(conn)
+
+    def get_summary(self, conversation_id):
+        row = self._connect().execute(
+            "SELECT id, title, created_at FROM conversations WHERE id = ?", (conversation_id,)
+        ).fetchone()
+        return _summary(*row) if row is not None else None
+
+    def list_summaries(self, limit=50, cursor=None):
+        self._maybe_evict()
+        conn = self._connect()
+        # (created_at, id) indeksi üzerinde sıralı okuma; sadece bir sayfa (+1 satır) okunur
+        if cursor:
+            created_ts, conversation_id = decode_cursor(cursor)
+            rows = conn.execute(
+                """
+                SELECT id, title, created_at FROM conversations
+                WHERE created_at < ? OR (created_at = ? AND id < ?)
+                ORDER BY created_at DESC, id DESC LIMIT ?
+                """,
+                (created_ts, created_ts, conversation_id, limit + 1),
+            ).fetchall()
+        else:
+            rows = conn.execute(
+                "SELECT id, title, created_at FROM conversations ORDER BY created_at DESC, id DESC LIMIT ?",
+                (limit + 1,),
+            ).fetchall()
+        items = [_summary(*row) for row in rows[:limit]]
+        next_cursor = encode_cursor(items[-1]) if len(rows) > limit and items else None
+        return items, next_cursor
+
+    def list_version(self):
+        return self._connect().execute(
+            "SELECT value FROM store_meta WHERE key = 'list_version'"
+        ).fetchone()[0]
+
+    def evict(self):
+        conn = self._connect()
+        removed = 0
+        with conn:
+            if self.idle_ttl_seconds:
+                removed += conn.execute(
+                    "DELETE FROM conversations WHERE last_access < ?", (time.time() - self.idle_ttl_seconds,)
+                ).rowcount
+            if self.max_conversations:
+                # Sınırı aşan en eski kullanılmış sohbetleri sil (last_access indeksi kullanılır)
+                removed += conn.execute(
+                    """
+                    DELETE FROM conversations WHERE id IN (
+                        SELECT id FROM conversations ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                    )
+                    """,
+                    (self.max_conversations,),
+                ).rowcount
+            if removed:
+                self._bump_version(conn)
+        return removed
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM conversations").fetchone()[0]
+
+
+def create_conversation_store():
+    """
+    Ortam değişkenlerine göre sohbet deposunu oluşturur.
+      - CONVERSATION_STORE: "sqlite" (varsayılan) veya "memory"
+      - CONVERSATION_DB_PATH: SQLite dosyasının yolu (varsayılan: ./instance/conversations.sqlite3)
+      - CONVERSATION_MAX: Saklanacak en fazla sohbet sayısı (varsayılan: 10000)
+      - CONVERSATION_IDLE_TTL: Kullanılmayan sohbetlerin silinme süresi, saniye (varsayılan: 7 gün)
+    Returns:
+        ConversationStore: Oluşturulan depo.
+    """
+    backend = os.getenv("CONVERSATION_STORE", "sqlite").lower()
+    max_conversations = int(os.getenv("CONVERSATION_MAX", "10000"))
+    idle_ttl = float(os.getenv("CONVERSATION_IDLE_TTL", str(7 * 24 * 3600)))
+    if backend == "memory":
+        return InMemoryConversationStore(max_conversations, idle_ttl)
+    if backend != "sqlite":
+        raise ValueError(f"Bilinmeyen sohbet deposu: '{backend}' (geçerli değerler: sqlite, memory)")
+    db_path = os.getenv("CONVERSATION_DB_PATH", "./instance/conversations.sqlite3")
+    return SQLiteConversationStore(db_path, max_conversations, idle_ttl)
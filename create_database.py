@@ -2,71 +2,327 @@
 import os                           # Dosya/klasör yolları ve ortam değişkenleri için
 import shutil                       # Klasör silme işlemi için
 import sys                          # Sistem (hata mesajları, çıkış) işlemleri için
+import json                         # Parça manifestosunu okumak/yazmak için
+import argparse                     # Komut satırı seçenekleri için (örn: --full)
+import uuid                         # Veritabanı sürüm kimliği oluşturmak için
+from datetime import datetime       # Sürüm kimliğine zaman damgası eklemek için
+from concurrent.futures import ThreadPoolExecutor # Oyunların PDF'lerini aynı anda okumak için
 from dotenv import load_dotenv      # .env dosyasını okumak için
 import google.generativeai as genai # Google AI (API yapılandırması)
-from langchain.schema import Document # LangChain'in metin parçalarını temsil eden Document sınıfı
-from langchain.text_splitter import RecursiveCharacterTextSplitter # Metni parçalara (chunk) ayırmak için
 from langchain_community.vectorstores import Chroma             # Chroma veritabanı ile LangChain entegrasyonu
 from langchain_google_genai import GoogleGenerativeAIEmbeddings # Google embedding modeli için LangChain entegrasyonu
-try:
-    from pypdf import PdfReader     # PDF dosyalarını okumak için kütüphane
-except ImportError:
-    # Eğer pypdf kurulu değilse kullanıcıyı bilgilendir ve çık
+from embedding_cache import CachedEmbeddings, text_hash         # Diskte kalıcı embedding önbelleği ve içerik özeti
+from vector_index import export_vector_index                    # Vektörleri uygulamanın bellek eşlemeli indeksine aktarmak için
+from quantized_index import export_quantized_index, remove_quantized_index # Büyük korpuslar için sıkıştırılmış (int8/float16 + IVF) indeks
+from lexical_index import build_lexical_index                   # Anahtar kelime (BM25) indeksini oluşturmak için
+from game_catalog import (                                      # data/ klasöründeki oyunlar ve oyun başına veritabanı klasörleri
+    CATALOG_FILE, DEFAULT_DATA_DIR, collection_name, discover_games, game_slug, game_title, load_catalog, shard_path, update_catalog,
+)
+from snapshots import (                                         # Sürümlü anlık görüntüler ve atomik CURRENT işaretçisi
+    DEFAULT_KEEP, SNAPSHOTS_DIR, begin_snapshot, collect_garbage, discard_snapshot, publish_snapshot, read_current,
+)
+import importlib.util               # pypdf'in kurulu olup olmadığını kontrol etmek için
+if importlib.util.find_spec("pypdf") is None:
+    # PDF'ler pdf_ingest.py'de pypdf ile okunur; kurulu değilse kullanıcıyı bilgilendir ve çık
     print("Hata: 'pypdf' kütüphanesi bulunamadı.", file=sys.stderr)
     print("Lütfen yüklemek için 'pip install pypdf' komutunu çalıştırın.", file=sys.stderr)
     sys.exit(1)
 import traceback                    # Hata ayıklama için detaylı hata izi
+from pdf_ingest import iter_pdf_documents, count_pages, start_page_pool # PDF'leri paralel okuyup sayfa bilgisiyle parçalara ayıran akış
+from chunking import SectionChunker, save_parents # Bölüm yapısına göre ebeveyn (bölüm) / çocuk (pasaj) parçalama
+from batch_embedding import embed_in_batches                    # Parçaları gruplar halinde, tekrar denemeli vektöre çevirmek için
 
-# PDF dosyasından metin içeriğini çıkaran fonksiyon
-def extract_text_from_pdf(pdf_path):
+# Veritabanı sürüm kimliğini yazan fonksiyon
+def write_index_version(db_path):
     """
-    Verilen yoldaki PDF dosyasını okur, her sayfadaki metni çıkarır,
-    basit temizlik yapar ve tüm metni tek bir string olarak birleştirir.
+    Veritabanı klasörüne yeni ve benzersiz bir sürüm kimliği yazar.
+    app.py bu dosyayı okuyarak veritabanının yeniden oluşturulduğunu anlar
+    ve anlamsal önbellekteki eski yanıtları geçersiz sayar.
     Args:
-        pdf_path (str): İşlenecek PDF dosyasının tam yolu.
+        db_path (str): Vektör veritabanının bulunduğu klasör.
     Returns:
-        str: PDF'ten çıkarılmış ve birleştirilmiş metin içeriği.
-             Hata durumunda veya dosya bulunamazsa None döner.
+        str: Yazılan sürüm kimliği.
     """
-    print(f"PDF dosyasından metin çıkarılıyor: {pdf_path}")
-    # Fonksiyonun başında dosyanın var olup olmadığını kontrol et
-    if not os.path.exists(pdf_path):
-        print(f"Hata: Belirtilen yolda PDF dosyası bulunamadı: {pdf_path}", file=sys.stderr)
+    version = f"{datetime.now().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    # Önce geçici dosyaya yaz, sonra yerine taşı (okuyan taraf yarım dosya görmesin)
+    version_path = os.path.join(db_path, "index_version") # app.py'deki INDEX_VERSION_FILE ile aynı olmalı
+    tmp_path = version_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(tmp_path, version_path)
+    print(f"Veritabanı sürümü: {version}")
+    return version
+
+# Artımlı (incremental) kurulum için parça manifestosu dosyasının adı (veritabanı klasöründe tutulur)
+MANIFEST_FILE = "index_manifest.json"
+# Kullanılan embedding modeli (model değişirse vektörler uyumsuz olur, tam kurulum gerekir)
+EMBEDDING_MODEL = "models/text-embedding-004"
+# Parçalama (chunking) yönteminin sürümü. Parçaların metadata'sı değiştiğinde artırılır; değişmeyen parçaların
+# metadata'sı artımlı kurulumda güncellenmediği için sürüm farklıysa tam kurulum yapılır (vektörler önbellekten gelir).
+CHUNKING_VERSION = 3
+
+def load_manifest(db_path):
+    """
+    Önceki kurulumdan kalan parça manifestosunu okur.
+    Args:
+        db_path (str): Vektör veritabanının bulunduğu klasör.
+    Returns:
+        dict | None: Manifesto içeriği; dosya yoksa veya okunamazsa None.
+    """
+    manifest_path = os.path.join(db_path, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
         return None
     try:
-        # pypdf kütüphanesi ile PDF dosyasını aç
-        reader = PdfReader(pdf_path)
-        # Tüm metni depolamak için boş bir string başlat
-        full_text = ""
-        print(f"Toplam {len(reader.pages)} sayfa bulundu.")
-        # PDF'in her sayfası için döngü başlat
-        for i, page in enumerate(reader.pages):
-            # Sayfadaki metni çıkarmayı dene
-            page_text = page.extract_text()
-            # Eğer sayfadan metin çıkarılabildiyse
-            if page_text:
-                # Metin temizleme adımları:
-                # 1. Satır sonunda tire ile bölünen kelimeleri birleştir
-                page_text = page_text.replace("-\n", "").replace("- \n", "")
-                # 2. Birden fazla boşluğu veya satır başını tek boşluğa indir
-                page_text = ' '.join(page_text.split())
-                # Temizlenmiş sayfa metnini ana metne ekle, sayfalar arasına çift satır başı koy (paragraf ayrımı gibi)
-                full_text += page_text + "\n\n"
-        print("PDF metin çıkarma işlemi tamamlandı.")
-        # Sonuç metninin başındaki/sonundaki olası boşlukları temizle ve döndür
-        return full_text.strip()
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
     except Exception as e:
-        # PDF okuma/işleme sırasında hata olursa logla ve None döndür
-        print(f"Hata: PDF dosyası okunurken veya işlenirken sorun oluştu: {e}", file=sys.stderr)
-        traceback.print_exc() # Hatanın tam detayını yazdır
+        print(f"Uyarı: Manifesto okunamadı, tam kurulum yapılacak: {e}", file=sys.stderr)
         return None
 
+def save_manifest(db_path, collection_name, chunk_ids):
+    """
+    Koleksiyondaki parçaların içerik özetlerini manifesto dosyasına yazar.
+    Args:
+        db_path (str): Vektör veritabanının bulunduğu klasör.
+        collection_name (str): Koleksiyon adı.
+        chunk_ids (list[str]): Koleksiyondaki parçaların kimlikleri (içerik özetleri).
+    """
+    manifest = {
+        "embedding_model": EMBEDDING_MODEL,
+        "chunking_version": CHUNKING_VERSION,
+        "collection_name": collection_name,
+        "updated_at": datetime.now().isoformat(timespec="seconds"),
+        "chunk_ids": sorted(chunk_ids),
+    }
+    manifest_path = os.path.join(db_path, MANIFEST_FILE)
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, manifest_path)
+
+def sync_collection(vectordb, documents, batch_size=100):
+    """
+    Koleksiyonu verilen belge listesiyle eşitler: sadece yeni/değişen parçaları ekler,
+    artık bulunmayan parçaları siler, değişmeyenlere dokunmaz.
+    Parça kimliği, parçanın içerik özetidir; bu yüzden değişen bir parça "eskisini sil + yenisini ekle" olarak işlenir.
+    Args:
+        vectordb (Chroma): Mevcut (kalıcı) Chroma veritabanı nesnesi.
+        documents (dict): {parça kimliği: Document} sözlüğü.
+        batch_size (int): Koleksiyona tek seferde eklenecek parça sayısı.
+    Returns:
+        tuple[int, int, int]: (eklenen, silinen, değişmeyen) parça sayıları.
+    """
+    # Gerçek durum koleksiyonun kendisinden okunur (önceki çalışma yarıda kesildiyse manifesto eksik olabilir)
+    existing_ids = set(vectordb.get(include=[])["ids"])
+    new_ids = set(documents.keys())
+
+    to_add = [doc_id for doc_id in documents if doc_id not in existing_ids]
+    to_delete = sorted(existing_ids - new_ids)
+    unchanged = len(new_ids & existing_ids)
+
+    if to_delete:
+        print(f"{len(to_delete)} adet artık bulunmayan parça siliniyor...")
+        vectordb.delete(ids=to_delete)
+    if to_add:
+        print(f"{len(to_add)} adet yeni/değişmiş parça koleksiyona ekleniyor...")
+        # Vektörler embedding aşamasında önbelleğe yazıldığı için burada API'ye gidilmez;
+        # gruplar halinde eklemek Chroma'nın tek istekteki parça sınırına takılmayı önler
+        for start in range(0, len(to_add), batch_size):
+            batch = to_add[start:start + batch_size]
+            vectordb.add_texts(
+                texts=[documents[doc_id].page_content for doc_id in batch],
+                metadatas=[documents[doc_id].metadata for doc_id in batch],
+                ids=batch,
+            )
+    return len(to_add), len(to_delete), unchanged
+
+def create_chunker():
+    """
+    PDF metnini RAG için bölüm yapısına göre parçalayacak nesneyi oluşturur: her kural bölümü bir ebeveyn (LLM'e
+    gönderilen bağlam), bölümün küçük pasajları çocuk (vektör ve BM25 ile aranan) parçalardır (bkz. chunking.py).
+    Ayarlar değiştirilirse CHUNKING_VERSION artırılmalıdır.
+    Returns:
+        SectionChunker: Ayarlanmış parçalayıcı.
+    """
+    return SectionChunker()
+
+# Eski (tek koleksiyonlu) kurulumda veritabanı klasörünün kökünde bulunan dosyalar
+LEGACY_FILES = ("chroma.sqlite3", MANIFEST_FILE, "index_version", "vectors.npy", "documents.json", "bm25.json")
+
+def remove_unversioned_layout(db_path):
+    """
+    İlk anlık görüntü yayınlandıktan sonra veritabanı klasörünün kökünde kalan eski düzenin dosyalarını siler:
+    tek koleksiyonlu kurulumun dosyaları ve anlık görüntülerden önceki katalog ve oyun klasörleri.
+    Anlık görüntülere ve CURRENT dosyasına dokunmaz. Vektörler embedding önbelleğinde olduğu için yeniden API'ye gidilmez.
+    Args:
+        db_path (str): Vektör veritabanının bulunduğu klasör.
+    """
+    if read_current(db_path) is None:
+        return
+    try:
+        catalog = load_catalog(db_path)
+    except ValueError:
+        catalog = {}
+    if not catalog:
+        return
+    print(f"'{db_path}' klasöründeki sürümsüz eski kurulum siliniyor (veritabanı artık '{SNAPSHOTS_DIR}/' altında)...")
+    for info in catalog.values():
+        if os.path.abspath(info["path"]) != os.path.abspath(db_path):
+            shutil.rmtree(info["path"], ignore_errors=True)
+    for name in os.listdir(db_path):
+        path = os.path.join(db_path, name)
+        if name in LEGACY_FILES or name == CATALOG_FILE:
+            os.remove(path)
+        elif os.path.isdir(path) and _is_uuid(name):
+            # Chroma'nın koleksiyon başına tuttuğu vektör (HNSW) klasörleri
+            shutil.rmtree(path, ignore_errors=True)
+
+def _is_uuid(name):
+    try:
+        uuid.UUID(name)
+        return True
+    except ValueError:
+        return False
+
+def extract_game_documents(game, pdf_paths, chunker, workers=None, pool=None):
+    """
+    Bir oyunun PDF'lerini okuyup bölümlere (ebeveyn) ve indekslenecek pasajlara (çocuk) ayırır.
+    Parça kimliği içerik özetidir: aynı içerik her çalıştırmada aynı kimliği alır (tekrar eden parçalar bir kez tutulur).
+    Args:
+        game (str): Oyun kimliği (mesajlarda kullanılır).
+        pdf_paths (list[str]): Oyunun PDF dosyaları.
+        chunker (SectionChunker): Parçalama için kullanılacak nesne.
+        workers (int | None): Sayfa çıkarma için süreç sayısı.
+        pool (ProcessPoolExecutor | None): Oyunlar arasında paylaşılan süreç havuzu.
+    Returns:
+        tuple[dict, dict]: ({çocuk parça kimliği: Document}, {ebeveyn bölüm kimliği: Document}).
+    """
+    documents = {}
+    parents = {}
+    for pdf_path in pdf_paths:
+        print(f"[{game}] PDF dosyasından metin çıkarılıyor: {pdf_path} (toplam {count_pages(pdf_path)} sayfa)")
+        # PDF sayfalarını paralel olarak çıkar, temizle ve bölümlere ayır (tüm metin hiçbir zaman tek string olarak birleştirilmez)
+        for parent, children in iter_pdf_documents(pdf_path, chunker, workers=workers, pool=pool):
+            parents.setdefault(parent.metadata["parent_id"], parent)
+            for document in children:
+                documents.setdefault(text_hash(document.page_content), document)
+    print(f"[{game}] {len(parents)} bölüm, {len(documents)} adet aranacak pasaj (child chunk) oluşturuldu.")
+    return documents, parents
+
+def build_game_shard(game, documents, embedding_function, shard_dir, full_rebuild=False, batch_size=100, quantization="int8", parents=None):
+    """
+    Bir oyunun parçalarını kendi klasöründeki Chroma koleksiyonuna yazar ve NumPy/BM25 indekslerini,
+    manifestosunu ve sürümünü günceller. Diğer oyunların klasörlerine dokunulmaz.
+    Vektörlerin önceden (embed_in_batches ile) önbelleğe alınmış olması beklenir; burada API'ye gidilmez.
+    Args:
+        game (str): Oyun kimliği.
+        documents (dict): {parça kimliği: Document} sözlüğü.
+        embedding_function (Embeddings): Önbellekli embedding modeli.
+        shard_dir (str): Oyunun veritabanı klasörü.
+        full_rebuild (bool): True ise oyunun klasörü silinip sıfırdan oluşturulur.
+        batch_size (int): Koleksiyona tek seferde eklenecek parça sayısı.
+        quantization (str): Sıkıştırılmış indeksin hassasiyeti ("int8", "float16" veya "none": oluşturma).
+        parents (dict | None): {ebeveyn bölüm kimliği: Document}; verilirse parents.json'a yazılır.
+    Returns:
+        int: Koleksiyondaki parça sayısı.
+    """
+    # Veritabanı içindeki koleksiyonun (tablo gibi düşünülebilir) adı
+    collection = collection_name(game)
+    print(f"[{game}] Vektör veritabanı '{shard_dir}' klasörüne '{collection}' koleksiyonu ile kaydedilecek.")
+
+    # Artımlı kurulum mümkün mü? (manifesto var, aynı koleksiyon ve aynı embedding modeli)
+    manifest = None if full_rebuild else load_manifest(shard_dir)
+    incremental = (
+        manifest is not None
+        and manifest.get("embedding_model") == EMBEDDING_MODEL
+        and manifest.get("chunking_version") == CHUNKING_VERSION
+        and manifest.get("collection_name") == collection
+        and os.path.exists(os.path.join(shard_dir, "chroma.sqlite3"))
+    )
+
+    # Artımlı kurulum yapılamıyorsa, oyunun daha önceden oluşturulmuş klasörünü sil (temiz kurulum için)
+    if not incremental and os.path.exists(shard_dir):
+        print(f"[{game}] Tam kurulum yapılacak. Mevcut '{shard_dir}' klasörü siliniyor...")
+        try:
+            shutil.rmtree(shard_dir) # Klasörü ve içindekileri sil
+        except Exception as e:
+            # Silme işlemi başarısız olursa sadece uyar, devam etmeyi dene
+            print(f"Uyarı: '{shard_dir}' klasörü silinirken hata: {e}", file=sys.stderr)
+
+    if incremental:
+        print(f"[{game}] Artımlı kurulum: sadece yeni veya değişmiş parçalar işlenecek...")
+    else:
+        print(f"[{game}] Chroma veritabanı oluşturuluyor ve belgeler işleniyor...")
+    # Chroma veritabanını aç (yoksa oluşturulur) ve belgeleri eşitle
+    vectordb = Chroma(
+        collection_name=collection,             # Koleksiyon adı
+        embedding_function=embedding_function,  # Vektöre çevirme işlemi için fonksiyon
+        persist_directory=shard_dir,            # Kaydedileceği klasör
+    )
+    added, deleted, unchanged = sync_collection(vectordb, documents, batch_size=batch_size)
+    # Verilerin diske yazıldığından emin olmak için persist çağrılabilir (genellikle gerekmez)
+    vectordb.persist()
+    # Vektörleri uygulamanın NumPy indeksi için tek bir .npy matrisine aktar
+    exported = export_vector_index(vectordb, shard_dir)
+    # Aynı parçalardan yerel BM25 (anahtar kelime) indeksini oluştur
+    indexed = build_lexical_index(shard_dir)
+    print(f"[{game}] {exported} parça vektörü NumPy indeksine, {indexed} parça BM25 indeksine aktarıldı.")
+    if parents is not None:
+        # Sorgu anında bulunan pasajlar bu bölümlere çevrilip LLM'e gönderilir
+        print(f"[{game}] {save_parents(shard_dir, parents)} bölüm parents.json dosyasına yazıldı.")
+    if quantization != "none":
+        # Aynı vektörlerden sıkıştırılmış indeksi oluştur ve tam aramaya göre isabet oranını raporla
+        meta = export_quantized_index(shard_dir, precision=quantization)
+        print(
+            f"[{game}] Sıkıştırılmış indeks ({meta['precision']}, IVF kümeleri: {meta['nlist'] or 'yok'}): "
+            f"recall@10 {meta.get('recall_at_10', 1.0):.3f}, bellekte {meta['resident_bytes'] / 2**20:.1f} MB "
+            f"(float32: {meta['float32_bytes'] / 2**20:.1f} MB)."
+        )
+    else:
+        remove_quantized_index(shard_dir)
+    # Manifestoyu güncelle (bir sonraki artımlı kurulum buna göre karar verir)
+    save_manifest(shard_dir, collection, list(documents.keys()))
+    print(f"[{game}] Parçalar: {added} eklendi, {deleted} silindi, {unchanged} değişmedi.")
+    # Yeni bir sürüm kimliği yaz; çalışan uygulama bu sayede bu oyunun anlamsal önbelleğini temizler
+    if added or deleted or not incremental:
+        write_index_version(shard_dir)
+    return exported
+
 # Vektör veritabanını oluşturan ana fonksiyon
-def create_database():
+def create_database(full_rebuild=False, workers=None, batch_size=100, concurrency=4, max_retries=6,
+                    games=None, data_dir=DEFAULT_DATA_DIR, parallel_games=4, quantization="int8", keep_snapshots=DEFAULT_KEEP):
     """
-    PDF veri kaynağını okur, metni LangChain ile parçalara ayırır,
-    Google embedding modeli ile vektörlere dönüştürür ve sonuçları
-    kalıcı bir Chroma veritabanına kaydeder.
+    data/ klasöründeki kural kitapçıklarını oyunlara ayırır (bkz. game_catalog.discover_games), her oyunun
+    PDF'lerini okuyup LangChain ile parçalara ayırır, Google embedding modeli ile vektörlere dönüştürür ve
+    her oyunu kendi klasöründeki ayrı bir Chroma koleksiyonuna (shard) kaydeder. Uygulama soruları tek bir
+    oyunun koleksiyonunda arar; bu yüzden arama maliyeti kütüphanenin tamamına değil, bir oyunun kitapçığına bağlıdır.
+
+    Varsayılan olarak artımlı çalışır: önceki kurulumun manifestosu varsa sadece yeni veya
+    değişmiş parçalar vektöre çevrilip eklenir, kaybolan parçalar silinir. Embedding'ler ayrıca
+    diskte (model adı, içerik özeti) anahtarıyla önbelleğe alındığından tam kurulum bile
+    daha önce görülmüş parçalar için API'ye gitmez. 'games' verilirse sadece o oyunlar yeniden
+    indekslenir; diğer oyunların klasörlerine ve katalog kayıtlarına dokunulmaz.
+    Oyunların PDF'leri ortak bir süreç havuzunda aynı anda çıkarılır; sayfa sayfa parçalanır ve her parça
+    metadata'sında sayfa numaralarını (page, page_end) ve kaynak dosyasını (source) taşır.
+
+    Tüm oyunların parçaları, mevcut veritabanına dokunulmadan önce gruplar halinde vektöre çevrilir. Kota veya ağ
+    hatasında grup beklenip tekrar denenir; işlem yine de yarıda kalırsa eski veritabanı yerinde kalır
+    ve komut tekrar çalıştırıldığında biten gruplar önbellekten gelir (kaldığı yerden devam eder).
+    Veritabanı yerinde değiştirilmez: kurulum yeni bir anlık görüntü klasörüne yazılır ve bitince CURRENT atomik
+    olarak ona çevrilir (bkz. snapshots.py); çalışan uygulama yeniden başlatılmadan yeni anlık görüntüye geçer.
+    Args:
+        full_rebuild (bool): True ise seçilen oyunların klasörleri silinip sıfırdan oluşturulur.
+        workers (int | None): PDF sayfalarını çıkaracak süreç sayısı (None ise CPU çekirdek sayısı).
+        batch_size (int): Embedding API'sine tek istekte gönderilecek parça sayısı.
+        concurrency (int): Aynı anda gönderilecek en fazla embedding isteği.
+        max_retries (int): Başarısız bir grup için en fazla tekrar deneme sayısı.
+        games (list[str] | None): Sadece bu oyunları indeksle (None ise data/ klasöründeki tüm oyunlar).
+        data_dir (str): Kural kitapçıklarının bulunduğu klasör.
+        parallel_games (int): PDF'leri aynı anda okunacak en fazla oyun sayısı.
+        quantization (str): Sıkıştırılmış vektör indeksinin hassasiyeti ("int8", "float16" veya "none").
+        keep_snapshots (int): Saklanacak anlık görüntü sayısı (güncel olan dahil); daha eskileri silinir.
+    Returns:
+        dict: Güncellenmiş oyun kataloğu.
     """
     print("Veritabanı oluşturma işlemi başlıyor...")
     # .env dosyasındaki ortam değişkenlerini yükle
@@ -87,106 +343,164 @@ def create_database():
         print(f"Hata: Google API yapılandırılamadı: {e}", file=sys.stderr)
         sys.exit(1)
 
-    # İşlenecek PDF dosyasının yolu
-    data_path = "data/monopoly_kapsamli_veri.pdf"
-    print(f"Veri dosyası olarak kullanılacak: {data_path}")
-
     # 'data' klasörünün varlığını kontrol et
-    if not os.path.exists("data"):
-        print("Hata: 'data' klasörü bulunamadı.", file=sys.stderr)
-        print(f"Lütfen 'data' klasörünü oluşturun ve '{os.path.basename(data_path)}' dosyasını içine koyun.", file=sys.stderr)
+    if not os.path.isdir(data_dir):
+        print(f"Hata: '{data_dir}' klasörü bulunamadı.", file=sys.stderr)
+        print(f"Lütfen '{data_dir}' klasörünü oluşturun ve oyunların kural kitapçıklarını (PDF) içine koyun.", file=sys.stderr)
         sys.exit(1)
-    # PDF dosyasının varlığını kontrol et
-    if not os.path.exists(data_path):
-        print(f"Hata: Veri dosyası '{data_path}' bulunamadı.", file=sys.stderr)
+    # Klasördeki oyunları ve PDF'lerini bul
+    available = discover_games(data_dir)
+    if not available:
+        print(f"Hata: '{data_dir}' klasöründe PDF bulunamadı.", file=sys.stderr)
         sys.exit(1)
+    if games:
+        unknown = sorted(set(games) - set(available))
+        if unknown:
+            print(f"Hata: '{data_dir}' klasöründe bulunamayan oyun(lar): {', '.join(unknown)}. Mevcut oyunlar: {', '.join(available)}", file=sys.stderr)
+            sys.exit(1)
+        selected = {game: available[game] for game in games}
+    else:
+        selected = available
+    print(f"İndekslenecek oyunlar: {', '.join(f'{game} ({len(paths)} PDF)' for game, paths in selected.items())}")
 
-    # PDF'ten metin içeriğini çıkar
-    text_content = extract_text_from_pdf(data_path)
-    # Metin çıkarma başarısız olduysa veya içerik boşsa işlemi durdur
-    if text_content is None or not text_content.strip():
-        print("Hata: PDF'ten metin çıkarılamadı veya metin boş. İşlem durduruldu.", file=sys.stderr)
-        sys.exit(1)
-
-    # Metni RAG için uygun parçalara (chunk) ayıracak splitter'ı ayarla
-    text_splitter = RecursiveCharacterTextSplitter(
-        # chunk_size: Her bir parçanın yaklaşık maksimum karakter sayısı. Deneyerek ayarlanabilir.
-        chunk_size=1500,
-        # chunk_overlap: Parçalar arasında anlam bütünlüğünü korumak için ortak karakter sayısı.
-        chunk_overlap=200,
-        # length_function: Parça boyutunu hesaplamak için kullanılacak fonksiyon (genellikle len yeterli).
-        length_function=len,
-        # separators: Metni bölmek için kullanılacak karakter dizileri (öncelik sırasına göre).
-        # PDF'ten gelen metinlerde çift satır başı genellikle paragrafları ayırır.
-        separators=["\n\n", "\n", ". ", "? ", "! ", " ", ""],
-        # separators listesinin regex olup olmadığını belirtir (False daha hızlıdır).
-        is_separator_regex=False,
-    )
-    print("Metin parçalayıcı (Text Splitter) oluşturuldu.")
-
-    # PDF metnini splitter kullanarak parçalara ayır
-    chunks = text_splitter.split_text(text_content)
-    # Her bir metin parçasını LangChain'in Document formatına çevir ve boş parçaları filtrele
-    documents = [Document(page_content=chunk) for chunk in chunks if chunk.strip()]
+    # Metni bölümlere ve aranacak pasajlara ayıracak parçalayıcıyı ayarla
+    chunker = create_chunker()
+    print("Bölüm parçalayıcı (ebeveyn/çocuk) oluşturuldu.")
 
-    # Eğer hiç parça oluşturulamadıysa hata ver
-    if not documents:
-        print("Hata: Metin parçalara ayrılamadı. Splitter ayarlarını veya PDF içeriğini kontrol edin.", file=sys.stderr)
+    # Oyunların PDF'lerini ortak bir süreç havuzunda aynı anda oku (küçük kitapçıklar da tüm çekirdekleri kullanır)
+    documents_by_game = {}
+    parents_by_game = {}
+    try:
+        with start_page_pool(workers) as pool, ThreadPoolExecutor(max_workers=max(1, min(parallel_games, len(selected)))) as threads:
+            futures = {
+                game: threads.submit(extract_game_documents, game, paths, chunker, workers, pool)
+                for game, paths in selected.items()
+            }
+            for game, future in futures.items():
+                documents_by_game[game], parents_by_game[game] = future.result()
+        print("PDF metin çıkarma işlemi tamamlandı.")
+    except Exception as e:
+        # PDF okuma/işleme sırasında hata olursa logla ve programı durdur
+        print(f"Hata: PDF dosyası okunurken veya işlenirken sorun oluştu: {e}", file=sys.stderr)
+        traceback.print_exc() # Hatanın tam detayını yazdır
         sys.exit(1)
 
-    print(f"Toplam {len(documents)} adet metin parçası (document chunk) oluşturuldu.")
+    # Eğer bir oyun için hiç parça oluşturulamadıysa hata ver
+    empty = [game for game, documents in documents_by_game.items() if not documents]
+    if empty:
+        print(f"Hata: Şu oyunların PDF'lerinden metin çıkarılamadı: {', '.join(empty)}. Parçalama ayarlarını veya PDF içeriğini kontrol edin.", file=sys.stderr)
+        sys.exit(1)
 
     # Metin parçalarını vektörlere çevirecek embedding modelini ayarla
     try:
-        embedding_function = GoogleGenerativeAIEmbeddings(
-            model="models/text-embedding-004", google_api_key=api_key
+        google_embeddings = GoogleGenerativeAIEmbeddings(
+            model=EMBEDDING_MODEL, google_api_key=api_key
             # Veritabanı oluştururken task_type belirtmek genellikle performansı artırabilir:
             # task_type="RETRIEVAL_DOCUMENT"
         )
-        print("Google Embedding modeli başarıyla ayarlandı.")
+        # Daha önce vektöre çevrilmiş parçalar için API'ye tekrar gitmemek için diskteki önbelleği öne koy
+        embedding_function = CachedEmbeddings(google_embeddings, model_name=EMBEDDING_MODEL)
+        print("Google Embedding modeli başarıyla ayarlandı (kalıcı embedding önbelleği ile).")
     except Exception as e:
         print(f"Hata: Google Embedding modeli ayarlanamadı: {e}", file=sys.stderr)
         sys.exit(1)
 
-    # Vektör veritabanının kaydedileceği klasör
-    db_path = "./chroma_db"
-    # Veritabanı içindeki koleksiyonun (tablo gibi düşünülebilir) adı
-    collection_name = "gaih_monopoly_comprehensive" # app.py'deki ile aynı olmalı
-    print(f"Vektör veritabanı '{db_path}' klasörüne '{collection_name}' koleksiyonu ile kaydedilecek.")
-
-    # Eğer daha önceden oluşturulmuş bir veritabanı klasörü varsa, onu sil (temiz kurulum için)
-    if os.path.exists(db_path):
-        print(f"Mevcut '{db_path}' klasörü siliniyor...")
-        try:
-            shutil.rmtree(db_path) # Klasörü ve içindekileri sil
-            print(f"'{db_path}' klasörü başarıyla silindi.")
-        except Exception as e:
-            # Silme işlemi başarısız olursa sadece uyar, devam etmeyi dene
-            print(f"Uyarı: '{db_path}' klasörü silinirken hata: {e}", file=sys.stderr)
-
-    # Chroma veritabanını oluştur ve belgeleri ekle
+    # Tüm oyunların parçalarını veritabanına dokunmadan önce tek bir iş kuyruğunda vektöre çevir
+    # (sonuçlar önbelleğe, yani diske yazılır; kota sınırı tüm oyunlar için ortak uygulanır)
+    texts = list(dict.fromkeys(doc.page_content for documents in documents_by_game.values() for doc in documents.values()))
+    print(f"{len(texts)} parça vektöre çevriliyor ({batch_size} parçalık gruplar, aynı anda en fazla {concurrency} istek)...")
     try:
-        print("Chroma veritabanı oluşturuluyor ve belgeler işleniyor (Bu işlem biraz zaman alabilir)...")
-        # Chroma.from_documents: Verilen belgeleri (Documents listesi) alır,
-        # embedding_function ile vektörlere çevirir ve belirtilen klasöre (`persist_directory`)
-        # kalıcı olarak kaydeder (`collection_name` ile).
-        vectordb = Chroma.from_documents(
-            documents=documents,             # Vektöre çevrilecek metin parçaları
-            embedding=embedding_function,    # Vektöre çevirme işlemi için fonksiyon
-            collection_name=collection_name, # Koleksiyon adı
-            persist_directory=db_path,       # Kaydedileceği klasör
+        stats = embed_in_batches(
+            embedding_function,
+            texts,
+            batch_size=batch_size,
+            max_workers=concurrency,
+            max_retries=max_retries,
         )
-        # Verilerin diske yazıldığından emin olmak için persist çağrılabilir (genellikle from_documents sonrası gerekmez)
-        vectordb.persist()
-        print(f"Veritabanı başarıyla oluşturuldu ve '{db_path}' klasörüne kaydedildi.")
-        # Oluşturulan veritabanı nesnesini döndür (opsiyonel)
-        return vectordb
     except Exception as e:
-        # Veritabanı oluşturma sırasında hata olursa logla ve programı durdur
+        print(f"Hata: Parçalar vektöre çevrilemedi: {e}", file=sys.stderr)
+        print("Mevcut veritabanı değiştirilmedi. Tamamlanan gruplar önbelleğe kaydedildi; komutu tekrar çalıştırarak kaldığı yerden devam edebilirsiniz.", file=sys.stderr)
+        traceback.print_exc()
+        sys.exit(1)
+    print(
+        f"Embedding tamamlandı: {stats['chunks']} parça, {stats['seconds']:.1f} sn, "
+        f"{stats['chunks_per_second']:.1f} parça/sn, {stats['retries']} tekrar deneme."
+    )
+
+    # Vektör veritabanının kaydedileceği klasör. Kurulum yeni bir anlık görüntü klasörüne yazılır; çalışan uygulama
+    # bu sırada güncel anlık görüntüyü kullanmaya devam eder ve kurulum bitince yeni anlık görüntüye geçer.
+    db_path = os.getenv("CHROMA_DB_PATH", "./chroma_db") # app.py'deki DB_PATH ile aynı olmalı
+    os.makedirs(db_path, exist_ok=True)
+    build_dir = begin_snapshot(db_path, rebuild=documents_by_game, copy_rebuilt=not full_rebuild)
+    print(f"Yeni anlık görüntü '{build_dir}' klasörüne yazılıyor (güncel veritabanı kurulum bitene kadar değişmez)...")
+    try:
+        # Her oyunun koleksiyonunu sırayla eşitle ve katalogu güncelle
+        catalog = None
+        for game, documents in documents_by_game.items():
+            chunks = build_game_shard(
+                game, documents, embedding_function, shard_path(build_dir, game),
+                full_rebuild=full_rebuild, batch_size=batch_size, quantization=quantization,
+                parents=parents_by_game[game],
+            )
+            catalog = update_catalog(build_dir, {game: {
+                "name": game_title(game),
+                "collection": collection_name(game),
+                "sources": [os.path.basename(p) for p in selected[game]],
+                "chunks": chunks,
+            }})
+        # Tüm klasör indekslendiyse artık data/ klasöründe olmayan oyunları kaldır
+        if not games:
+            removed = sorted(set(load_catalog(build_dir)) - set(selected))
+            for game in removed:
+                print(f"[{game}] Oyunun kitapçığı artık '{data_dir}' klasöründe yok; klasörü siliniyor...")
+                shutil.rmtree(shard_path(build_dir, game), ignore_errors=True)
+            if removed:
+                catalog = update_catalog(build_dir, {}, remove=removed)
+        # Kurulum tamamlandı: CURRENT'ı atomik olarak yeni anlık görüntüye çevir
+        snapshot = publish_snapshot(db_path, build_dir)
+    except Exception as e:
+        # Veritabanı oluşturma sırasında hata olursa yarım anlık görüntüyü sil, logla ve programı durdur
+        discard_snapshot(build_dir)
         print(f"Hata: Chroma veritabanı oluşturulamadı: {e}", file=sys.stderr)
+        print("Güncel veritabanı değiştirilmedi.", file=sys.stderr)
         traceback.print_exc() # Hatanın detayını yazdır
         sys.exit(1)
+    print(f"Embedding önbelleği: {embedding_function.hits} isabet, {embedding_function.misses} API çağrısı gerektiren parça.")
+    print(f"Veritabanı başarıyla oluşturuldu: '{db_path}' klasöründe '{snapshot}' anlık görüntüsü yayınlandı ({len(catalog)} oyun).")
+    print("Çalışan uygulama yeni anlık görüntüye yeniden başlatılmadan geçecek (bkz. SNAPSHOT_POLL_SECONDS, /admin/reload).")
+    try:
+        remove_unversioned_layout(db_path)
+        removed = collect_garbage(db_path, keep=keep_snapshots)
+        if removed:
+            print(f"Eski anlık görüntüler silindi: {', '.join(removed)}")
+    except OSError as e:
+        # Temizlik başarısız olsa da yeni anlık görüntü yayınlandı; bir sonraki kurulumda tekrar denenir
+        print(f"Uyarı: Eski anlık görüntüler silinemedi: {e}", file=sys.stderr)
+    return catalog
 
 # Bu script doğrudan çalıştırıldığında (python create_database.py) create_database() fonksiyonunu çağır
 if __name__ == "__main__":
-    create_database()
+    parser = argparse.ArgumentParser(description="data/ klasöründeki oyun kural kitapçıklarından oyun başına bir Chroma koleksiyonu oluşturur veya günceller.")
+    parser.add_argument("--full", action="store_true", help="Seçilen oyunların veritabanını silip sıfırdan oluştur (artımlı kurulumu kapatır).")
+    parser.add_argument("--game", action="append", default=None, help="Sadece bu oyunu yeniden indeksle (birden fazla kez verilebilir; örn: --game monopoly).")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help=f"Kural kitapçıklarının bulunduğu klasör (varsayılan: {DEFAULT_DATA_DIR}).")
+    parser.add_argument("--parallel-games", type=int, default=4, help="PDF'leri aynı anda okunacak en fazla oyun sayısı (varsayılan: 4).")
+    parser.add_argument("--workers", type=int, default=None, help="PDF sayfalarını çıkaracak süreç sayısı (varsayılan: CPU çekirdek sayısı).")
+    parser.add_argument("--batch-size", type=int, default=100, help="Embedding API'sine tek istekte gönderilecek parça sayısı (varsayılan: 100).")
+    parser.add_argument("--concurrency", type=int, default=4, help="Aynı anda gönderilecek en fazla embedding isteği (varsayılan: 4).")
+    parser.add_argument("--max-retries", type=int, default=6, help="Kota/ağ hatasında bir grup için en fazla tekrar deneme (varsayılan: 6).")
+    parser.add_argument("--keep-snapshots", type=int, default=DEFAULT_KEEP, help=f"Saklanacak anlık görüntü sayısı, güncel olan dahil (varsayılan: {DEFAULT_KEEP}).")
+    parser.add_argument("--quantization", choices=("int8", "float16", "none"), default="int8", help="Sıkıştırılmış vektör indeksinin hassasiyeti; 'none' ise oluşturulmaz (varsayılan: int8).")
+    args = parser.parse_args()
+    create_database(
+        full_rebuild=args.full,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        concurrency=args.concurrency,
+        max_retries=args.max_retries,
+        games=[game_slug(game) for game in args.game] if args.game else None,
+        data_dir=args.data_dir,
+        parallel_games=args.parallel_games,
+        quantization=args.quantization,
+        keep_snapshots=args.keep_snapshots,
+    )
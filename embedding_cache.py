@@ -0,0 +1,147 @@
+# Gerekli kütüphaneleri içe aktar
+import hashlib                      # Metinlerin içerik özetini (hash) hesaplamak için
+import os                           # Önbellek klasörünü oluşturmak için
+import sqlite3                      # Önbelleği diskte kalıcı olarak saklamak için
+import threading                    # Aynı bağlantıya farklı thread'lerden güvenli erişim için
+from array import array             # Vektörleri kompakt float32 byte dizisi olarak saklamak için
+
+from langchain_core.embeddings import Embeddings # LangChain embedding arayüzü
+
+# Önbellek dosyasının varsayılan yolu
+DEFAULT_CACHE_PATH = "./cache/embeddings.sqlite3"
+
+
+def text_hash(text):
+    """
+    Metnin SHA-256 içerik özetini döndürür.
+    Args:
+        text (str): Özeti alınacak metin.
+    Returns:
+        str: 64 karakterlik onaltılık (hex) özet.
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Herhangi bir LangChain embedding modelinin önüne konan, diskte kalıcı embedding önbelleği.
+    Vektörler (model adı, metin türü, metin özeti) anahtarıyla SQLite dosyasında saklanır;
+    daha önce vektöre çevrilmiş bir metin için API'ye tekrar gidilmez. Böylece PDF'te birkaç
+    sayfa değiştiğinde veritabanını yeniden oluşturmak sadece değişen parçalar kadar API çağrısı gerektirir.
+    """
+
+    def __init__(self, underlying, model_name, cache_path=DEFAULT_CACHE_PATH):
+        """
+        Args:
+            underlying (Embeddings): Önbellekte olmayan metinler için kullanılacak gerçek embedding modeli.
+            model_name (str): Model adı (farklı modellerin vektörleri birbirine karışmasın diye anahtara eklenir).
+            cache_path (str): SQLite önbellek dosyasının yolu.
+        """
+        self.underlying = underlying
+        self.model_name = model_name
+        self.cache_path = cache_path
+        # İstatistik sayaçları (kaç metin önbellekten geldi, kaçı API'den)
+        self.hits = 0
+        self.misses = 0
+
+        cache_dir = os.path.dirname(cache_path)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(cache_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                PRIMARY KEY (model, kind, text_hash)
+            )
+            """
+        )
+        self._conn.commit()
+
+    # ----- Yardımcı (iç) fonksiyonlar -----
+
+    def _get_many(self, kind, hashes):
+        """Verilen özetlere ait önbellekteki vektörleri {özet: vektör} olarak döndürür."""
+        found = {}
+        unique_hashes = list(dict.fromkeys(hashes))
+        # SQLite'ın parametre sınırına takılmamak için sorguyu parçalara böl
+        with self._lock:
+            for start in range(0, len(unique_hashes), 500):
+                batch = unique_hashes[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND kind = ? AND text_hash IN ({placeholders})",
+                    [self.model_name, kind, *batch],
+                ).fetchall()
+                for h, blob in rows:
+                    found[h] = array("f", blob).tolist()
+        return found
+
+    def _put_many(self, kind, items):
+        """{özet: vektör} çiftlerini önbelleğe yazar."""
+        if not items:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, kind, text_hash, vector) VALUES (?, ?, ?, ?)",
+                [(self.model_name, kind, h, array("f", vector).tobytes()) for h, vector in items.items()],
+            )
+            self._conn.commit()
+
+    # ----- LangChain Embeddings arayüzü -----
+
+    def embed_documents(self, texts):
+        """
+        Belgeleri vektöre çevirir. Önbellekte olanlar diskten okunur, olmayanlar tek bir
+        toplu çağrı ile gerçek modele gönderilir ve sonuçları önbelleğe yazılır.
+        Args:
+            texts (list[str]): Vektöre çevrilecek metinler.
+        Returns:
+            list[list[float]]: Metinlerle aynı sırada vektörler.
+        """
+        hashes = [text_hash(t) for t in texts]
+        cached = self._get_many("document", hashes)
+
+        # Önbellekte olmayan metinleri (tekrarları atarak) topla
+        missing = {}
+        for t, h in zip(texts, hashes):
+            if h not in cached and h not in missing:
+                missing[h] = t
+        self.hits += len(texts) - sum(1 for h in hashes if h not in cached)
+        self.misses += sum(1 for h in hashes if h not in cached)
+
+        if missing:
+            new_vectors = self.underlying.embed_documents(list(missing.values()))
+            fresh = dict(zip(missing.keys(), new_vectors))
+            self._put_many("document", fresh)
+            cached.update(fresh)
+
+        return [cached[h] for h in hashes]
+
+    def embed_query(self, text):
+        """
+        Tek bir sorguyu vektöre çevirir (sorgu vektörleri belge vektörlerinden ayrı saklanır).
+        Args:
+            text (str): Sorgu metni.
+        Returns:
+            list[float]: Sorgunun vektörü.
+        """
+        h = text_hash(text)
+        cached = self._get_many("query", [h])
+        if h in cached:
+            self.hits += 1
+            return cached[h]
+        self.misses += 1
+        vector = self.underlying.embed_query(text)
+        self._put_many("query", {h: vector})
+        return vector
+
+    def close(self):
+        """SQLite bağlantısını kapatır."""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,128 @@
+# Oyun kataloğu: data/ klasöründeki kural kitapçıklarını oyunlara ayırır ve her oyunun veritabanı parçasının (shard)
+# nerede olduğunu tutar. create_database.py kataloğu yazar, app.py okur.
+#
+# Katalog düzeni (bir anlık görüntü klasöründe, bkz. snapshots.py; eski kurulumlarda doğrudan CHROMA_DB_PATH'te):
+#   <klasör>/games.json             -> Katalog: oyun kimliği -> ad, koleksiyon adı, klasör, kaynak dosyalar
+#   <klasör>/<oyun>/                -> Oyunun kendi Chroma koleksiyonu, NumPy/BM25 indeksleri, manifestosu ve sürümü
+# Katalog olmayan eski kurulumlarda (tek koleksiyon doğrudan chroma_db/ içinde) veritabanı tek bir oyun (monopoly) sayılır.
+
+# Gerekli kütüphaneleri içe aktar
+import json                         # Katalog dosyasını okumak/yazmak için
+import os                           # Dosya/klasör yolları için
+import re                           # Oyun kimliğini (slug) oluşturmak için
+from datetime import datetime       # Katalogdaki güncelleme zamanı için
+
+# Katalog dosyasının adı (veritabanı klasörünün kökünde tutulur)
+CATALOG_FILE = "games.json"
+# Kural kitapçıklarının bulunduğu klasör
+DEFAULT_DATA_DIR = "data"
+# Katalog olmayan eski kurulumlardaki tek oyunun kimliği ve koleksiyon adı
+LEGACY_GAME = "monopoly"
+
+# Türkçe harflerin kimlikte kullanılacak ASCII karşılıkları (Chroma koleksiyon adları sadece ASCII kabul eder)
+_ASCII = str.maketrans("çğıöşüÇĞİÖŞÜ", "cgiosuCGIOSU")
+
+
+def game_slug(name):
+    """
+    Dosya veya klasör adından oyun kimliği üretir: küçük harf, ASCII, kelimeler arası '-'.
+    Örn: "Ticket to Ride" -> "ticket-to-ride", "Kızma Birader" -> "kizma-birader".
+    Args:
+        name (str): Dosya/klasör adı.
+    Returns:
+        str: Oyun kimliği (boş olabilir).
+    """
+    return re.sub(r"[^a-z0-9]+", "-", name.translate(_ASCII).lower()).strip("-")
+
+
+def game_title(slug):
+    """Oyun kimliğinden ekranda ve prompt'ta kullanılacak adı üretir (örn: "ticket-to-ride" -> "Ticket To Ride")."""
+    return " ".join(word.capitalize() for word in slug.split("-"))
+
+
+def collection_name(slug):
+    """Oyunun Chroma koleksiyon adı (monopoly için eski kurulumlarla aynı: gaih_monopoly_comprehensive)."""
+    return f"gaih_{slug.replace('-', '_')}_comprehensive"
+
+
+def discover_games(data_dir=DEFAULT_DATA_DIR):
+    """
+    data/ klasöründeki PDF'leri oyunlara ayırır:
+      - data/<oyun>/*.pdf: Alt klasördeki tüm PDF'ler klasör adındaki oyuna aittir (örn: data/ticket-to-ride/kurallar.pdf).
+      - data/<oyun>_<açıklama>.pdf: Kökteki PDF'lerde ilk '_' öncesi oyunun adıdır
+        (örn: monopoly_kapsamli_veri.pdf ve monopoly_sss.pdf -> monopoly).
+    Args:
+        data_dir (str): Kural kitapçıklarının bulunduğu klasör.
+    Returns:
+        dict[str, list[str]]: Oyun kimliği -> PDF yolları (sıralı).
+    """
+    games = {}
+    for entry in sorted(os.listdir(data_dir)):
+        path = os.path.join(data_dir, entry)
+        if os.path.isdir(path):
+            slug = game_slug(entry)
+            pdfs = [os.path.join(path, f) for f in sorted(os.listdir(path)) if f.lower().endswith(".pdf")]
+        elif entry.lower().endswith(".pdf"):
+            slug = game_slug(os.path.splitext(entry)[0].split("_")[0])
+            pdfs = [path]
+        else:
+            continue
+        if slug and pdfs:
+            games.setdefault(slug, []).extend(pdfs)
+    return games
+
+
+def shard_path(db_path, slug):
+    """Oyunun veritabanı klasörü (chroma_db/<oyun>)."""
+    return os.path.join(db_path, slug)
+
+
+def load_catalog(db_path):
+    """
+    Veritabanındaki oyunları döndürür. Katalog yoksa ve kökte eski tek koleksiyonlu kurulum varsa onu tek oyun olarak döndürür.
+    Args:
+        db_path (str): Veritabanı klasörü.
+    Returns:
+        dict[str, dict]: Oyun kimliği -> {"name", "collection", "path" (tam yol), "sources", ...}. Hiç oyun yoksa boş sözlük.
+    Raises:
+        ValueError: Katalog dosyası okunamazsa.
+    """
+    catalog_path = os.path.join(db_path, CATALOG_FILE)
+    if os.path.exists(catalog_path):
+        try:
+            with open(catalog_path, "r", encoding="utf-8") as f:
+                games = json.load(f)["games"]
+        except (OSError, ValueError, KeyError) as e:
+            raise ValueError(f"Oyun kataloğu okunamadı ({catalog_path}): {e}") from e
+        return {slug: {**info, "path": shard_path(db_path, info.get("path", slug))} for slug, info in games.items()}
+    if os.path.exists(os.path.join(db_path, "chroma.sqlite3")):
+        return {LEGACY_GAME: {"name": game_title(LEGACY_GAME), "collection": collection_name(LEGACY_GAME), "path": db_path, "sources": []}}
+    return {}
+
+
+def update_catalog(db_path, entries, remove=()):
+    """
+    Katalogdaki oyun kayıtlarını ekler/günceller ve verilen oyunları çıkarır; diğer oyunların kayıtlarına dokunmaz.
+    Args:
+        db_path (str): Veritabanı klasörü.
+        entries (dict[str, dict]): Oyun kimliği -> kayıt ("name", "collection", "sources", "chunks" ...).
+        remove (iterable[str]): Katalogdan çıkarılacak oyun kimlikleri.
+    Returns:
+        dict[str, dict]: Güncellenmiş katalog.
+    """
+    catalog_path = os.path.join(db_path, CATALOG_FILE)
+    games = {}
+    if os.path.exists(catalog_path):
+        with open(catalog_path, "r", encoding="utf-8") as f:
+            games = json.load(f).get("games", {})
+    for slug in remove:
+        games.pop(slug, None)
+    now = datetime.now().isoformat(timespec="seconds")
+    for slug, entry in entries.items():
+        games[slug] = {**entry, "path": slug, "updated_at": now}
+    # Önce geçici dosyaya yaz, sonra yerine taşı (okuyan taraf yarım dosya görmesin)
+    tmp_path = catalog_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"games": dict(sorted(games.items()))}, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, catalog_path)
+    return games
@@ -0,0 +1,82 @@
+# Gerekli kütüphaneleri içe aktar
+import math                         # Log-olasılık ve softmax hesapları için
+
+from lexical_index import tokenize  # Sorular BM25 indeksiyle aynı Türkçe terimlere ayrılır
+
+
+class GameRouter:
+    """
+    Soruyu hangi oyunla ilgili olduğuna göre bir oyuna yönlendiren yerel sınıflandırıcı (ağ çağrısı yok).
+    Her oyunun BM25 indeksindeki "terim kaç parçada geçiyor" sayılarından bir Naive Bayes modeli kurulur:
+    bir terim bir oyunun kitapçığında ne kadar yaygınsa o oyuna o kadar oy verir; tüm oyunlarda eşit yaygın
+    terimler ("oyuncu", "zar") kararı etkilemez. Soruda bir oyunun adı geçiyorsa doğrudan o oyun seçilir.
+    Maliyeti soru terimi sayısı x oyun sayısı kadardır (parça sayısından bağımsızdır).
+    """
+
+    def __init__(self, term_counts, chunk_counts, names=None, min_confidence=0.6):
+        """
+        Args:
+            term_counts (dict[str, dict[str, int]]): Oyun kimliği -> (terim -> terimin geçtiği parça sayısı).
+            chunk_counts (dict[str, int]): Oyun kimliği -> oyunun toplam parça sayısı.
+            names (dict[str, str] | None): Oyun kimliği -> oyunun adı (soruda geçerse o oyun seçilir).
+            min_confidence (float): Sınıflandırıcının bir oyunu seçmesi için gereken en düşük olasılık (0-1).
+        """
+        self.games = sorted(chunk_counts)
+        self.min_confidence = min_confidence
+        # Hiç geçmeyen terimin log-olasılığı (Laplace yumuşatması); büyük kitapçıklarda daha düşüktür
+        self._absent = [math.log(1.0 / (chunk_counts[g] + 2)) for g in self.games]
+        # terim -> {oyun sırası: log-olasılık}; sadece terimin geçtiği oyunlar tutulur (seyrek)
+        self._log_probs = {}
+        for i, game in enumerate(self.games):
+            total = chunk_counts[game] + 2
+            for term, count in term_counts.get(game, {}).items():
+                self._log_probs.setdefault(term, {})[i] = math.log((count + 1) / total)
+        # Oyun adlarının terimleri (örn: "ticket to ride" -> {"ticke", "ride"})
+        self._name_terms = [
+            (game, frozenset(tokenize(name)))
+            for game, name in (names or {}).items()
+            if game in chunk_counts and tokenize(name)
+        ]
+
+    def __len__(self):
+        return len(self.games)
+
+    def route(self, query):
+        """
+        Sorunun hangi oyunla ilgili olduğunu tahmin eder.
+        Args:
+            query (str): Soru metni.
+        Returns:
+            tuple[str | None, float]: (oyun kimliği, olasılık). Soru hiçbir oyuna yeterince benzemiyorsa
+                                      (terimleri bilinmiyorsa veya olasılık min_confidence'ın altındaysa) oyun None'dır.
+        """
+        if len(self.games) == 1:
+            return self.games[0], 1.0
+        terms = set(tokenize(query))
+        if not terms or not self.games:
+            return None, 0.0
+
+        # Soruda bir oyunun adı geçiyorsa (ve sadece bir oyunun) doğrudan onu seç
+        named = [game for game, name_terms in self._name_terms if name_terms <= terms]
+        if len(named) == 1:
+            return named[0], 1.0
+
+        scores = [0.0] * len(self.games)
+        known = 0
+        for term in terms:
+            row = self._log_probs.get(term)
+            if row is None:
+                continue
+            known += 1
+            for i, absent in enumerate(self._absent):
+                scores[i] += row.get(i, absent)
+        if not known:
+            return None, 0.0
+
+        # Skorları olasılığa çevir (softmax) ve en olası oyunu seç
+        best = max(range(len(scores)), key=scores.__getitem__)
+        total = sum(math.exp(score - scores[best]) for score in scores)
+        confidence = 1.0 / total
+        if confidence < self.min_confidence:
+            return None, confidence
+        return self.games[best], confidence
@@ -0,0 +1,46 @@
+# Gunicorn yapılandırması (Procfile: gunicorn -c gunicorn.conf.py app:app)
+import os                           # Ortam değişkenlerini okumak için
+
+# Dinlenecek adres (Render/Heroku gibi platformlar PORT değişkenini verir)
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+
+# gthread: Her worker birden fazla thread ile aynı anda birden fazla isteği karşılar.
+# Varsayılan 'sync' worker'da yavaş bir Gemini çağrısı koca bir süreci kilitliyordu;
+# istekler zamanlarının çoğunu ağda beklediği için thread'ler bu süreyi verimli kullanır.
+worker_class = "gthread"
+# Süreç (worker) sayısı; bellek kısıtlı ortamlarda düşük tutulmalı
+workers = int(os.environ.get("WEB_CONCURRENCY", "2"))
+# Worker başına thread sayısı (aynı anda karşılanabilecek istek sayısı)
+threads = int(os.environ.get("GUNICORN_THREADS", "16"))
+
+# Akışlı yanıtlar ve yavaş LLM çağrıları için istek zaman aşımı (saniye)
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "120"))
+# Keep-alive bağlantıların açık tutulma süresi (saniye)
+keepalive = 5
+
+# --preload: Uygulama ana süreçte bir kez import edilir ve sadece okunan indeksler (NumPy matrisi, BM25) fork'tan önce
+# yüklenir; worker'lar bu belleği kopyalamadan paylaşır ve açılır açılmaz istek karşılamaya başlar.
+# GUNICORN_PRELOAD=0 ile her worker uygulamayı kendisi import eder.
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1").lower() in ("1", "true", "yes")
+
+
+def when_ready(server):
+    """Ana süreç hazır olduğunda (worker'lar fork edilmeden önce) sadece okunan verileri ve ağır kütüphaneleri yükler."""
+    if not preload_app:
+        return
+    import app as application
+    try:
+        application.preload_read_only_data()
+        application.preload_modules()
+    except Exception as e:
+        # Veritabanı yoksa worker'lar ısınma sırasında tekrar deneyecek ve /readyz hatayı raporlayacak
+        server.log.warning("Sadece okunan veriler önceden yüklenemedi: %s", e)
+
+
+def post_worker_init(worker):
+    """
+    Worker uygulamayı yükledikten (--preload ile fork edildikten) sonra API istemcilerini oluşturan ısınmayı
+    arka planda başlatır. Worker bu sırada istek karşılamaya başlar; hazır olana kadar /readyz 503 döner.
+    """
+    import app as application
+    application.start_warm_up()
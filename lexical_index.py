@@ -0,0 +1,231 @@
+# Gerekli kütüphaneleri içe aktar
+import heapq                        # En yüksek skorlu k belgeyi seçmek için
+import json                         # İndeksi diske yazmak/okumak için
+import math                         # BM25 IDF hesabı için (logaritma)
+import os                           # Dosya yolları ve atomik dosya değiştirme için
+import re                           # Metni kelimelere ayırmak için
+from collections import Counter     # Belge içi kelime frekansları için
+
+from langchain.schema import Document # LangChain'in metin parçalarını temsil eden Document sınıfı
+
+# İndeks dosyasının adı (veritabanı klasöründe, documents.json'ın yanında tutulur)
+LEXICAL_INDEX_FILE = "bm25.json"
+# Belge metinlerinin bulunduğu dosya (vector_index.DOCUMENTS_FILE ile aynı)
+DOCUMENTS_FILE = "documents.json"
+
+# Türkçe'ye özgü büyük/küçük harf dönüşümleri (Python'un lower() fonksiyonu 'I' -> 'i' ve 'İ' -> 'i̇' yapar)
+_TURKISH_LOWER = str.maketrans({"I": "ı", "İ": "i"})
+# Kelime (harf/rakam dizisi) yakalayan ifade
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+# Arama sonucunu etkilemeyen sık kullanılan Türkçe kelimeler
+STOPWORDS = frozenset("""
+acaba ama ancak bana bazı belki ben beni benim bir biri birkaç biz bu buna bunu bunun çok çünkü da daha de
+defa diye en gibi hem hep her hiç için ile ise kadar ki kim mi mı mu mü nasıl ne neden nedir nerede niye
+o olan olarak olur onu onun sadece şey şu ve veya ya yani yine zaten
+""".split())
+
+# Eklerin sondan atılması için (uzundan kısaya) basit Türkçe çekim/iyelik ekleri listesi.
+# Tam bir kök bulucu değildir; "kartı" / "kartlar" / "kartın" gibi yazımları aynı köke indirmek için yeterlidir.
+_SUFFIXES = sorted("""
+lerinden larından lerinde larında lerine larına lerini larını
+ndan nden nda nde nın nin nun nün dan den tan ten daki deki taki teki
+ları leri lar ler yla yle sı si su sü ya ye yı yi yu yü da de ta te na ne ın in un ün
+ı i u ü a e
+""".split(), key=len, reverse=True)
+# Köklerin kesileceği en fazla uzunluk (Türkçe bilgi erişiminde yaygın "ilk 5 harf" yaklaşımı)
+STEM_LENGTH = 5
+# Ek atıldıktan sonra kalması gereken en kısa kök uzunluğu
+MIN_STEM = 3
+
+
+def turkish_lower(text):
+    """Metni Türkçe kurallarına göre küçük harfe çevirir ('I' -> 'ı', 'İ' -> 'i')."""
+    return (text or "").translate(_TURKISH_LOWER).lower()
+
+
+def stem(word):
+    """
+    Kelimeden bilinen bir çekim ekini atar ve kökü STEM_LENGTH harfe keser.
+    Örn: "kartı" -> "kart", "hapisten" -> "hapis", "başlangıç" -> "başla".
+    Args:
+        word (str): Küçük harfe çevrilmiş kelime.
+    Returns:
+        str: Kelimenin kökü.
+    """
+    if word.isdigit():
+        return word
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM:
+            word = word[:-len(suffix)]
+            break
+    return word[:STEM_LENGTH]
+
+
+def tokenize(text):
+    """
+    Metni Türkçe'ye uygun şekilde arama terimlerine ayırır: küçük harfe çevirir,
+    kelimelere böler, etkisiz kelimeleri atar ve her kelimeyi köküne indirir.
+    Args:
+        text (str): Belge veya soru metni.
+    Returns:
+        list[str]: Arama terimleri.
+    """
+    return [stem(w) for w in _WORD.findall(turkish_lower(text)) if w not in STOPWORDS and len(w) > 1]
+
+
+def build_lexical_index(index_dir, k1=1.5, b=0.75):
+    """
+    documents.json içindeki parçalardan bir BM25 ters indeksi (inverted index) oluşturur ve
+    bm25.json olarak yazar. Parçalar documents.json'daki sıraları ile numaralandırılır.
+    Args:
+        index_dir (str): documents.json'ın bulunduğu ve indeksin yazılacağı klasör.
+        k1 (float): BM25 terim frekansı doygunluk parametresi.
+        b (float): BM25 belge uzunluğu normalizasyon parametresi.
+    Returns:
+        int: İndekslenen parça sayısı.
+    """
+    with open(os.path.join(index_dir, DOCUMENTS_FILE), "r", encoding="utf-8") as f:
+        records = json.load(f)
+
+    postings = {} # terim -> [[belge no, frekans], ...]
+    doc_lengths = []
+    for doc_no, record in enumerate(records):
+        terms = tokenize(record["page_content"])
+        doc_lengths.append(len(terms))
+        for term, freq in Counter(terms).items():
+            postings.setdefault(term, []).append([doc_no, freq])
+
+    index = {
+        "k1": k1,
+        "b": b,
+        "ids": [r["id"] for r in records],
+        "doc_lengths": doc_lengths,
+        "postings": postings,
+    }
+    index_path = os.path.join(index_dir, LEXICAL_INDEX_FILE)
+    with open(index_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False)
+    os.replace(index_path + ".tmp", index_path)
+    return len(records)
+
+
+def lexical_index_exists(index_dir):
+    """Klasörde bir BM25 indeksi olup olmadığını kontrol eder."""
+    return os.path.exists(os.path.join(index_dir, LEXICAL_INDEX_FILE))
+
+
+def load_document_frequencies(index_dir):
+    """
+    BM25 indeksini arama için yüklemeden sadece terimlerin geçtiği parça sayılarını okur.
+    Args:
+        index_dir (str): bm25.json'ın bulunduğu klasör.
+    Returns:
+        tuple[int, dict[str, int]]: (parça sayısı, terim -> terimin geçtiği parça sayısı).
+    """
+    with open(os.path.join(index_dir, LEXICAL_INDEX_FILE), "r", encoding="utf-8") as f:
+        index = json.load(f)
+    return len(index["doc_lengths"]), {term: len(plist) for term, plist in index["postings"].items()}
+
+
+class LexicalIndex:
+    """
+    Diskten yüklenen BM25 ters indeksi. Anahtar kelime ağırlıklı sorular ("Şans kartı", "ipotek")
+    ağ çağrısı (embedding) gerektirmeden, tamamen yerel olarak yanıtlanır.
+    """
+
+    def __init__(self, index_dir, documents=None, ids=None):
+        """
+        Args:
+            index_dir (str): bm25.json ve documents.json'ın bulunduğu klasör.
+            documents (list[Document] | None): Aynı sırada zaten yüklenmiş belgeler (örn: NumpyVectorIndex'ten).
+                                               Verilmezse veya kimlikler uyuşmazsa documents.json'dan okunur.
+            ids (list[str] | None): documents listesine ait parça kimlikleri.
+        """
+        with open(os.path.join(index_dir, LEXICAL_INDEX_FILE), "r", encoding="utf-8") as f:
+            index = json.load(f)
+        self.k1 = index["k1"]
+        self.b = index["b"]
+        self.ids = index["ids"]
+        self.doc_lengths = index["doc_lengths"]
+        self.avg_length = (sum(self.doc_lengths) / len(self.doc_lengths)) if self.doc_lengths else 0.0
+        n_docs = len(self.doc_lengths)
+        # Her terim için IDF değeri ve postings listesi (belge no, frekans) bir kez hesaplanır
+        self._postings = {}
+        for term, plist in index["postings"].items():
+            idf = math.log(1.0 + (n_docs - len(plist) + 0.5) / (len(plist) + 0.5))
+            self._postings[term] = (idf, [(doc_no, freq) for doc_no, freq in plist])
+
+        # Belgeleri paylaş (aynı sıradaysa) veya dosyadan oku
+        if documents is not None and ids == self.ids:
+            self.documents = documents
+        else:
+            with open(os.path.join(index_dir, DOCUMENTS_FILE), "r", encoding="utf-8") as f:
+                records = json.load(f)
+            if [r["id"] for r in records] != self.ids:
+                raise ValueError("BM25 indeksi documents.json ile uyuşmuyor; 'python create_database.py' ile yeniden oluşturun.")
+            self.documents = [Document(page_content=r["page_content"], metadata=r.get("metadata") or {}) for r in records]
+
+    def __len__(self):
+        return len(self.documents)
+
+    def document_frequencies(self):
+        """Her terimin geçtiği parça sayısını döndürür (oyun yönlendiricisi için)."""
+        return {term: len(plist) for term, (_, plist) in self._postings.items()}
+
+    def search_indices(self, query, k=5):
+        """
+        Soruyu BM25 ile skorlar ve en iyi k parçanın (belge no, skor) listesini döndürür.
+        Args:
+            query (str): Soru metni.
+            k (int): Döndürülecek sonuç sayısı.
+        Returns:
+            list[tuple[int, float]]: Skora göre azalan sırada (belge no, skor) çiftleri.
+        """
+        scores = {}
+        k1, b, avg = self.k1, self.b, self.avg_length or 1.0
+        for term in set(tokenize(query)):
+            entry = self._postings.get(term)
+            if entry is None:
+                continue
+            idf, plist = entry
+            for doc_no, freq in plist:
+                norm = k1 * (1.0 - b + b * self.doc_lengths[doc_no] / avg)
+                scores[doc_no] = scores.get(doc_no, 0.0) + idf * freq * (k1 + 1.0) / (freq + norm)
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+    def search(self, query, k=5):
+        """
+        Soruyla en alakalı k parçayı BM25 skoruna göre döndürür.
+        Args:
+            query (str): Soru metni.
+            k (int): Döndürülecek parça sayısı.
+        Returns:
+            list[Document]: En alakalıdan başlayarak parçalar.
+        """
+        return [self.documents[doc_no] for doc_no, _ in self.search_indices(query, k)]
+
+
+def reciprocal_rank_fusion(result_lists, k=60, limit=None):
+    """
+    Farklı arama yöntemlerinin (örn: vektör ve BM25) sıralı sonuçlarını Reciprocal Rank Fusion ile birleştirir.
+    Her belgenin skoru, göründüğü listelerdeki sırasına göre 1 / (k + sıra) toplamıdır.
+    Belgeler içeriklerine göre eşleştirilir (aynı parça iki listede de olabilir).
+    Args:
+        result_lists (list[list[Document]]): Her biri en alakalıdan başlayan sonuç listeleri.
+        k (int): Sıralama sabiti (60 literatürde yaygın kullanılan değerdir).
+        limit (int | None): Döndürülecek en fazla belge sayısı.
+    Returns:
+        list[Document]: Birleştirilmiş skora göre sıralı belgeler.
+    """
+    scores = {}
+    docs = {}
+    for results in result_lists:
+        for rank, doc in enumerate(results, start=1):
+            key = doc.page_content
+            docs.setdefault(key, doc)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+    ordered = sorted(scores, key=lambda key: scores[key], reverse=True)
+    if limit is not None:
+        ordered = ordered[:limit]
+    return [docs[key] for key in ordered]
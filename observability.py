@@ -0,0 +1,266 @@
+# Gerekli kütüphaneleri içe aktar
+import atexit                       # Uygulama kapanırken bekleyen log kayıtlarını yazmak için
+import json                         # JSON formatlı log satırları için
+import logging                      # Seviyeli (DEBUG/INFO/WARNING/ERROR) loglama için
+import logging.handlers             # Logların arka planda yazılması için (QueueHandler/QueueListener)
+import math                         # Histogramın +Inf sınırı için
+import os                           # Fork sonrası log yazıcısını yeniden başlatmak için
+import queue                        # Log kayıtlarının arka plandaki yazıcıya aktarılması için
+import sys                          # Logların yazılacağı akış (stderr) için
+import threading                    # Metriklerin thread-safe güncellenmesi için
+import time                         # Süre ölçümü için
+from contextlib import contextmanager # Zamanlama bloğu (span) için
+
+# ----- Loglama -----
+
+# Log kaydına eklenen standart alanlar (bunların dışındakiler "extra" ile verilmiş yapılandırılmış alanlardır)
+_RESERVED_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener = None # Arka planda log yazan QueueListener (bir kez kurulur)
+
+
+class StructuredFormatter(logging.Formatter):
+    """
+    Log kayıtlarını "zaman seviye logger mesaj anahtar=değer ..." (text) veya tek satır JSON (json)
+    olarak biçimlendirir. logger.info("...", extra={"stage": "embedding"}) ile verilen alanlar satıra eklenir.
+    """
+
+    def __init__(self, fmt="text"):
+        super().__init__()
+        self.fmt = fmt
+
+    def format(self, record):
+        fields = {k: v for k, v in vars(record).items() if k not in _RESERVED_ATTRS and not k.startswith("_")}
+        message = record.getMessage()
+        if record.exc_info:
+            fields["exc"] = self.formatException(record.exc_info)
+        timestamp = self.formatTime(record, "%Y-%m-%dT%H:%M:%S")
+        if self.fmt == "json":
+            return json.dumps(
+                {"ts": timestamp, "level": record.levelname, "logger": record.name, "msg": message, **fields},
+                ensure_ascii=False,
+                default=str,
+            )
+        line = f"{timestamp} {record.levelname:<7} {record.name}: {message}"
+        extras = " ".join(f"{k}={v!r}" for k, v in fields.items() if k != "exc")
+        if extras:
+            line = f"{line} | {extras}"
+        if "exc" in fields:
+            line = f"{line}\n{fields['exc']}"
+        return line
+
+
+def configure_logging(level="INFO", fmt="text"):
+    """
+    Kök logger'ı yapılandırır. Kayıtlar istek thread'inde sadece bir kuyruğa konur; stderr'e yazma işini
+    arka plandaki tek bir thread yapar. Böylece istek akışı (hot path) yavaş bir terminal/log toplayıcı yüzünden beklemez.
+    Birden fazla çağrılırsa sadece seviye güncellenir.
+    Args:
+        level (str): En düşük log seviyesi (DEBUG, INFO, WARNING, ERROR).
+        fmt (str): "text" (okunabilir) veya "json" (log toplayıcılar için).
+    """
+    root = logging.getLogger()
+    root.setLevel(getattr(logging, str(level).upper(), logging.INFO))
+    if _listener is not None:
+        return
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(StructuredFormatter(fmt))
+    queue_handler = logging.handlers.QueueHandler(queue.SimpleQueue())
+    _start_listener(queue_handler, stream_handler)
+    # gunicorn --preload: ana süreçte başlatılan yazıcı thread'i fork edilen worker'a geçmez. Worker'da yeni bir
+    # kuyruk ve yazıcı kurulur (ana sürecin kuyruğu fork anında kilitli olabilir ve yazılmamış kayıtlar içerebilir).
+    if hasattr(os, "register_at_fork"):
+        os.register_at_fork(after_in_child=lambda: _start_listener(queue_handler, stream_handler))
+    # Önceden eklenmiş handler'ları (örn: basicConfig) kaldır, sadece kuyruğa yaz
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+
+
+def _start_listener(queue_handler, handler):
+    """QueueHandler'a yeni bir kuyruk verir ve bu kuyruktaki kayıtları handler'a yazan arka plan thread'ini başlatır."""
+    global _listener
+    queue_handler.queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(queue_handler.queue, handler, respect_handler_level=False)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+# ----- Metrikler (Prometheus metin formatı) -----
+
+# Gecikme histogramlarının varsayılan sınırları (saniye): milisaniyelik yerel işlerden onlarca saniyelik LLM çağrılarına kadar
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value):
+    """Etiket değerini Prometheus formatına uygun hale getirir."""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """Ortak metrik davranışı: ad, açıklama, etiket adları ve etiket değerlerine göre seriler."""
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._series = {} # etiket değerleri (tuple) -> seri değeri
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} metriği şu etiketleri bekler: {self.labelnames}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            series = sorted(self._series.items())
+        for key, value in series:
+            lines.extend(self._render_series(key, value))
+        return lines
+
+    def _render_series(self, key, value):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    """Sadece artan sayaç (örn: bitiş nedeni sayıları, hatalar)."""
+
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """Anlık değer. set_function ile değer her okumada bir fonksiyondan alınabilir (örn: aktif LLM çağrısı sayısı)."""
+
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._function = None
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = value
+
+    def set_function(self, fn):
+        """Etiketsiz gauge'un değerini her okumada fn() ile hesaplar."""
+        self._function = fn
+
+    def render(self):
+        if self._function is not None:
+            try:
+                value = self._function()
+            except Exception:
+                value = math.nan
+            with self._lock:
+                self._series[()] = value
+        return super().render()
+
+
+class Histogram(_Metric):
+    """Gözlem dağılımı (örn: gecikme). Her seri için kümülatif sınır sayıları, toplam ve adet tutulur."""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][i] += 1
+                    break
+            series["sum"] += value
+            series["count"] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Bloğun süresini (saniye) gözlem olarak ekler; blok hata verse de süre kaydedilir."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _render_series(self, key, value):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, value["counts"]):
+            cumulative += count
+            le = 'le="' + _format_value(bound) + '"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(value['sum'])}")
+        lines.append(f"{self.name}_count{labels} {value['count']}")
+        return lines
+
+
+class Registry:
+    """Metrikleri toplayan ve Prometheus metin formatında (text/plain; version=0.0.4) döndüren kayıt."""
+
+    CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                # Aynı ad ikinci kez tanımlanırsa (örn: modül yeniden yüklenince) mevcut metriği kullan
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self):
+        """Tüm metrikleri Prometheus metin formatında döndürür."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Uygulama genelinde kullanılan varsayılan kayıt
+REGISTRY = Registry()
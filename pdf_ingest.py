@@ -0,0 +1,124 @@
+# Gerekli kütüphaneleri içe aktar
+import contextlib                   # Ortak süreç havuzunu kapatmadan kullanmak için (nullcontext)
+import os                           # CPU sayısı ve dosya adları için
+from collections import deque       # Sırası korunarak bekleyen işler (future) için
+from concurrent.futures import ProcessPoolExecutor # Sayfaları birden fazla çekirdekte çıkarmak için
+
+from pypdf import PdfReader         # PDF dosyalarını okumak için kütüphane
+
+# Her worker sürecine tek seferde gönderilecek sayfa sayısı (süreçler arası iletişim maliyetini azaltır)
+PAGES_PER_TASK = 8
+
+# Worker sürecinin açtığı PDF okuyucuları (her süreç her dosyayı bir kez açar; havuz birden fazla PDF'e hizmet edebilir)
+_readers = {}
+
+
+def clean_page_text(text):
+    """
+    Sayfadan çıkarılan metni temizler: satır sonunda tire ile bölünen kelimeleri birleştirir, satır içindeki
+    birden fazla boşluğu tek boşluğa indirir ve boş satırları atar. Satır yapısı korunur (başlıklar ayrı satırdadır;
+    bkz. chunking.iter_sections).
+    Args:
+        text (str): Sayfanın ham metni.
+    Returns:
+        str: Temizlenmiş, satırları "\n" ile ayrılmış metin.
+    """
+    text = (text or "").replace("-\n", "").replace("- \n", "")
+    lines = (" ".join(line.split()) for line in text.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def count_pages(pdf_path):
+    """PDF'teki sayfa sayısını döndürür."""
+    return len(PdfReader(pdf_path).pages)
+
+
+def _open_reader(pdf_path):
+    """PDF'i bu süreçte bir kez açar ve okuyucuyu döndürür."""
+    reader = _readers.get(pdf_path)
+    if reader is None:
+        reader = _readers[pdf_path] = PdfReader(pdf_path)
+    return reader
+
+
+def _extract_pages(pdf_path, start, stop):
+    """
+    Worker sürecinde [start, stop) aralığındaki sayfaların metnini çıkarıp temizler.
+    Returns:
+        list[tuple[int, str]]: (1'den başlayan sayfa numarası, temiz metin) çiftleri.
+    """
+    reader = _open_reader(pdf_path)
+    pages = []
+    for i in range(start, stop):
+        pages.append((i + 1, clean_page_text(reader.pages[i].extract_text())))
+    return pages
+
+
+def start_page_pool(workers=None):
+    """
+    Birden fazla PDF'in (örn: farklı oyunların kitapçıkları) sayfalarını aynı anda çıkarmak için ortak bir süreç havuzu açar.
+    Süreçler burada, çağıran thread'de başlatılır; havuz daha sonra başka thread'lerden kullanılırsa
+    çok thread'li bir süreçten fork yapılmamış olur.
+    Args:
+        workers (int | None): Süreç sayısı (None ise CPU çekirdek sayısı).
+    Returns:
+        ProcessPoolExecutor: with bloğuyla kullanılıp kapatılması gereken havuz.
+    """
+    pool = ProcessPoolExecutor(max_workers=max(1, workers or os.cpu_count() or 1))
+    # İlk iş gönderildiğinde tüm süreçler başlatılır (fork yönteminde süreçler sonradan tek tek açılmaz)
+    pool.submit(int).result()
+    return pool
+
+
+def iter_pdf_pages(pdf_path, workers=None, pages_per_task=PAGES_PER_TASK, pool=None):
+    """
+    PDF sayfalarını bir süreç havuzunda paralel olarak çıkarır ve sayfa sırasıyla tek tek döndürür.
+    Aynı anda en fazla (worker sayısı x 2) sayfa grubu işlenir/bekletilir; böylece PDF ne kadar büyük
+    olursa olsun bellekte tüm metin birikmez.
+    Args:
+        pdf_path (str): İşlenecek PDF dosyasının yolu.
+        workers (int | None): Süreç sayısı (None ise CPU çekirdek sayısı; 1 ise havuz kullanılmaz).
+        pages_per_task (int): Bir worker'a tek seferde verilecek sayfa sayısı.
+        pool (ProcessPoolExecutor | None): Kullanılacak ortak havuz (start_page_pool); verilmezse bu PDF için açılır.
+    Yields:
+        tuple[int, str]: (1'den başlayan sayfa numarası, temiz metin). Metni olmayan sayfalar atlanır.
+    """
+    total = count_pages(pdf_path)
+    ranges = [(start, min(start + pages_per_task, total)) for start in range(0, total, pages_per_task)]
+    workers = max(1, min(workers or os.cpu_count() or 1, len(ranges) or 1))
+
+    if workers == 1 and pool is None:
+        # Tek çekirdekte havuz kurmanın maliyetine gerek yok
+        for start, stop in ranges:
+            for page_number, text in _extract_pages(pdf_path, start, stop):
+                if text:
+                    yield page_number, text
+        return
+
+    with contextlib.nullcontext(pool) if pool is not None else ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        next_range = 0
+        while next_range < len(ranges) or pending:
+            # Havuzu dolu tut, ama tüketiciden (splitter/embedding) fazla öne geçme
+            while next_range < len(ranges) and len(pending) < workers * 2:
+                pending.append(pool.submit(_extract_pages, pdf_path, *ranges[next_range]))
+                next_range += 1
+            # Sonuçlar sayfa sırasıyla döndürülür
+            for page_number, text in pending.popleft().result():
+                if text:
+                    yield page_number, text
+
+
+def iter_pdf_documents(pdf_path, chunker, workers=None, pool=None):
+    """
+    PDF'i sayfa sayfa paralel okuyup temizleyen ve bölüm yapısına göre parçalara ayıran uçtan uca akış.
+    Args:
+        pdf_path (str): İşlenecek PDF dosyasının yolu.
+        chunker (SectionChunker): Bölümleri ebeveyn/çocuk parçalara ayıracak nesne (bkz. chunking.py).
+        workers (int | None): Sayfa çıkarma için süreç sayısı (None ise CPU çekirdek sayısı).
+        pool (ProcessPoolExecutor | None): Birden fazla PDF arasında paylaşılan süreç havuzu (start_page_pool).
+    Yields:
+        tuple[Document, list[Document]]: (ebeveyn bölüm, çocuk pasajları); sayfa bilgisi (page, page_end, source) taşır.
+    """
+    pages = iter_pdf_pages(pdf_path, workers=workers, pool=pool)
+    yield from chunker.iter_documents(pages, source=os.path.basename(pdf_path))
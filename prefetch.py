@@ -0,0 +1,163 @@
+# Kullanıcı yazarken yapılan önceden arama (speculative retrieval prefetch) için oturum başına kısa ömürlü önbellek.
+# Sayfa, kullanıcı yazmayı kısa bir süre bıraktığında yarım soruyu /prefetch'e gönderir; sunucu soruyu vektöre çevirip
+# ilgili kitapçık bölümlerini bulur ve sonucu bu önbellekte saklar. Asıl soru geldiğinde sonuç yeterince benziyorsa
+# embedding ve arama atlanıp doğrudan yanıt üretimine geçilir (bkz. app.py prefetch_context ve prepare_answer).
+# Her oturumun tek bir kaydı vardır: yeni bir önceden arama eskisinin yerini alır ve devam eden eski arama sonucunu
+# kaydedemez (iptal). Önbellek süreç (gunicorn worker'ı) başınadır; istek başka bir worker'a düşerse sonuç kullanılmaz.
+
+# Gerekli kütüphaneleri içe aktar
+import threading                    # Önbelleğe farklı thread'lerden güvenli erişim için (kilit)
+import time                         # TTL (yaşam süresi) hesapları için
+from collections import OrderedDict # Oturumları en eski kullanılan önce silinecek şekilde tutmak için
+
+from concurrency import normalize_question # Soruların birebir aynı olup olmadığını yazım farklarından bağımsız karşılaştırmak için
+from lexical_index import tokenize   # Benzerlik için soruları (kökleri alınmış, etkisiz kelimeleri çıkarılmış) kelimelere ayırmak için
+
+
+def question_overlap(query_tokens, prefetched_tokens):
+    """
+    Asıl sorunun kelimelerinden kaçının önceden aranan soruda da bulunduğunu döndürür (0-1).
+    Önceden arama asıl sorunun kelimelerinin çoğunu içeriyorsa bulduğu bölümler asıl soru için de geçerlidir.
+    Args:
+        query_tokens (list[str]): Asıl sorunun kelimeleri (bkz. lexical_index.tokenize).
+        prefetched_tokens (list[str]): Önceden aranan sorunun kelimeleri.
+    Returns:
+        float: Kapsama oranı; asıl soruda kelime yoksa 0.
+    """
+    query_tokens = set(query_tokens)
+    if not query_tokens:
+        return 0.0
+    return len(query_tokens & set(prefetched_tokens)) / len(query_tokens)
+
+
+class PrefetchCache:
+    """
+    Oturum başına en fazla bir önceden arama sonucu tutan, kısa ömürlü (TTL) önbellek.
+    Her oturumun bir nesil (generation) sayacı vardır: begin() sayacı artırır ve yeni aramanın neslini döndürür;
+    store() sadece hâlâ güncel olan neslin sonucunu kaydeder. Böylece yeni bir önceden arama veya asıl sorunun
+    gelmesi (take) devam eden eski aramayı iptal eder. En fazla `max_sessions` oturum tutulur (en eski kullanılan silinir).
+    """
+
+    def __init__(self, ttl_seconds=30.0, min_overlap=0.8, max_sessions=10000):
+        """
+        Args:
+            ttl_seconds (float): Bir sonucun kullanılabileceği en uzun süre (saniye).
+            min_overlap (float): Asıl soru önceden arananla birebir aynı değilse kullanılması için gereken en düşük
+                                 kelime kapsama oranı (0-1, bkz. question_overlap; 1'den büyükse sadece aynı soru).
+            max_sessions (int): Kaydı tutulacak en fazla oturum sayısı.
+        """
+        self.ttl_seconds = float(ttl_seconds)
+        self.min_overlap = float(min_overlap)
+        self.max_sessions = max(1, int(max_sessions))
+        self._lock = threading.Lock()
+        self._sessions = OrderedDict() # oturum -> {"generation": int, "entry": dict | None}
+
+        # İstatistik sayaçları
+        self.stored = 0
+        self.cancelled = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _state(self, key):
+        """Oturumun durumunu döndürür (yoksa oluşturur) ve LRU sırasında en sona taşır. Kilit altında çağrılır."""
+        state = self._sessions.pop(key, None) or {"generation": 0, "entry": None}
+        self._sessions[key] = state
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+        return state
+
+    def begin(self, key):
+        """
+        Oturum için yeni bir önceden arama başlatır; oturumun önceki sonucu silinir, devam eden araması iptal edilir.
+        Args:
+            key (str): Oturum kimliği.
+        Returns:
+            int: Yeni aramanın nesli (store ve is_current için).
+        """
+        with self._lock:
+            state = self._state(key)
+            state["generation"] += 1
+            state["entry"] = None
+            return state["generation"]
+
+    def is_current(self, key, generation):
+        """Aramanın hâlâ güncel olup olmadığını (yeni bir arama veya asıl soru tarafından iptal edilmediğini) döndürür."""
+        with self._lock:
+            state = self._sessions.get(key)
+            return state is not None and state["generation"] == generation
+
+    def store(self, key, generation, query, shard, query_embedding, context, excerpts):
+        """
+        Önceden aramanın sonucunu kaydeder (arama bu arada iptal edildiyse kaydedilmez).
+        Args:
+            key (str): Oturum kimliği.
+            generation (int): begin()'in döndürdüğü nesil.
+            query (str): Önceden aranan (yarım) soru.
+            shard (GameShard): Aramanın yapıldığı oyun (asıl soru aynı oyuna yönlendirilmezse sonuç kullanılmaz).
+            query_embedding (list[float] | None): Yarım sorunun vektörü.
+            context (str): Prompt'a eklenecek bağlam.
+            excerpts (str | None): Bağlama eklenen kitapçık alıntıları.
+        Returns:
+            bool: Sonuç kaydedildiyse True, arama iptal edildiyse False.
+        """
+        entry = {
+            "query": query,
+            "normalized": normalize_question(query),
+            "tokens": tokenize(query),
+            "shard": shard,
+            "embedding": query_embedding,
+            "context": context,
+            "excerpts": excerpts,
+            "created_at": time.monotonic(),
+        }
+        with self._lock:
+            state = self._sessions.get(key)
+            if state is None or state["generation"] != generation:
+                self.cancelled += 1
+                return False
+            state["entry"] = entry
+            self.stored += 1
+            return True
+
+    def take(self, key, query, shard):
+        """
+        Asıl soru için oturumun önceden arama sonucunu alır. Sonuç tek kullanımlıktır: bulunsa da bulunmasa da silinir
+        ve devam eden arama iptal edilir (asıl soru geldikten sonra biten arama artık işe yaramaz).
+        Args:
+            key (str): Oturum kimliği.
+            query (str): Asıl soru.
+            shard (GameShard): Asıl sorunun yönlendirildiği oyun.
+        Returns:
+            dict | None: Kullanılabilir sonuç ("context", "excerpts", "embedding" ve asıl soru önceden arananla aynıysa
+                         True olan "exact" anahtarlarıyla); sonuç yoksa, süresi dolduysa, başka bir oyuna veya anlık
+                         görüntüye aitse ya da soru yeterince benzemiyorsa None.
+        """
+        with self._lock:
+            state = self._sessions.get(key)
+            entry = None
+            if state is not None:
+                entry = state["entry"]
+                state["generation"] += 1
+                state["entry"] = None
+            if entry is None or entry["shard"] is not shard or time.monotonic() - entry["created_at"] > self.ttl_seconds:
+                self.misses += 1
+                return None
+        exact = normalize_question(query) == entry["normalized"]
+        if not exact and question_overlap(tokenize(query), entry["tokens"]) < self.min_overlap:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return dict(entry, exact=exact)
+
+    def stats(self):
+        """Önbellek istatistiklerini döndürür."""
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "stored": self.stored,
+                "cancelled": self.cancelled,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
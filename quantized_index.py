@@ -0,0 +1,322 @@
+# Büyük korpuslar için sıkıştırılmış (quantized) vektör indeksi.
+#
+# Tam hassasiyetli (float32, 768 boyut) vektörler parça başına 3 KB tutar ve her worker'ın belleğinde en büyük yer
+# kaplayan veri olur. Bu indeks vektörleri int8 (satır başına ölçekle) veya float16 olarak saklar ve aramayı bu
+# küçük kodlar üzerinde yapar:
+#   1. IVF (inverted file): Vektörler k-means ile kümelere ayrılır; soru sadece en yakın nprobe kümenin parçalarıyla
+#      karşılaştırılır (küçük korpuslarda IVF kullanılmaz, tüm kodlar taranır).
+#   2. Yaklaşık uzaklıklarla bir aday listesi (shortlist) seçilir.
+#   3. Adaylar diskteki float32 matristen (vectors.npy, bellek eşlemeli; sadece aday satırlar okunur) tam olarak
+#      yeniden puanlanır. Böylece sonuçlar tam aramayla neredeyse aynıdır, bellekte ise sadece kodlar durur (~4x az).
+# create_database.py indeksi NumPy indeksiyle birlikte yazar ve tam aramaya göre isabet oranını (recall) raporlar.
+
+# Gerekli kütüphaneleri içe aktar
+import hashlib                      # Kodların hangi parça listesinden üretildiğini doğrulamak için
+import json                         # İndeks bilgilerini (meta) saklamak için
+import math                         # Küme sayısı hesabı için
+import os                           # Dosya yolları ve atomik dosya değiştirme için
+
+import numpy as np                  # Kodlar, k-means ve vektörleştirilmiş uzaklık hesapları için
+
+from vector_index import VECTORS_FILE, NumpyVectorIndex, load_documents # Tam hassasiyetli indeks (yeniden puanlama için)
+
+# Dışa aktarılan dosyaların adları (veritabanı klasöründe, vectors.npy'nin yanında tutulur)
+QUANTIZED_CODES_FILE = "vectors_q.npy"     # Kodlar: (parça sayısı, boyut) int8 veya float16, IVF küme sırasıyla
+QUANTIZED_AUX_FILE = "vectors_q_aux.npz"   # Ölçekler, normlar, satır sırası, küme merkezleri ve küme sınırları
+QUANTIZED_META_FILE = "vectors_q.json"     # Hassasiyet, küme sayısı, isabet oranı ve bellek bilgisi
+# Bu sayıdan az parçada IVF kullanılmaz (tüm kodları taramak zaten birkaç milisaniye sürer)
+IVF_MIN_VECTORS = 10000
+# Yaklaşık uzaklıklar bu kadar satırlık bloklar halinde hesaplanır (geçici float32 kopyanın boyutu sınırlı kalır)
+SCAN_BLOCK_ROWS = 8192
+
+
+def _ids_digest(ids):
+    """Parça kimlik listesinin özeti; kodlar ile vectors.npy/documents.json'ın aynı kurulumdan geldiğini doğrular."""
+    digest = hashlib.blake2b(digest_size=16)
+    for chunk_id in ids:
+        digest.update(chunk_id.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def quantize(matrix, precision="int8"):
+    """
+    Vektörleri sıkıştırır.
+    Args:
+        matrix (np.ndarray): (n, boyut) float32 vektörler.
+        precision (str): "int8" (satır başına ölçekle, ~4x küçük) veya "float16" (~2x küçük).
+    Returns:
+        tuple[np.ndarray, np.ndarray]: (kodlar, satır ölçekleri). Vektör yaklaşık olarak kod x ölçektir.
+    """
+    if precision == "float16":
+        return matrix.astype(np.float16), np.ones(matrix.shape[0], dtype=np.float32)
+    if precision != "int8":
+        raise ValueError(f"Bilinmeyen hassasiyet: {precision} (int8 veya float16 olmalı).")
+    scales = np.abs(matrix).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.rint(matrix / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def _unit(matrix):
+    norms = np.linalg.norm(matrix, axis=1)
+    norms[norms == 0] = 1.0
+    return matrix / norms[:, None]
+
+
+def _nearest_centroids(unit_vectors, centroids, block_rows=SCAN_BLOCK_ROWS):
+    """Her vektörün en yakın (cosine) küme merkezinin sırasını döndürür."""
+    assignments = np.empty(unit_vectors.shape[0], dtype=np.int32)
+    for start in range(0, unit_vectors.shape[0], block_rows):
+        block = unit_vectors[start:start + block_rows]
+        assignments[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return assignments
+
+
+def train_ivf(unit_vectors, nlist, iterations=20, samples_per_list=256, seed=0):
+    """
+    Birim vektörleri küresel k-means ile nlist kümeye ayırır (eğitim en fazla nlist x samples_per_list örnekle yapılır).
+    Args:
+        unit_vectors (np.ndarray): (n, boyut) birim uzunlukta vektörler.
+        nlist (int): Küme sayısı.
+        iterations (int): k-means tekrar sayısı.
+        samples_per_list (int): Küme başına en fazla eğitim örneği.
+        seed (int): Rastgelelik tohumu (aynı veriyle aynı kümeler).
+    Returns:
+        tuple[np.ndarray, np.ndarray]: (birim küme merkezleri (nlist, boyut), her vektörün kümesi (n,)).
+    """
+    rng = np.random.default_rng(seed)
+    n = unit_vectors.shape[0]
+    sample = unit_vectors[np.sort(rng.choice(n, min(n, nlist * samples_per_list), replace=False))]
+    centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = _nearest_centroids(sample, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, sample)
+        counts = np.bincount(assignments, minlength=nlist)
+        # Boş kalan kümeleri rastgele bir örnekle yeniden başlat
+        empty = counts == 0
+        sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+        centroids = _unit(sums)
+    return centroids.astype(np.float32), _nearest_centroids(unit_vectors, centroids)
+
+
+def export_quantized_index(index_dir, precision="int8", nlist=None, nprobe=None, rescore_factor=4, recall_queries=200):
+    """
+    export_vector_index ile yazılmış vectors.npy'den sıkıştırılmış indeksi oluşturur ve tam aramaya göre
+    isabet oranını (recall@10) ölçer.
+    Args:
+        index_dir (str): vectors.npy ve documents.json'ın bulunduğu klasör.
+        precision (str): "int8" veya "float16".
+        nlist (int | None): IVF küme sayısı (None: IVF_MIN_VECTORS ve üzerinde ~sqrt(n), altında IVF yok).
+        nprobe (int | None): Aramada bakılacak küme sayısı (None: küme sayısının ~%10'u, en az 8).
+        rescore_factor (int): k sonuç için tam olarak yeniden puanlanacak aday sayısı (k x rescore_factor).
+        recall_queries (int): İsabet oranı ölçümünde kullanılacak sorgu sayısı.
+    Returns:
+        dict: İndeks bilgileri (vectors_q.json içeriği).
+    """
+    matrix = np.load(os.path.join(index_dir, VECTORS_FILE), mmap_mode="r")
+    ids, _ = load_documents(index_dir)
+    matrix = np.asarray(matrix, dtype=np.float32)
+    n, dim = matrix.shape
+
+    if nlist is None:
+        nlist = int(round(math.sqrt(n))) if n >= IVF_MIN_VECTORS else 0
+    nlist = max(0, min(int(nlist), n))
+    if nlist > 1:
+        centroids, assignments = train_ivf(_unit(matrix), nlist)
+        # Aynı kümedeki satırlar art arda saklanır; arama her küme için tek bir dilim okur
+        rows = np.argsort(assignments, kind="stable").astype(np.int32)
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assignments, minlength=nlist))]).astype(np.int64)
+        if nprobe is None:
+            nprobe = max(8, int(math.ceil(nlist * 0.1)))
+    else:
+        nlist = 0
+        centroids = np.zeros((0, dim), dtype=np.float32)
+        rows = np.arange(n, dtype=np.int32)
+        offsets = np.array([0, n], dtype=np.int64)
+        nprobe = 0
+    ordered = matrix[rows]
+    codes, scales = quantize(ordered, precision)
+    sq_norms = np.einsum("ij,ij->i", ordered, ordered).astype(np.float32)
+
+    # Önce geçici dosyalara yaz, sonra yerlerine taşı (çalışan uygulama yarım dosya görmesin); meta en son yazılır
+    codes_path = os.path.join(index_dir, QUANTIZED_CODES_FILE)
+    aux_path = os.path.join(index_dir, QUANTIZED_AUX_FILE)
+    with open(codes_path + ".tmp", "wb") as f:
+        np.save(f, np.ascontiguousarray(codes))
+    with open(aux_path + ".tmp", "wb") as f:
+        np.savez(f, scales=scales, sq_norms=sq_norms, rows=rows, centroids=centroids, offsets=offsets)
+    os.replace(codes_path + ".tmp", codes_path)
+    os.replace(aux_path + ".tmp", aux_path)
+
+    meta = {
+        "precision": precision,
+        "count": int(n),
+        "dim": int(dim),
+        "nlist": int(nlist),
+        "nprobe": int(min(nprobe, nlist)),
+        "rescore_factor": int(rescore_factor),
+        "ids_digest": _ids_digest(ids),
+        # Bellekte tutulan (kodlar + yardımcı diziler) ve tam hassasiyetli matrisin boyutu
+        "resident_bytes": int(codes.nbytes + scales.nbytes + sq_norms.nbytes + rows.nbytes + centroids.nbytes + offsets.nbytes),
+        "float32_bytes": int(n * dim * 4),
+    }
+    _write_meta(index_dir, meta)
+    if n:
+        index = QuantizedVectorIndex(index_dir, None)
+        meta["recall_at_10"] = round(measure_recall(index, sample_queries(matrix, recall_queries), k=10), 4)
+        _write_meta(index_dir, meta)
+    return meta
+
+
+def _write_meta(index_dir, meta):
+    meta_path = os.path.join(index_dir, QUANTIZED_META_FILE)
+    with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=1)
+    os.replace(meta_path + ".tmp", meta_path)
+
+
+def remove_quantized_index(index_dir):
+    """Klasördeki sıkıştırılmış indeks dosyalarını siler (vectors.npy ile uyumsuz eski bir indeks kalmasın diye)."""
+    for name in (QUANTIZED_META_FILE, QUANTIZED_CODES_FILE, QUANTIZED_AUX_FILE):
+        path = os.path.join(index_dir, name)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def load_quantized_meta(index_dir):
+    """Sıkıştırılmış indeksin bilgilerini (vectors_q.json) okur."""
+    with open(os.path.join(index_dir, QUANTIZED_META_FILE), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def quantized_index_exists(index_dir):
+    """Klasörde sıkıştırılmış bir vektör indeksi (ve yeniden puanlama için float32 matris) olup olmadığını kontrol eder."""
+    return all(
+        os.path.exists(os.path.join(index_dir, name))
+        for name in (QUANTIZED_META_FILE, QUANTIZED_CODES_FILE, QUANTIZED_AUX_FILE, VECTORS_FILE)
+    )
+
+
+def sample_queries(matrix, count, noise=0.5, seed=0):
+    """
+    İsabet ölçümü için korpustan sorgu üretir: rastgele parçaların vektörlerine gürültü eklenir (soru ile parça
+    arasındaki uzaklığa benzesin diye; noise=0.5 ile cosine benzerliği ~0.9).
+    """
+    rng = np.random.default_rng(seed)
+    n, dim = matrix.shape
+    picked = np.asarray(matrix[np.sort(rng.choice(n, min(n, count), replace=False))], dtype=np.float32)
+    norms = np.linalg.norm(picked, axis=1, keepdims=True)
+    return picked + rng.standard_normal(picked.shape).astype(np.float32) * norms * (noise / math.sqrt(dim))
+
+
+def measure_recall(index, queries, k=10):
+    """
+    Sıkıştırılmış indeksin en yakın k sonucunun tam (float32, tüm satırlar) aramanın sonuçlarıyla örtüşme oranı.
+    Args:
+        index (QuantizedVectorIndex): Ölçülecek indeks.
+        queries (np.ndarray): (sorgu sayısı, boyut) sorgu vektörleri.
+        k (int): Karşılaştırılacak sonuç sayısı.
+    Returns:
+        float: Ortalama recall@k (1.0: tam aramayla aynı).
+    """
+    if len(queries) == 0:
+        return 1.0
+    exact_sq_norms = np.einsum("ij,ij->i", index.vectors, index.vectors)
+    hits = 0
+    total = 0
+    for query in np.asarray(queries, dtype=np.float32):
+        distances = exact_sq_norms - 2.0 * (index.vectors @ query)
+        kk = min(k, len(distances))
+        exact = set(np.argpartition(distances, kk - 1)[:kk].tolist())
+        hits += len(exact & set(index._nearest(query, kk).tolist()))
+        total += kk
+    return hits / total
+
+
+class QuantizedVectorIndex(NumpyVectorIndex):
+    """
+    NumpyVectorIndex'in sıkıştırılmış kodlarla arama yapan versiyonu (aynı arayüz; get_answer içinde yerine geçer).
+    Bellekte kodlar (int8/float16) ve küçük yardımcı diziler durur; float32 matris sadece bellek eşlemeli açılır ve
+    aday satırların tam yeniden puanlanması ile MMR için okunur.
+    """
+
+    def __init__(self, index_dir, embedding_function, nprobe=None, rescore_factor=None):
+        """
+        Args:
+            index_dir (str): export_quantized_index ile oluşturulmuş dosyaların bulunduğu klasör.
+            embedding_function (Embeddings | None): Sorguları vektöre çevirmek için kullanılacak model.
+            nprobe (int | None): Aramada bakılacak IVF küme sayısı (None: indeksteki varsayılan).
+            rescore_factor (int | None): Tam olarak yeniden puanlanacak aday çarpanı (None: indeksteki varsayılan).
+        Raises:
+            ValueError: Kodlar vectors.npy/documents.json ile aynı kurulumdan değilse (yeniden oluşturulmalı).
+        """
+        self.index_dir = index_dir
+        self._embedding_function = embedding_function
+        self.meta = load_quantized_meta(index_dir)
+        self.vectors = np.load(os.path.join(index_dir, VECTORS_FILE), mmap_mode="r")
+        self.ids, self.documents = load_documents(index_dir)
+        if _ids_digest(self.ids) != self.meta.get("ids_digest") or self.vectors.shape[0] != len(self.ids):
+            raise ValueError("Sıkıştırılmış indeks güncel değil (parça listesi farklı); 'python create_database.py' ile yeniden oluşturun.")
+        # mmap_mode="r": Kodlar da worker'lar arasında paylaşılır
+        self.codes = np.load(os.path.join(index_dir, QUANTIZED_CODES_FILE), mmap_mode="r")
+        with np.load(os.path.join(index_dir, QUANTIZED_AUX_FILE)) as aux:
+            self.scales = aux["scales"]
+            self.sq_norms = aux["sq_norms"]
+            self.rows = aux["rows"]
+            self.centroids = aux["centroids"]
+            self.offsets = aux["offsets"]
+        self.nprobe = int(nprobe or self.meta.get("nprobe") or 0)
+        self.rescore_factor = max(1, int(rescore_factor or self.meta.get("rescore_factor") or 4))
+
+    def _probe(self, query):
+        """Soruya en yakın nprobe kümenin kod dilimlerini (başlangıç, bitiş) döndürür; IVF yoksa tek dilim (tüm kodlar)."""
+        if len(self.centroids) == 0 or self.nprobe <= 0 or self.nprobe >= len(self.centroids):
+            return [(0, len(self.rows))]
+        scores = self.centroids @ query
+        lists = np.argpartition(-scores, self.nprobe - 1)[:self.nprobe]
+        return [(int(self.offsets[l]), int(self.offsets[l + 1])) for l in np.sort(lists)]
+
+    def _nearest(self, query, k):
+        """
+        Sorgu vektörüne L2 uzaklığına göre en yakın k satırın (documents sırasındaki) indekslerini döndürür:
+        kodlarla yaklaşık uzaklık -> aday listesi -> float32 ile tam yeniden puanlama.
+        """
+        n = len(self.rows)
+        k = min(k, n)
+        if k <= 0:
+            return np.empty(0, dtype=np.int64)
+        positions = []
+        approx = []
+        for start, stop in self._probe(query):
+            for block in range(start, stop, SCAN_BLOCK_ROWS):
+                end = min(stop, block + SCAN_BLOCK_ROWS)
+                scores = self.codes[block:end] @ query
+                approx.append(self.sq_norms[block:end] - 2.0 * self.scales[block:end] * scores)
+                positions.append(np.arange(block, end))
+        if not positions:
+            return np.empty(0, dtype=np.int64)
+        positions = np.concatenate(positions)
+        approx = np.concatenate(approx)
+        shortlist = min(len(positions), k * self.rescore_factor)
+        if shortlist < len(positions):
+            keep = np.argpartition(approx, shortlist - 1)[:shortlist]
+            positions = positions[keep]
+        # Tam yeniden puanlama: sadece aday satırlar float32 matristen okunur (sıralı okuma için satır sırasıyla)
+        rows = self.rows[positions].astype(np.int64)
+        order = np.argsort(rows)
+        rows, positions = rows[order], positions[order]
+        exact = self.sq_norms[positions] - 2.0 * (np.asarray(self.vectors[rows], dtype=np.float32) @ query)
+        best = np.argsort(exact, kind="stable")[:k]
+        return rows[best]
+
+    def batch_max_marginal_relevance_search_by_vector(self, embeddings, k=4, fetch_k=20, lambda_mult=0.5, block_size=256):
+        """
+        Birden fazla sorgu için MMR araması. Tam matris çarpımı (tüm float32 satırları okur) yerine her sorgu
+        sıkıştırılmış kodlarla ayrı ayrı aranır.
+        """
+        queries = np.asarray(embeddings, dtype=np.float32)
+        if queries.ndim != 2 or queries.shape[0] == 0:
+            return []
+        return [self._mmr(query, self._nearest(query, fetch_k), k, lambda_mult) for query in queries]
@@ -0,0 +1,294 @@
+# Dış servis (Gemini, embedding) çağrıları için dayanıklı istemci katmanı:
+#   - Zaman aşımı: Her deneme ve çağrının tamamı için son tarih; yavaş servis isteği ve worker thread'ini kilitlemez.
+#   - Tekrar deneme: Geçici hatalarda (kota, ağ, 5xx, zaman aşımı) rastgele (jitter) eklenmiş üstel artan bekleme.
+#   - Yedek istek (hedging): Çağrı, gözlenen p95 gecikmesini aşınca aynı isteğin bir kopyası gönderilir; önce biten kazanır.
+#   - Devre kesici (circuit breaker): Art arda hatalarda servis bir süre hiç çağrılmaz, çağıran hemen yedek yola geçer.
+# Çağrılar ortak bir thread havuzunda çalışır; zaman aşımına uğrayan çağrı arka planda biter ve sonucu atılır.
+
+# Gerekli kütüphaneleri içe aktar
+import math                         # Yüzdelik sıra hesabı için
+import os                           # Fork sonrası thread havuzunu yeniden kurmak için
+import random                       # Bekleme sürelerine rastgelelik (jitter) eklemek için
+import threading                    # Kilitler için
+import time                         # Gecikme ölçümü ve son tarih hesapları için
+from collections import deque       # Son gecikmeleri tutmak için
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait # Çağrıları zaman aşımıyla beklemek için
+
+from batch_embedding import is_transient_error # Tekrar denemeye değer hatalar (create_database.py ile aynı sınıflandırma)
+
+
+class CallTimeoutError(TimeoutError):
+    """Çağrı son tarihinden önce bitmediğinde fırlatılır."""
+
+
+class CircuitOpenError(Exception):
+    """Devre kesici açıkken (servis art arda hata verdiği için) çağrı yapılmadığında fırlatılır."""
+
+
+class LatencyWindow:
+    """Son başarılı çağrıların gecikmelerini tutar ve yüzdeliklerini hesaplar."""
+
+    def __init__(self, size=200):
+        self._lock = threading.Lock()
+        self._values = deque(maxlen=size)
+
+    def record(self, seconds):
+        with self._lock:
+            self._values.append(seconds)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._values)
+
+    def percentile(self, q):
+        """
+        Args:
+            q (float): Yüzdelik (0-100).
+        Returns:
+            float | None: Gecikmenin q. yüzdeliği (saniye); ölçüm yoksa None.
+        """
+        with self._lock:
+            values = sorted(self._values)
+        if not values:
+            return None
+        rank = max(0, min(len(values) - 1, math.ceil(q / 100.0 * len(values)) - 1))
+        return values[rank]
+
+
+class CircuitBreaker:
+    """
+    Art arda `failure_threshold` hatadan sonra devre açılır ve `reset_timeout` saniye boyunca çağrılara izin verilmez.
+    Süre dolunca tek bir deneme çağrısına izin verilir (yarı açık): başarılıysa devre kapanır, hata verirse tekrar açılır.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        """
+        Args:
+            failure_threshold (int): Devreyi açan art arda hata sayısı.
+            reset_timeout (float): Devrenin açık kalma süresi (saniye).
+        """
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout = float(reset_timeout)
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.opened = 0 # Devrenin kaç kez açıldığı
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self):
+        """Şu anda çağrı yapılıp yapılamayacağını döndürür (yarı açık durumda sadece tek deneme çağrısına izin verilir)."""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self.opened += 1
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+# Tüm dayanıklı çağrıların çalıştığı ortak thread havuzu (ilk kullanımda oluşturulur; fork sonrası worker'da yeniden kurulur)
+_executor = None
+_executor_lock = threading.Lock()
+_executor_pid = None
+# Havuzdaki en fazla thread; zaman aşımına uğrayıp arka planda biten çağrılar da yer tutar
+EXECUTOR_THREADS = 64
+
+
+def _get_executor():
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=EXECUTOR_THREADS, thread_name_prefix="upstream")
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def call_with_timeout(fn, timeout):
+    """
+    fn() fonksiyonunu ortak havuzda çalıştırır ve en fazla timeout saniye bekler.
+    Args:
+        fn (callable): Argümansız fonksiyon.
+        timeout (float | None): En fazla bekleme süresi (saniye); None veya 0 ise fn bu thread'de çalıştırılır.
+    Returns:
+        fn() sonucu.
+    Raises:
+        CallTimeoutError: Süre dolarsa (fn arka planda çalışmaya devam eder, sonucu atılır).
+    """
+    if not timeout:
+        return fn()
+    future = _get_executor().submit(fn)
+    done, _ = wait([future], timeout=timeout)
+    if not done:
+        future.cancel()
+        raise CallTimeoutError(f"Çağrı {timeout:.1f} saniye içinde bitmedi.")
+    return future.result()
+
+
+class ResilientCaller:
+    """
+    Bir dış servise yapılan çağrıları zaman aşımı, tekrar deneme, yedek istek ve devre kesiciyle sarar.
+    Kullanım: caller.call(lambda: model.generate_content(prompt))
+    """
+
+    def __init__(self, name, attempt_timeout=30.0, deadline=60.0, max_attempts=3, backoff_base=0.5, backoff_max=4.0,
+                 hedge_quantile=95.0, hedge_min_samples=20, breaker=None, on_event=None):
+        """
+        Args:
+            name (str): Servisin adı (hata mesajları için).
+            attempt_timeout (float): Tek bir denemenin en fazla süresi (saniye).
+            deadline (float): Tüm denemeler ve beklemeler dahil çağrının en fazla süresi (saniye).
+            max_attempts (int): En fazla deneme sayısı (1: tekrar deneme yok).
+            backoff_base (float): İlk tekrar denemeden önceki ortalama bekleme (saniye); her denemede iki katına çıkar.
+            backoff_max (float): Tek bir beklemenin üst sınırı (saniye).
+            hedge_quantile (float | None): Çağrı bu gecikme yüzdeliğini aşınca yedek istek gönderilir (None: yedek istek yok).
+            hedge_min_samples (int): Yedek istek için gereken en az gecikme ölçümü (yüzdelik güvenilir olsun diye).
+            breaker (CircuitBreaker | None): Devre kesici (None: devre kesici yok). Aynı servisin farklı çağrıları
+                                             (örn: akışlı ve akışsız) aynı devre kesiciyi paylaşabilir.
+            on_event (callable | None): on_event(name, event) ile olaylar bildirilir (metrikler için): retry, hedge,
+                                        hedge_win, timeout, failure, rejected (devre açık).
+        """
+        self.name = name
+        self.attempt_timeout = float(attempt_timeout)
+        self.deadline = float(deadline)
+        self.max_attempts = max(1, int(max_attempts))
+        self.backoff_base = float(backoff_base)
+        self.backoff_max = float(backoff_max)
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = max(1, int(hedge_min_samples))
+        self.breaker = breaker
+        self.on_event = on_event
+        self.latency = LatencyWindow()
+
+    def _event(self, event):
+        if self.on_event is not None:
+            self.on_event(self.name, event)
+
+    def hedge_delay(self):
+        """Yedek isteğin gönderileceği gecikme (saniye); yedek istek kapalıysa veya yeterli ölçüm yoksa None."""
+        if self.hedge_quantile is None or len(self.latency) < self.hedge_min_samples:
+            return None
+        return self.latency.percentile(self.hedge_quantile)
+
+    def call(self, fn, hedge=True, attempt_timeout=None, deadline=None):
+        """
+        fn() fonksiyonunu dayanıklı olarak çağırır.
+        Args:
+            fn (callable): Argümansız, servisi çağıran fonksiyon (yedek istek için iki kez çağrılabilir; yan etkisiz olmalı).
+            hedge (bool): Yedek istek gönderilsin mi? False ise çağrının gecikmesi p95 hesabına da katılmaz
+                          (örn: toplu embedding gibi gecikmesi farklı çağrılar).
+            attempt_timeout (float | None): Bu çağrı için tek denemenin en fazla süresi (None: varsayılan).
+            deadline (float | None): Bu çağrının en fazla toplam süresi (None: varsayılan).
+        Returns:
+            fn() sonucu.
+        Raises:
+            CircuitOpenError: Devre açıksa (servis hiç çağrılmaz).
+            CallTimeoutError: Son tarih dolarsa.
+            Exception: Geçici olmayan hata veya son denemenin hatası.
+        """
+        if self.breaker is not None and not self.breaker.allow():
+            self._event("rejected")
+            raise CircuitOpenError(f"{self.name} servisi art arda hata verdi; devre kesici açık.")
+        attempt_timeout = self.attempt_timeout if attempt_timeout is None else attempt_timeout
+        expires = time.monotonic() + (self.deadline if deadline is None else deadline)
+        attempt = 0
+        while True:
+            attempt += 1
+            remaining = expires - time.monotonic()
+            try:
+                result = self._attempt(fn, min(attempt_timeout, remaining), hedge)
+            except Exception as e:
+                if isinstance(e, CallTimeoutError):
+                    self._event("timeout")
+                transient = is_transient_error(e)
+                if self.breaker is not None:
+                    # Geçici olmayan hatalar (örn: geçersiz istek) servisin ayakta olduğunu gösterir; devreyi açmaz
+                    if transient:
+                        self.breaker.record_failure()
+                    else:
+                        self.breaker.record_success()
+                # Tekrar denemeye değer mi, deneme hakkı ve süre kaldı mı?
+                delay = min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1))) * random.uniform(0.5, 1.5)
+                if (attempt >= self.max_attempts or not transient
+                        or time.monotonic() + delay >= expires
+                        or (self.breaker is not None and not self.breaker.allow())):
+                    self._event("failure")
+                    raise
+                self._event("retry")
+                time.sleep(delay)
+                continue
+            if self.breaker is not None:
+                self.breaker.record_success()
+            return result
+
+    def _attempt(self, fn, timeout, hedge):
+        """Tek bir deneme: fn'i havuzda başlatır, gerekirse yedek istek gönderir ve ilk başarılı sonucu döndürür."""
+        if timeout <= 0:
+            raise CallTimeoutError(f"{self.name} çağrısı için süre kalmadı.")
+        executor = _get_executor()
+        started = time.monotonic()
+        expires = started + timeout
+        pending = {executor.submit(fn): False} # future -> yedek istek mi?
+        hedge_at = self.hedge_delay() if hedge else None
+        error = None
+        while pending:
+            now = time.monotonic()
+            if now >= expires:
+                break
+            wait_for = expires - now
+            if hedge_at is not None:
+                wait_for = min(wait_for, max(0.0, started + hedge_at - now))
+            done, _ = wait(list(pending), timeout=wait_for, return_when=FIRST_COMPLETED)
+            for future in done:
+                is_hedge = pending.pop(future)
+                if future.exception() is not None:
+                    # Diğer istek hâlâ sürüyorsa onu beklemeye devam et
+                    error = future.exception()
+                    continue
+                if hedge:
+                    self.latency.record(time.monotonic() - started)
+                if is_hedge:
+                    self._event("hedge_win")
+                for other in pending:
+                    other.cancel()
+                return future.result()
+            # Yedek istek zamanı geldiyse (ve ilk istek hâlâ sürüyorsa) aynı isteğin bir kopyasını gönder
+            if hedge_at is not None and pending and time.monotonic() - started >= hedge_at:
+                self._event("hedge")
+                pending[executor.submit(fn)] = True
+                hedge_at = None
+        if error is not None and not pending:
+            raise error
+        for future in pending:
+            future.cancel()
+        raise CallTimeoutError(f"{self.name} çağrısı {timeout:.1f} saniye içinde bitmedi.")
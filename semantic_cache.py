@@ -0,0 +1,195 @@
+# Gerekli kütüphaneleri içe aktar
+import logging                      # Önbellek temizlenmesini seviyeli olarak loglamak için
+import threading                    # Önbelleğe farklı thread'lerden güvenli erişim için (kilit)
+import time                         # TTL (yaşam süresi) hesapları için
+from collections import OrderedDict # LRU (en uzun süredir kullanılmayan) sırasını tutmak için
+
+import numpy as np                  # Vektör benzerliği (cosine) hesapları için
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticCache:
+    """
+    Daha önce yanıtlanmış soruların embedding vektörlerini ve yanıtlarını saklayan anlamsal önbellek.
+    Yeni bir sorunun vektörü, saklanan vektörlerle cosine benzerliği ile karşılaştırılır;
+    benzerlik eşik değerin üzerindeyse saklanan yanıt, LLM'e hiç gidilmeden döndürülür.
+
+    Önbellek boyut sınırına ulaştığında en uzun süredir kullanılmayan kayıt (LRU) silinir,
+    yaşam süresi (TTL) dolan kayıtlar ise kullanılmaz ve silinir. Vektör veritabanı yeniden
+    oluşturulduğunda (version_fn farklı bir değer döndürdüğünde) tüm önbellek temizlenir.
+    """
+
+    def __init__(self, similarity_threshold=0.92, max_entries=512, ttl_seconds=3600, version_fn=None):
+        """
+        Args:
+            similarity_threshold (float): Önbellek isabeti için gereken en düşük cosine benzerliği (0-1).
+            max_entries (int): Önbellekte tutulacak en fazla kayıt sayısı.
+            ttl_seconds (float): Bir kaydın geçerli kalacağı süre (saniye). 0 veya None ise süresizdir.
+            version_fn (callable): Vektör veritabanının güncel sürümünü döndüren fonksiyon.
+                                   Döndürdüğü değer değişirse önbellek geçersiz sayılır.
+        """
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = ttl_seconds
+        self.version_fn = version_fn
+
+        self._lock = threading.Lock()
+        # slot numarası -> kayıt bilgisi; sıralama LRU sırasını gösterir (en eski en başta)
+        self._entries = OrderedDict()
+        # Tüm vektörler tek bir matriste tutulur; benzerlik tek bir matris çarpımı ile hesaplanır
+        self._matrix = None                                         # (max_entries, boyut) - ilk kayıtta oluşturulur
+        self._valid = np.zeros(self.max_entries, dtype=bool)        # Hangi slotların dolu olduğu
+        self._free_slots = list(range(self.max_entries - 1, -1, -1)) # Boş slotlar (pop ile küçükten büyüğe)
+        self._version = None
+
+        # İstatistik sayaçları
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    # ----- Yardımcı (iç) fonksiyonlar -----
+
+    @staticmethod
+    def _normalize(vector):
+        """Vektörü birim uzunluğa getirir (cosine benzerliği = iç çarpım olsun diye)."""
+        vec = np.asarray(vector, dtype=np.float32).ravel()
+        norm = float(np.linalg.norm(vec))
+        return vec / norm if norm > 0 else vec
+
+    def _is_expired(self, entry, now):
+        """Kaydın TTL süresinin dolup dolmadığını kontrol eder."""
+        return bool(self.ttl_seconds) and (now - entry["created_at"]) > self.ttl_seconds
+
+    def _remove_slot(self, slot):
+        """Verilen slottaki kaydı siler ve slotu boş slotlara geri ekler (kilit altında çağrılmalı)."""
+        self._entries.pop(slot, None)
+        self._valid[slot] = False
+        self._free_slots.append(slot)
+
+    def _clear(self):
+        """Tüm kayıtları siler (kilit altında çağrılmalı)."""
+        self._entries.clear()
+        self._valid[:] = False
+        self._free_slots = list(range(self.max_entries - 1, -1, -1))
+
+    def _check_version(self):
+        """Veritabanı sürümü değiştiyse önbelleği temizler (kilit altında çağrılmalı)."""
+        if self.version_fn is None:
+            return
+        try:
+            version = self.version_fn()
+        except Exception:
+            # Sürüm okunamazsa önbelleği olduğu gibi bırak
+            return
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+                logger.info(
+                    "Anlamsal önbellek temizlendi: veritabanı sürümü değişti.",
+                    extra={"old_version": self._version, "new_version": version},
+                )
+            self._clear()
+            self._version = version
+
+    # ----- Dış kullanıma açık fonksiyonlar -----
+
+    def lookup(self, query_vector, threshold=None):
+        """
+        Soru vektörüne yeterince benzeyen, süresi dolmamış bir kayıt arar.
+        Args:
+            query_vector (list[float]): Sorunun embedding vektörü.
+            threshold (float | None): Bu arama için en düşük benzerlik (None: similarity_threshold). LLM kullanılamadığında
+                                      daha düşük bir eşikle "yakın" bir sorunun yanıtı aranabilir.
+        Returns:
+            dict | None: İsabet varsa {"query", "answer", "similarity"} sözlüğü, yoksa None.
+        """
+        query = self._normalize(query_vector)
+        with self._lock:
+            self._check_version()
+            if not self._entries or self._matrix is None or self._matrix.shape[1] != query.shape[0]:
+                self.misses += 1
+                return None
+
+            # Tüm kayıtlarla benzerliği tek seferde hesapla; boş slotları hesaba katma
+            similarities = self._matrix @ query
+            similarities[~self._valid] = -np.inf
+            threshold = self.similarity_threshold if threshold is None else threshold
+            now = time.monotonic()
+            while True:
+                slot = int(np.argmax(similarities))
+                similarity = float(similarities[slot])
+                if similarity < threshold:
+                    self.misses += 1
+                    return None
+                entry = self._entries[slot]
+                if not self._is_expired(entry, now):
+                    break
+                # Süresi dolmuş kaydı sil ve eşiği geçen bir sonraki en benzer kayda bak
+                self._remove_slot(slot)
+                self.evictions += 1
+                similarities[slot] = -np.inf
+
+            # LRU sırasını güncelle (en son kullanılan en sona)
+            self._entries.move_to_end(slot)
+            entry["hits"] += 1
+            self.hits += 1
+            return {"query": entry["query"], "answer": entry["answer"], "similarity": similarity}
+
+    def store(self, query, query_vector, answer):
+        """
+        Yanıtlanmış bir soruyu vektörü ve yanıtıyla birlikte önbelleğe ekler.
+        Önbellek doluysa en uzun süredir kullanılmayan kayıt silinir.
+        Args:
+            query (str): Kullanıcının sorusu.
+            query_vector (list[float]): Sorunun embedding vektörü.
+            answer (str): LLM tarafından üretilen yanıt.
+        """
+        vector = self._normalize(query_vector)
+        with self._lock:
+            self._check_version()
+            if self._matrix is None or self._matrix.shape[1] != vector.shape[0]:
+                # İlk kayıtta (veya embedding boyutu değiştiyse) matrisi oluştur
+                self._matrix = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+                self._clear()
+
+            # Önce süresi dolmuş kayıtları temizle, hâlâ yer yoksa LRU kaydını sil
+            now = time.monotonic()
+            for slot in [s for s, e in self._entries.items() if self._is_expired(e, now)]:
+                self._remove_slot(slot)
+                self.evictions += 1
+            if not self._free_slots:
+                oldest_slot = next(iter(self._entries))
+                self._remove_slot(oldest_slot)
+                self.evictions += 1
+
+            slot = self._free_slots.pop()
+            self._matrix[slot] = vector
+            self._valid[slot] = True
+            self._entries[slot] = {"query": query, "answer": answer, "created_at": now, "hits": 0}
+
+    def invalidate(self):
+        """Önbellekteki tüm kayıtları siler (örn: veritabanı yeniden oluşturulduğunda)."""
+        with self._lock:
+            if self._entries:
+                self.invalidations += 1
+            self._clear()
+
+    def stats(self):
+        """
+        Önbellek istatistiklerini döndürür.
+        Returns:
+            dict: Kayıt sayısı, isabet/ıska sayıları, isabet oranı ve silinme sayıları.
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / total) if total else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
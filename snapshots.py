@@ -0,0 +1,187 @@
+# Sürümlü veritabanı anlık görüntüleri (snapshot) ve atomik olarak değiştirilen "güncel" işaretçisi.
+#
+# create_database.py veritabanını yerinde silip yeniden yazmaz; her kurulum yeni bir anlık görüntü klasörüne yazılır
+# ve ancak tamamlandığında CURRENT dosyası atomik olarak (os.replace) yeni klasörü gösterecek şekilde değiştirilir:
+#   chroma_db/CURRENT                     -> Güncel anlık görüntünün adı (örn: 20240501-101500-3fa2c1)
+#   chroma_db/snapshots/<ad>/games.json   -> O anlık görüntünün oyun kataloğu (bkz. game_catalog.py)
+#   chroma_db/snapshots/<ad>/<oyun>/      -> Oyun klasörleri (Chroma koleksiyonu, NumPy/BM25 indeksleri, sürüm)
+# Kurulum sürerken ve yarıda kalırsa çalışan uygulama eski anlık görüntüyü kullanmaya devam eder. Uygulama CURRENT'ı
+# izler ve değiştiğinde yeni anlık görüntüyü arka planda yükleyip değiştirir (bkz. app.py reload_snapshot).
+# Eski anlık görüntüler, geçiş yapmamış worker'lar ve devam eden istekler için bir süre saklanıp sonra silinir.
+# CURRENT olmayan eski kurulumlarda chroma_db/ klasörünün kendisi güncel veritabanıdır.
+
+# Gerekli kütüphaneleri içe aktar
+import json                         # Katalog dosyasından oyun klasörlerini okumak için
+import os                           # Dosya/klasör yolları ve atomik dosya değiştirme için
+import shutil                       # Klasör kopyalama ve silme için
+import time                         # Yarıda kalmış kurulumların yaşını hesaplamak için
+import uuid                         # Anlık görüntü adlarını benzersiz yapmak için
+from datetime import datetime       # Anlık görüntü adlarındaki zaman damgası için
+from game_catalog import CATALOG_FILE, shard_path # Katalog dosyasının adı ve oyun klasörlerinin yolu
+
+# Güncel anlık görüntünün adını tutan dosya ve anlık görüntülerin klasörü (veritabanı klasörünün kökünde)
+CURRENT_FILE = "CURRENT"
+SNAPSHOTS_DIR = "snapshots"
+# Kurulumu süren anlık görüntü klasörlerinin uzantısı (yayınlanınca kaldırılır)
+BUILDING_SUFFIX = ".building"
+# Varsayılan olarak saklanan anlık görüntü sayısı (güncel olan dahil)
+DEFAULT_KEEP = 3
+# Bu süreden (saniye) eski, yayınlanmamış kurulum klasörleri yarıda kalmış sayılıp silinir
+STALE_BUILD_SECONDS = 6 * 3600
+
+
+def snapshots_dir(db_path):
+    """Anlık görüntülerin bulunduğu klasör (chroma_db/snapshots)."""
+    return os.path.join(db_path, SNAPSHOTS_DIR)
+
+
+def snapshot_path(db_path, name):
+    """Anlık görüntünün klasörü (chroma_db/snapshots/<ad>)."""
+    return os.path.join(snapshots_dir(db_path), name)
+
+
+def read_current(db_path):
+    """
+    CURRENT dosyasındaki güncel anlık görüntünün adını okur.
+    Args:
+        db_path (str): Veritabanı klasörü.
+    Returns:
+        str | None: Anlık görüntünün adı; CURRENT yoksa veya gösterdiği klasör yoksa None (eski düzen).
+    """
+    try:
+        with open(os.path.join(db_path, CURRENT_FILE), "r", encoding="utf-8") as f:
+            name = f.read().strip()
+    except OSError:
+        return None
+    return name if name and os.path.isdir(snapshot_path(db_path, name)) else None
+
+
+def current_snapshot(db_path):
+    """
+    Güncel anlık görüntünün adını ve klasörünü döndürür. CURRENT tek bir kez okunur; böylece ad ve klasör
+    aynı anlık görüntüye aittir.
+    Args:
+        db_path (str): Veritabanı klasörü.
+    Returns:
+        tuple[str | None, str]: (anlık görüntünün adı veya eski düzende None, katalogun okunacağı klasör).
+    """
+    name = read_current(db_path)
+    return name, (snapshot_path(db_path, name) if name else db_path)
+
+
+def list_snapshots(db_path):
+    """Yayınlanmış anlık görüntülerin adları (eskiden yeniye; adlar zaman damgasıyla başladığı için sıralıdır)."""
+    root = snapshots_dir(db_path)
+    if not os.path.isdir(root):
+        return []
+    return sorted(
+        name for name in os.listdir(root)
+        if not name.endswith(BUILDING_SUFFIX) and os.path.isdir(os.path.join(root, name))
+    )
+
+
+def _link_or_copy(source, target):
+    """Dosyayı sabit bağlantı (hard link) ile paylaşır; dosya sistemi desteklemiyorsa kopyalar."""
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+def begin_snapshot(db_path, rebuild=(), copy_rebuilt=True):
+    """
+    Yeni bir anlık görüntü klasörü oluşturur ve güncel veritabanındaki oyunları içine alır (artımlı kurulum için).
+    Yeniden indekslenecek oyunların klasörleri kopyalanır (Chroma dosyaları yerinde değiştirdiği için eski anlık
+    görüntü etkilenmez); diğer oyunların dosyaları değişmeyeceği için sabit bağlantıyla paylaşılır (ek disk kullanmaz).
+    Args:
+        db_path (str): Veritabanı klasörü.
+        rebuild (iterable[str]): Bu kurulumda yeniden indekslenecek oyunlar.
+        copy_rebuilt (bool): False ise (tam kurulum) yeniden indekslenecek oyunlar hiç kopyalanmaz.
+    Returns:
+        str: Kurulumun yazılacağı (henüz yayınlanmamış) klasör.
+    """
+    name = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+    build_dir = snapshot_path(db_path, name + BUILDING_SUFFIX)
+    os.makedirs(build_dir)
+    _, base = current_snapshot(db_path)
+    catalog_path = os.path.join(base, CATALOG_FILE)
+    if not os.path.exists(catalog_path):
+        # İlk kurulum veya katalogsuz eski düzen: oyunlar embedding önbelleğinden sıfırdan kurulur
+        return build_dir
+    with open(catalog_path, "r", encoding="utf-8") as f:
+        games = json.load(f).get("games", {})
+    rebuild = set(rebuild)
+    for slug, info in games.items():
+        source = shard_path(base, info.get("path", slug))
+        if not os.path.isdir(source) or (slug in rebuild and not copy_rebuilt):
+            continue
+        copy_function = shutil.copy2 if slug in rebuild else _link_or_copy
+        shutil.copytree(source, shard_path(build_dir, info.get("path", slug)), copy_function=copy_function)
+    shutil.copy2(catalog_path, os.path.join(build_dir, CATALOG_FILE))
+    return build_dir
+
+
+def publish_snapshot(db_path, build_dir):
+    """
+    Tamamlanan kurulumu yayınlar: klasörü son adına taşır ve CURRENT'ı atomik olarak değiştirir.
+    Çalışan uygulamalar bir sonraki kontrolde (veya yönetici isteğiyle) yeni anlık görüntüye geçer.
+    Args:
+        db_path (str): Veritabanı klasörü.
+        build_dir (str): begin_snapshot'ın döndürdüğü klasör.
+    Returns:
+        str: Yayınlanan anlık görüntünün adı.
+    """
+    name = os.path.basename(build_dir.rstrip(os.sep))
+    if name.endswith(BUILDING_SUFFIX):
+        name = name[:-len(BUILDING_SUFFIX)]
+    os.rename(build_dir, snapshot_path(db_path, name))
+    # Önce geçici dosyaya yaz, sonra yerine taşı (okuyan taraf yarım dosya görmesin)
+    current_path = os.path.join(db_path, CURRENT_FILE)
+    tmp_path = f"{current_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(name + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, current_path)
+    return name
+
+
+def discard_snapshot(build_dir):
+    """Yarıda kalan (yayınlanmamış) bir kurulumun klasörünü siler; güncel anlık görüntüye dokunulmaz."""
+    shutil.rmtree(build_dir, ignore_errors=True)
+
+
+def collect_garbage(db_path, keep=DEFAULT_KEEP, stale_seconds=STALE_BUILD_SECONDS):
+    """
+    Eski anlık görüntüleri siler: güncel olan ve ondan önceki en yeni (keep - 1) anlık görüntü saklanır
+    (henüz geçiş yapmamış worker'lar ve eski anlık görüntüde devam eden istekler için). Yarıda kalmış kurulum
+    klasörleri stale_seconds'tan eskiyse silinir (süren bir kurulumun klasörü silinmesin diye).
+    Args:
+        db_path (str): Veritabanı klasörü.
+        keep (int): Saklanacak anlık görüntü sayısı (en az 1: güncel olan her zaman saklanır).
+        stale_seconds (float): Yayınlanmamış kurulum klasörlerinin silinmeden önceki en kısa yaşı.
+    Returns:
+        list[str]: Silinen klasörlerin adları.
+    """
+    current = read_current(db_path)
+    names = list_snapshots(db_path)
+    if current in names:
+        # Güncel olandan daha yeni (örn: CURRENT elle eskisine döndürülmüşse) anlık görüntüler de saklanır
+        position = names.index(current)
+        kept = set(names[position:]) | set(names[max(position - (keep - 1), 0):position])
+    else:
+        kept = set(names[-max(keep, 1):])
+    removed = []
+    for name in names:
+        if name not in kept:
+            shutil.rmtree(snapshot_path(db_path, name), ignore_errors=True)
+            removed.append(name)
+    root = snapshots_dir(db_path)
+    if os.path.isdir(root):
+        now = time.time()
+        for name in os.listdir(root):
+            path = os.path.join(root, name)
+            if name.endswith(BUILDING_SUFFIX) and now - os.path.getmtime(path) > stale_seconds:
+                shutil.rmtree(path, ignore_errors=True)
+                removed.append(name)
+    return removed
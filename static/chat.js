@@ -0,0 +1,313 @@
+// Sohbet arayüzü (index.html). Sunucudan gelen tek değer (aktif oturum) <body data-session-id> ile okunur;
+// böylece bu dosya içerik özetli adıyla uzun süre önbellekte tutulabilir.
+
+// DOM Elementleri
+const chatBox = document.getElementById('chat-box');
+const messageInput = document.getElementById('message-input');
+const sendButton = document.getElementById('send-button');
+const newChatButton = document.getElementById('new-chat-button');
+const conversationList = document.getElementById('conversation-list');
+const loadMoreButton = document.getElementById('load-more-button');
+const loadingIndicator = document.getElementById('loading-indicator');
+const gameSelect = document.getElementById('game-select'); // Tek oyun varsa sayfada yoktur
+const currentSessionId = document.body.dataset.sessionId;
+const prefetchEnabled = document.body.dataset.prefetch === '1';
+
+// Marked.js ayarları
+marked.setOptions({ breaks: true, gfm: true });
+
+window.onload = () => {
+     scrollToBottom();
+     adjustTextareaHeight();
+     messageInput.focus();
+};
+
+function scrollToBottom() {
+    setTimeout(() => { chatBox.scrollTop = chatBox.scrollHeight; }, 50);
+}
+
+// Kullanıcı yazarken önceden arama: yazmaya PREFETCH_DELAY_MS kadar ara verildiğinde yarım soru /prefetch'e gönderilir.
+// Sunucu ilgili bölümleri bulup saklar; soru gönderildiğinde yeterince benziyorsa arama atlanır. Yeni bir önceden
+// arama veya sorunun gönderilmesi devam eden isteği iptal eder; sunucu 429 dönerse Retry-After süresince istek atılmaz.
+const PREFETCH_DELAY_MS = 400;
+const PREFETCH_MIN_CHARS = 8;
+let prefetchTimer = null;
+let prefetchController = null;
+let lastPrefetched = '';
+let prefetchPausedUntil = 0;
+
+function cancelPrefetch() {
+    clearTimeout(prefetchTimer);
+    prefetchTimer = null;
+    if (prefetchController) { prefetchController.abort(); prefetchController = null; }
+}
+
+function schedulePrefetch() {
+    if (!prefetchEnabled) return;
+    clearTimeout(prefetchTimer);
+    prefetchTimer = setTimeout(prefetchQuestion, PREFETCH_DELAY_MS);
+}
+
+async function prefetchQuestion() {
+    const message = messageInput.value.trim();
+    if (message.length < PREFETCH_MIN_CHARS || message === lastPrefetched || sendButton.disabled || Date.now() < prefetchPausedUntil) return;
+    cancelPrefetch();
+    lastPrefetched = message;
+    const controller = new AbortController();
+    prefetchController = controller;
+    try {
+        const response = await fetch('/prefetch', {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({ message: message, game: gameSelect ? gameSelect.value : 'auto' }),
+            signal: controller.signal,
+        });
+        if (response.status === 429) {
+            prefetchPausedUntil = Date.now() + (parseInt(response.headers.get('Retry-After'), 10) || 5) * 1000;
+        }
+    } catch (error) {
+        // İptal edilen veya başarısız önceden arama önemsizdir; soru gönderildiğinde normal yoldan yanıtlanır
+    } finally {
+        if (prefetchController === controller) { prefetchController = null; }
+    }
+}
+
+async function sendMessage() {
+    const message = messageInput.value.trim();
+    if (!message || sendButton.disabled) return;
+
+    cancelPrefetch();
+    lastPrefetched = '';
+    sendButton.disabled = true;
+    sendButton.textContent = "...";
+
+    appendMessage(message, 'user');
+    messageInput.value = '';
+    adjustTextareaHeight();
+    loadingIndicator.style.display = 'block';
+    scrollToBottom();
+
+    try {
+        // Yanıtı akış (SSE) olarak iste; parçalar geldikçe ekranda göster
+        const response = await fetch('/send_message_stream', {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({ message: message, game: gameSelect ? gameSelect.value : 'auto' }),
+        });
+
+        const contentType = response.headers.get('Content-Type') || '';
+        if (!contentType.includes('text/event-stream')) {
+            // Akış yerine JSON döndüyse (örn: boş mesaj, geçersiz oturum) eski davranışla işle
+            const data = await response.json();
+            // Yoğunluk (503) veya hız sınırı (429): soru kaydedilmedi, sunucunun mesajını hata olarak değil bilgi olarak göster
+            if (response.status === 429 || response.status === 503) {
+                appendMessage(data.response, 'bot', false);
+                return;
+            }
+            if (!response.ok) { throw new Error(data.response || `Sunucu hatası (${response.status})`); }
+            if (data.message && data.message.html) {
+                setBotHtml(appendMessage('', 'bot'), data.message.html);
+            } else {
+                appendMessage(data.response, 'bot');
+            }
+            updateConversationList(data.conversation);
+            return;
+        }
+
+        await readAnswerStream(response);
+
+    } catch (error) {
+        console.error('Mesaj gönderme hatası:', error);
+        appendMessage(`Hata: ${error.message}`, 'bot', false);
+    } finally {
+         loadingIndicator.style.display = 'none';
+         sendButton.disabled = false;
+         sendButton.textContent = "Gönder";
+         scrollToBottom();
+         messageInput.focus();
+    }
+}
+
+// SSE akışını okuyup bot mesajını parça parça günceller
+async function readAnswerStream(response) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let answerText = '';
+    let messageDiv = null;
+    let renderFrame = null; // Bekleyen önizleme çiziminin requestAnimationFrame kimliği
+
+    // Markdown'ı her parçada değil, ekran yenilemesi başına en fazla bir kez işle
+    const scheduleRender = () => {
+        if (renderFrame !== null) return;
+        renderFrame = requestAnimationFrame(() => {
+            renderFrame = null;
+            renderBotHtml(messageDiv, answerText);
+            scrollToBottom();
+        });
+    };
+
+    const handleEvent = (eventName, data) => {
+        if (eventName === 'chunk') {
+            if (!messageDiv) {
+                // İlk parça geldi: yükleniyor göstergesini gizle ve boş bot mesajı oluştur
+                loadingIndicator.style.display = 'none';
+                messageDiv = appendMessage('', 'bot');
+            }
+            answerText += data.text;
+            scheduleRender();
+        } else if (eventName === 'done') {
+            // Bekleyen önizleme çizimi sunucunun HTML'inin üzerine yazmasın
+            if (renderFrame !== null) { cancelAnimationFrame(renderFrame); renderFrame = null; }
+            if (!messageDiv) { messageDiv = appendMessage('', 'bot'); }
+            answerText = data.response;
+            // Son hali sunucunun ürettiği (ve sohbetle saklanan) HTML ile göster; sayfa yenilendiğinde aynı görünür
+            if (data.html) { setBotHtml(messageDiv, data.html); }
+            else { renderBotHtml(messageDiv, answerText); }
+            updateConversationList(data.conversation);
+        } else if (eventName === 'error') {
+            throw new Error(data.response);
+        }
+    };
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        // Olaylar boş satırla ayrılır
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const rawEvent = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            let eventName = 'message';
+            let dataLines = [];
+            rawEvent.split('\n').forEach(line => {
+                if (line.startsWith('event:')) { eventName = line.slice(6).trim(); }
+                else if (line.startsWith('data:')) { dataLines.push(line.slice(5).trim()); }
+            });
+            if (dataLines.length) { handleEvent(eventName, JSON.parse(dataLines.join('\n'))); }
+        }
+    }
+}
+
+// İstemcide Markdown işleme sadece akış sırasındaki önizleme (ve eski yanıt biçimi) için kullanılır
+function renderBotHtml(messageDiv, content) {
+    setBotHtml(messageDiv, marked.parse(content || ""));
+}
+
+function setBotHtml(messageDiv, html) {
+    messageDiv.innerHTML = DOMPurify.sanitize(html, { USE_PROFILES: { html: true } });
+}
+
+function appendMessage(content, role, renderMd = (role === 'bot')) {
+    const messageDiv = document.createElement('div');
+    messageDiv.classList.add('message', role === 'user' ? 'user-message' : 'bot-message');
+    messageDiv.setAttribute('role', 'log');
+    messageDiv.setAttribute('aria-label', `${role === 'user' ? 'Kullanıcı' : 'Bot'} mesajı`);
+
+    if (renderMd) {
+        renderBotHtml(messageDiv, content);
+    } else {
+        const p = document.createElement('p');
+        p.textContent = content;
+        messageDiv.appendChild(p);
+    }
+     chatBox.insertBefore(messageDiv, loadingIndicator);
+     scrollToBottom();
+     return messageDiv;
+}
+
+function createConversationItem(conv) {
+    const li = document.createElement('li');
+    li.setAttribute('role', 'presentation');
+    li.dataset.id = conv.id;
+    if (conv.id === currentSessionId) { li.classList.add('active'); }
+    const a = document.createElement('a');
+    a.href = `/conversation/${conv.id}`;
+    a.setAttribute('role', 'menuitem');
+    const title = conv.title.length > 35 ? conv.title.substring(0, 32) + '...' : conv.title;
+    const titleNode = document.createTextNode(title);
+    const smallNode = document.createElement('small');
+    smallNode.textContent = conv.created_at;
+    a.appendChild(titleNode);
+    a.appendChild(document.createElement('br'));
+    a.appendChild(smallNode);
+    li.appendChild(a);
+    return li;
+}
+
+// Sunucu tüm listeyi değil sadece değişen sohbetin özetini gönderir; listede varsa güncelle, yoksa en üste ekle
+function updateConversationList(conv) {
+    if (!conv) return;
+    const newItem = createConversationItem(conv);
+    const existing = conversationList.querySelector(`li[data-id="${CSS.escape(conv.id)}"]`);
+    if (existing) {
+        existing.replaceWith(newItem);
+        return;
+    }
+    // "Henüz sohbet yok." satırı varsa kaldır
+    conversationList.querySelectorAll('li:not([data-id])').forEach(li => li.remove());
+    conversationList.prepend(newItem);
+}
+
+// Sonraki sohbet sayfasını /conversations endpoint'inden yükleyip listenin sonuna ekler
+async function loadMoreConversations() {
+    const cursor = loadMoreButton.dataset.cursor;
+    if (!cursor) return;
+    loadMoreButton.disabled = true;
+    try {
+        const response = await fetch(`/conversations?cursor=${encodeURIComponent(cursor)}`);
+        if (!response.ok) { throw new Error(`Sunucu hatası (${response.status})`); }
+        const data = await response.json();
+        data.conversations.forEach(conv => {
+            if (!conversationList.querySelector(`li[data-id="${CSS.escape(conv.id)}"]`)) {
+                conversationList.appendChild(createConversationItem(conv));
+            }
+        });
+        loadMoreButton.dataset.cursor = data.next_cursor || '';
+        if (!data.next_cursor) { loadMoreButton.style.display = 'none'; }
+    } catch (error) {
+        console.error('Sohbet listesi yükleme hatası:', error);
+    } finally {
+        loadMoreButton.disabled = false;
+    }
+}
+
+async function startNewChat() {
+    newChatButton.disabled = true;
+    newChatButton.textContent = "Başlatılıyor...";
+    try {
+        const response = await fetch('/new_chat', { method: 'POST' });
+        const data = await response.json();
+        if (data.success && data.new_session_id) {
+            window.location.href = `/conversation/${data.new_session_id}`;
+        } else {
+             console.error("Yeni sohbet başlatılamadı:", data);
+             alert("Yeni sohbet başlatılırken bir sunucu hatası oluştu.");
+             newChatButton.disabled = false;
+             newChatButton.textContent = "+ Yeni Sohbet Başlat";
+        }
+    } catch (error) {
+        console.error('Yeni sohbet ağ hatası:', error);
+         alert("Yeni sohbet başlatılırken bir bağlantı hatası oluştu: " + error.message);
+         newChatButton.disabled = false;
+         newChatButton.textContent = "+ Yeni Sohbet Başlat";
+    }
+}
+
+function adjustTextareaHeight() {
+    messageInput.style.height = 'auto';
+    const scrollHeight = messageInput.scrollHeight;
+    const maxHeight = 150;
+    messageInput.style.height = Math.min(scrollHeight, maxHeight) + 'px';
+}
+
+// Olay Dinleyicileri
+sendButton.addEventListener('click', sendMessage);
+messageInput.addEventListener('keypress', (e) => {
+    if (e.key === 'Enter' && !e.shiftKey) { e.preventDefault(); sendMessage(); }
+    if (e.key === 'Enter' && e.shiftKey) { setTimeout(adjustTextareaHeight, 0); }
+});
+messageInput.addEventListener('input', () => { adjustTextareaHeight(); schedulePrefetch(); });
+newChatButton.addEventListener('click', startNewChat);
+loadMoreButton.addEventListener('click', loadMoreConversations);
@@ -0,0 +1,196 @@
+# Statik dosyaların (CSS, JS) içerik özetli adlarla, uzun süreli önbellek başlıklarıyla ve önceden sıkıştırılmış
+# olarak sunulması.
+#
+# Uygulama başlarken static/ klasöründeki her dosya için içerik özeti hesaplanır ve dosya
+# static/dist/<ad>.<özet>.<uzantı> olarak (yanında .gz ve brotli kuruluysa .br sürümleriyle) yazılır.
+# Şablonlar asset_url("style.css") ile bu adı kullanır. İçerik değişmedikçe adres değişmediğinden tarayıcılar dosyayı
+# bir yıl boyunca sunucuya sormadan önbellekten kullanabilir (Cache-Control: immutable); içerik değişince adres de
+# değişir. Sıkıştırma kurulumda bir kez yapıldığından istek başına CPU harcanmaz.
+#
+# Üçüncü taraf kütüphaneler (marked, DOMPurify) static/vendor/ altında barındırılır:
+#   python static_assets.py --fetch-vendor
+# Dosyalar henüz indirilmemişse şablon sabitlenmiş sürümlerin CDN adreslerini kullanır.
+
+# Gerekli kütüphaneleri içe aktar
+import argparse                     # Komut satırı seçenekleri için (--fetch-vendor)
+import gzip                         # Dosyaların önceden gzip ile sıkıştırılması için
+import hashlib                      # İçerik özetleri için
+import json                         # Dosya adı eşlemesini (manifest) yazmak için
+import os                           # Dosya yolları ve atomik dosya değiştirme için
+import urllib.request               # --fetch-vendor ile kütüphaneleri indirmek için
+
+try:
+    import brotli                   # İsteğe bağlı: brotli sıkıştırması (gzip'ten ~%15-20 daha küçük)
+except ImportError:
+    brotli = None
+
+# Varsayılan klasörler (uygulamanın static/ klasörü ve üretilen dosyalar)
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+DIST_DIRNAME = "dist"
+MANIFEST_FILE = "manifest.json"
+# Sıkıştırılacak dosya türleri (resimler zaten sıkıştırılmıştır)
+COMPRESSIBLE_EXTENSIONS = (".css", ".js", ".svg", ".json", ".txt", ".html", ".map")
+# Bu boyuttan küçük dosyalar sıkıştırılmaz (başlıklar kazançtan büyük olur)
+MIN_COMPRESS_BYTES = 256
+# Sabitlenmiş üçüncü taraf kütüphaneler: static/ altındaki yol -> indirileceği (ve dosya yoksa kullanılacak) CDN adresi
+VENDOR_ASSETS = {
+    "vendor/marked.min.js": "https://cdn.jsdelivr.net/npm/marked@12.0.2/marked.min.js",
+    "vendor/purify.min.js": "https://cdn.jsdelivr.net/npm/dompurify@3.0.11/dist/purify.min.js",
+}
+
+
+def _digest(data):
+    return hashlib.sha256(data).hexdigest()[:12]
+
+
+def _write_atomic(path, data):
+    """Dosyayı önce geçici bir ada yazıp yerine taşır (aynı anda başlayan worker'lar yarım dosya görmesin)."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _hashed_name(relative_path, digest):
+    root, ext = os.path.splitext(relative_path)
+    return f"{root}.{digest}{ext}"
+
+
+def build_assets(static_dir=STATIC_DIR):
+    """
+    static/ klasöründeki dosyaların içerik özetli kopyalarını ve sıkıştırılmış sürümlerini static/dist/ altına yazar.
+    Daha önce yazılmış (aynı özetli) dosyalar tekrar yazılmaz; eski sürümler silinir.
+    Args:
+        static_dir (str): Uygulamanın static klasörü.
+    Returns:
+        dict: {static/ altındaki yol: dist/ altındaki özetli yol} eşlemesi.
+    """
+    dist_dir = os.path.join(static_dir, DIST_DIRNAME)
+    manifest = {}
+    for root, dirs, files in os.walk(static_dir):
+        if os.path.abspath(root) == os.path.abspath(static_dir) and DIST_DIRNAME in dirs:
+            dirs.remove(DIST_DIRNAME)
+        for name in sorted(files):
+            source = os.path.join(root, name)
+            relative = os.path.relpath(source, static_dir).replace(os.sep, "/")
+            with open(source, "rb") as f:
+                data = f.read()
+            hashed = _hashed_name(relative, _digest(data))
+            manifest[relative] = hashed
+            target = os.path.join(dist_dir, hashed)
+            if os.path.exists(target):
+                continue
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            _write_atomic(target, data)
+            if name.endswith(COMPRESSIBLE_EXTENSIONS) and len(data) >= MIN_COMPRESS_BYTES:
+                # mtime=0: Aynı içerik her zaman aynı .gz dosyasını üretir
+                _write_atomic(target + ".gz", gzip.compress(data, compresslevel=9, mtime=0))
+                if brotli is not None:
+                    _write_atomic(target + ".br", brotli.compress(data, quality=11))
+    _remove_stale(dist_dir, manifest)
+    if manifest:
+        os.makedirs(dist_dir, exist_ok=True)
+        _write_atomic(os.path.join(dist_dir, MANIFEST_FILE), json.dumps(manifest, indent=1).encode("utf-8"))
+    return manifest
+
+
+def _remove_stale(dist_dir, manifest):
+    """Manifestte artık olmayan (eski içerikli) dosyaları siler."""
+    if not os.path.isdir(dist_dir):
+        return
+    current = set(manifest.values())
+    for root, _, files in os.walk(dist_dir):
+        for name in files:
+            relative = os.path.relpath(os.path.join(root, name), dist_dir).replace(os.sep, "/")
+            base = relative[:-3] if relative.endswith((".gz", ".br")) else relative
+            if base != MANIFEST_FILE and base not in current and not name.endswith(".tmp"):
+                try:
+                    os.remove(os.path.join(root, name))
+                except OSError:
+                    pass
+
+
+def accepted_encodings(accept_encoding):
+    """Accept-Encoding başlığındaki kabul edilen (q > 0) sıkıştırma yöntemleri (örn: {"gzip", "br"})."""
+    accepted = set()
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.partition(";")
+        quality = 1.0
+        params = params.strip().lower()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name.strip() and quality > 0:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def select_encoding(accept_encoding, path):
+    """
+    İstemcinin desteklediği ve diskte önceden hazırlanmış en küçük sıkıştırılmış sürümü seçer.
+    Args:
+        accept_encoding (str): İsteğin Accept-Encoding başlığı.
+        path (str): Sıkıştırılmamış dosyanın yolu.
+    Returns:
+        tuple[str, str | None]: (sunulacak dosyanın yolu, Content-Encoding değeri veya None).
+    """
+    accepted = accepted_encodings(accept_encoding)
+    for encoding, suffix in (("br", ".br"), ("gzip", ".gz")):
+        if encoding in accepted and os.path.exists(path + suffix):
+            return path + suffix, encoding
+    return path, None
+
+
+def compress_body(data, accept_encoding, level=6):
+    """
+    Dinamik bir yanıt gövdesini istemcinin desteklediği yöntemle sıkıştırır (brotli kuruluysa ve destekleniyorsa br,
+    yoksa gzip). Hızlı sıkıştırma seviyeleri kullanılır; her istekte çalışır.
+    Args:
+        data (bytes): Yanıt gövdesi.
+        accept_encoding (str): İsteğin Accept-Encoding başlığı.
+        level (int): gzip sıkıştırma seviyesi (1-9).
+    Returns:
+        tuple[bytes, str | None]: (gövde, Content-Encoding değeri veya sıkıştırılmadıysa None).
+    """
+    accepted = accepted_encodings(accept_encoding)
+    if brotli is not None and "br" in accepted:
+        return brotli.compress(data, quality=4), "br"
+    if "gzip" in accepted:
+        return gzip.compress(data, compresslevel=level), "gzip"
+    return data, None
+
+
+def fetch_vendor_assets(static_dir=STATIC_DIR, force=False):
+    """
+    VENDOR_ASSETS'teki sabitlenmiş kütüphaneleri static/vendor/ altına indirir (depoya eklenmeleri için).
+    Args:
+        static_dir (str): Uygulamanın static klasörü.
+        force (bool): True ise mevcut dosyalar da yeniden indirilir.
+    Returns:
+        list[str]: İndirilen dosyalar.
+    """
+    fetched = []
+    for relative, url in VENDOR_ASSETS.items():
+        path = os.path.join(static_dir, relative)
+        if os.path.exists(path) and not force:
+            continue
+        with urllib.request.urlopen(url, timeout=30) as response:
+            data = response.read()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        _write_atomic(path, data)
+        fetched.append(relative)
+    return fetched
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Statik dosyaların içerik özetli ve sıkıştırılmış sürümlerini üretir.")
+    parser.add_argument("--fetch-vendor", action="store_true", help="Üçüncü taraf kütüphaneleri (marked, DOMPurify) static/vendor/ altına indir.")
+    parser.add_argument("--force", action="store_true", help="--fetch-vendor ile mevcut dosyaları da yeniden indir.")
+    args = parser.parse_args()
+    if args.fetch_vendor:
+        for relative in fetch_vendor_assets(force=args.force):
+            print(f"İndirildi: static/{relative}")
+    for relative, hashed in sorted(build_assets().items()):
+        print(f"static/{relative} -> static/{DIST_DIRNAME}/{hashed}")
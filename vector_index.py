@@ -0,0 +1,232 @@
+# Gerekli kütüphaneleri içe aktar
+import json                         # Belge (chunk) metinlerini ve metadata'larını saklamak için
+import os                           # Dosya yolları ve atomik dosya değiştirme için
+
+import numpy as np                  # Vektör matrisi ve vektörleştirilmiş benzerlik hesapları için
+from langchain.schema import Document # LangChain'in metin parçalarını temsil eden Document sınıfı
+
+# Dışa aktarılan dosyaların adları (veritabanı klasöründe, chroma.sqlite3'ün yanında tutulur)
+VECTORS_FILE = "vectors.npy"        # Tüm parça vektörleri: (parça sayısı, boyut) float32 matris
+DOCUMENTS_FILE = "documents.json"   # Vektörlerle aynı sırada parça kimlikleri, metinleri ve metadata'ları
+
+
+def export_vector_index(vectordb, index_dir):
+    """
+    Chroma koleksiyonundaki tüm parça vektörlerini tek parça (contiguous) bir float32 .npy matrisine,
+    parça metinlerini de aynı sırada bir JSON dosyasına yazar. Uygulama bu dosyaları NumpyVectorIndex
+    ile bellek eşlemeli (memory-mapped) olarak açar; tüm gunicorn worker'ları aynı fiziksel sayfaları paylaşır.
+    Args:
+        vectordb (Chroma): Kaynak Chroma veritabanı nesnesi.
+        index_dir (str): Dosyaların yazılacağı klasör.
+    Returns:
+        int: Dışa aktarılan parça sayısı.
+    """
+    data = vectordb.get(include=["embeddings", "documents", "metadatas"])
+    ids = list(data["ids"])
+    # Her çalıştırmada aynı sırayı elde etmek için kimliğe göre sırala
+    order = sorted(range(len(ids)), key=lambda i: ids[i])
+
+    embeddings = data["embeddings"]
+    dim = len(embeddings[order[0]]) if order else 0
+    matrix = np.zeros((len(order), dim), dtype=np.float32)
+    documents = []
+    for row, i in enumerate(order):
+        matrix[row] = np.asarray(embeddings[i], dtype=np.float32)
+        documents.append({
+            "id": ids[i],
+            "page_content": data["documents"][i],
+            "metadata": data["metadatas"][i] or {},
+        })
+
+    # Önce geçici dosyalara yaz, sonra yerlerine taşı (çalışan uygulama yarım dosya görmesin)
+    vectors_path = os.path.join(index_dir, VECTORS_FILE)
+    documents_path = os.path.join(index_dir, DOCUMENTS_FILE)
+    with open(vectors_path + ".tmp", "wb") as f:
+        np.save(f, np.ascontiguousarray(matrix))
+    with open(documents_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(documents, f, ensure_ascii=False)
+    os.replace(vectors_path + ".tmp", vectors_path)
+    os.replace(documents_path + ".tmp", documents_path)
+    return len(documents)
+
+
+def load_documents(index_dir):
+    """
+    export_vector_index ile yazılmış parça kimliklerini ve metinlerini (vektör satırlarıyla aynı sırada) okur.
+    Returns:
+        tuple[list[str], list[Document]]: (parça kimlikleri, parçalar).
+    """
+    with open(os.path.join(index_dir, DOCUMENTS_FILE), "r", encoding="utf-8") as f:
+        records = json.load(f)
+    ids = [r["id"] for r in records]
+    documents = [Document(page_content=r["page_content"], metadata=r.get("metadata") or {}) for r in records]
+    return ids, documents
+
+
+def vector_index_exists(index_dir):
+    """Klasörde dışa aktarılmış bir NumPy vektör indeksi olup olmadığını kontrol eder."""
+    return (
+        os.path.exists(os.path.join(index_dir, VECTORS_FILE))
+        and os.path.exists(os.path.join(index_dir, DOCUMENTS_FILE))
+    )
+
+
+class NumpyVectorIndex:
+    """
+    Dışa aktarılmış vektör matrisini bellek eşlemeli açan ve aramayı süreç içinde (in-process)
+    NumPy ile yapan vektör deposu. Chroma'nın SQLite/HNSW katmanına gitmeden, tek bir matris-vektör
+    çarpımı ile en yakın parçaları bulur ve MMR seçimini vektörleştirilmiş olarak yapar.
+
+    Chroma ile aynı arayüzün kullanılan kısmını sağlar (embeddings, similarity_search_by_vector,
+    max_marginal_relevance_search_by_vector); bu yüzden get_answer içinde Chroma'nın yerine geçebilir.
+    """
+
+    def __init__(self, index_dir, embedding_function):
+        """
+        Args:
+            index_dir (str): export_vector_index ile oluşturulmuş dosyaların bulunduğu klasör.
+            embedding_function (Embeddings | None): Sorguları vektöre çevirmek için kullanılacak model
+                (None ise aramadan önce embeddings özelliğine atanmalıdır).
+        """
+        self.index_dir = index_dir
+        self._embedding_function = embedding_function
+        # mmap_mode="r": Matris belleğe kopyalanmaz; işletim sisteminin sayfa önbelleği tüm süreçlerce paylaşılır
+        self.vectors = np.load(os.path.join(index_dir, VECTORS_FILE), mmap_mode="r")
+        self.ids, self.documents = load_documents(index_dir)
+        if len(self.documents) != self.vectors.shape[0]:
+            raise ValueError(
+                f"Vektör sayısı ({self.vectors.shape[0]}) ile belge sayısı ({len(self.documents)}) uyuşmuyor."
+            )
+        # Chroma'nın varsayılan uzaklık ölçüsü L2'dir; ||x - q||^2 = ||x||^2 - 2 x.q + ||q||^2
+        # Satır normlarının karesi bir kez hesaplanır (parça sayısı kadar küçük bir dizi)
+        self._sq_norms = np.einsum("ij,ij->i", self.vectors, self.vectors)
+
+    @property
+    def embeddings(self):
+        """Sorguları vektöre çeviren embedding modeli (Chroma.embeddings ile aynı)."""
+        return self._embedding_function
+
+    @embeddings.setter
+    def embeddings(self, embedding_function):
+        """İndeks önceden (örn: gunicorn --preload ile ana süreçte) modelsiz açıldıysa modeli sonradan atar."""
+        self._embedding_function = embedding_function
+
+    def __len__(self):
+        return len(self.documents)
+
+    # ----- Arama fonksiyonları -----
+
+    def _nearest(self, query, k):
+        """
+        Sorgu vektörüne L2 uzaklığına göre en yakın k satırın indekslerini (yakından uzağa) döndürür.
+        """
+        n = self.vectors.shape[0]
+        k = min(k, n)
+        if k <= 0:
+            return np.empty(0, dtype=np.int64)
+        # ||q||^2 tüm satırlar için sabit olduğundan sıralamayı etkilemez
+        distances = self._sq_norms - 2.0 * (self.vectors @ query)
+        if k < n:
+            candidates = np.argpartition(distances, k - 1)[:k]
+        else:
+            candidates = np.arange(n)
+        return candidates[np.argsort(distances[candidates], kind="stable")]
+
+    def similarity_search_by_vector(self, embedding, k=4):
+        """
+        Sorgu vektörüne en yakın k parçayı döndürür.
+        Args:
+            embedding (list[float]): Sorgu vektörü.
+            k (int): Döndürülecek parça sayısı.
+        Returns:
+            list[Document]: En yakından uzağa sıralı parçalar.
+        """
+        query = np.asarray(embedding, dtype=np.float32)
+        return [self.documents[i] for i in self._nearest(query, k)]
+
+    def max_marginal_relevance_search_by_vector(self, embedding, k=4, fetch_k=20, lambda_mult=0.5):
+        """
+        Max Marginal Relevance (MMR) araması: önce en yakın fetch_k parça alınır, sonra bunlar arasından
+        hem soruya benzer hem de birbirinden farklı k parça seçilir. Seçim LangChain'in
+        maximal_marginal_relevance fonksiyonuyla aynı sonucu verir, ancak döngü içindeki benzerlik
+        hesapları tek bir matris çarpımına indirilmiştir.
+        Args:
+            embedding (list[float]): Sorgu vektörü.
+            k (int): Döndürülecek parça sayısı.
+            fetch_k (int): MMR'a aday olarak alınacak parça sayısı.
+            lambda_mult (float): 1'e yakınsa benzerlik, 0'a yakınsa çeşitlilik öne çıkar.
+        Returns:
+            list[Document]: Seçilen parçalar (seçilme sırasına göre).
+        """
+        query = np.asarray(embedding, dtype=np.float32)
+        return self._mmr(query, self._nearest(query, fetch_k), k, lambda_mult)
+
+    def batch_max_marginal_relevance_search_by_vector(self, embeddings, k=4, fetch_k=20, lambda_mult=0.5, block_size=256):
+        """
+        Birden fazla sorgu için MMR araması. Tüm sorguların tüm parçalara uzaklığı tek bir matris çarpımıyla
+        (sorgu sayısı x parça sayısı) hesaplanır; MMR seçimi her sorgu için sadece fetch_k aday üzerinde yapılır.
+        Sonuçlar max_marginal_relevance_search_by_vector ile aynıdır.
+        Args:
+            embeddings (list[list[float]]): Sorgu vektörleri.
+            k (int): Sorgu başına döndürülecek parça sayısı.
+            fetch_k (int): MMR'a aday olarak alınacak parça sayısı.
+            lambda_mult (float): 1'e yakınsa benzerlik, 0'a yakınsa çeşitlilik öne çıkar.
+            block_size (int): Tek matris çarpımında işlenecek en fazla sorgu sayısı.
+        Returns:
+            list[list[Document]]: Her sorgu için seçilen parçalar (sorgu sırasıyla).
+        """
+        queries = np.asarray(embeddings, dtype=np.float32)
+        if queries.ndim != 2 or queries.shape[0] == 0:
+            return []
+        n = self.vectors.shape[0]
+        fetch_k = min(fetch_k, n)
+        if fetch_k <= 0:
+            return [[] for _ in range(queries.shape[0])]
+        results = []
+        # Uzaklık matrisi sorgu grupları halinde hesaplanır (büyük korpusta bellek kullanımı sınırlı kalır)
+        for start in range(0, queries.shape[0], block_size):
+            block = queries[start:start + block_size]
+            distances = self._sq_norms[None, :] - 2.0 * (block @ self.vectors.T)
+            if fetch_k < n:
+                candidates = np.argpartition(distances, fetch_k - 1, axis=1)[:, :fetch_k]
+            else:
+                candidates = np.broadcast_to(np.arange(n), (block.shape[0], n))
+            for row, query in enumerate(block):
+                row_candidates = candidates[row]
+                order = np.argsort(distances[row, row_candidates], kind="stable")
+                results.append(self._mmr(query, row_candidates[order], k, lambda_mult))
+        return results
+
+    def _mmr(self, query, candidates, k, lambda_mult):
+        """
+        Yakından uzağa sıralı aday satırlar arasından MMR ile k parça seçer.
+        Returns:
+            list[Document]: Seçilen parçalar (seçilme sırasına göre).
+        """
+        if len(candidates) == 0 or k <= 0:
+            return []
+        # Aday vektörleri birim uzunluğa getir (cosine benzerliği = iç çarpım)
+        cand_vectors = np.asarray(self.vectors[candidates], dtype=np.float32)
+        cand_norms = np.linalg.norm(cand_vectors, axis=1)
+        cand_norms[cand_norms == 0] = 1.0
+        cand_unit = cand_vectors / cand_norms[:, None]
+        query_norm = float(np.linalg.norm(query)) or 1.0
+        sim_to_query = cand_unit @ (query / query_norm)
+        # Adaylar arası tüm benzerlikler tek seferde hesaplanır (fetch_k x fetch_k)
+        pairwise = cand_unit @ cand_unit.T
+
+        selected = [int(np.argmax(sim_to_query))]
+        # Her adayın o ana kadar seçilenlere olan en yüksek benzerliği
+        max_sim_to_selected = pairwise[:, selected[0]].copy()
+        is_selected = np.zeros(len(candidates), dtype=bool)
+        is_selected[selected[0]] = True
+
+        while len(selected) < min(k, len(candidates)):
+            scores = lambda_mult * sim_to_query - (1.0 - lambda_mult) * max_sim_to_selected
+            scores[is_selected] = -np.inf
+            best = int(np.argmax(scores))
+            selected.append(best)
+            is_selected[best] = True
+            np.maximum(max_sim_to_selected, pairwise[:, best], out=max_sim_to_selected)
+
+        return [self.documents[candidates[i]] for i in selected]